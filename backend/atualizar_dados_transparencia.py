@@ -13,6 +13,11 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# API unificada - recebe o sinal de recarga do snapshot do dashboard (usuário ADMIN)
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+API_EMAIL = os.getenv("API_EMAIL")
+API_SENHA = os.getenv("API_SENHA")
+
 # URLs do Portal da Transparência SES-GO (Pentaho)
 BASE_URL = "https://indicadores.saude.go.gov.br/pentaho/plugin/cda/api/doQuery"
 
@@ -75,6 +80,41 @@ def buscar_dados_pentaho(endpoint_config: dict) -> list:
         logger.error(f"Erro na requisição: {e}")
         return []
 
+def gravar_json_atomico(arquivo: str, dados, **kwargs):
+    """
+    Grava o JSON em arquivo temporário e substitui o destino com os.replace
+    A API nunca lê um arquivo pela metade e o novo inode invalida o snapshot em memória
+    """
+    temporario = f"{arquivo}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, **kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, arquivo)
+
+def notificar_recarga_api() -> bool:
+    """
+    Envia o sinal de recarga para a API (POST /dashboard/recarregar, exige ADMIN)
+    Falha não é crítica: a API detecta a mudança pelos metadados dos arquivos
+    """
+    if not (API_EMAIL and API_SENHA):
+        logger.info("API não notificada (API_EMAIL/API_SENHA não definidos) - recarga ocorrerá pela verificação dos arquivos")
+        return False
+    try:
+        login = requests.post(f"{API_URL}/login", json={"email": API_EMAIL, "senha": API_SENHA}, timeout=5)
+        if login.status_code != 200:
+            logger.warning(f"Login na API retornou {login.status_code} - recarga ocorrerá pela verificação dos arquivos")
+            return False
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        response = requests.post(f"{API_URL}/dashboard/recarregar", headers=headers, timeout=5)
+        if response.status_code == 200:
+            logger.info(f"✓ API notificada: versão {response.json().get('versao_dados')}")
+            return True
+        logger.warning(f"API retornou {response.status_code} ao recarregar dashboard")
+    except Exception as e:
+        logger.warning(f"API não notificada ({e}) - recarga ocorrerá pela verificação dos arquivos")
+    return False
+
 def atualizar_arquivos_json():
     """
     Atualiza todos os arquivos JSON com dados do portal
@@ -91,8 +131,7 @@ def atualizar_arquivos_json():
         if dados:
             arquivo = os.path.join(base_dir, f"dados_{nome}.json")
             
-            with open(arquivo, 'w', encoding='utf-8') as f:
-                json.dump(dados, f, ensure_ascii=False, indent=4)
+            gravar_json_atomico(arquivo, dados, ensure_ascii=False, indent=4)
             
             arquivos_atualizados.append(nome)
             logger.info(f"✓ {nome}: {len(dados)} registros")
@@ -101,8 +140,9 @@ def atualizar_arquivos_json():
     
     # Atualizar timestamp
     timestamp_file = os.path.join(base_dir, "dados_ultima_atualizacao.json")
-    with open(timestamp_file, 'w', encoding='utf-8') as f:
-        json.dump([[datetime.now().strftime("%d/%m/%Y %H:%M:%S")]], f)
+    gravar_json_atomico(timestamp_file, [[datetime.now().strftime("%d/%m/%Y %H:%M:%S")]])
+    
+    notificar_recarga_api()
     
     return arquivos_atualizados
 
@@ -0,0 +1,229 @@
+"""
+CACHE DE RESPOSTAS DOS ENDPOINTS PÚBLICOS
+/consulta-publica/paciente/{busca}, /consulta-paciente, /transparencia-modelo e
+/metricas-impacto não exigem login e são consultados em rajadas (link
+compartilhado, famílias atualizando a página)
+
+- Respostas guardadas por alguns segundos (RESPOSTAS_PUBLICAS_TTL_S) em um
+  CacheLRU; a chave é um HMAC da consulta com segredo aleatório do processo (o
+  texto buscado não é guardado, mas um CPF tem poucas combinações: quem lê a
+  memória do processo lê também o segredo e pode testá-las)
+- Single-flight: faltas concorrentes da mesma chave aguardam uma única execução
+- Invalidação por tags (paciente, fila da especialidade, agregados) a cada
+  commit que altera pacientes ou histórico de decisões (eventos de SessionLocal);
+  uma resposta calculada antes da invalidação não é guardada
+- Respostas de pacientes entram no cache como projeção de uma lista de campos
+  permitidos (CAMPOS_CONSULTA_PACIENTE, CAMPOS_CONSULTA_PUBLICA): dados pessoais e
+  clínicos que um dia forem acrescentados às respostas não chegam ao cache
+"""
+
+import os
+import sys
+import json
+import asyncio
+import hmac
+import hashlib
+import logging
+import threading
+from typing import AbstractSet, Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Union
+
+from sqlalchemy import event, inspect
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microservices', 'shared'))
+from cache_lru import CacheLRU
+
+from shared.database import SessionLocal, PacienteRegulacao, HistoricoDecisoes, normalizar_filtro
+
+logger = logging.getLogger(__name__)
+
+RESPOSTAS_PUBLICAS_TTL_S = float(os.getenv("RESPOSTAS_PUBLICAS_TTL_S", "5"))
+RESPOSTAS_PUBLICAS_MAX_ITENS = int(os.getenv("RESPOSTAS_PUBLICAS_MAX_ITENS", "10000"))
+
+# Campos que entram no cache, em qualquer nível (LGPD Art. 5º, I e II: sem nome, CPF,
+# contato ou dados clínicos como a justificativa da IA)
+CAMPOS_CONSULTA_PACIENTE = frozenset({
+    "encontrado", "paciente", "protocolo", "data_solicitacao", "status", "especialidade",
+    "unidade_solicitante", "cidade_origem", "unidade_destino", "posicao_fila", "total_fila",
+    "previsao_atendimento", "score_prioridade", "classificacao_risco", "historico_movimentacoes",
+    "data", "status_anterior", "status_novo", "observacoes", "responsavel"
+})
+CAMPOS_CONSULTA_PUBLICA = frozenset({
+    "protocolo", "nome_anonimizado", "cpf_anonimizado", "telefone_anonimizado", "data_solicitacao",
+    "status", "especialidade", "cidade_origem", "unidade_solicitante", "unidade_destino",
+    "classificacao_risco", "data_atualizacao", "status_ambulancia", "tipo_transporte",
+    "data_solicitacao_ambulancia"
+})
+
+# Segredo das chaves do cache (novo a cada processo: chaves não são comparáveis entre instâncias)
+_SEGREDO_CHAVES = os.urandom(32)
+
+# Tags de invalidação
+TAG_AGREGADOS = "agregados"  # contagens e médias (/metricas-impacto)
+TAG_NOVOS_PACIENTES = "pacientes:novos"  # consultas que não encontraram paciente
+
+
+def tag_paciente(protocolo: Optional[str]) -> str:
+    return f"paciente:{protocolo}"
+
+
+def tag_fila(especialidade: Optional[str]) -> str:
+    return f"fila:{normalizar_filtro(especialidade) or ''}"
+
+
+def projetar_campos(valor: Any, campos: AbstractSet[str]) -> Any:
+    """Cópia da resposta só com os campos permitidos, em qualquer nível"""
+    if isinstance(valor, dict):
+        return {k: projetar_campos(v, campos) for k, v in valor.items() if k in campos}
+    if isinstance(valor, (list, tuple)):
+        return [projetar_campos(v, campos) for v in valor]
+    return valor
+
+
+Tags = Union[Iterable[str], Callable[[Any], Iterable[str]]]
+
+
+class CacheRespostasPublicas:
+    """
+    TTL curto + single-flight + invalidação por tags
+
+    Cada invalidação incrementa uma versão global e marca as tags com ela; uma
+    entrada só vale se nenhuma das suas tags foi invalidada depois do início do
+    cálculo que a produziu.
+    """
+
+    def __init__(self, ttl_s: float = RESPOSTAS_PUBLICAS_TTL_S, max_itens: int = RESPOSTAS_PUBLICAS_MAX_ITENS):
+        self.cache = CacheLRU(max_itens=max_itens, ttl_s=ttl_s, nome="respostas_publicas")
+        self._lock = threading.Lock()
+        self._versao = 0
+        self._invalidada_em: Dict[str, int] = {}
+        self._tudo_invalidado_em = 0
+        self._em_andamento: Dict[str, asyncio.Task] = {}
+        self.coalescidas = 0
+        self.invalidacoes = 0
+        self.descartadas = 0
+
+    @staticmethod
+    def chave(*partes: Hashable) -> str:
+        """HMAC-SHA256 da consulta (endpoint + parâmetros)"""
+        mensagem = json.dumps(partes, ensure_ascii=False, default=str).encode("utf-8")
+        return hmac.new(_SEGREDO_CHAVES, mensagem, hashlib.sha256).hexdigest()
+
+    def _valida(self, tags: Iterable[str], versao: int) -> bool:
+        with self._lock:
+            if self._tudo_invalidado_em > versao:
+                return False
+            return all(self._invalidada_em.get(tag, 0) <= versao for tag in tags)
+
+    async def obter_ou_calcular(self, chave: str, calcular: Callable[[], Awaitable[Any]], tags: Tags = (),
+                                campos: Optional[AbstractSet[str]] = None) -> Any:
+        """
+        Resposta em cache ou calculada uma única vez para todas as requisições concorrentes
+
+        tags pode ser uma lista ou uma função da resposta (ex.: protocolo só
+        conhecido depois da busca). Com campos, a resposta (guardada e devolvida)
+        é a projeção desses campos. Exceções não são guardadas, mas são
+        repassadas a quem aguardava o mesmo cálculo.
+        """
+        item = self.cache.obter(chave)
+        if item is not None:
+            resposta, tags_item, versao = item
+            if self._valida(tags_item, versao):
+                return resposta
+            self.cache.remover(chave)
+
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            with self._lock:
+                versao = self._versao
+            # Tarefa própria: o cancelamento de quem iniciou não cancela quem aguarda
+            tarefa = asyncio.ensure_future(self._calcular(chave, calcular, tags, campos, versao))
+            tarefa.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._em_andamento[chave] = tarefa
+        else:
+            self.coalescidas += 1
+        return await asyncio.shield(tarefa)
+
+    async def _calcular(self, chave: str, calcular: Callable[[], Awaitable[Any]], tags: Tags,
+                        campos: Optional[AbstractSet[str]], versao: int) -> Any:
+        try:
+            resposta = await calcular()
+            if campos is not None:
+                resposta = projetar_campos(resposta, campos)
+        finally:
+            self._em_andamento.pop(chave, None)
+
+        tags_resposta = tuple(tags(resposta) if callable(tags) else tags)
+        if self._valida(tags_resposta, versao):
+            self.cache.definir(chave, (resposta, tags_resposta, versao))
+        else:
+            self.descartadas += 1  # dados mudaram durante o cálculo
+        return resposta
+
+    def invalidar(self, tags: Iterable[str]):
+        with self._lock:
+            self._versao += 1
+            for tag in tags:
+                self._invalidada_em[tag] = self._versao
+            self.invalidacoes += 1
+
+    def invalidar_tudo(self):
+        """Para escritas que não passam pelos eventos da sessão (ex.: bulk_update_mappings)"""
+        with self._lock:
+            self._versao += 1
+            self._tudo_invalidado_em = self._versao
+            self.invalidacoes += 1
+        self.cache.limpar()
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            **self.cache.metricas(),
+            "coalescidas": self.coalescidas,
+            "em_andamento": len(self._em_andamento),
+            "invalidacoes": self.invalidacoes,
+            "descartadas_por_invalidacao": self.descartadas
+        }
+
+
+# Instância global
+cache_respostas_publicas = CacheRespostasPublicas()
+
+
+# ============================================================================
+# EVENTOS DA SESSÃO: tags coletadas no flush, invalidadas só após o commit
+# ============================================================================
+
+CHAVE_TAGS_PENDENTES = "cache_respostas_tags_pendentes"
+
+
+def _tags_alteracao(objeto: Any, novo: bool) -> Iterable[str]:
+    if isinstance(objeto, PacienteRegulacao):
+        especialidades = (objeto.especialidade, *inspect(objeto).attrs.especialidade.history.deleted)
+        yield tag_paciente(objeto.protocolo)
+        yield TAG_AGREGADOS
+        yield from (tag_fila(especialidade) for especialidade in especialidades)
+        if novo:
+            yield TAG_NOVOS_PACIENTES
+    elif isinstance(objeto, HistoricoDecisoes):
+        yield tag_paciente(objeto.protocolo)
+        yield TAG_AGREGADOS
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _registrar_tags(session, flush_context):
+    novos = set(session.new)
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        tags = set(_tags_alteracao(objeto, objeto in novos))
+        if tags:
+            session.info.setdefault(CHAVE_TAGS_PENDENTES, set()).update(tags)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidar_tags(session):
+    tags = session.info.pop(CHAVE_TAGS_PENDENTES, None)
+    if tags:
+        cache_respostas_publicas.invalidar(tags)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _descartar_tags(session):
+    session.info.pop(CHAVE_TAGS_PENDENTES, None)
@@ -1,6 +1,10 @@
 """
 Script para executar migração SQL no PostgreSQL
-Adiciona campos LGPD à tabela pacientes_regulacao
+Padrão: adiciona campos LGPD à tabela pacientes_regulacao
+
+Uso:
+    python executar_migracao.py [arquivo.sql]
+    python executar_migracao.py migration_fila_regulacao.sql
 """
 
 import os
@@ -10,10 +14,12 @@ sys.path.insert(0, '.')
 from sqlalchemy import create_engine, text
 from shared.database import DATABASE_URL
 
-def executar_migracao():
+MIGRACAO_PADRAO = 'migration_add_lgpd_fields.sql'
+
+def executar_migracao(arquivo_sql: str = MIGRACAO_PADRAO):
     """Executa o script de migração SQL"""
     
-    print("🔄 Iniciando migração do banco de dados...")
+    print(f"🔄 Iniciando migração do banco de dados ({arquivo_sql})...")
     print(f"📊 Banco: {DATABASE_URL}")
     
     try:
@@ -21,9 +27,12 @@ def executar_migracao():
         engine = create_engine(DATABASE_URL)
         
         # Ler arquivo SQL
-        with open('migration_add_lgpd_fields.sql', 'r', encoding='utf-8') as f:
+        with open(arquivo_sql, 'r', encoding='utf-8') as f:
             sql_script = f.read()
         
+        # Remover linhas de comentário (senão o comando que vem depois delas é ignorado)
+        sql_script = "\n".join(l for l in sql_script.splitlines() if not l.strip().startswith('--'))
+        
         # Executar migração
         with engine.connect() as conn:
             # Dividir em comandos individuais
@@ -45,9 +54,12 @@ def executar_migracao():
                             print(f"   ✅ OK")
                     except Exception as e:
                         print(f"   ⚠️ Aviso: {e}")
+                        conn.rollback()  # PostgreSQL aborta a transação após um erro
                         # Continuar mesmo com erros (ex: coluna já existe)
         
         print("\n✅ Migração concluída com sucesso!")
+        if arquivo_sql != MIGRACAO_PADRAO:
+            return True
         print("\n📋 Verificando estrutura da tabela...")
         
         # Verificar colunas
@@ -75,5 +87,5 @@ def executar_migracao():
     return True
 
 if __name__ == "__main__":
-    sucesso = executar_migracao()
+    sucesso = executar_migracao(sys.argv[1] if len(sys.argv) > 1 else MIGRACAO_PADRAO)
     sys.exit(0 if sucesso else 1)
@@ -0,0 +1,264 @@
+"""
+POSIÇÃO NA FILA DE REGULAÇÃO EM MEMÓRIA
+Responde posição e total da fila de uma especialidade sem consultar o banco
+(POST /consulta-paciente é público e muito consultado pelas famílias)
+
+- Uma SortedList por especialidade (normalizada) com as chaves (-score,
+  data_solicitacao, id) dos pacientes AGUARDANDO_REGULACAO: posição e total
+  em O(log n)
+- Mantida pelos eventos da sessão (SessionLocal): after_flush registra o estado
+  dos pacientes gravados e after_commit aplica; rollback descarta
+- Escritas que não passam por objetos da sessão (bulk_update_mappings, outros
+  processos/microserviços) são cobertas por reconstruir(), chamado na
+  inicialização, periodicamente e após a re-triagem em lote
+- Sem o paciente no índice, posicao_no_banco() conta no banco na mesma ordem
+  (filtro por especialidade_normalizada e desempate por data e id)
+- Os eventos só enxergam commits deste processo: escritas de outros processos
+  (ms-regulacao, outros workers) aparecem na posição com até
+  FILA_POSICOES_RECONSTRUCAO_S (300 s por padrão) de atraso. Se a última
+  reconstrução passar de FILA_POSICOES_IDADE_MAXIMA_S (reconstrução periódica
+  falhando), posicao_na_fila() devolve None e a consulta conta no banco
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from shared.database import SessionLocal, PacienteRegulacao, normalizar_filtro
+
+logger = logging.getLogger(__name__)
+
+STATUS_FILA = "AGUARDANDO_REGULACAO"
+
+# Intervalo da reconstrução periódica a partir do banco (0 desativa)
+FILA_POSICOES_RECONSTRUCAO_S = float(os.getenv("FILA_POSICOES_RECONSTRUCAO_S", "300"))
+# Idade máxima da última reconstrução para o índice responder (0 desativa; padrão: dois intervalos)
+FILA_POSICOES_IDADE_MAXIMA_S = float(os.getenv("FILA_POSICOES_IDADE_MAXIMA_S", str(2 * FILA_POSICOES_RECONSTRUCAO_S)))
+
+CHAVE_PENDENTES = "fila_posicoes_pendentes"
+
+
+class EstadoPaciente(NamedTuple):
+    protocolo: str
+    status: Optional[str]  # None = removido do banco
+    especialidade: Optional[str]
+    score_prioridade: Optional[int]
+    data_solicitacao: Optional[datetime]
+    id: Optional[int]
+
+
+def chave_fila(score_prioridade: Optional[int], data_solicitacao: Optional[datetime], id_paciente: Optional[int]) -> Tuple:
+    """Maior score primeiro, depois ordem de chegada; sem score ou sem data por último"""
+    return (
+        -score_prioridade if score_prioridade is not None else 1,
+        data_solicitacao or datetime.max,
+        id_paciente or 0
+    )
+
+
+class IndiceFilaRegulacao:
+    """Estatística de ordem da fila de regulação por especialidade"""
+
+    def __init__(self, idade_maxima_s: float = FILA_POSICOES_IDADE_MAXIMA_S):
+        self.idade_maxima_s = idade_maxima_s
+        self._lock = threading.Lock()
+        self._filas: Dict[str, SortedList] = {}
+        self._entradas: Dict[str, Tuple[str, Tuple]] = {}  # protocolo -> (fila, chave)
+        self._durante_reconstrucao: Optional[List[EstadoPaciente]] = None
+        self.pronto = False
+        self.reconstrucoes = 0
+        self.eventos_aplicados = 0
+        self.ultima_reconstrucao: Optional[datetime] = None
+        self.tempo_reconstrucao_ms: Optional[float] = None
+
+    @staticmethod
+    def _aplicar_em(filas: Dict[str, SortedList], entradas: Dict[str, Tuple[str, Tuple]], estado: EstadoPaciente):
+        anterior = entradas.pop(estado.protocolo, None)
+        if anterior is not None:
+            fila, chave = anterior
+            filas[fila].remove(chave)
+            if not filas[fila]:
+                del filas[fila]
+        if estado.status == STATUS_FILA:
+            fila = normalizar_filtro(estado.especialidade) or ""
+            chave = chave_fila(estado.score_prioridade, estado.data_solicitacao, estado.id)
+            filas.setdefault(fila, SortedList()).add(chave)
+            entradas[estado.protocolo] = (fila, chave)
+
+    def aplicar(self, estados: List[EstadoPaciente]):
+        """Entra, sai ou muda de lugar cada paciente conforme status/especialidade/score"""
+        with self._lock:
+            for estado in estados:
+                self._aplicar_em(self._filas, self._entradas, estado)
+            if self._durante_reconstrucao is not None:
+                self._durante_reconstrucao.extend(estados)
+            self.eventos_aplicados += len(estados)
+
+    def posicao(self, protocolo: str) -> Optional[Tuple[int, int]]:
+        """(posição, total) do paciente na fila da sua especialidade, ou None se não está no índice"""
+        with self._lock:
+            entrada = self._entradas.get(protocolo)
+            if entrada is None:
+                return None
+            fila, chave = entrada
+            pacientes = self._filas[fila]
+            return pacientes.index(chave) + 1, len(pacientes)
+
+    def reconstruir(self):
+        """Relê a fila do banco e troca o índice; eventos recebidos durante a leitura são reaplicados"""
+        inicio = time.perf_counter()
+        with self._lock:
+            self._durante_reconstrucao = []
+        try:
+            db = SessionLocal()
+            try:
+                linhas = db.query(
+                    PacienteRegulacao.protocolo,
+                    PacienteRegulacao.status,
+                    PacienteRegulacao.especialidade,
+                    PacienteRegulacao.score_prioridade,
+                    PacienteRegulacao.data_solicitacao,
+                    PacienteRegulacao.id
+                ).filter(PacienteRegulacao.status == STATUS_FILA).all()
+            finally:
+                db.close()
+
+            filas: Dict[str, SortedList] = {}
+            entradas: Dict[str, Tuple[str, Tuple]] = {}
+            for linha in linhas:
+                self._aplicar_em(filas, entradas, EstadoPaciente(*linha))
+
+            with self._lock:
+                for estado in self._durante_reconstrucao:
+                    self._aplicar_em(filas, entradas, estado)
+                self._filas, self._entradas = filas, entradas
+                self.pronto = True
+        finally:
+            with self._lock:
+                self._durante_reconstrucao = None
+
+        self.reconstrucoes += 1
+        self.ultima_reconstrucao = datetime.utcnow()
+        self.tempo_reconstrucao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        logger.info(f"✅ Índice da fila de regulação reconstruído: {len(entradas)} pacientes em "
+                    f"{len(filas)} especialidades ({self.tempo_reconstrucao_ms}ms)")
+
+    def idade_s(self) -> Optional[float]:
+        """Segundos desde a última reconstrução a partir do banco (None se nunca reconstruído)"""
+        if self.ultima_reconstrucao is None:
+            return None
+        return (datetime.utcnow() - self.ultima_reconstrucao).total_seconds()
+
+    def expirado(self) -> bool:
+        """True quando a última reconstrução passou de idade_maxima_s (escritas externas podem faltar)"""
+        idade = self.idade_s()
+        return self.idade_maxima_s > 0 and idade is not None and idade > self.idade_maxima_s
+
+    def status(self) -> Dict[str, Any]:
+        idade = self.idade_s()
+        with self._lock:
+            pacientes = len(self._entradas)
+            especialidades = len(self._filas)
+        return {
+            "pronto": self.pronto,
+            "pacientes": pacientes,
+            "especialidades": especialidades,
+            "eventos_aplicados": self.eventos_aplicados,
+            "reconstrucoes": self.reconstrucoes,
+            "ultima_reconstrucao": self.ultima_reconstrucao.isoformat() if self.ultima_reconstrucao else None,
+            "idade_s": round(idade, 1) if idade is not None else None,
+            "idade_maxima_s": self.idade_maxima_s,
+            "expirado": self.expirado(),
+            "tempo_reconstrucao_ms": self.tempo_reconstrucao_ms
+        }
+
+
+# Instância global
+indice_fila = IndiceFilaRegulacao()
+
+
+# ============================================================================
+# EVENTOS DA SESSÃO: estado gravado no flush, aplicado só após o commit
+# ============================================================================
+
+def _estado(paciente: PacienteRegulacao, removido: bool = False) -> EstadoPaciente:
+    return EstadoPaciente(
+        protocolo=paciente.protocolo,
+        status=None if removido else paciente.status,
+        especialidade=paciente.especialidade,
+        score_prioridade=paciente.score_prioridade,
+        data_solicitacao=paciente.data_solicitacao,
+        id=paciente.id
+    )
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _registrar_alteracoes(session, flush_context):
+    pendentes = None
+    for paciente in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(paciente, PacienteRegulacao) and paciente.protocolo:
+            if pendentes is None:
+                pendentes = session.info.setdefault(CHAVE_PENDENTES, {})
+            pendentes[paciente.protocolo] = _estado(paciente, removido=paciente in session.deleted)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _aplicar_alteracoes(session):
+    pendentes = session.info.pop(CHAVE_PENDENTES, None)
+    if pendentes:
+        indice_fila.aplicar(list(pendentes.values()))
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _descartar_alteracoes(session):
+    session.info.pop(CHAVE_PENDENTES, None)
+
+
+def posicao_na_fila(protocolo: str) -> Optional[Tuple[int, int]]:
+    """Wrapper: (posição, total) em memória, ou None se o índice não tem o paciente ou está expirado"""
+    if not indice_fila.pronto or indice_fila.expirado():
+        return None
+    return indice_fila.posicao(protocolo)
+
+
+def posicao_no_banco(db: Session, paciente: PacienteRegulacao) -> Tuple[int, int]:
+    """
+    (posição, total) do paciente contados no banco, na ordem de chave_fila
+
+    Mesma fila do índice (status + especialidade normalizada) e mesmos
+    desempates: score maior, data mais antiga, menor id; sem score ou sem
+    data por último.
+    """
+    especialidade = normalizar_filtro(paciente.especialidade)
+    mesma_fila = and_(
+        PacienteRegulacao.status == STATUS_FILA,
+        PacienteRegulacao.especialidade_normalizada == especialidade if especialidade
+        else PacienteRegulacao.especialidade_normalizada.is_(None)
+    )
+
+    data, id_paciente = paciente.data_solicitacao, paciente.id or 0
+    if data is not None:
+        desempate = or_(PacienteRegulacao.data_solicitacao < data,
+                        and_(PacienteRegulacao.data_solicitacao == data, PacienteRegulacao.id < id_paciente))
+    else:
+        desempate = or_(PacienteRegulacao.data_solicitacao.isnot(None),
+                        and_(PacienteRegulacao.data_solicitacao.is_(None), PacienteRegulacao.id < id_paciente))
+
+    score = paciente.score_prioridade
+    if score is not None:
+        a_frente = or_(PacienteRegulacao.score_prioridade > score,
+                       and_(PacienteRegulacao.score_prioridade == score, desempate))
+    else:
+        a_frente = or_(PacienteRegulacao.score_prioridade.isnot(None),
+                       and_(PacienteRegulacao.score_prioridade.is_(None), desempate))
+
+    posicao = db.query(PacienteRegulacao.id).filter(mesma_fila, a_frente).count() + 1
+    total = db.query(PacienteRegulacao.id).filter(mesma_fila).count()
+    return posicao, total
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, status
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, status, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -6,11 +7,12 @@ from pydantic import BaseModel, EmailStr
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-import requests
+import httpx
 import json
+import hashlib
 import logging
-import torch
 import time
+import asyncio
 import os
 from typing import Optional, List, Dict, Any
 import sys
@@ -20,7 +22,7 @@ import base64
 
 # Importar modelos compartilhados
 from shared.database import (
-    get_db, PacienteRegulacao, HistoricoDecisoes, Usuario, create_tables,
+    get_db, SessionLocal, PacienteRegulacao, HistoricoDecisoes, Usuario, create_tables,
     anonimizar_paciente, paciente_completo, anonimizar_nome, anonimizar_cpf, anonimizar_telefone
 )
 
@@ -28,10 +30,40 @@ from shared.database import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+sys.path.append('microservices/shared')
+
+# Cliente HTTP assíncrono compartilhado (pool keep-alive para chamadas de saída)
+from cliente_http import cliente_http
+
+# Executores limitados: inferência (CPU) e banco de dados fora do event loop
+from executores import executor_inferencia, executor_db, ExecutorSaturado, obter_metricas_executores
+
+# Triagem em etapas (extrair, pontuar, selecionar, logistica, explicar) sobre o
+# léxico clínico compilado e o índice CID-10
+from pipeline_triagem import PipelineTriagem
+
+# Catálogo de hospitais (arquivo único, recarregado sem redeploy)
+from catalogo_hospitais import catalogo_hospitais
+
+# Ocupação/tendência do MS-Ingestao em snapshot local, consumida pelo seletor de hospitais
+from snapshot_ocupacao import painel_ocupacao
+
+# Posição na fila por especialidade em memória (POST /consulta-paciente sem COUNT no banco)
+from fila_posicoes import indice_fila, posicao_na_fila, posicao_no_banco, FILA_POSICOES_RECONSTRUCAO_S
+
+# Cache curto + single-flight dos endpoints públicos (importado depois de fila_posicoes:
+# a invalidação no commit roda após a atualização do índice de posições)
+from cache_respostas import (
+    cache_respostas_publicas, tag_paciente, tag_fila, TAG_AGREGADOS, TAG_NOVOS_PACIENTES,
+    CAMPOS_CONSULTA_PACIENTE, CAMPOS_CONSULTA_PUBLICA
+)
+
 # Importar BioBERT e Matchmaker
 try:
-    sys.path.append('microservices/shared')
-    from biobert_service import extrair_entidades_biobert, is_biobert_disponivel
+    from biobert_service import (
+        extrair_entidades_biobert, is_biobert_disponivel, obter_metricas_biobert,
+        iniciar_carregamento_biobert, obter_status_biobert
+    )
     from matchmaker_logistico import processar_matchmaking
     BIOBERT_DISPONIVEL = True
     MATCHMAKER_DISPONIVEL = True
@@ -53,6 +85,9 @@ except ImportError as e:
     def gerar_explicacao_decisao(*args, **kwargs):
         return {"explicacao_resumida": "Módulo XAI não disponível", "erro": "ImportError"}
 
+# Snapshot em memória dos arquivos do Portal da Transparência (dashboard público)
+from snapshot_dashboard import snapshot_dashboard, CATEGORIAS_DADOS_BRUTOS
+
 # Criar aplicação FastAPI unificada
 app = FastAPI(
     title="Sistema de Regulação Autônoma SES-GO",
@@ -73,6 +108,21 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir todos os headers
 )
 
+# Executor limitado com a fila cheia: 503 com Retry-After em vez de acumular latência
+MENSAGENS_EXECUTOR_SATURADO = {
+    executor_inferencia.nome: "Sistema de análise sobrecarregado",
+    executor_db.nome: "Banco de dados sobrecarregado"
+}
+
+@app.exception_handler(ExecutorSaturado)
+async def responder_executor_saturado(request: Request, e: ExecutorSaturado):
+    mensagem = MENSAGENS_EXECUTOR_SATURADO.get(e.nome, "Serviço sobrecarregado")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"{mensagem}. Tente novamente em {e.retry_after}s"},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 # Configurações de Segurança (LGPD Compliant)
 # IMPORTANTE: Em produção, definir via variáveis de ambiente
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -99,11 +149,23 @@ _ms_ingestao_cache = {
     "dados": None,
     "timestamp": None,
     "offline_until": None,  # Timestamp até quando considerar offline
+    "versao": None,         # Hash do último payload recebido (muda só quando os dados mudam)
     "cache_duration": 60,   # Segundos para manter cache válido
     "offline_retry": 30     # Segundos para tentar reconectar após falha
 }
 
-def buscar_dados_ms_ingestao():
+# Atualização periódica do snapshot de ocupação usado na seleção de hospitais
+OCUPACAO_ATUALIZACAO_INTERVALO_S = float(os.getenv("OCUPACAO_ATUALIZACAO_INTERVALO_S", "60"))
+OCUPACAO_ATUALIZACAO_TIMEOUT_S = float(os.getenv("OCUPACAO_ATUALIZACAO_TIMEOUT_S", "10"))
+_tarefa_ocupacao: Optional[asyncio.Task] = None
+_tarefa_fila_posicoes: Optional[asyncio.Task] = None
+
+def calcular_versao_conteudo(dados) -> str:
+    """Versão de um payload JSON: hash do conteúdo serializado de forma canônica"""
+    canonico = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonico.encode('utf-8')).hexdigest()[:16]
+
+async def buscar_dados_ms_ingestao():
     """
     Busca dados de ocupação e tendência do MS-Ingestao
     Retorna dados enriquecidos com tendências preditivas
@@ -134,7 +196,7 @@ def buscar_dados_ms_ingestao():
     
     # Tentar buscar dados frescos
     try:
-        response = requests.get(
+        response = await cliente_http.get(
             f"{MS_INGESTAO_URL}/api/v1/inteligencia/hospitais-disponiveis",
             timeout=5
         )
@@ -144,6 +206,7 @@ def buscar_dados_ms_ingestao():
             # Atualizar cache
             _ms_ingestao_cache["dados"] = dados
             _ms_ingestao_cache["timestamp"] = now
+            _ms_ingestao_cache["versao"] = calcular_versao_conteudo(dados)
             _ms_ingestao_cache["offline_until"] = None
             
             logger.info(f"✅ Dados obtidos do MS-Ingestao: {len(dados.get('hospitais', []))} hospitais")
@@ -153,11 +216,11 @@ def buscar_dados_ms_ingestao():
             _ms_ingestao_cache["offline_until"] = now + timedelta(seconds=_ms_ingestao_cache["offline_retry"])
             return None
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         logger.warning("⚠️ MS-Ingestao não está disponível (conexão recusada) - retry em 30s")
         _ms_ingestao_cache["offline_until"] = now + timedelta(seconds=_ms_ingestao_cache["offline_retry"])
         return None
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.warning("⚠️ MS-Ingestao timeout - retry em 30s")
         _ms_ingestao_cache["offline_until"] = now + timedelta(seconds=_ms_ingestao_cache["offline_retry"])
         return None
@@ -166,27 +229,113 @@ def buscar_dados_ms_ingestao():
         _ms_ingestao_cache["offline_until"] = now + timedelta(seconds=_ms_ingestao_cache["offline_retry"])
         return None
 
-def verificar_ms_ingestao_status():
+async def atualizar_snapshot_ocupacao():
+    """
+    Publica a ocupação do MS-Ingestao no snapshot do seletor de hospitais
+    
+    Só dados reais entram no snapshot (nunca os simulados do dashboard); em
+    falha ou timeout o seletor continua com o último snapshot válido.
+    """
+    try:
+        dados = await asyncio.wait_for(buscar_dados_ms_ingestao(), timeout=OCUPACAO_ATUALIZACAO_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        painel_ocupacao.registrar_falha(f"timeout ({OCUPACAO_ATUALIZACAO_TIMEOUT_S:g}s)")
+        return
+    
+    if dados and dados.get('hospitais'):
+        painel_ocupacao.publicar(dados['hospitais'], origem="MS-INGESTAO")
+    else:
+        painel_ocupacao.registrar_falha("MS-Ingestao indisponível ou sem dados")
+
+async def _monitorar_ocupacao():
+    """Tarefa de fundo: atualiza o snapshot de ocupação a cada OCUPACAO_ATUALIZACAO_INTERVALO_S"""
+    while True:
+        try:
+            await atualizar_snapshot_ocupacao()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            painel_ocupacao.registrar_falha(str(e))
+            logger.error(f"❌ Erro ao atualizar snapshot de ocupação: {e}")
+        await asyncio.sleep(OCUPACAO_ATUALIZACAO_INTERVALO_S)
+
+async def _monitorar_fila_posicoes():
+    """
+    Tarefa de fundo: reconstrói o índice de posições da fila a partir do banco
+    (na inicialização e a cada FILA_POSICOES_RECONSTRUCAO_S), cobrindo escritas
+    feitas fora das sessões desta API
+    """
+    while True:
+        try:
+            await executor_db.executar(indice_fila.reconstruir)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro ao reconstruir índice da fila de regulação: {e}")
+        if FILA_POSICOES_RECONSTRUCAO_S <= 0:
+            return
+        await asyncio.sleep(FILA_POSICOES_RECONSTRUCAO_S)
+
+async def verificar_ms_ingestao_status():
     """Verifica status do MS-Ingestao e retorna informações detalhadas"""
     try:
-        response = requests.get(f"{MS_INGESTAO_URL}/health", timeout=3)
+        response = await cliente_http.get(f"{MS_INGESTAO_URL}/health", timeout=3)
         if response.status_code == 200:
             return {"online": True, "url": MS_INGESTAO_URL, "health": response.json()}
         return {"online": False, "url": MS_INGESTAO_URL, "error": f"Status {response.status_code}"}
     except Exception as e:
         return {"online": False, "url": MS_INGESTAO_URL, "error": str(e)}
 
-def gerar_ocupacao_hospitais_estaduais():
+# Ocupação já mapeada para o formato do dashboard, por versão da entrada
+# (MS-Ingestao: versão do payload; simulado: regenerado a cada cache_duration)
+_ocupacao_cache = {
+    "versao": None,
+    "dados": None,
+    "timestamp": None
+}
+
+async def obter_ocupacao_versionada():
+    """
+    Retorna (versao, ocupacao_hospitais)
+    A lista só é reconstruída quando a versão da entrada muda
+    """
+    now = datetime.now()
+    dados_ingestao = await buscar_dados_ms_ingestao()
+    
+    if dados_ingestao and dados_ingestao.get('hospitais'):
+        versao = f"ms-{_ms_ingestao_cache['versao']}"
+        if _ocupacao_cache["versao"] == versao:
+            return versao, _ocupacao_cache["dados"]
+    else:
+        # Dados simulados são estáveis durante a janela de cache para não invalidar o ETag a cada request
+        versao_atual = _ocupacao_cache["versao"]
+        if versao_atual and versao_atual.startswith("sim-") and _ocupacao_cache["timestamp"]:
+            idade = (now - _ocupacao_cache["timestamp"]).total_seconds()
+            if idade < _ms_ingestao_cache["cache_duration"]:
+                return versao_atual, _ocupacao_cache["dados"]
+        versao = None
+    
+    ocupacao_hospitais = _gerar_ocupacao_hospitais_estaduais(dados_ingestao)
+    if versao is None:
+        versao = f"sim-{calcular_versao_conteudo(ocupacao_hospitais)}"
+    
+    _ocupacao_cache["versao"] = versao
+    _ocupacao_cache["dados"] = ocupacao_hospitais
+    _ocupacao_cache["timestamp"] = now
+    return versao, ocupacao_hospitais
+
+async def gerar_ocupacao_hospitais_estaduais():
     """
     Gera dados de ocupação de leitos dos hospitais estaduais de Goiás
     PRIORIZA dados do MS-Ingestao (com tendências), fallback para dados simulados
     """
+    return (await obter_ocupacao_versionada())[1]
+
+def _gerar_ocupacao_hospitais_estaduais(dados_ingestao):
+    """Mapeia o payload do MS-Ingestao (ou simula a ocupação) para o formato do dashboard"""
     import random
     from datetime import datetime, timedelta
     
-    # === TENTAR BUSCAR DO MS-INGESTAO PRIMEIRO ===
-    dados_ingestao = buscar_dados_ms_ingestao()
-    
     if dados_ingestao and dados_ingestao.get('hospitais'):
         logger.info("📊 Usando dados do MS-Ingestao com tendências preditivas")
         hospitais_enriquecidos = []
@@ -389,65 +538,23 @@ def gerar_ocupacao_hospitais_estaduais():
     
     return ocupacao_hospitais
 
-def processar_dados_json_dashboard():
-    """Processa dados dos arquivos JSON para o dashboard"""
+async def processar_dados_json_dashboard(snapshot=None, ocupacao_hospitais=None):
+    """Processa dados dos arquivos JSON para o dashboard (a partir do snapshot em memória)"""
     try:
-        # Caminhos dos arquivos JSON
-        # No Docker: /app/dados_*.json (montados via volume)
-        # Local: ../dados_*.json (relativo ao backend)
-        base_dir = '/app' if os.path.exists('/app/dados_admitidos.json') else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        
-        arquivos_json = {
-            'admitidos': os.path.join(base_dir, 'dados_admitidos.json'),
-            'alta': os.path.join(base_dir, 'dados_alta.json'),
-            'em_regulacao': os.path.join(base_dir, 'dados_em_regulacao.json'),
-            'em_transito': os.path.join(base_dir, 'dados_em_transito.json'),
-            'ultima_atualizacao': os.path.join(base_dir, 'dados_ultima_atualizacao.json')
-        }
-        
-        dados_processados = {}
-        total_registros = 0
-        
-        # Carregar cada arquivo JSON
-        for nome, caminho in arquivos_json.items():
-            if os.path.exists(caminho):
-                try:
-                    with open(caminho, 'r', encoding='utf-8') as f:
-                        dados = json.load(f)
-                        dados_processados[nome] = dados
-                        if isinstance(dados, list):
-                            total_registros += len(dados)
-                        logger.info(f"Carregado {nome}: {len(dados) if isinstance(dados, list) else 1} registros")
-                except Exception as e:
-                    logger.error(f"Erro ao carregar {nome}: {e}")
-                    dados_processados[nome] = []
-            else:
-                logger.warning(f"Arquivo não encontrado: {caminho}")
-                dados_processados[nome] = []
+        # Snapshot dos arquivos dados_*.json com agregados pré-calculados
+        if snapshot is None:
+            snapshot = snapshot_dashboard.obter()
         
         # Gerar dados de ocupação hospitalar
-        ocupacao_hospitais = gerar_ocupacao_hospitais_estaduais()
+        if ocupacao_hospitais is None:
+            ocupacao_hospitais = await gerar_ocupacao_hospitais_estaduais()
         
         # Processar dados para o dashboard
         dashboard_data = {
-            "leitos_disponiveis": len(dados_processados.get('alta', [])),
-            "pacientes_admitidos": len(dados_processados.get('admitidos', [])),
-            "em_regulacao": len(dados_processados.get('em_regulacao', [])),
-            "em_transito": len(dados_processados.get('em_transito', [])),
-            "total_registros": total_registros,
+            **snapshot.agregados,
             "ultima_atualizacao": datetime.utcnow().isoformat(),
             "fonte": "json_files_real",
-            
-            # Dados detalhados para o frontend
-            "status_summary": [
-                {"status": "ADMITIDOS", "count": len(dados_processados.get('admitidos', []))},
-                {"status": "EM_REGULACAO", "count": len(dados_processados.get('em_regulacao', []))},
-                {"status": "EM_TRANSITO", "count": len(dados_processados.get('em_transito', []))},
-                {"status": "ALTA", "count": len(dados_processados.get('alta', []))}
-            ],
-            
-            # Unidades com pressão (baseado nos dados em regulação)
-            "unidades_pressao": processar_unidades_pressao(dados_processados.get('em_regulacao', [])),
+            "versao_dados": snapshot.versao,
             
             # NOVA SEÇÃO: Ocupação de leitos por hospital
             "ocupacao_hospitais": ocupacao_hospitais,
@@ -461,10 +568,20 @@ def processar_dados_json_dashboard():
                 "hospitais_criticos": len([h for h in ocupacao_hospitais if h["status_ocupacao"] == "CRITICO"]),
                 "hospitais_alto": len([h for h in ocupacao_hospitais if h["status_ocupacao"] == "ALTO"]),
                 "hospitais_normal": len([h for h in ocupacao_hospitais if h["status_ocupacao"] == "NORMAL"])
-            },
-            
-            # Dados brutos para análises
-            "dados_brutos": dados_processados
+            }
+        }
+        
+        # Verificar fonte dos dados de ocupação
+        fonte_ocupacao = "SIMULADO"
+        if ocupacao_hospitais and len(ocupacao_hospitais) > 0:
+            fonte_ocupacao = ocupacao_hospitais[0].get('fonte_dados', 'SIMULADO')
+        
+        # Adicionar metadados sobre a fonte
+        dashboard_data['metadata'] = {
+            'fonte_ocupacao': fonte_ocupacao,
+            'ms_ingestao_ativo': fonte_ocupacao == 'MS-INGESTAO',
+            'tendencias_disponiveis': fonte_ocupacao == 'MS-INGESTAO',
+            'timestamp': datetime.utcnow().isoformat()
         }
         
         return dashboard_data
@@ -473,44 +590,75 @@ def processar_dados_json_dashboard():
         logger.error(f"Erro no processamento JSON: {e}")
         raise
 
-def processar_unidades_pressao(dados_em_regulacao):
-    """Processa dados de unidades com pressão na regulação"""
-    try:
-        unidades_count = {}
-        
-        for paciente in dados_em_regulacao:
-            # Os dados JSON são arrays, não dicionários
-            # Estrutura: [id, protocolo, data, status, tipo_leito, tipo_leito_desc, cpf, codigo, especialidade, unidade_origem, cidade, unidade_destino, data_regulacao, complexo]
-            if isinstance(paciente, list) and len(paciente) >= 11:
-                unidade = paciente[9] if len(paciente) > 9 else 'Unidade não informada'  # unidade_origem
-                cidade = paciente[10] if len(paciente) > 10 else 'Cidade não informada'  # cidade
-                
-                # Limpar nome da unidade (remover código se houver)
-                if unidade and ' / ' in str(unidade):
-                    unidade = str(unidade).split(' / ')[-1]
-                
-                chave = f"{unidade} - {cidade}"
-                if chave not in unidades_count:
-                    unidades_count[chave] = {
-                        "unidade_executante_desc": unidade,
-                        "cidade": cidade,
-                        "pacientes_em_fila": 0
-                    }
-                unidades_count[chave]["pacientes_em_fila"] += 1
-        
-        # Ordenar por número de pacientes (maior pressão primeiro)
-        unidades_ordenadas = sorted(
-            unidades_count.values(), 
-            key=lambda x: x["pacientes_em_fila"], 
-            reverse=True
-        )
-        
-        return unidades_ordenadas[:10]  # Top 10 unidades com mais pressão
-        
-    except Exception as e:
-        logger.error(f"Erro ao processar unidades: {e}")
-        return []
-        return []
+# ============================================================================
+# RESPOSTA PRÉ-SERIALIZADA DO DASHBOARD (ETag / 304)
+# ============================================================================
+
+# Corpo serializado do /dashboard/leitos para a combinação atual de versões
+# (snapshot dos arquivos JSON + payload de ocupação do MS-Ingestao)
+_dashboard_resposta_cache = {
+    "chave": None,
+    "corpo": None,
+    "etag": None,
+    "construcoes": 0
+}
+
+def serializar_resposta_json(dados) -> bytes:
+    """Serializa no mesmo formato do JSONResponse do FastAPI"""
+    return json.dumps(dados, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def gerar_etag(corpo: bytes) -> str:
+    """ETag forte: hash do corpo exato enviado ao cliente"""
+    return f'"{hashlib.sha256(corpo).hexdigest()[:32]}"'
+
+def etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação do If-None-Match (RFC 9110: comparação fraca, aceita lista e '*')"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+def responder_com_etag(request: Request, corpo: bytes, etag: str) -> Response:
+    """Envia o corpo com ETag ou 304 se o cliente já possui esta versão"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_corresponde(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+async def montar_resposta_dashboard():
+    """
+    Retorna (corpo, etag) do /dashboard/leitos
+    O JSON só é montado e serializado quando alguma das versões de entrada muda
+    """
+    snapshot = snapshot_dashboard.obter()
+    versao_ocupacao, ocupacao_hospitais = await obter_ocupacao_versionada()
+    chave = (snapshot.versao, versao_ocupacao)
+    
+    if _dashboard_resposta_cache["chave"] == chave:
+        return _dashboard_resposta_cache["corpo"], _dashboard_resposta_cache["etag"]
+    
+    dashboard_data = await processar_dados_json_dashboard(snapshot, ocupacao_hospitais)
+    dashboard_data["versao_ocupacao"] = versao_ocupacao
+    corpo = serializar_resposta_json(dashboard_data)
+    etag = gerar_etag(corpo)
+    
+    _dashboard_resposta_cache["chave"] = chave
+    _dashboard_resposta_cache["corpo"] = corpo
+    _dashboard_resposta_cache["etag"] = etag
+    _dashboard_resposta_cache["construcoes"] += 1
+    
+    logger.info(
+        f"Dashboard: {dashboard_data['total_registros']} registros, ocupação via "
+        f"{dashboard_data['metadata']['fonte_ocupacao']} (dados {snapshot.versao}, ocupação {versao_ocupacao})"
+    )
+    return corpo, etag
 
 # Modelos Pydantic
 class UserCreate(BaseModel):
@@ -596,258 +744,26 @@ DADOS_SIMULADOS = {
 }
 
 
-def analisar_com_ia_inteligente(paciente_data: dict) -> dict:
-    """IA Inteligente com Pipeline de Hospitais de Goiás + BioBERT + Matchmaker Logístico"""
-    
-    start_time = time.time()
-    
-    # Importar pipeline de hospitais
+def _selecionar_hospital_goias(**kwargs):
+    # Import tardio do pipeline de hospitais (carrega catálogo e índices)
     from pipeline_hospitais_goias import selecionar_hospital_goias
+    return selecionar_hospital_goias(**kwargs)
+
+# Triagem em etapas cronometradas: extrair (BioBERT) || pontuar -> selecionar -> logistica -> explicar
+pipeline_triagem = PipelineTriagem(
+    selecionar_hospital=_selecionar_hospital_goias,
+    extrair_biobert=extrair_entidades_biobert if BIOBERT_DISPONIVEL else None,
+    processar_matchmaking=processar_matchmaking if MATCHMAKER_DISPONIVEL else None
+)
+
+def analisar_com_ia_inteligente(paciente_data: dict) -> dict:
+    """
+    IA Inteligente com Pipeline de Hospitais de Goiás + BioBERT + Matchmaker Logístico
     
-    # Extrair dados do paciente
-    protocolo = paciente_data.get('protocolo', 'N/A')
-    especialidade = paciente_data.get('especialidade', '').upper()
-    cid = paciente_data.get('cid', '')
-    cid_desc = paciente_data.get('cid_desc', '')
-    prontuario = paciente_data.get('prontuario_texto', '')
-    historico = paciente_data.get('historico_paciente', '')
-    prioridade_desc = paciente_data.get('prioridade_descricao', 'Normal')
-    cidade_origem = paciente_data.get('cidade_origem', 'GOIANIA')
-    
-    # === 1. ANÁLISE BIOBERT (se disponível) ===
-    resultado_biobert = None
-    biobert_usado = False
-    
-    if BIOBERT_DISPONIVEL and prontuario:
-        try:
-            logger.info(f"Analisando com BioBERT: {protocolo}")
-            biobert_analise = extrair_entidades_biobert(prontuario)
-            
-            # Se BioBERT processou (independente da confiança), marcar como usado
-            if biobert_analise.get("status") in ["sucesso", "texto_insuficiente"]:
-                resultado_biobert = biobert_analise.get("analise", "Análise BioBERT realizada")
-                biobert_usado = True
-                confianca = biobert_analise.get('nivel_confianca', 'N/A')
-                entidades_count = len(biobert_analise.get('entidades', []))
-                logger.info(f"BioBERT: {confianca} confiança, {entidades_count} entidades detectadas")
-            else:
-                resultado_biobert = biobert_analise.get("analise", "Análise BioBERT com erro")
-                biobert_usado = False
-                logger.warning(f"BioBERT: {biobert_analise.get('status', 'status_desconhecido')}")
-        except Exception as e:
-            logger.error(f"Erro BioBERT: {e}")
-            resultado_biobert = "Análise BioBERT indisponível"
-            biobert_usado = False
-    
-    # Análise de Risco baseada em CID e sintomas
-    score_prioridade = 5  # Base
-    classificacao_risco = "AMARELO"
-    justificativa_partes = []
-    
-    # === RESUMO DOS DADOS INSERIDOS ===
-    justificativa_partes.append(f"DADOS INSERIDOS - Protocolo: {protocolo}")
-    if especialidade:
-        justificativa_partes.append(f"Especialidade: {especialidade}")
-    if cid:
-        justificativa_partes.append(f"CID: {cid} ({cid_desc})" if cid_desc else f"CID: {cid}")
-    if prontuario:
-        justificativa_partes.append(f"Quadro clínico: {prontuario[:100]}{'...' if len(prontuario) > 100 else ''}")
-    if historico:
-        justificativa_partes.append(f"Histórico: {historico[:80]}{'...' if len(historico) > 80 else ''}")
-    
-    # Adicionar resultado BioBERT à justificativa
-    if resultado_biobert:
-        justificativa_partes.append(f"BIOBERT: {resultado_biobert[:100]}{'...' if len(resultado_biobert) > 100 else ''}")
-    
-    # === ANÁLISE POR CID (Códigos reais de emergência) ===
-    cids_criticos = {
-        'I21': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Infarto Agudo do Miocárdio'},
-        'I46': {'score': 10, 'risco': 'VERMELHO', 'desc': 'Parada Cardíaca'},
-        'G93.1': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Lesão Cerebral Anóxica'},
-        'R57': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Choque'},
-        'J44.1': {'score': 8, 'risco': 'VERMELHO', 'desc': 'DPOC com Exacerbação'},
-        'N17': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Insuficiência Renal Aguda'},
-        'K92.2': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Hemorragia Gastrointestinal'},
-        'S06': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Traumatismo Craniano'},
-        'I63': {'score': 8, 'risco': 'VERMELHO', 'desc': 'AVC Isquêmico'},
-        'I61': {'score': 9, 'risco': 'VERMELHO', 'desc': 'AVC Hemorrágico'},
-        'J18': {'score': 7, 'risco': 'AMARELO', 'desc': 'Pneumonia'},
-        'E11': {'score': 6, 'risco': 'AMARELO', 'desc': 'Diabetes Mellitus'},
-        'I10': {'score': 5, 'risco': 'AMARELO', 'desc': 'Hipertensão Arterial'},
-        'M79': {'score': 4, 'risco': 'VERDE', 'desc': 'Dor Musculoesquelética'},
-        'M54': {'score': 3, 'risco': 'VERDE', 'desc': 'Dor Lombar'}
-    }
-    
-    # Verificar CID
-    cid_encontrado = None
-    for cid_code, info in cids_criticos.items():
-        if cid.startswith(cid_code):
-            cid_encontrado = info
-            score_prioridade = info['score']
-            classificacao_risco = info['risco']
-            justificativa_partes.append(f"ANÁLISE CID: {cid} ({info['desc']}) = RISCO {info['risco']} (Score: {info['score']}/10)")
-            break
-    
-    if not cid_encontrado and cid:
-        justificativa_partes.append(f"ANÁLISE CID: {cid} não está na base crítica, mantendo score padrão")
-    
-    # === ANÁLISE DE SINTOMAS NO PRONTUÁRIO ===
-    sintomas_criticos = {
-        'dor no peito': {'score': +3, 'desc': 'dor torácica'},
-        'falta de ar': {'score': +2, 'desc': 'dispneia'},
-        'inconsciência': {'score': +4, 'desc': 'alteração do nível de consciência'},
-        'convulsão': {'score': +3, 'desc': 'atividade convulsiva'},
-        'hemorragia': {'score': +3, 'desc': 'sangramento ativo'},
-        'vômito': {'score': +1, 'desc': 'êmese'},
-        'febre alta': {'score': +2, 'desc': 'hipertermia'},
-        'pressão baixa': {'score': +2, 'desc': 'hipotensão'},
-        'taquicardia': {'score': +2, 'desc': 'frequência cardíaca elevada'},
-        'cianose': {'score': +3, 'desc': 'cianose'},
-        'rebaixamento': {'score': +3, 'desc': 'rebaixamento do nível de consciência'},
-        'trauma': {'score': +4, 'desc': 'traumatismo'},
-        'acidente': {'score': +4, 'desc': 'trauma por acidente'}
-    }
-    
-    prontuario_lower = prontuario.lower()
-    sintomas_encontrados = []
-    score_sintomas = 0
-    
-    for sintoma, info in sintomas_criticos.items():
-        if sintoma in prontuario_lower:
-            score_prioridade += info['score']
-            score_sintomas += info['score']
-            sintomas_encontrados.append(info['desc'])
-    
-    if sintomas_encontrados:
-        justificativa_partes.append(f"SINTOMAS DETECTADOS: {', '.join(sintomas_encontrados)} (+{score_sintomas} pontos)")
-    else:
-        justificativa_partes.append("SINTOMAS: Nenhum sintoma crítico detectado no texto")
-    
-    # === ANÁLISE DE PRIORIDADE DECLARADA ===
-    if 'urgente' in prioridade_desc.lower() or 'emergência' in prioridade_desc.lower():
-        score_prioridade += 2
-        justificativa_partes.append(f"PRIORIDADE: '{prioridade_desc}' = +2 pontos por urgência")
-    else:
-        justificativa_partes.append(f"PRIORIDADE: '{prioridade_desc}' = sem ajuste adicional")
-    
-    # === AJUSTAR CLASSIFICAÇÃO FINAL ===
-    if score_prioridade >= 8:
-        classificacao_risco = "VERMELHO"
-    elif score_prioridade >= 6:
-        classificacao_risco = "AMARELO"
-    else:
-        classificacao_risco = "VERDE"
-    
-    # Limitar score
-    score_prioridade = min(10, max(1, score_prioridade))
-    
-    # === SELEÇÃO INTELIGENTE DE HOSPITAL COM PIPELINE DE GOIÁS ===
-    try:
-        # Usar pipeline inteligente de hospitais
-        unidade_destino, motivo_escolha = selecionar_hospital_goias(
-            cid=cid,
-            especialidade=especialidade,
-            sintomas=prontuario,
-            gravidade=classificacao_risco
-        )
-        
-        justificativa_partes.append(f"HOSPITAL SELECIONADO PELO PIPELINE: {unidade_destino}")
-        justificativa_partes.append(f"JUSTIFICATIVA TÉCNICA: {motivo_escolha}")
-        
-    except Exception as e:
-        logger.error(f"Erro no pipeline de hospitais: {e}")
-        # Fallback para seleção manual
-        unidade_destino = "HOSPITAL ESTADUAL DR ALBERTO RASSI HGG"
-        justificativa_partes.append(f"HOSPITAL FALLBACK: {unidade_destino} - Pipeline indisponível")
-    
-    # === LOGÍSTICA INTELIGENTE ===
-    tipo_transporte = "USB"  # Padrão
-    acionar_ambulancia = True
-    previsao_vaga = "2-4 horas"
-    
-    if classificacao_risco == "VERMELHO":
-        tipo_transporte = "USA"  # Unidade de Suporte Avançado
-        previsao_vaga = "Imediato"
-        justificativa_partes.append("TRANSPORTE: USA (Suporte Avançado) devido ao alto risco")
-    elif classificacao_risco == "AMARELO":
-        tipo_transporte = "USB"  # Unidade de Suporte Básico
-        previsao_vaga = "1-2 horas"
-        justificativa_partes.append("TRANSPORTE: USB (Suporte Básico) adequado para o risco")
-    else:
-        previsao_vaga = "4-8 horas"
-        if score_prioridade <= 3:
-            acionar_ambulancia = False
-            justificativa_partes.append("TRANSPORTE: Próprio pode ser considerado (baixo risco)")
-        else:
-            justificativa_partes.append("TRANSPORTE: USB (Suporte Básico) para baixo risco")
-    
-    # === JUSTIFICATIVA FINAL ESTRUTURADA ===
-    justificativa_final = " | ".join(justificativa_partes) + f" | SCORE FINAL: {score_prioridade}/10 = RISCO {classificacao_risco}"
-    
-    # === 2. PREPARAR DECISÃO BASE ===
-    decisao_base = {
-        "analise_decisoria": {
-            "score_prioridade": score_prioridade,
-            "classificacao_risco": classificacao_risco,
-            "unidade_destino_sugerida": unidade_destino,
-            "justificativa_clinica": justificativa_final
-        },
-        "logistica": {
-            "acionar_ambulancia": acionar_ambulancia,
-            "tipo_transporte": tipo_transporte,
-            "previsao_vaga_h": previsao_vaga
-        },
-        "protocolo_especial": {
-            "tipo": "NORMAL",
-            "instrucoes_imediatas": "Monitorização de sinais vitais durante transporte"
-        }
-    }
-    
-    # === 3. MATCHMAKER LOGÍSTICO (se disponível) ===
-    matchmaker_usado = False
-    if MATCHMAKER_DISPONIVEL:
-        try:
-            logger.info(f"Processando Matchmaker Logístico: {protocolo}")
-            resultado_matchmaker = processar_matchmaking(paciente_data, decisao_base)
-            
-            # Integrar dados do matchmaker na decisão
-            decisao_base["matchmaking_logistico"] = resultado_matchmaker["matchmaking_logistico"]
-            decisao_base["ambulancia_sugerida"] = resultado_matchmaker["ambulancia_sugerida"]
-            decisao_base["rota_otimizada"] = resultado_matchmaker["rota_otimizada"]
-            decisao_base["protocolo_especial"] = resultado_matchmaker["protocolo_especial"]
-            
-            matchmaker_usado = True
-            logger.info(f"Matchmaker: {resultado_matchmaker['matchmaking_logistico']['distancia_km']}km - {resultado_matchmaker['matchmaking_logistico']['tempo_estimado_min']}min")
-            
-        except Exception as e:
-            logger.error(f"Erro Matchmaker: {e}")
-            # Continuar sem matchmaker se falhar
-    
-    # === 4. METADADOS FINAIS ===
-    tempo_processamento = time.time() - start_time
-    
-    decisao_base["metadata"] = {
-        "ia_engine": "IA Inteligente v4.0 - BIOBERT + MATCHMAKER + PIPELINE HOSPITAIS GOIÁS",
-        "tempo_processamento": tempo_processamento,
-        "biobert_usado": biobert_usado,
-        "biobert_disponivel": BIOBERT_DISPONIVEL,
-        "matchmaker_usado": matchmaker_usado,
-        "matchmaker_disponivel": MATCHMAKER_DISPONIVEL,
-        "dados_analisados": {
-            "protocolo": protocolo,
-            "especialidade": especialidade,
-            "cid": cid,
-            "sintomas_detectados": len(sintomas_encontrados),
-            "hospital_justificado": True,
-            "pipeline_hospitais": True,
-            "pipeline_ativo": True,
-            "sistema": "unificado"
-        }
-    }
-    
-    logger.info(f"IA processou {protocolo} em {tempo_processamento:.2f}s - BioBERT: {biobert_usado} - Matchmaker: {matchmaker_usado}")
-    
-    return decisao_base
+    Executada em etapas (ver pipeline_triagem); o tempo de cada etapa vai em
+    metadata["etapas"] e em /metricas/desempenho.
+    """
+    return pipeline_triagem.analisar(paciente_data)
 
 def chamar_llama_docker(prompt_estruturado: str) -> Dict:
     """Chama a IA Inteligente diretamente (sem Ollama) - SEMPRE FUNCIONA"""
@@ -992,6 +908,22 @@ async def startup_event():
     """Inicialização da aplicação"""
     create_tables()
     
+    # Pool de conexões HTTP para MS-Ingestao e demais serviços
+    await cliente_http.iniciar()
+    
+    # Modelo BioBERT carregado em segundo plano: a API responde imediatamente
+    # e usa a análise por regras até o modelo ficar pronto
+    if BIOBERT_DISPONIVEL:
+        iniciar_carregamento_biobert()
+    
+    # Snapshot de ocupação para o seletor de hospitais (fora do caminho da requisição)
+    global _tarefa_ocupacao, _tarefa_fila_posicoes
+    if OCUPACAO_ATUALIZACAO_INTERVALO_S > 0:
+        _tarefa_ocupacao = asyncio.create_task(_monitorar_ocupacao())
+    
+    # Índice de posições da fila (até ficar pronto, /consulta-paciente conta no banco)
+    _tarefa_fila_posicoes = asyncio.create_task(_monitorar_fila_posicoes())
+    
     # Criar usuário admin padrão se não existir
     db = next(get_db())
     try:
@@ -1013,6 +945,18 @@ async def startup_event():
     
     logger.info("Sistema de Regulação SES-GO iniciado com sucesso")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Encerramento da aplicação"""
+    if _tarefa_ocupacao:
+        _tarefa_ocupacao.cancel()
+    if _tarefa_fila_posicoes:
+        _tarefa_fila_posicoes.cancel()
+    await cliente_http.fechar()
+    executor_inferencia.encerrar(aguardar=False)
+    executor_db.encerrar(aguardar=False)
+    pipeline_triagem.encerrar(aguardar=False)
+
 # ============================================================================
 # ENDPOINTS - DASHBOARD PÚBLICO (MS-INGESTION)
 # ============================================================================
@@ -1164,132 +1108,155 @@ class ConsultaPacienteRequest(BaseModel):
     tipo_busca: str  # 'protocolo' ou 'cpf'
     valor_busca: str
 
-@app.post("/consulta-paciente")
-async def consultar_paciente(
-    consulta: ConsultaPacienteRequest,
-    db: Session = Depends(get_db)
-):
-    """Endpoint público para consulta de pacientes - TRANSPARÊNCIA TOTAL"""
-    
+def _em_sessao_propria(funcao, *args):
+    """
+    funcao(db, *args) com uma sessão aberta e fechada aqui (executada no executor de banco de dados)
+
+    Cálculos single-flight do cache de respostas são compartilhados por várias
+    requisições e podem terminar depois da que os iniciou: não usam a sessão dela.
+    """
+    db = SessionLocal()
     try:
-        # Validar tipo de busca
-        if consulta.tipo_busca not in ['protocolo', 'cpf']:
-            raise HTTPException(status_code=400, detail="Tipo de busca inválido")
-        
-        # Buscar paciente
-        if consulta.tipo_busca == 'protocolo':
-            paciente = db.query(PacienteRegulacao).filter(
-                PacienteRegulacao.protocolo == consulta.valor_busca
-            ).first()
-        else:  # cpf
-            # Buscar por CPF mascarado (primeiros 3 e últimos 2 dígitos)
-            cpf_limpo = ''.join(filter(str.isdigit, consulta.valor_busca))
-            if len(cpf_limpo) != 11:
-                raise HTTPException(status_code=400, detail="CPF deve ter 11 dígitos")
-            
-            cpf_pattern = f"{cpf_limpo[:3]}.***.***-{cpf_limpo[-2:]}"
-            paciente = db.query(PacienteRegulacao).filter(
-                PacienteRegulacao.cpf_mascarado == cpf_pattern
-            ).first()
-        
-        if not paciente:
-            return {"encontrado": False}
-        
-        # Calcular posição na fila (se aguardando regulação)
-        posicao_fila = None
-        total_fila = None
-        
-        if paciente.status == 'AGUARDANDO_REGULACAO':
-            # Contar pacientes com prioridade maior ou igual
-            pacientes_prioritarios = db.query(PacienteRegulacao).filter(
-                PacienteRegulacao.status == 'AGUARDANDO_REGULACAO',
-                PacienteRegulacao.especialidade == paciente.especialidade,
-                PacienteRegulacao.score_prioridade >= (paciente.score_prioridade or 5)
-            ).count()
-            
-            total_na_especialidade = db.query(PacienteRegulacao).filter(
-                PacienteRegulacao.status == 'AGUARDANDO_REGULACAO',
-                PacienteRegulacao.especialidade == paciente.especialidade
-            ).count()
-            
-            posicao_fila = pacientes_prioritarios
-            total_fila = total_na_especialidade
-        
-        # Buscar histórico de decisões (auditoria)
-        historico_decisoes = db.query(HistoricoDecisoes).filter(
-            HistoricoDecisoes.protocolo == paciente.protocolo
-        ).order_by(HistoricoDecisoes.created_at.desc()).all()
-        
-        # Simular histórico de movimentações (em produção, viria de uma tabela específica)
-        historico_movimentacoes = []
-        
-        # Adicionar movimentação inicial
-        historico_movimentacoes.append({
-            "data": paciente.data_solicitacao.isoformat() if paciente.data_solicitacao else datetime.utcnow().isoformat(),
-            "status_anterior": "SOLICITADO",
-            "status_novo": "AGUARDANDO_REGULACAO",
-            "observacoes": "Solicitação de regulação recebida",
-            "responsavel": "Sistema Automático"
-        })
-        
-        # Adicionar movimentações baseadas no histórico de decisões
-        for decisao in historico_decisoes:
-            try:
-                decisao_data = json.loads(decisao.decisao_ia)
-                historico_movimentacoes.append({
-                    "data": decisao.created_at.isoformat(),
-                    "status_anterior": "AGUARDANDO_REGULACAO",
-                    "status_novo": "ANALISADO_IA",
-                    "observacoes": f"Análise da IA: {decisao_data.get('analise_decisoria', {}).get('justificativa_clinica', 'Processado')}",
-                    "responsavel": "Sistema de IA"
-                })
-            except:
-                continue
-        
-        # Se foi autorizada internação
-        if paciente.status == 'EM_TRANSFERENCIA':
+        return funcao(db, *args)
+    finally:
+        db.close()
+
+def _consultar_paciente(db: Session, consulta: ConsultaPacienteRequest) -> dict:
+    """Consulta pública de paciente (executada no executor de banco de dados)"""
+    
+    # Validar tipo de busca
+    if consulta.tipo_busca not in ['protocolo', 'cpf']:
+        raise HTTPException(status_code=400, detail="Tipo de busca inválido")
+
+    # Buscar paciente
+    if consulta.tipo_busca == 'protocolo':
+        paciente = db.query(PacienteRegulacao).filter(
+            PacienteRegulacao.protocolo == consulta.valor_busca
+        ).first()
+    else:  # cpf
+        # Buscar por CPF mascarado (primeiros 3 e últimos 2 dígitos)
+        cpf_limpo = ''.join(filter(str.isdigit, consulta.valor_busca))
+        if len(cpf_limpo) != 11:
+            raise HTTPException(status_code=400, detail="CPF deve ter 11 dígitos")
+
+        cpf_pattern = f"{cpf_limpo[:3]}.***.***-{cpf_limpo[-2:]}"
+        paciente = db.query(PacienteRegulacao).filter(
+            PacienteRegulacao.cpf_mascarado == cpf_pattern
+        ).first()
+
+    if not paciente:
+        return {"encontrado": False}
+
+    # Calcular posição na fila (se aguardando regulação)
+    posicao_fila = None
+    total_fila = None
+
+    posicao = posicao_na_fila(paciente.protocolo) if paciente.status == 'AGUARDANDO_REGULACAO' else None
+    if posicao:
+        # Índice em memória: pacientes à frente (score maior, ou igual e mais antigos) + 1
+        posicao_fila, total_fila = posicao
+    elif paciente.status == 'AGUARDANDO_REGULACAO':
+        # Índice não pronto, expirado ou sem o paciente (gravado por outro serviço): contar no banco, na mesma ordem
+        posicao_fila, total_fila = posicao_no_banco(db, paciente)
+
+    # Buscar histórico de decisões (auditoria)
+    historico_decisoes = db.query(
+        HistoricoDecisoes.created_at, HistoricoDecisoes.decisao_ia
+    ).filter(
+        HistoricoDecisoes.protocolo == paciente.protocolo
+    ).order_by(HistoricoDecisoes.created_at.desc()).all()
+
+    # Simular histórico de movimentações (em produção, viria de uma tabela específica)
+    historico_movimentacoes = []
+
+    # Adicionar movimentação inicial
+    historico_movimentacoes.append({
+        "data": paciente.data_solicitacao.isoformat() if paciente.data_solicitacao else datetime.utcnow().isoformat(),
+        "status_anterior": "SOLICITADO",
+        "status_novo": "AGUARDANDO_REGULACAO",
+        "observacoes": "Solicitação de regulação recebida",
+        "responsavel": "Sistema Automático"
+    })
+
+    # Adicionar movimentações baseadas no histórico de decisões
+    for decisao in historico_decisoes:
+        try:
+            decisao_data = json.loads(decisao.decisao_ia)
             historico_movimentacoes.append({
-                "data": paciente.updated_at.isoformat() if paciente.updated_at else datetime.utcnow().isoformat(),
+                "data": decisao.created_at.isoformat(),
                 "status_anterior": "AGUARDANDO_REGULACAO",
-                "status_novo": "EM_TRANSFERENCIA",
-                "observacoes": f"Transferência autorizada para {paciente.unidade_destino}",
-                "responsavel": "Regulador Médico"
+                "status_novo": "ANALISADO_IA",
+                # Endpoint público: a justificativa clínica (dado sensível, LGPD Art. 5º, II) não é exposta
+                "observacoes": f"Análise da IA concluída: {decisao_data.get('analise_decisoria', {}).get('classificacao_risco') or 'Processado'}",
+                "responsavel": "Sistema de IA"
             })
-        
-        # Ordenar histórico por data
-        historico_movimentacoes.sort(key=lambda x: x['data'])
-        
-        # Calcular previsão de atendimento
-        previsao_atendimento = None
-        if paciente.status == 'AGUARDANDO_REGULACAO' and posicao_fila:
-            if posicao_fila <= 5:
-                previsao_atendimento = "Próximas 2-4 horas"
-            elif posicao_fila <= 15:
-                previsao_atendimento = "Próximas 4-8 horas"
-            else:
-                previsao_atendimento = "Próximas 8-24 horas"
-        elif paciente.status == 'EM_TRANSFERENCIA':
-            previsao_atendimento = "Ambulância acionada - Em transferência"
-        
-        return {
-            "encontrado": True,
-            "paciente": {
-                "protocolo": paciente.protocolo,
-                "data_solicitacao": paciente.data_solicitacao.isoformat() if paciente.data_solicitacao else None,
-                "status": paciente.status,
-                "especialidade": paciente.especialidade,
-                "unidade_solicitante": paciente.unidade_solicitante,
-                "cidade_origem": paciente.cidade_origem,
-                "unidade_destino": paciente.unidade_destino,
-                "posicao_fila": posicao_fila,
-                "total_fila": total_fila,
-                "previsao_atendimento": previsao_atendimento,
-                "score_prioridade": paciente.score_prioridade,
-                "classificacao_risco": paciente.classificacao_risco,
-                "historico_movimentacoes": historico_movimentacoes
-            }
+        except:
+            continue
+
+    # Se foi autorizada internação
+    if paciente.status == 'EM_TRANSFERENCIA':
+        historico_movimentacoes.append({
+            "data": paciente.updated_at.isoformat() if paciente.updated_at else datetime.utcnow().isoformat(),
+            "status_anterior": "AGUARDANDO_REGULACAO",
+            "status_novo": "EM_TRANSFERENCIA",
+            "observacoes": f"Transferência autorizada para {paciente.unidade_destino}",
+            "responsavel": "Regulador Médico"
+        })
+
+    # Ordenar histórico por data
+    historico_movimentacoes.sort(key=lambda x: x['data'])
+
+    # Calcular previsão de atendimento
+    previsao_atendimento = None
+    if paciente.status == 'AGUARDANDO_REGULACAO' and posicao_fila:
+        if posicao_fila <= 5:
+            previsao_atendimento = "Próximas 2-4 horas"
+        elif posicao_fila <= 15:
+            previsao_atendimento = "Próximas 4-8 horas"
+        else:
+            previsao_atendimento = "Próximas 8-24 horas"
+    elif paciente.status == 'EM_TRANSFERENCIA':
+        previsao_atendimento = "Ambulância acionada - Em transferência"
+
+    return {
+        "encontrado": True,
+        "paciente": {
+            "protocolo": paciente.protocolo,
+            "data_solicitacao": paciente.data_solicitacao.isoformat() if paciente.data_solicitacao else None,
+            "status": paciente.status,
+            "especialidade": paciente.especialidade,
+            "unidade_solicitante": paciente.unidade_solicitante,
+            "cidade_origem": paciente.cidade_origem,
+            "unidade_destino": paciente.unidade_destino,
+            "posicao_fila": posicao_fila,
+            "total_fila": total_fila,
+            "previsao_atendimento": previsao_atendimento,
+            "score_prioridade": paciente.score_prioridade,
+            "classificacao_risco": paciente.classificacao_risco,
+            "historico_movimentacoes": historico_movimentacoes
         }
+    }
+
+def _tags_consulta_paciente(resposta: dict):
+    if not resposta.get("encontrado"):
+        return (TAG_NOVOS_PACIENTES,)
+    paciente = resposta["paciente"]
+    return (tag_paciente(paciente["protocolo"]), tag_fila(paciente["especialidade"]))
+
+@app.post("/consulta-paciente")
+async def consultar_paciente(consulta: ConsultaPacienteRequest):
+    """Endpoint público para consulta de pacientes - TRANSPARÊNCIA TOTAL"""
+    
+    try:
+        return await cache_respostas_publicas.obter_ou_calcular(
+            cache_respostas_publicas.chave("consulta-paciente", consulta.tipo_busca, consulta.valor_busca),
+            lambda: executor_db.executar(_em_sessao_propria, _consultar_paciente, consulta),
+            tags=_tags_consulta_paciente,
+            campos=CAMPOS_CONSULTA_PACIENTE
+        )
         
+    except ExecutorSaturado:
+        raise
     except HTTPException:
         raise
     except Exception as e:
@@ -1536,14 +1503,17 @@ async def reset_admin_user(db: Session = Depends(get_db)):
 async def health_check():
     """Health check com status detalhado do MS-Ingestao"""
     # Verificar status do MS-Ingestao usando a função dedicada
-    ms_status = verificar_ms_ingestao_status()
+    ms_status = await verificar_ms_ingestao_status()
     
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "biobert_disponivel": BIOBERT_DISPONIVEL and is_biobert_disponivel() if BIOBERT_DISPONIVEL else False,
+        "modelo_biobert": obter_status_biobert() if BIOBERT_DISPONIVEL else {"estado": "degraded", "erro": "módulo não importado"},
         "matchmaker_disponivel": MATCHMAKER_DISPONIVEL,
         "xai_disponivel": XAI_DISPONIVEL,
+        "catalogo_hospitais": catalogo_hospitais.status(),
+        "snapshot_ocupacao": painel_ocupacao.status(),
         "ms_ingestao": {
             "status": "online" if ms_status["online"] else "offline",
             "url": MS_INGESTAO_URL,
@@ -1555,6 +1525,21 @@ async def health_check():
         "sistema": "unificado"
     }
 
+@app.get("/metricas/desempenho")
+async def metricas_desempenho():
+    """Métricas de desempenho: ocupação das filas dos executores, pool HTTP e caches"""
+    from pipeline_hospitais_goias import obter_metricas_contexto_rag
+    return {
+        "executores": obter_metricas_executores(),
+        "biobert": obter_metricas_biobert() if BIOBERT_DISPONIVEL else None,
+        "cliente_http": cliente_http.metricas(),
+        "cache_contexto_rag": obter_metricas_contexto_rag(),
+        "triagem_etapas": pipeline_triagem.metricas.metricas(),
+        "fila_posicoes": indice_fila.status(),
+        "respostas_publicas": cache_respostas_publicas.metricas(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @app.post("/ms-ingestao/reconectar")
 async def reconectar_ms_ingestao():
     """
@@ -1569,11 +1554,13 @@ async def reconectar_ms_ingestao():
     _ms_ingestao_cache["offline_until"] = None
     
     # Tentar conectar
-    ms_status = verificar_ms_ingestao_status()
+    ms_status = await verificar_ms_ingestao_status()
     
     if ms_status["online"]:
-        # Buscar dados frescos
-        dados = buscar_dados_ms_ingestao()
+        # Buscar dados frescos (e já refletir no seletor de hospitais)
+        dados = await buscar_dados_ms_ingestao()
+        if dados and dados.get("hospitais"):
+            painel_ocupacao.publicar(dados["hospitais"], origem="MS-INGESTAO")
         return {
             "status": "conectado",
             "message": "MS-Ingestao reconectado com sucesso",
@@ -1604,7 +1591,7 @@ async def sincronizar_ocupacao_ms_ingestao():
     
     try:
         # Gerar dados de ocupação atuais
-        ocupacao_hospitais = gerar_ocupacao_hospitais_estaduais()
+        ocupacao_hospitais = await gerar_ocupacao_hospitais_estaduais()
         
         # Se já veio do MS-Ingestao, não precisa sincronizar
         if ocupacao_hospitais and ocupacao_hospitais[0].get('fonte_dados') == 'MS-INGESTAO':
@@ -1629,7 +1616,7 @@ async def sincronizar_ocupacao_ms_ingestao():
             })
         
         # Enviar para MS-Ingestao
-        response = requests.post(
+        response = await cliente_http.post(
             f"{MS_INGESTAO_URL}/ingerir-ocupacao-batch",
             json={"registros": registros},
             timeout=10
@@ -1652,7 +1639,7 @@ async def sincronizar_ocupacao_ms_ingestao():
                 "registros_enviados": 0
             }
             
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         logger.warning("⚠️ MS-Ingestao não disponível para sincronização")
         return {
             "status": "offline",
@@ -1734,17 +1721,8 @@ async def explicar_decisao_ia(request: ExplicacaoRequest):
         logger.error(f"❌ Erro ao gerar explicação: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao gerar explicação: {str(e)}")
 
-@app.get("/transparencia-modelo")
-async def transparencia_modelo():
-    """
-    Endpoint público de Transparência do Modelo
-    
-    Retorna informações detalhadas sobre os modelos de IA utilizados,
-    dados de treinamento e metodologia de decisão.
-    
-    Atende ao critério de IA Aberta do edital FAPEG.
-    """
-    
+def _transparencia_modelo() -> dict:
+    """Modelos, metodologia e auditabilidade (sem acesso ao banco)"""
     return {
         "modelos_utilizados": [
             {
@@ -1811,8 +1789,72 @@ async def transparencia_modelo():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/transparencia-modelo")
+async def transparencia_modelo():
+    """
+    Endpoint público de Transparência do Modelo
+    
+    Retorna informações detalhadas sobre os modelos de IA utilizados,
+    dados de treinamento e metodologia de decisão.
+    
+    Atende ao critério de IA Aberta do edital FAPEG.
+    """
+    
+    async def calcular():
+        return _transparencia_modelo()
+    
+    return await cache_respostas_publicas.obter_ou_calcular(
+        cache_respostas_publicas.chave("transparencia-modelo"), calcular
+    )
+
+def _calcular_metricas_impacto(db: Session) -> dict:
+    """Contagens e médias do banco (executada no executor de banco de dados)"""
+    # Buscar estatísticas do banco
+    total_pacientes = db.query(PacienteRegulacao).count()
+    aguardando_regulacao = db.query(PacienteRegulacao).filter(
+        PacienteRegulacao.status == 'AGUARDANDO_REGULACAO'
+    ).count()
+    em_transferencia = db.query(PacienteRegulacao).filter(
+        PacienteRegulacao.status == 'EM_TRANSFERENCIA'
+    ).count()
+
+    # Buscar decisões da IA
+    total_decisoes_ia = db.query(HistoricoDecisoes).count()
+
+    # Calcular tempo médio de processamento da IA
+    from sqlalchemy import func
+    tempo_medio = db.query(func.avg(HistoricoDecisoes.tempo_processamento)).scalar() or 0.15
+
+    return {
+        "metricas_operacionais": {
+            "total_pacientes_processados": total_pacientes,
+            "pacientes_aguardando_regulacao": aguardando_regulacao,
+            "pacientes_em_transferencia": em_transferencia,
+            "total_decisoes_ia": total_decisoes_ia
+        },
+        "metricas_performance_ia": {
+            "tempo_medio_analise_segundos": round(tempo_medio, 3),
+            "disponibilidade_sistema": "99.8%",
+            "taxa_fallback_ativado": "< 1%"
+        },
+        "impacto_estimado": {
+            "reducao_tempo_regulacao": "70%",
+            "tempo_antes_ia_horas": 4.5,
+            "tempo_com_ia_horas": 1.3,
+            "economia_estimada_mensal": "R$ 45.000,00",
+            "nota": "Valores estimados baseados em simulações. Validação real pendente."
+        },
+        "conformidade": {
+            "ia_aberta": True,
+            "modelos_auditaveis": True,
+            "decisao_final_humana": True,
+            "lgpd_compliant": True
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @app.get("/metricas-impacto")
-async def metricas_impacto(db: Session = Depends(get_db)):
+async def metricas_impacto():
     """
     Métricas de Impacto do Sistema
     
@@ -1823,50 +1865,14 @@ async def metricas_impacto(db: Session = Depends(get_db)):
     """
     
     try:
-        # Buscar estatísticas do banco
-        total_pacientes = db.query(PacienteRegulacao).count()
-        aguardando_regulacao = db.query(PacienteRegulacao).filter(
-            PacienteRegulacao.status == 'AGUARDANDO_REGULACAO'
-        ).count()
-        em_transferencia = db.query(PacienteRegulacao).filter(
-            PacienteRegulacao.status == 'EM_TRANSFERENCIA'
-        ).count()
-        
-        # Buscar decisões da IA
-        total_decisoes_ia = db.query(HistoricoDecisoes).count()
-        
-        # Calcular tempo médio de processamento da IA
-        from sqlalchemy import func
-        tempo_medio = db.query(func.avg(HistoricoDecisoes.tempo_processamento)).scalar() or 0.15
-        
-        return {
-            "metricas_operacionais": {
-                "total_pacientes_processados": total_pacientes,
-                "pacientes_aguardando_regulacao": aguardando_regulacao,
-                "pacientes_em_transferencia": em_transferencia,
-                "total_decisoes_ia": total_decisoes_ia
-            },
-            "metricas_performance_ia": {
-                "tempo_medio_analise_segundos": round(tempo_medio, 3),
-                "disponibilidade_sistema": "99.8%",
-                "taxa_fallback_ativado": "< 1%"
-            },
-            "impacto_estimado": {
-                "reducao_tempo_regulacao": "70%",
-                "tempo_antes_ia_horas": 4.5,
-                "tempo_com_ia_horas": 1.3,
-                "economia_estimada_mensal": "R$ 45.000,00",
-                "nota": "Valores estimados baseados em simulações. Validação real pendente."
-            },
-            "conformidade": {
-                "ia_aberta": True,
-                "modelos_auditaveis": True,
-                "decisao_final_humana": True,
-                "lgpd_compliant": True
-            },
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        return await cache_respostas_publicas.obter_ou_calcular(
+            cache_respostas_publicas.chave("metricas-impacto"),
+            lambda: executor_db.executar(_em_sessao_propria, _calcular_metricas_impacto),
+            tags=(TAG_AGREGADOS,)
+        )
         
+    except ExecutorSaturado:
+        raise
     except Exception as e:
         logger.error(f"Erro ao calcular métricas: {e}")
         return {
@@ -2067,22 +2073,25 @@ async def upload_documento_medico(
         # === PROCESSAR COM PIPELINE DE IA ===
         try:
             sys.path.append('microservices/shared')
-            from document_ai_service import processar_documento_medico
+            from document_ai_service import processar_documento_medico_async
             
             # Contexto do paciente para análise
             contexto = f"Paciente: {paciente.especialidade or 'N/A'}, CID: {paciente.cid or 'N/A'}"
             if paciente.prontuario_texto:
                 contexto += f", Quadro: {paciente.prontuario_texto[:200]}"
             
-            # Processar documento
-            resultado_ia = processar_documento_medico(
+            # Processar documento (OCR/BioBERT no executor de inferência, Llama pelo cliente HTTP)
+            resultado_ia = await processar_documento_medico_async(
                 image_data=conteudo,
                 filename=file.filename,
-                contexto_paciente=contexto
+                contexto_paciente=contexto,
+                executor=executor_inferencia
             )
             
             logger.info(f"✅ Documento processado: confiança {resultado_ia.get('confianca_geral', 0)}")
             
+        except ExecutorSaturado:
+            raise
         except ImportError as e:
             logger.warning(f"⚠️ Document AI Service não disponível: {e}")
             resultado_ia = {
@@ -2145,6 +2154,8 @@ async def upload_documento_medico(
             "mensagem": "Documento processado e anexado ao paciente com sucesso"
         }
         
+    except ExecutorSaturado:
+        raise
     except HTTPException:
         raise
     except Exception as e:
@@ -2186,11 +2197,12 @@ async def analisar_documento_ia(file: UploadFile = File(...)):
         # Processar com IA
         try:
             sys.path.append('microservices/shared')
-            from document_ai_service import processar_documento_medico
+            from document_ai_service import processar_documento_medico_async
             
-            resultado = processar_documento_medico(
+            resultado = await processar_documento_medico_async(
                 image_data=conteudo,
-                filename=file.filename
+                filename=file.filename,
+                executor=executor_inferencia
             )
             
             return {
@@ -2214,6 +2226,8 @@ async def analisar_documento_ia(file: UploadFile = File(...)):
                 }
             }
             
+    except ExecutorSaturado:
+        raise
     except HTTPException:
         raise
     except Exception as e:
@@ -2263,29 +2277,43 @@ async def obter_anexo_paciente(
 
 
 @app.get("/dashboard/leitos")
-async def get_dashboard_leitos(db: Session = Depends(get_db)):
-    """Dashboard público de leitos com dados reais processados e tendências do MS-Ingestao"""
+async def get_dashboard_leitos(
+    request: Request,
+    incluir_dados_brutos: bool = False,
+    offset: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    Dashboard público de leitos com dados reais processados e tendências do MS-Ingestao
+    
+    Os registros brutos não são mais enviados por padrão. Com incluir_dados_brutos=true
+    retorna uma página (offset/limit) de cada categoria; para navegar por uma categoria
+    use /dashboard/dados-brutos/{categoria}.
+    
+    A resposta traz ETag forte; com If-None-Match igual à versão atual retorna 304.
+    """
     
     # PRIORIZAR dados dos arquivos JSON (dados reais da SES-GO)
     try:
-        dashboard_data = processar_dados_json_dashboard()
-        
-        # Verificar fonte dos dados de ocupação
-        ocupacao = dashboard_data.get('ocupacao_hospitais', [])
-        fonte_ocupacao = "SIMULADO"
-        if ocupacao and len(ocupacao) > 0:
-            fonte_ocupacao = ocupacao[0].get('fonte_dados', 'SIMULADO')
-        
-        # Adicionar metadados sobre a fonte
-        dashboard_data['metadata'] = {
-            'fonte_ocupacao': fonte_ocupacao,
-            'ms_ingestao_ativo': fonte_ocupacao == 'MS-INGESTAO',
-            'tendencias_disponiveis': fonte_ocupacao == 'MS-INGESTAO',
-            'timestamp': datetime.utcnow().isoformat()
+        if not incluir_dados_brutos:
+            # Resposta pré-serializada por versão dos dados; 304 se o cliente já a possui
+            corpo, etag = await montar_resposta_dashboard()
+            return responder_com_etag(request, corpo, etag)
+        
+        snapshot = snapshot_dashboard.obter()
+        versao_ocupacao, ocupacao_hospitais = await obter_ocupacao_versionada()
+        dashboard_data = await processar_dados_json_dashboard(snapshot, ocupacao_hospitais)
+        dashboard_data["versao_ocupacao"] = versao_ocupacao
+        
+        limit = max(1, min(limit, 1000))
+        dashboard_data['dados_brutos'] = {
+            categoria: snapshot.pagina_dados_brutos(categoria, offset, limit)
+            for categoria in CATEGORIAS_DADOS_BRUTOS
         }
         
-        logger.info(f"Dashboard: {dashboard_data['total_registros']} registros, ocupação via {fonte_ocupacao}")
-        return dashboard_data
+        corpo = serializar_resposta_json(dashboard_data)
+        return responder_com_etag(request, corpo, gerar_etag(corpo))
         
     except Exception as e:
         logger.error(f"Erro ao processar arquivos JSON: {e}")
@@ -2335,6 +2363,99 @@ async def get_dashboard_leitos(db: Session = Depends(get_db)):
         "fonte": "fallback_simulado"
     }
 
+@app.get("/dashboard/dados-brutos/{categoria}")
+async def get_dashboard_dados_brutos(categoria: str, offset: int = 0, limit: int = 100):
+    """Registros brutos paginados de uma categoria do Portal da Transparência"""
+    if categoria not in CATEGORIAS_DADOS_BRUTOS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Categoria inválida. Use uma de: {', '.join(CATEGORIAS_DADOS_BRUTOS)}"
+        )
+    
+    limit = max(1, min(limit, 1000))
+    return snapshot_dashboard.obter().pagina_dados_brutos(categoria, offset, limit)
+
+@app.post("/dashboard/recarregar")
+async def recarregar_dashboard(current_user: Usuario = Depends(require_role(["ADMIN"]))):
+    """
+    Sinal de recarga do snapshot dos arquivos JSON (apenas ADMIN)
+    Chamado pelo atualizar_dados_transparencia.py após gravar novos dados
+    """
+    try:
+        snapshot = snapshot_dashboard.invalidar()
+        return {
+            "message": "Snapshot do dashboard recarregado",
+            "versao_dados": snapshot.versao,
+            "total_registros": snapshot.agregados["total_registros"],
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Erro ao recarregar snapshot do dashboard: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+@app.post("/catalogo-hospitais/recarregar")
+async def recarregar_catalogo_hospitais(current_user: Usuario = Depends(require_role(["ADMIN"]))):
+    """
+    Relê o catálogo de hospitais e publica a nova versão (apenas ADMIN)
+    A leitura do arquivo e a remontagem dos índices rodam no executor de I/O
+    (não ocupam vaga da inferência); requisições em andamento terminam com a
+    versão anterior
+    """
+    try:
+        anterior = catalogo_hospitais.obter()
+        snapshot = await executor_db.executar(catalogo_hospitais.recarregar, True)
+        return {
+            "message": "Catálogo de hospitais recarregado" if snapshot is not anterior else "Catálogo sem alterações",
+            "versao_anterior": anterior.versao,
+            "versao_catalogo": snapshot.versao,
+            "total_hospitais": len(snapshot.hospitais),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except ExecutorSaturado:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao recarregar catálogo de hospitais: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
+class RetriagemFilaRequest(BaseModel):
+    status: str = "AGUARDANDO_REGULACAO"
+    dry_run: bool = True
+    tamanho_lote: int = 500
+    max_diferencas: int = 100
+
+@app.post("/admin/retriagem-fila")
+async def retriagem_fila(
+    parametros: RetriagemFilaRequest,
+    current_user: Usuario = Depends(require_role(["ADMIN"]))
+):
+    """
+    Recalcula score_prioridade e classificacao_risco de toda a fila (após mudar
+    pesos de sintomas ou a tabela CID-10 de risco)
+    
+    Leitura em lotes por keyset e análise vetorizada (triagem_lote); em dry_run
+    (padrão) só retorna as diferenças, sem gravar. Roda no executor de banco
+    com sessão própria: a da requisição não é usada fora do event loop.
+    """
+    from triagem_lote import retriar_fila
+    
+    try:
+        resultado = await executor_db.executar(
+            _em_sessao_propria, retriar_fila, parametros.status, parametros.dry_run,
+            parametros.tamanho_lote, parametros.max_diferencas
+        )
+        if not parametros.dry_run and resultado["total_alterados"]:
+            # bulk_update_mappings não passa pelos eventos da sessão
+            await executor_db.executar(indice_fila.reconstruir)
+            cache_respostas_publicas.invalidar_tudo()
+        resultado["executado_por"] = current_user.email
+        resultado["timestamp"] = datetime.utcnow().isoformat()
+        return resultado
+    except ExecutorSaturado:
+        raise
+    except Exception as e:
+        logger.error(f"Erro na re-triagem da fila: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
+
 @app.post("/load-json-data")
 async def load_json_data(db: Session = Depends(get_db)):
     """Carrega dados dos arquivos JSON para o banco de dados"""
@@ -2421,11 +2542,32 @@ async def load_json_data(db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao carregar dados: {str(e)}")
 
+def _consulta_publica_paciente(db: Session, busca: str) -> dict:
+    """Busca por protocolo ou CPF e anonimiza (executada no executor de banco de dados)"""
+    # Tentar buscar por protocolo primeiro
+    paciente = db.query(PacienteRegulacao).filter(
+        PacienteRegulacao.protocolo == busca
+    ).first()
+
+    # Se não encontrou, tentar por CPF (remover formatação)
+    if not paciente:
+        cpf_limpo = ''.join(filter(str.isdigit, busca))
+        if cpf_limpo:
+            paciente = db.query(PacienteRegulacao).filter(
+                PacienteRegulacao.cpf == cpf_limpo
+            ).first()
+
+    if not paciente:
+        raise HTTPException(
+            status_code=404,
+            detail="Paciente não encontrado. Verifique o protocolo ou CPF informado."
+        )
+
+    # Retornar dados anonimizados
+    return anonimizar_paciente(paciente)
+
 @app.get("/consulta-publica/paciente/{busca}")
-async def consulta_publica_paciente(
-    busca: str,
-    db: Session = Depends(get_db)
-):
+async def consulta_publica_paciente(busca: str):
     """
     Consulta pública de paciente com dados anonimizados (LGPD Art. 12)
     Endpoint público - não requer autenticação
@@ -2435,28 +2577,15 @@ async def consulta_publica_paciente(
     - busca: Protocolo (ex: REG-2025-001) ou CPF (ex: 12345678901)
     """
     try:
-        # Tentar buscar por protocolo primeiro
-        paciente = db.query(PacienteRegulacao).filter(
-            PacienteRegulacao.protocolo == busca
-        ).first()
-        
-        # Se não encontrou, tentar por CPF (remover formatação)
-        if not paciente:
-            cpf_limpo = ''.join(filter(str.isdigit, busca))
-            if cpf_limpo:
-                paciente = db.query(PacienteRegulacao).filter(
-                    PacienteRegulacao.cpf == cpf_limpo
-                ).first()
-        
-        if not paciente:
-            raise HTTPException(
-                status_code=404,
-                detail="Paciente não encontrado. Verifique o protocolo ou CPF informado."
-            )
-        
-        # Retornar dados anonimizados
-        return anonimizar_paciente(paciente)
+        return await cache_respostas_publicas.obter_ou_calcular(
+            cache_respostas_publicas.chave("consulta-publica", busca),
+            lambda: executor_db.executar(_em_sessao_propria, _consulta_publica_paciente, busca),
+            tags=lambda resposta: (tag_paciente(resposta["protocolo"]),),
+            campos=CAMPOS_CONSULTA_PUBLICA
+        )
         
+    except ExecutorSaturado:
+        raise
     except HTTPException:
         raise
     except Exception as e:
@@ -2499,12 +2628,69 @@ async def get_pacientes(
 # ENDPOINTS - INTELIGÊNCIA ARTIFICIAL (MS-INTELLIGENCE)
 # ============================================================================
 
+def _persistir_decisao_regulacao(db: Session, paciente: PacienteInput, decisao: dict, tempo_processamento: float):
+    """Grava histórico e cria/atualiza o paciente (executado no executor de banco de dados)"""
+    historico = HistoricoDecisoes(
+        protocolo=paciente.protocolo,
+        decisao_ia=json.dumps(decisao),
+        tempo_processamento=tempo_processamento
+    )
+    db.add(historico)
+    
+    # Atualizar paciente se existir
+    paciente_db = db.query(PacienteRegulacao).filter(
+        PacienteRegulacao.protocolo == paciente.protocolo
+    ).first()
+    
+    if paciente_db:
+        if "analise_decisoria" in decisao:
+            paciente_db.score_prioridade = decisao["analise_decisoria"].get("score_prioridade")
+            paciente_db.classificacao_risco = decisao["analise_decisoria"].get("classificacao_risco")
+            paciente_db.justificativa_tecnica = decisao["analise_decisoria"].get("justificativa_clinica")
+        paciente_db.prontuario_texto = paciente.prontuario_texto
+        paciente_db.updated_at = datetime.utcnow()
+    else:
+        # Criar novo paciente se não existir (com valores padrão para campos obrigatórios)
+        # Status AGUARDANDO_REGULACAO para aparecer na fila do regulador
+        novo_paciente = PacienteRegulacao(
+            protocolo=paciente.protocolo,
+            nome_completo=paciente.nome_completo or "Não informado",
+            nome_mae=paciente.nome_mae or "Não informado",
+            cpf=paciente.cpf or "00000000000",
+            telefone_contato=paciente.telefone_contato or "00000000000",
+            data_solicitacao=datetime.utcnow(),
+            status='AGUARDANDO_REGULACAO',  # Corrigido: deve ser AGUARDANDO_REGULACAO
+            especialidade=paciente.especialidade,
+            cid=paciente.cid,
+            cid_desc=paciente.cid_desc,
+            prontuario_texto=paciente.prontuario_texto,
+            historico_paciente=paciente.historico_paciente,
+            prioridade_descricao=paciente.prioridade_descricao,
+            score_prioridade=decisao["analise_decisoria"].get("score_prioridade"),
+            classificacao_risco=decisao["analise_decisoria"].get("classificacao_risco"),
+            justificativa_tecnica=decisao["analise_decisoria"].get("justificativa_clinica"),
+            unidade_destino=decisao["analise_decisoria"].get("unidade_destino_sugerida")
+        )
+        db.add(novo_paciente)
+    
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
 @app.post("/processar-regulacao")
 async def processar_regulacao_ia(
     paciente: PacienteInput,
     db: Session = Depends(get_db)
 ):
-    """Processamento com IA Inteligente - SEMPRE FUNCIONA"""
+    """
+    Processamento com IA Inteligente - SEMPRE FUNCIONA
+    
+    A análise (BioBERT, pipeline de hospitais, matchmaker) roda no executor de
+    inferência e a gravação no executor de banco de dados, sem bloquear o event
+    loop. Com a fila de inferência cheia retorna 503 com Retry-After.
+    """
     start_time = time.time()
     
     if not paciente.cid:
@@ -2524,56 +2710,12 @@ async def processar_regulacao_ia(
             'prioridade_descricao': paciente.prioridade_descricao or 'Normal'
         }
         
-        # Chamar IA inteligente diretamente
-        decisao = analisar_com_ia_inteligente(paciente_data)
+        # Análise da IA no executor de inferência
+        decisao = await executor_inferencia.executar(analisar_com_ia_inteligente, paciente_data)
         
-        # Salvar no histórico
+        # Salvar no histórico e atualizar/criar paciente no executor de banco de dados
         tempo_processamento = time.time() - start_time
-        
-        historico = HistoricoDecisoes(
-            protocolo=paciente.protocolo,
-            decisao_ia=json.dumps(decisao),
-            tempo_processamento=tempo_processamento
-        )
-        db.add(historico)
-        
-        # Atualizar paciente se existir
-        paciente_db = db.query(PacienteRegulacao).filter(
-            PacienteRegulacao.protocolo == paciente.protocolo
-        ).first()
-        
-        if paciente_db:
-            if "analise_decisoria" in decisao:
-                paciente_db.score_prioridade = decisao["analise_decisoria"].get("score_prioridade")
-                paciente_db.classificacao_risco = decisao["analise_decisoria"].get("classificacao_risco")
-                paciente_db.justificativa_tecnica = decisao["analise_decisoria"].get("justificativa_clinica")
-            paciente_db.prontuario_texto = paciente.prontuario_texto
-            paciente_db.updated_at = datetime.utcnow()
-        else:
-            # Criar novo paciente se não existir (com valores padrão para campos obrigatórios)
-            # Status AGUARDANDO_REGULACAO para aparecer na fila do regulador
-            novo_paciente = PacienteRegulacao(
-                protocolo=paciente.protocolo,
-                nome_completo=paciente.nome_completo or "Não informado",
-                nome_mae=paciente.nome_mae or "Não informado",
-                cpf=paciente.cpf or "00000000000",
-                telefone_contato=paciente.telefone_contato or "00000000000",
-                data_solicitacao=datetime.utcnow(),
-                status='AGUARDANDO_REGULACAO',  # Corrigido: deve ser AGUARDANDO_REGULACAO
-                especialidade=paciente.especialidade,
-                cid=paciente.cid,
-                cid_desc=paciente.cid_desc,
-                prontuario_texto=paciente.prontuario_texto,
-                historico_paciente=paciente.historico_paciente,
-                prioridade_descricao=paciente.prioridade_descricao,
-                score_prioridade=decisao["analise_decisoria"].get("score_prioridade"),
-                classificacao_risco=decisao["analise_decisoria"].get("classificacao_risco"),
-                justificativa_tecnica=decisao["analise_decisoria"].get("justificativa_clinica"),
-                unidade_destino=decisao["analise_decisoria"].get("unidade_destino_sugerida")
-            )
-            db.add(novo_paciente)
-        
-        db.commit()
+        await executor_db.executar(_persistir_decisao_regulacao, db, paciente, decisao, tempo_processamento)
         
         # Adicionar metadados à resposta
         decisao["metadata"]["tempo_processamento"] = tempo_processamento
@@ -2584,6 +2726,8 @@ async def processar_regulacao_ia(
         
         return decisao
         
+    except ExecutorSaturado:
+        raise
     except Exception as e:
         logger.error(f"Erro no processamento: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
@@ -0,0 +1,490 @@
+"""
+COMPACTADOR DO HISTÓRICO DE OCUPAÇÃO - MS-INGESTAO
+Camadas de retenção de historico_ocupacao, para que gráficos de longo prazo
+não leiam todas as leituras brutas e a tabela não cresça indefinidamente
+
+- bruto: leituras originais, mantidas por HISTORICO_RETENCAO_BRUTO_HORAS (48h)
+- 15min: min/máx/média/última por intervalo de 15 minutos, mantidos por
+  HISTORICO_RETENCAO_15MIN_DIAS (90 dias)
+- 1h: mesmos agregados por hora, mantidos por HISTORICO_RETENCAO_1H_DIAS (0 = sem limite)
+
+A compactação agrega apenas intervalos fechados e só remove dados de uma camada
+depois que a camada seguinte os cobre. As marcas d'água vêm do próprio banco
+(último intervalo agregado), então a tarefa pode ser reiniciada a qualquer momento;
+os últimos HISTORICO_RECOMPACTAR_HORAS são refeitos a cada execução para incluir
+leituras recebidas com atraso.
+
+Leituras retroativas (data_coleta informada pela fonte) também são agregadas:
+- mais antigas que a retenção bruta: lidas com id, somadas ao intervalo de 15 min
+  (ou de 1 hora, além da retenção de 15 min) e só então removidas, pelos mesmos ids;
+- entre a retenção bruta e a janela de recompactação: séries cuja contagem de
+  leituras difere da soma de amostras dos intervalos são reagregadas.
+Um intervalo existente é substituído quando ainda tem todas as suas leituras na
+origem (a última agregada continua lá) e somado às novas quando elas já foram removidas.
+"""
+
+import os
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from shared.database import SessionLocal, HistoricoOcupacao, HistoricoOcupacaoAgregado
+
+logger = logging.getLogger(__name__)
+
+HISTORICO_RETENCAO_BRUTO_HORAS = float(os.getenv("HISTORICO_RETENCAO_BRUTO_HORAS", "48"))
+HISTORICO_RETENCAO_15MIN_DIAS = float(os.getenv("HISTORICO_RETENCAO_15MIN_DIAS", "90"))
+HISTORICO_RETENCAO_1H_DIAS = float(os.getenv("HISTORICO_RETENCAO_1H_DIAS", "0"))
+HISTORICO_COMPACTACAO_INTERVALO_S = float(os.getenv("HISTORICO_COMPACTACAO_INTERVALO_S", "300"))
+HISTORICO_RECOMPACTAR_HORAS = float(os.getenv("HISTORICO_RECOMPACTAR_HORAS", "2"))
+
+# Pontos desejados em /historico quando a resolução não é informada
+HISTORICO_PONTOS_ALVO = int(os.getenv("HISTORICO_PONTOS_ALVO", "200"))
+
+# Parâmetros por comando em IN (...) (limite de variáveis do SQLite)
+LOTE_IDS = 5000
+
+
+class Camada(NamedTuple):
+    nome: str
+    resolucao_min: int  # 0 = leituras brutas
+    retencao: Optional[timedelta]  # None = sem limite
+
+
+CAMADAS: Tuple[Camada, ...] = (
+    Camada("bruto", 0, timedelta(hours=HISTORICO_RETENCAO_BRUTO_HORAS)),
+    Camada("15min", 15, timedelta(days=HISTORICO_RETENCAO_15MIN_DIAS)),
+    Camada("1h", 60, timedelta(days=HISTORICO_RETENCAO_1H_DIAS) if HISTORICO_RETENCAO_1H_DIAS > 0 else None),
+)
+
+
+def inicio_intervalo(data: datetime, resolucao_min: int) -> datetime:
+    """Início do intervalo de `resolucao_min` minutos (divisor de 60) que contém `data`"""
+    return data - timedelta(minutes=data.minute % resolucao_min, seconds=data.second, microseconds=data.microsecond)
+
+
+def escolher_camada(inicio: datetime, resolucao_min: Optional[float] = None,
+                    agora: Optional[datetime] = None) -> Camada:
+    """
+    Camada mais grossa que ainda atende à resolução pedida
+
+    Sem resolução, usa a que dá cerca de HISTORICO_PONTOS_ALVO pontos no período.
+    Se a camada não guarda dados tão antigos quanto `inicio`, passa para a seguinte.
+    """
+    agora = agora or datetime.utcnow()
+    if resolucao_min is None:
+        resolucao_min = (agora - inicio).total_seconds() / 60 / HISTORICO_PONTOS_ALVO
+
+    indice = max(i for i, camada in enumerate(CAMADAS) if camada.resolucao_min <= resolucao_min)
+    while indice < len(CAMADAS) - 1 and CAMADAS[indice].retencao is not None \
+            and inicio < agora - CAMADAS[indice].retencao:
+        indice += 1
+    return CAMADAS[indice]
+
+
+class AcumuladorIntervalo:
+    """min/máx/média/última de um intervalo, a partir de leituras ou de intervalos menores"""
+
+    __slots__ = ("minimo", "maximo", "soma", "amostras", "ultima", "ultima_coleta", "coletas")
+
+    def __init__(self):
+        self.minimo = float("inf")
+        self.maximo = float("-inf")
+        self.soma = 0.0
+        self.amostras = 0
+        self.ultima = None
+        self.ultima_coleta = None
+        self.coletas: Set[datetime] = set()  # horário da última leitura de cada origem
+
+    def adicionar(self, minimo: float, maximo: float, media: float, amostras: int, ultima_coleta: datetime, ultima: Any):
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+        self.soma += media * amostras
+        self.amostras += amostras
+        self.coletas.add(ultima_coleta)
+        if self.ultima_coleta is None or ultima_coleta >= self.ultima_coleta:
+            self.ultima_coleta, self.ultima = ultima_coleta, ultima
+
+    def linha(self, resolucao_min: int, unidade_id: str, tipo_leito: str, inicio: datetime) -> Dict[str, Any]:
+        return {
+            "resolucao_min": resolucao_min,
+            "unidade_id": unidade_id,
+            "unidade_nome": self.ultima.unidade_nome,
+            "tipo_leito": tipo_leito,
+            "inicio_intervalo": inicio,
+            "ocupacao_min": self.minimo,
+            "ocupacao_max": self.maximo,
+            "ocupacao_media": round(self.soma / self.amostras, 2),
+            "ocupacao_ultima": self.ultima.ocupacao,
+            "leitos_totais": self.ultima.leitos_totais,
+            "leitos_ocupados": self.ultima.leitos_ocupados,
+            "leitos_disponiveis": self.ultima.leitos_disponiveis,
+            "amostras": self.amostras,
+            "ultima_coleta": self.ultima_coleta,
+            "fonte_dados": self.ultima.fonte_dados
+        }
+
+
+class CompactadorHistorico:
+    """Agregação em camadas e retenção de historico_ocupacao"""
+
+    def __init__(self):
+        self.execucoes = 0
+        self.ultima_execucao: Optional[datetime] = None
+        self.ultimo_resultado: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _marca_dagua(db: Session, resolucao_min: int) -> Optional[datetime]:
+        """Fim do último intervalo agregado nesta resolução"""
+        ultimo = db.query(func.max(HistoricoOcupacaoAgregado.inicio_intervalo)).filter(
+            HistoricoOcupacaoAgregado.resolucao_min == resolucao_min
+        ).scalar()
+        return ultimo + timedelta(minutes=resolucao_min) if ultimo else None
+
+    def _inicio_recompactacao(self, marca: Optional[datetime], mais_antigo: Optional[datetime],
+                              resolucao_min: int) -> Optional[datetime]:
+        # Nunca antes do dado mais antigo da camada de origem: intervalos anteriores já perderam leituras
+        if mais_antigo is None:
+            return None
+        desde = inicio_intervalo(mais_antigo, resolucao_min)
+        if marca is not None:
+            desde = max(desde, inicio_intervalo(marca - timedelta(hours=HISTORICO_RECOMPACTAR_HORAS), resolucao_min))
+        return desde
+
+    def _gravar(self, db: Session, resolucao_min: int, desde: datetime, ate: datetime,
+                acumuladores: Dict[Tuple[str, str, datetime], AcumuladorIntervalo]) -> int:
+        """Substitui os intervalos [desde, ate) da resolução pelos recém-calculados"""
+        db.query(HistoricoOcupacaoAgregado).filter(
+            HistoricoOcupacaoAgregado.resolucao_min == resolucao_min,
+            HistoricoOcupacaoAgregado.inicio_intervalo >= desde,
+            HistoricoOcupacaoAgregado.inicio_intervalo < ate
+        ).delete(synchronize_session=False)
+        linhas = [
+            acumulador.linha(resolucao_min, unidade_id, tipo_leito, inicio)
+            for (unidade_id, tipo_leito, inicio), acumulador in acumuladores.items()
+        ]
+        db.bulk_insert_mappings(HistoricoOcupacaoAgregado, linhas)
+        return len(linhas)
+
+    def _consolidar(self, db: Session, resolucao_min: int,
+                    acumuladores: Dict[Tuple[str, str, datetime], AcumuladorIntervalo]) -> Tuple[int, Set[datetime]]:
+        """
+        Grava intervalos fora da janela de recompactação, comparando com os já agregados
+
+        O intervalo existente é substituído se ainda tem todas as leituras na origem
+        (a última que ele agregou está entre as lidas agora); senão as lidas agora
+        chegaram depois que as anteriores foram removidas e são somadas a ele.
+
+        Returns:
+            (intervalos gravados, inícios dos intervalos gravados)
+        """
+        if not acumuladores:
+            return 0, set()
+        A = HistoricoOcupacaoAgregado
+        inicios = sorted({inicio for _, _, inicio in acumuladores})
+        existentes = {}
+        for i in range(0, len(inicios), LOTE_IDS):
+            for intervalo in self._intervalos(db, resolucao_min, A.inicio_intervalo.in_(inicios[i:i + LOTE_IDS])):
+                existentes[(intervalo.unidade_id, intervalo.tipo_leito, intervalo.inicio_intervalo)] = intervalo
+
+        substituidos, linhas = [], []
+        for chave, acumulador in acumuladores.items():
+            existente = existentes.get(chave)
+            if existente is not None:
+                if existente.ultima_coleta in acumulador.coletas and existente.amostras <= acumulador.amostras:
+                    if existente.amostras == acumulador.amostras:
+                        continue  # mesmas leituras: intervalo já agregado
+                else:
+                    acumulador.adicionar(existente.ocupacao_min, existente.ocupacao_max, existente.ocupacao_media,
+                                         existente.amostras, existente.ultima_coleta, existente)
+                substituidos.append(existente.id)
+            linhas.append(acumulador.linha(resolucao_min, *chave))
+
+        self._remover_ids(db, A, substituidos)
+        db.bulk_insert_mappings(A, linhas)
+        return len(linhas), {linha["inicio_intervalo"] for linha in linhas}
+
+    @staticmethod
+    def _remover_ids(db: Session, modelo: Any, ids: List[int]) -> int:
+        removidos = 0
+        for i in range(0, len(ids), LOTE_IDS):
+            removidos += db.query(modelo).filter(modelo.id.in_(ids[i:i + LOTE_IDS])).delete(synchronize_session=False)
+        return removidos
+
+    @staticmethod
+    def _leituras(db: Session, *filtros) -> Iterable[Any]:
+        """Leituras brutas na ordem de coleta (ocupacao = ocupacao_percentual, como nos intervalos)"""
+        H = HistoricoOcupacao
+        return db.query(
+            H.id, H.unidade_id, H.unidade_nome, H.tipo_leito, H.ocupacao_percentual.label("ocupacao"),
+            H.leitos_totais, H.leitos_ocupados, H.leitos_disponiveis, H.data_coleta, H.fonte_dados
+        ).filter(*filtros).order_by(H.data_coleta, H.id).yield_per(10000)
+
+    @staticmethod
+    def _intervalos(db: Session, resolucao_min: int, *filtros) -> Iterable[Any]:
+        """Intervalos agregados de uma resolução (ocupacao = ocupacao_ultima, como nas leituras)"""
+        A = HistoricoOcupacaoAgregado
+        return db.query(
+            A.id, A.unidade_id, A.unidade_nome, A.tipo_leito, A.inicio_intervalo, A.ocupacao_min, A.ocupacao_max,
+            A.ocupacao_media, A.ocupacao_ultima.label("ocupacao"), A.amostras, A.ultima_coleta,
+            A.leitos_totais, A.leitos_ocupados, A.leitos_disponiveis, A.fonte_dados
+        ).filter(A.resolucao_min == resolucao_min, *filtros).yield_per(10000)
+
+    @staticmethod
+    def _acumulador(acumuladores: Dict[Tuple[str, str, datetime], AcumuladorIntervalo],
+                    unidade_id: str, tipo_leito: str, inicio: datetime) -> AcumuladorIntervalo:
+        chave = (unidade_id, tipo_leito, inicio)
+        acumulador = acumuladores.get(chave)
+        if acumulador is None:
+            acumulador = acumuladores[chave] = AcumuladorIntervalo()
+        return acumulador
+
+    def _acumular_leitura(self, acumuladores: Dict, leitura: Any, resolucao_min: int):
+        if leitura.ocupacao is None:
+            return
+        self._acumulador(acumuladores, leitura.unidade_id, leitura.tipo_leito,
+                         inicio_intervalo(leitura.data_coleta, resolucao_min)).adicionar(
+            leitura.ocupacao, leitura.ocupacao, leitura.ocupacao, 1, leitura.data_coleta, leitura)
+
+    def _acumular_intervalo(self, acumuladores: Dict, intervalo: Any, resolucao_min: int):
+        self._acumulador(acumuladores, intervalo.unidade_id, intervalo.tipo_leito,
+                         inicio_intervalo(intervalo.inicio_intervalo, resolucao_min)).adicionar(
+            intervalo.ocupacao_min, intervalo.ocupacao_max, intervalo.ocupacao_media,
+            intervalo.amostras, intervalo.ultima_coleta, intervalo)
+
+    @staticmethod
+    def _series_pendentes(db: Session, desde: datetime, ate: datetime) -> List[Tuple[str, str]]:
+        """Séries com leituras em [desde, ate) que os intervalos de 15 minutos não contam"""
+        if desde >= ate:
+            return []
+        H, A = HistoricoOcupacao, HistoricoOcupacaoAgregado
+        leituras = db.query(H.unidade_id, H.tipo_leito, func.count(H.ocupacao_percentual)).filter(
+            H.data_coleta >= desde, H.data_coleta < ate
+        ).group_by(H.unidade_id, H.tipo_leito).all()
+        amostras = {
+            (unidade_id, tipo_leito): total
+            for unidade_id, tipo_leito, total in db.query(A.unidade_id, A.tipo_leito, func.sum(A.amostras)).filter(
+                A.resolucao_min == CAMADAS[1].resolucao_min, A.inicio_intervalo >= desde, A.inicio_intervalo < ate
+            ).group_by(A.unidade_id, A.tipo_leito)
+        }
+        return [(unidade_id, tipo_leito) for unidade_id, tipo_leito, total in leituras
+                if total != (amostras.get((unidade_id, tipo_leito)) or 0)]
+
+    def _agregar_brutos(self, db: Session, agora: datetime,
+                        lidas_antigas: List[int]) -> Tuple[int, Set[datetime], Dict]:
+        """
+        Leituras brutas -> intervalos de 15 minutos
+
+        Ids das leituras além da retenção bruta vão para `lidas_antigas` (removidas
+        pela retenção depois de agregadas); as além da retenção de 15 minutos são
+        acumuladas por hora, para _consolidar depois dos intervalos de 1 hora.
+
+        Returns:
+            (intervalos gravados, inícios dos intervalos alterados fora da janela, acumuladores por hora)
+        """
+        bruto, quinze, hora = CAMADAS
+        resolucao = quinze.resolucao_min
+        H = HistoricoOcupacao
+        desde = self._inicio_recompactacao(
+            self._marca_dagua(db, resolucao), db.query(func.min(H.data_coleta)).scalar(), resolucao)
+        if desde is None:
+            return 0, set(), {}
+        ate = inicio_intervalo(agora, resolucao)
+        corte = inicio_intervalo(agora - bruto.retencao, resolucao)
+        corte_quinze = inicio_intervalo(agora - quinze.retencao, hora.resolucao_min)
+        desde = min(max(desde, corte), ate)
+
+        # Janela de recompactação: todos os intervalos refeitos a partir das leituras
+        gravados = 0
+        if desde < ate:
+            acumuladores = {}
+            for leitura in self._leituras(db, H.data_coleta >= desde, H.data_coleta < ate):
+                self._acumular_leitura(acumuladores, leitura, resolucao)
+            gravados = self._gravar(db, resolucao, desde, ate, acumuladores)
+
+        # Entre o corte da retenção e a janela: só séries com leituras retroativas
+        acumuladores = {}
+        for unidade_id, tipo_leito in self._series_pendentes(db, corte, desde):
+            for leitura in self._leituras(db, H.unidade_id == unidade_id, H.tipo_leito == tipo_leito,
+                                          H.data_coleta >= corte, H.data_coleta < desde):
+                self._acumular_leitura(acumuladores, leitura, resolucao)
+
+        # Além da retenção: vencidas desde a última execução ou retroativas
+        horas_antigas = {}
+        for leitura in self._leituras(db, H.data_coleta < corte):
+            lidas_antigas.append(leitura.id)
+            if leitura.data_coleta >= corte_quinze:
+                self._acumular_leitura(acumuladores, leitura, resolucao)
+            else:
+                self._acumular_leitura(horas_antigas, leitura, hora.resolucao_min)
+
+        consolidados, alterados = self._consolidar(db, resolucao, acumuladores)
+        return gravados + consolidados, alterados, horas_antigas
+
+    def _agregar_intervalos(self, db: Session, alterados: Set[datetime]) -> int:
+        """
+        Intervalos de 15 minutos -> intervalos de 1 hora (apenas horas com os 15 min já fechados)
+
+        Além da janela de recompactação, refaz as horas de `alterados` (intervalos
+        de 15 min com leituras retroativas).
+        """
+        origem, destino = CAMADAS[1].resolucao_min, CAMADAS[2].resolucao_min
+        A = HistoricoOcupacaoAgregado
+        marca_origem = self._marca_dagua(db, origem)
+        if marca_origem is None:
+            return 0
+        mais_antigo = db.query(func.min(A.inicio_intervalo)).filter(A.resolucao_min == origem).scalar()
+        desde = self._inicio_recompactacao(self._marca_dagua(db, destino), mais_antigo, destino)
+        ate = inicio_intervalo(marca_origem, destino)
+
+        janelas = []
+        if desde is not None and desde < ate:
+            janelas.append((desde, ate))
+        limite = janelas[0][0] if janelas else ate
+        duracao = timedelta(minutes=destino)
+        janelas.extend(
+            (inicio, inicio + duracao)
+            for inicio in sorted({inicio_intervalo(alterado, destino) for alterado in alterados})
+            if inicio < limite
+        )
+
+        gravados = 0
+        for inicio, fim in janelas:
+            acumuladores: Dict[Tuple[str, str, datetime], AcumuladorIntervalo] = {}
+            for intervalo in self._intervalos(db, origem, A.inicio_intervalo >= inicio, A.inicio_intervalo < fim):
+                self._acumular_intervalo(acumuladores, intervalo, destino)
+            gravados += self._gravar(db, destino, inicio, fim, acumuladores)
+        return gravados
+
+    def _aplicar_retencao(self, db: Session, agora: datetime, lidas_antigas: List[int]) -> Dict[str, int]:
+        """Remove o que passou da retenção de cada camada e já está coberto pela camada seguinte"""
+        removidos = {}
+        bruto, quinze, hora = CAMADAS
+
+        # Pelos ids agregados nesta execução: leituras gravadas durante a compactação ficam para a próxima
+        removidos[bruto.nome] = self._remover_ids(db, HistoricoOcupacao, lidas_antigas)
+
+        marca_hora = self._marca_dagua(db, hora.resolucao_min)
+        corte = inicio_intervalo(agora - quinze.retencao, hora.resolucao_min)
+        removidos[quinze.nome] = db.query(HistoricoOcupacaoAgregado).filter(
+            HistoricoOcupacaoAgregado.resolucao_min == quinze.resolucao_min,
+            HistoricoOcupacaoAgregado.inicio_intervalo < min(corte, marca_hora)
+        ).delete(synchronize_session=False) if marca_hora else 0
+
+        removidos[hora.nome] = db.query(HistoricoOcupacaoAgregado).filter(
+            HistoricoOcupacaoAgregado.resolucao_min == hora.resolucao_min,
+            HistoricoOcupacaoAgregado.inicio_intervalo < agora - hora.retencao
+        ).delete(synchronize_session=False) if hora.retencao else 0
+        return removidos
+
+    def compactar(self, agora: Optional[datetime] = None) -> Dict[str, Any]:
+        """Uma execução completa (agregação + retenção) em uma transação"""
+        agora = agora or datetime.utcnow()
+        inicio = time.perf_counter()
+        lidas_antigas: List[int] = []
+        db = SessionLocal()
+        try:
+            intervalos_15min, alterados, horas_antigas = self._agregar_brutos(db, agora, lidas_antigas)
+            db.flush()
+            intervalos_1h = self._agregar_intervalos(db, alterados)
+            db.flush()
+            intervalos_1h += self._consolidar(db, CAMADAS[2].resolucao_min, horas_antigas)[0]
+            removidos = self._aplicar_retencao(db, agora, lidas_antigas)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        resultado = {
+            "intervalos_15min_gravados": intervalos_15min,
+            "intervalos_1h_gravados": intervalos_1h,
+            "removidos": removidos,
+            "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2)
+        }
+        self.execucoes += 1
+        self.ultima_execucao = agora
+        self.ultimo_resultado = resultado
+        logger.info(f"✅ Histórico compactado: {intervalos_15min} intervalos de 15 min, {intervalos_1h} de 1h, "
+                    f"removidos {removidos} ({resultado['tempo_ms']}ms)")
+        return resultado
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "camadas": [
+                {
+                    "nome": camada.nome,
+                    "resolucao_min": camada.resolucao_min,
+                    "retencao_horas": camada.retencao.total_seconds() / 3600 if camada.retencao else None
+                }
+                for camada in CAMADAS
+            ],
+            "intervalo_s": HISTORICO_COMPACTACAO_INTERVALO_S,
+            "execucoes": self.execucoes,
+            "ultima_execucao": self.ultima_execucao.isoformat() if self.ultima_execucao else None,
+            "ultimo_resultado": self.ultimo_resultado
+        }
+
+
+# Instância global
+compactador_historico = CompactadorHistorico()
+
+
+def consultar_historico(db: Session, unidade_id: str, inicio: datetime, resolucao_min: Optional[float] = None,
+                        tipo_leito: Optional[str] = None) -> Tuple[Camada, List[Dict[str, Any]]]:
+    """
+    Histórico de uma unidade desde `inicio` na camada escolhida por escolher_camada
+
+    Camadas agregadas têm apenas intervalos fechados até a última compactação.
+    Registros do mais recente para o mais antigo.
+    """
+    camada = escolher_camada(inicio, resolucao_min)
+
+    if camada.resolucao_min == 0:
+        H = HistoricoOcupacao
+        query = db.query(H).filter(H.unidade_id == unidade_id, H.data_coleta >= inicio)
+        if tipo_leito:
+            query = query.filter(H.tipo_leito == tipo_leito)
+        return camada, [
+            {
+                "id": h.id,
+                "data_coleta": h.data_coleta.isoformat(),
+                "ocupacao_percentual": h.ocupacao_percentual,
+                "leitos_totais": h.leitos_totais,
+                "leitos_ocupados": h.leitos_ocupados,
+                "leitos_disponiveis": h.leitos_disponiveis,
+                "tipo_leito": h.tipo_leito,
+                "fonte_dados": h.fonte_dados
+            }
+            for h in query.order_by(H.data_coleta.desc()).all()
+        ]
+
+    A = HistoricoOcupacaoAgregado
+    query = db.query(A).filter(
+        A.unidade_id == unidade_id,
+        A.resolucao_min == camada.resolucao_min,
+        A.inicio_intervalo >= inicio_intervalo(inicio, camada.resolucao_min)
+    )
+    if tipo_leito:
+        query = query.filter(A.tipo_leito == tipo_leito)
+    return camada, [
+        {
+            "data_coleta": a.inicio_intervalo.isoformat(),
+            "ocupacao_percentual": a.ocupacao_media,
+            "ocupacao_min": a.ocupacao_min,
+            "ocupacao_max": a.ocupacao_max,
+            "ocupacao_ultima": a.ocupacao_ultima,
+            "amostras": a.amostras,
+            "leitos_totais": a.leitos_totais,
+            "leitos_ocupados": a.leitos_ocupados,
+            "leitos_disponiveis": a.leitos_disponiveis,
+            "tipo_leito": a.tipo_leito,
+            "fonte_dados": a.fonte_dados
+        }
+        for a in query.order_by(A.inicio_intervalo.desc(), A.tipo_leito).all()
+    ]
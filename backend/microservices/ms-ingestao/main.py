@@ -4,23 +4,38 @@ Responsável por: Memória de curto prazo do sistema, histórico de ocupação,
 Atua como a "Memória de Curto Prazo" do ecossistema de regulação
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from sqlalchemy import Column, Integer, String, Float, DateTime, desc
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Column, Integer, String, Float, DateTime, func, inspect
 from pydantic import BaseModel
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 import sys
 import os
+import csv
+import json
+import time
+import asyncio
 import logging
 
 # Adicionar path para módulos compartilhados
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.database import get_db, Base, engine, SessionLocal, HistoricoOcupacao
+from shared.database import get_db, Base, engine, SessionLocal, HistoricoOcupacao, HistoricoOcupacaoAgregado, OcupacaoAtual
+from shared.executores import executor_db, ExecutorSaturado
 from shared.auth import get_current_user, Usuario
 from shared.utils import setup_logging
+from motor_tendencia import (
+    motor_tendencia, tendencia_de_historico, LeituraOcupacao,
+    TENDENCIA_JANELA_HORAS, TENDENCIA_RECONSTRUCAO_S, TENDENCIA_EWMA_MEIA_VIDA_MIN, LIMIAR_VARIACAO
+)
+from compactador_historico import (
+    compactador_historico, consultar_historico, inicio_intervalo, CAMADAS, HISTORICO_COMPACTACAO_INTERVALO_S
+)
+from ocupacao_atual import (
+    COLUNAS_INSERIDAS, insert_dialeto, leitura_inserida, atualizar_ocupacao_atual, reconstruir_ocupacao_atual
+)
 
 # Configurar logging
 logger = setup_logging("MS-Ingestao")
@@ -60,6 +75,7 @@ class OcupacaoInput(BaseModel):
     leitos_ocupados: int
     leitos_disponiveis: int
     fonte_dados: Optional[str] = "SCRAPER"
+    data_coleta: Optional[datetime] = None  # Horário da coleta na fonte (padrão: recebimento)
 
 class OcupacaoBatchInput(BaseModel):
     registros: List[OcupacaoInput]
@@ -82,56 +98,196 @@ class HospitalTendencia(BaseModel):
 
 def calcular_tendencia(historico_leitos: List[HistoricoOcupacao]) -> Dict[str, Any]:
     """
-    Calcula tendência de ocupação baseado no histórico das últimas 6 horas
-    
+    Calcula tendência de ocupação de um histórico lido do banco
+
+    Mesmas contas do motor de tendência (regressão linear sobre os horários
+    reais das leituras); usado quando o motor ainda não foi reconstruído.
+
     Returns:
         Dict com tendência (ALTA, QUEDA, ESTAVEL), variação e previsão
     """
-    if len(historico_leitos) < 2:
-        return {
-            "tendencia": "ESTAVEL",
-            "variacao": 0.0,
-            "previsao_saturacao_min": None,
-            "dados_insuficientes": True
-        }
-    
-    # Ordenar por data (mais antigo primeiro)
-    historico_ordenado = sorted(historico_leitos, key=lambda x: x.data_coleta)
-    
-    # Pegar primeiro (6h atrás) e último (atual)
-    primeira_leitura = historico_ordenado[0].ocupacao_percentual
-    ultima_leitura = historico_ordenado[-1].ocupacao_percentual
-    
-    # Calcular variação
-    variacao = ultima_leitura - primeira_leitura
-    
-    # Determinar tendência
-    if variacao > 5:
-        tendencia = "ALTA"
-    elif variacao < -5:
-        tendencia = "QUEDA"
+    return tendencia_de_historico(historico_leitos)
+
+
+# Janela de tendência de /api/v1/inteligencia/hospitais-disponiveis
+JANELA_ANALISE_HORAS = TENDENCIA_JANELA_HORAS
+PONTOS_TENDENCIA = 12  # leituras mais antigas da janela usadas em calcular_tendencia
+
+
+def buscar_janela_ocupacao(db: Session, janela_inicio: datetime, tipo_leito: Optional[str] = None,
+                           pontos_tendencia: int = PONTOS_TENDENCIA) -> List[tuple]:
+    """
+    Último registro e pontos de tendência de cada unidade
+
+    O estado atual vem de ocupacao_atual (uma linha por unidade/tipo de leito);
+    os pontos de tendência, de uma consulta com ROW_NUMBER() por unidade (as
+    primeiras `pontos_tendencia` leituras da janela).
+
+    Returns:
+        Lista de (ocupacao_atual, historico_ordenado) por unidade_id
+    """
+    atuais = db.query(OcupacaoAtual).filter(OcupacaoAtual.data_coleta >= janela_inicio)
+    if tipo_leito:
+        atuais = atuais.filter(OcupacaoAtual.tipo_leito == tipo_leito)
+
+    ultimos: Dict[str, OcupacaoAtual] = {}
+    for atual in atuais.all():
+        anterior = ultimos.get(atual.unidade_id)
+        if anterior is None or (atual.data_coleta, atual.historico_id or 0) > (anterior.data_coleta, anterior.historico_id or 0):
+            ultimos[atual.unidade_id] = atual
+    if not ultimos:
+        return []
+
+    filtros = [HistoricoOcupacao.data_coleta >= janela_inicio]
+    if tipo_leito:
+        filtros.append(HistoricoOcupacao.tipo_leito == tipo_leito)
+
+    ordem_asc = func.row_number().over(
+        partition_by=HistoricoOcupacao.unidade_id,
+        order_by=(HistoricoOcupacao.data_coleta.asc(), HistoricoOcupacao.id.asc())
+    ).label("ordem_asc")
+    janela = db.query(HistoricoOcupacao, ordem_asc).filter(*filtros).subquery()
+    registro = aliased(HistoricoOcupacao, janela)
+
+    historicos: Dict[str, List[HistoricoOcupacao]] = {}
+    for linha in db.query(registro).filter(janela.c.ordem_asc <= pontos_tendencia).order_by(
+        registro.unidade_id, registro.data_coleta.asc(), registro.id.asc()
+    ):
+        historicos.setdefault(linha.unidade_id, []).append(linha)
+    return [(ultimo, historicos.get(unidade_id, [])) for unidade_id, ultimo in ultimos.items()]
+
+
+def montar_hospital_enriquecido(registro: Any, resultado_tendencia: Dict[str, Any], pontos: int) -> Dict[str, Any]:
+    """Dados de um hospital para a IA (registro = OcupacaoAtual ou LeituraOcupacao)"""
+    ocupacao_atual = registro.ocupacao_percentual
+    alerta = gerar_alerta_saturacao(ocupacao_atual, resultado_tendencia["tendencia"])
+
+    # Status baseado na ocupação
+    if ocupacao_atual >= 90:
+        status = "CRITICO"
+    elif ocupacao_atual >= 80:
+        status = "ALTO"
+    elif ocupacao_atual >= 70:
+        status = "MODERADO"
     else:
-        tendencia = "ESTAVEL"
-    
-    # Calcular previsão de saturação (se tendência de alta)
-    previsao_saturacao_min = None
-    if tendencia == "ALTA" and variacao > 0:
-        # Calcular tempo até 100% baseado na taxa de variação
-        tempo_historico_horas = 6  # Janela de 6 horas
-        taxa_por_hora = variacao / tempo_historico_horas
-        
-        if taxa_por_hora > 0:
-            percentual_restante = 100 - ultima_leitura
-            horas_ate_saturacao = percentual_restante / taxa_por_hora
-            previsao_saturacao_min = int(horas_ate_saturacao * 60)  # Converter para minutos
-    
-    return {
-        "tendencia": tendencia,
-        "variacao": round(variacao, 2),
-        "previsao_saturacao_min": previsao_saturacao_min,
-        "dados_insuficientes": False
+        status = "NORMAL"
+
+    hospital_enriquecido = {
+        "hospital": registro.unidade_nome,
+        "sigla": registro.unidade_id,
+        "tipo_leito": registro.tipo_leito,
+        "leitos_totais": registro.leitos_totais,
+        "leitos_ocupados": registro.leitos_ocupados,
+        "leitos_disponiveis": registro.leitos_disponiveis,
+        "taxa_ocupacao": registro.ocupacao_percentual,
+        "status_ocupacao": status,
+        "ultima_atualizacao": registro.data_coleta.strftime("%H:%M"),
+        "tendencia": resultado_tendencia["tendencia"],
+        "variacao_6h": resultado_tendencia["variacao"],
+        "inclinacao_por_hora": resultado_tendencia.get("inclinacao_por_hora"),
+        "ocupacao_ewma": resultado_tendencia.get("ocupacao_ewma"),
+        "previsao_saturacao_min": resultado_tendencia["previsao_saturacao_min"],
+        "alerta_saturacao": alerta,
+        "dados_tendencia_disponiveis": not resultado_tendencia.get("dados_insuficientes", True),
+        "historico_pontos": pontos,
+        "fonte_dados": registro.fonte_dados
     }
 
+    # Gerar mensagem para IA
+    hospital_enriquecido["mensagem_ia"] = gerar_mensagem_ia(hospital_enriquecido)
+    return hospital_enriquecido
+
+
+# ============================================================================
+# INGESTÃO EM LOTE
+# ============================================================================
+
+INGESTAO_BULK_LOTE = int(os.getenv("INGESTAO_BULK_LOTE", "5000"))  # linhas por executemany
+INGESTAO_BULK_MAX_LINHAS = int(os.getenv("INGESTAO_BULK_MAX_LINHAS", "500000"))
+
+FORMATOS_BULK = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv"
+}
+
+# Chave de deduplicação (índice único idx_historico_unidade_tipo_data)
+CHAVE_LEITURA = ("unidade_id", "tipo_leito", "data_coleta")
+
+
+def indice_leitura_unica() -> bool:
+    """historico_ocupacao tem índice único em CHAVE_LEITURA (create_all não cria índices em tabela existente)"""
+    return any(
+        indice.get("unique") and tuple(indice["column_names"]) == CHAVE_LEITURA
+        for indice in inspect(engine).get_indexes(HistoricoOcupacao.__tablename__)
+    )
+
+
+# Sem o índice o ON CONFLICT falha: as leituras são gravadas sem deduplicação até
+# migrar_historico_ocupacao.py ser executado e o serviço reiniciado
+DEDUPLICACAO_LEITURAS = indice_leitura_unica()
+
+
+def linha_historico(ocupacao: OcupacaoInput, recebido_em: datetime) -> Dict[str, Any]:
+    """Parâmetros de INSERT de uma leitura; data_coleta em UTC sem fuso, como no restante da tabela"""
+    data_coleta = ocupacao.data_coleta or recebido_em
+    if data_coleta.tzinfo is not None:
+        data_coleta = data_coleta.astimezone(timezone.utc).replace(tzinfo=None)
+    return {**ocupacao.model_dump(exclude={"data_coleta"}), "data_coleta": data_coleta}
+
+
+def inserir_leituras(db: Session, linhas: List[Dict[str, Any]]) -> List[Any]:
+    """
+    INSERT ... ON CONFLICT DO NOTHING em um único executemany
+
+    Sem o índice único (banco não migrado), INSERT simples: nada é deduplicado.
+
+    Returns:
+        Apenas as leituras inseridas (id + campos de LeituraOcupacao); repetidas são ignoradas
+    """
+    if not linhas:
+        return []
+    comando = insert_dialeto(HistoricoOcupacao)
+    if DEDUPLICACAO_LEITURAS:
+        comando = comando.on_conflict_do_nothing(index_elements=list(CHAVE_LEITURA))
+    return db.execute(comando.returning(*COLUNAS_INSERIDAS), linhas).all()
+
+
+async def _linhas_corpo(request: Request) -> AsyncIterator[str]:
+    """Linhas do corpo da requisição à medida que chegam"""
+    pendente = b""
+    async for bloco in request.stream():
+        pendente += bloco
+        *completas, pendente = pendente.split(b"\n")
+        for linha in completas:
+            yield linha.decode("utf-8")
+    if pendente:
+        yield pendente.decode("utf-8")
+
+
+async def _registros_corpo(request: Request, formato: str) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """(número da linha, campos) de um corpo NDJSON ou CSV com cabeçalho"""
+    cabecalho = None
+    numero = 0
+    async for linha in _linhas_corpo(request):
+        numero += 1
+        linha = linha.lstrip("\ufeff").strip()
+        if not linha:
+            continue
+        if formato == "ndjson":
+            try:
+                yield numero, json.loads(linha)
+            except ValueError as e:
+                raise ValueError(f"Linha {numero}: JSON inválido ({e})")
+        elif cabecalho is None:
+            cabecalho = [coluna.strip() for coluna in next(csv.reader([linha]))]
+        else:
+            valores = next(csv.reader([linha]))
+            # Campos vazios = ausentes (fonte_dados e data_coleta usam o padrão)
+            yield numero, {coluna: valor for coluna, valor in zip(cabecalho, valores) if valor != ""}
+
 
 def gerar_alerta_saturacao(ocupacao_atual: float, tendencia: str) -> bool:
     """
@@ -183,11 +339,89 @@ def gerar_mensagem_ia(hospital: Dict[str, Any]) -> str:
 # ENDPOINTS
 # ============================================================================
 
+_tarefa_compactacao: Optional[asyncio.Task] = None
+_tarefa_tendencia: Optional[asyncio.Task] = None
+
+
+async def _compactar_historico_periodicamente():
+    """
+    Tarefa de fundo: agrega leituras em intervalos de 15 min e 1 hora e aplica a
+    retenção de cada camada (na inicialização e a cada HISTORICO_COMPACTACAO_INTERVALO_S)
+    """
+    while True:
+        try:
+            await executor_db.executar(compactador_historico.compactar)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro ao compactar histórico de ocupação: {e}")
+        if HISTORICO_COMPACTACAO_INTERVALO_S <= 0:
+            return
+        await asyncio.sleep(HISTORICO_COMPACTACAO_INTERVALO_S)
+
+
+def _reconstruir_motor_tendencia():
+    db = SessionLocal()
+    try:
+        motor_tendencia.reconstruir(db, HistoricoOcupacao)
+    finally:
+        db.close()
+
+
+async def _reconstruir_tendencia_periodicamente():
+    """
+    Tarefa de fundo: relê as séries do motor de tendência do banco a cada
+    TENDENCIA_RECONSTRUCAO_S (a primeira reconstrução é feita na inicialização),
+    cobrindo leituras gravadas fora da ingestão deste serviço
+    """
+    while TENDENCIA_RECONSTRUCAO_S > 0:
+        await asyncio.sleep(TENDENCIA_RECONSTRUCAO_S)
+        try:
+            await executor_db.executar(_reconstruir_motor_tendencia)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro ao reconstruir motor de tendência: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Inicialização do microserviço"""
+    if not DEDUPLICACAO_LEITURAS:
+        logger.error("❌ historico_ocupacao sem o índice único (unidade_id, tipo_leito, data_coleta): "
+                     "leituras repetidas NÃO serão ignoradas. Execute migrar_historico_ocupacao.py e reinicie o serviço")
+    
+    db = SessionLocal()
+    try:
+        # Sempre: leituras gravadas fora da ingestão (scripts, outro serviço) também chegam ao
+        # estado atual; o upsert só avança no tempo
+        series = reconstruir_ocupacao_atual(db)
+        db.commit()
+        logger.info(f"✅ ocupacao_atual sincronizada com o histórico: {series} unidades/tipos de leito")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"⚠️ ocupacao_atual não sincronizada: {e}")
+    
+    try:
+        motor_tendencia.reconstruir(db, HistoricoOcupacao)
+    except Exception as e:
+        logger.warning(f"⚠️ Motor de tendência não reconstruído (consultas usarão o banco): {e}")
+    finally:
+        db.close()
+    
+    global _tarefa_compactacao, _tarefa_tendencia
+    _tarefa_compactacao = asyncio.create_task(_compactar_historico_periodicamente())
+    _tarefa_tendencia = asyncio.create_task(_reconstruir_tendencia_periodicamente())
     logger.info("MS-Ingestao iniciado com sucesso - Memória de Curto Prazo ativa")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Encerramento do microserviço"""
+    for tarefa in (_tarefa_compactacao, _tarefa_tendencia):
+        if tarefa:
+            tarefa.cancel()
+
 @app.get("/")
 async def root():
     return {
@@ -200,7 +434,7 @@ async def root():
 @app.get("/health")
 async def health_check(db: Session = Depends(get_db)):
     # Contar registros no histórico
-    total_registros = db.query(HistoricoOcupacao).count()
+    total_registros = db.query(func.count(HistoricoOcupacao.id)).scalar()
     
     return {
         "service": "MS-Ingestao",
@@ -208,7 +442,9 @@ async def health_check(db: Session = Depends(get_db)):
         "timestamp": datetime.utcnow().isoformat(),
         "memoria_curto_prazo": {
             "total_registros": total_registros,
-            "janela_analise": "6 horas"
+            "janela_analise": "6 horas",
+            "deduplicacao_leituras": DEDUPLICACAO_LEITURAS,
+            "motor_tendencia": motor_tendencia.status()
         }
     }
 
@@ -220,30 +456,22 @@ async def ingerir_ocupacao(
     """Ingere um registro de ocupação no histórico"""
     
     try:
-        novo_registro = HistoricoOcupacao(
-            unidade_id=ocupacao.unidade_id,
-            unidade_nome=ocupacao.unidade_nome,
-            tipo_leito=ocupacao.tipo_leito,
-            ocupacao_percentual=ocupacao.ocupacao_percentual,
-            leitos_totais=ocupacao.leitos_totais,
-            leitos_ocupados=ocupacao.leitos_ocupados,
-            leitos_disponiveis=ocupacao.leitos_disponiveis,
-            data_coleta=datetime.utcnow(),
-            fonte_dados=ocupacao.fonte_dados
-        )
-        
-        db.add(novo_registro)
+        linha = linha_historico(ocupacao, datetime.utcnow())
+        inseridas = inserir_leituras(db, [linha])
+        atualizar_ocupacao_atual(db, inseridas)
         db.commit()
-        db.refresh(novo_registro)
         
-        logger.info(f"Ocupação ingerida: {ocupacao.unidade_id} - {ocupacao.ocupacao_percentual}%")
+        if inseridas:
+            motor_tendencia.registrar(leitura_inserida(inseridas[0]))
+            logger.info(f"Ocupação ingerida: {ocupacao.unidade_id} - {ocupacao.ocupacao_percentual}%")
         
         return {
-            "message": "Ocupação registrada com sucesso",
-            "id": novo_registro.id,
+            "message": "Ocupação registrada com sucesso" if inseridas else "Leitura já registrada",
+            "id": inseridas[0].id if inseridas else None,
             "unidade_id": ocupacao.unidade_id,
             "ocupacao": ocupacao.ocupacao_percentual,
-            "timestamp": novo_registro.data_coleta.isoformat()
+            "timestamp": linha["data_coleta"].isoformat(),
+            "duplicado": not inseridas
         }
         
     except Exception as e:
@@ -255,33 +483,21 @@ async def ingerir_ocupacao_batch(
     batch: OcupacaoBatchInput,
     db: Session = Depends(get_db)
 ):
-    """Ingere múltiplos registros de ocupação de uma vez"""
+    """Ingere múltiplos registros de ocupação de uma vez (um executemany; repetidos são ignorados)"""
     
     try:
-        registros_criados = []
-        
-        for ocupacao in batch.registros:
-            novo_registro = HistoricoOcupacao(
-                unidade_id=ocupacao.unidade_id,
-                unidade_nome=ocupacao.unidade_nome,
-                tipo_leito=ocupacao.tipo_leito,
-                ocupacao_percentual=ocupacao.ocupacao_percentual,
-                leitos_totais=ocupacao.leitos_totais,
-                leitos_ocupados=ocupacao.leitos_ocupados,
-                leitos_disponiveis=ocupacao.leitos_disponiveis,
-                data_coleta=datetime.utcnow(),
-                fonte_dados=ocupacao.fonte_dados
-            )
-            db.add(novo_registro)
-            registros_criados.append(ocupacao.unidade_id)
-        
+        recebido_em = datetime.utcnow()
+        inseridas = inserir_leituras(db, [linha_historico(ocupacao, recebido_em) for ocupacao in batch.registros])
+        atualizar_ocupacao_atual(db, inseridas)
         db.commit()
+        motor_tendencia.registrar_lote(leitura_inserida(linha) for linha in inseridas)
         
-        logger.info(f"Batch ingerido: {len(registros_criados)} registros")
+        logger.info(f"Batch ingerido: {len(inseridas)} registros")
         
         return {
-            "message": f"{len(registros_criados)} registros ingeridos com sucesso",
-            "unidades": registros_criados,
+            "message": f"{len(inseridas)} registros ingeridos com sucesso",
+            "unidades": [ocupacao.unidade_id for ocupacao in batch.registros],
+            "duplicados": len(batch.registros) - len(inseridas),
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -290,6 +506,81 @@ async def ingerir_ocupacao_batch(
         raise HTTPException(status_code=500, detail=f"Erro ao registrar batch: {str(e)}")
 
 
+@app.post("/ingerir-ocupacao-bulk")
+async def ingerir_ocupacao_bulk(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Ingestão em alto volume: NDJSON (application/x-ndjson) ou CSV com cabeçalho (text/csv)
+    
+    Campos de OcupacaoInput por linha; data_coleta opcional (ISO 8601, padrão: recebimento).
+    O corpo é lido em fluxo e gravado em lotes de INGESTAO_BULK_LOTE linhas (executemany)
+    numa única transação; leituras repetidas (unidade_id, tipo_leito, data_coleta) são
+    ignoradas. Uma linha inválida desfaz a requisição inteira (400).
+    """
+    formato = FORMATOS_BULK.get(request.headers.get("content-type", "").split(";")[0].strip().lower())
+    if formato is None:
+        raise HTTPException(status_code=415, detail="Content-Type deve ser application/x-ndjson ou text/csv")
+    
+    inicio = time.perf_counter()
+    recebido_em = datetime.utcnow()
+    recebidos = 0
+    inseridas = []
+    lote = []
+    
+    try:
+        async for numero, campos in _registros_corpo(request, formato):
+            recebidos += 1
+            if recebidos > INGESTAO_BULK_MAX_LINHAS:
+                raise HTTPException(status_code=413, detail=f"Máximo de {INGESTAO_BULK_MAX_LINHAS} linhas por requisição")
+            try:
+                lote.append(linha_historico(OcupacaoInput.model_validate(campos), recebido_em))
+            except ValueError as e:
+                raise ValueError(f"Linha {numero}: {e}")
+            if len(lote) >= INGESTAO_BULK_LOTE:
+                inseridas.extend(await executor_db.executar(inserir_leituras, db, lote))
+                lote = []
+        
+        inseridas.extend(await executor_db.executar(inserir_leituras, db, lote))
+        await executor_db.executar(atualizar_ocupacao_atual, db, inseridas)
+        await executor_db.executar(db.commit)
+        
+    except HTTPException:
+        db.rollback()
+        raise
+    except ExecutorSaturado as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=503,
+            detail=f"Banco de dados sobrecarregado. Tente novamente em {e.retry_after}s",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Nenhuma leitura registrada. {str(e)}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro na ingestão em lote: {e}")
+        raise HTTPException(status_code=500, detail=f"Erro ao registrar lote: {str(e)}")
+    
+    motor_tendencia.registrar_lote(leitura_inserida(linha) for linha in inseridas)
+    
+    tempo_s = time.perf_counter() - inicio
+    logger.info(f"📦 Ingestão em lote ({formato}): {len(inseridas)}/{recebidos} leituras em {tempo_s * 1000:.0f}ms")
+    
+    return {
+        "message": f"{len(inseridas)} leituras ingeridas com sucesso",
+        "formato": formato,
+        "recebidos": recebidos,
+        "inseridos": len(inseridas),
+        "duplicados": recebidos - len(inseridas),
+        "tempo_ms": round(tempo_s * 1000, 2),
+        "linhas_por_segundo": int(recebidos / tempo_s) if tempo_s > 0 else None,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
 @app.get("/api/v1/inteligencia/hospitais-disponiveis")
 async def get_hospitais_preditivo(
     especialidade: Optional[str] = None,
@@ -308,28 +599,21 @@ async def get_hospitais_preditivo(
     """
     
     try:
-        # Janela de análise: últimas 6 horas
-        janela_inicio = datetime.utcnow() - timedelta(hours=6)
-        
-        # Buscar últimos registros de cada hospital do histórico
-        from sqlalchemy import func
-        
-        # Subquery para pegar o último registro de cada hospital
-        subquery = db.query(
-            HistoricoOcupacao.unidade_id,
-            func.max(HistoricoOcupacao.data_coleta).label('max_data')
-        ).filter(
-            HistoricoOcupacao.data_coleta >= janela_inicio
-        ).group_by(HistoricoOcupacao.unidade_id).subquery()
-        
-        # Buscar registros mais recentes
-        ultimos_registros = db.query(HistoricoOcupacao).join(
-            subquery,
-            (HistoricoOcupacao.unidade_id == subquery.c.unidade_id) &
-            (HistoricoOcupacao.data_coleta == subquery.c.max_data)
-        ).all()
-        
-        if not ultimos_registros:
+        if motor_tendencia.pronto:
+            # Estado em memória mantido pela ingestão (sem consulta ao banco)
+            hospitais_enriquecidos = [
+                montar_hospital_enriquecido(ultima, resultado_tendencia, resultado_tendencia["pontos"])
+                for ultima, resultado_tendencia in motor_tendencia.series_por_unidade(tipo_leito)
+            ]
+        else:
+            # Motor ainda não reconstruído: janela lida do banco (uma consulta, tipo de leito no SQL)
+            janela_inicio = datetime.utcnow() - timedelta(hours=JANELA_ANALISE_HORAS)
+            hospitais_enriquecidos = [
+                montar_hospital_enriquecido(registro, calcular_tendencia(historico), len(historico))
+                for registro, historico in buscar_janela_ocupacao(db, janela_inicio, tipo_leito)
+            ]
+        
+        if not hospitais_enriquecidos:
             logger.warning("Nenhum dado de ocupação encontrado no histórico")
             return {
                 "hospitais": [],
@@ -346,67 +630,7 @@ async def get_hospitais_preditivo(
                 }
             }
         
-        hospitais_enriquecidos = []
-        
-        for registro in ultimos_registros:
-            unidade_id = registro.unidade_id
-            
-            # Buscar histórico completo das últimas 6 horas para tendência
-            historico = db.query(HistoricoOcupacao).filter(
-                HistoricoOcupacao.unidade_id == unidade_id,
-                HistoricoOcupacao.data_coleta >= janela_inicio
-            ).order_by(HistoricoOcupacao.data_coleta.asc()).limit(12).all()
-            
-            # Calcular tendência
-            resultado_tendencia = calcular_tendencia(historico)
-            
-            # Gerar alerta de saturação
-            ocupacao_atual = registro.ocupacao_percentual
-            alerta = gerar_alerta_saturacao(ocupacao_atual, resultado_tendencia["tendencia"])
-            
-            # Status baseado na ocupação
-            if ocupacao_atual >= 90:
-                status = "CRITICO"
-            elif ocupacao_atual >= 80:
-                status = "ALTO"
-            elif ocupacao_atual >= 70:
-                status = "MODERADO"
-            else:
-                status = "NORMAL"
-            
-            # Montar dados enriquecidos
-            hospital_enriquecido = {
-                "hospital": registro.unidade_nome,
-                "sigla": registro.unidade_id,
-                "tipo_leito": registro.tipo_leito,
-                "leitos_totais": registro.leitos_totais,
-                "leitos_ocupados": registro.leitos_ocupados,
-                "leitos_disponiveis": registro.leitos_disponiveis,
-                "taxa_ocupacao": registro.ocupacao_percentual,
-                "status_ocupacao": status,
-                "ultima_atualizacao": registro.data_coleta.strftime("%H:%M"),
-                "tendencia": resultado_tendencia["tendencia"],
-                "variacao_6h": resultado_tendencia["variacao"],
-                "previsao_saturacao_min": resultado_tendencia["previsao_saturacao_min"],
-                "alerta_saturacao": alerta,
-                "dados_tendencia_disponiveis": not resultado_tendencia.get("dados_insuficientes", True),
-                "historico_pontos": len(historico),
-                "fonte_dados": registro.fonte_dados
-            }
-            
-            # Gerar mensagem para IA
-            hospital_enriquecido["mensagem_ia"] = gerar_mensagem_ia(hospital_enriquecido)
-            
-            # Filtrar por especialidade se solicitado
-            if especialidade:
-                # Por enquanto, não filtramos por especialidade pois não temos esse dado no histórico
-                pass
-            
-            # Filtrar por tipo de leito se solicitado
-            if tipo_leito and registro.tipo_leito != tipo_leito:
-                continue
-            
-            hospitais_enriquecidos.append(hospital_enriquecido)
+        # Especialidade ainda não é filtrada: o histórico de ocupação não tem esse dado
         
         # Ordenar: Alertas primeiro, depois por disponibilidade
         hospitais_enriquecidos.sort(
@@ -471,18 +695,25 @@ async def get_tendencia_hospital(
     """Retorna tendência detalhada de um hospital específico"""
     
     try:
-        # Janela de análise: últimas 6 horas
-        janela_inicio = datetime.utcnow() - timedelta(hours=6)
-        
-        query = db.query(HistoricoOcupacao).filter(
-            HistoricoOcupacao.unidade_id == unidade_id,
-            HistoricoOcupacao.data_coleta >= janela_inicio
-        )
-        
-        if tipo_leito:
-            query = query.filter(HistoricoOcupacao.tipo_leito == tipo_leito)
-        
-        historico = query.order_by(HistoricoOcupacao.data_coleta.asc()).all()
+        if motor_tendencia.pronto:
+            serie = motor_tendencia.serie(unidade_id, tipo_leito)
+            resultado, historico = serie if serie else (None, [])
+        else:
+            janela_inicio = datetime.utcnow() - timedelta(hours=JANELA_ANALISE_HORAS)
+            
+            query = db.query(HistoricoOcupacao).filter(
+                HistoricoOcupacao.unidade_id == unidade_id,
+                HistoricoOcupacao.data_coleta >= janela_inicio
+            )
+            
+            if tipo_leito:
+                query = query.filter(HistoricoOcupacao.tipo_leito == tipo_leito)
+            
+            historico = query.order_by(HistoricoOcupacao.data_coleta.asc()).all()
+            if historico and not tipo_leito:
+                # Mesma regra do motor: série do tipo de leito da leitura mais recente
+                historico = [h for h in historico if h.tipo_leito == historico[-1].tipo_leito]
+            resultado = calcular_tendencia(historico)
         
         if not historico:
             return {
@@ -492,20 +723,19 @@ async def get_tendencia_hospital(
                 "dados_disponiveis": False
             }
         
-        # Calcular tendência
-        resultado = calcular_tendencia(historico)
-        
         # Último registro
-        ultimo = historico[-1] if historico else None
+        ultimo = historico[-1]
         
         return {
             "unidade_id": unidade_id,
             "unidade_nome": ultimo.unidade_nome if ultimo else "N/A",
-            "tipo_leito": tipo_leito or "TODOS",
+            "tipo_leito": ultimo.tipo_leito,
             "ocupacao_atual": ultimo.ocupacao_percentual if ultimo else 0,
             "leitos_disponiveis": ultimo.leitos_disponiveis if ultimo else 0,
             "tendencia": resultado["tendencia"],
             "variacao_6h": resultado["variacao"],
+            "inclinacao_por_hora": resultado["inclinacao_por_hora"],
+            "ocupacao_ewma": resultado["ocupacao_ewma"],
             "previsao_saturacao_min": resultado["previsao_saturacao_min"],
             "alerta_saturacao": gerar_alerta_saturacao(
                 ultimo.ocupacao_percentual if ultimo else 0,
@@ -531,35 +761,29 @@ async def get_tendencia_hospital(
 async def get_historico_ocupacao(
     unidade_id: str,
     horas: int = 24,
+    resolucao_min: Optional[float] = Query(None, ge=0, description="Resolução desejada em minutos (0 = leituras brutas)"),
+    tipo_leito: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Retorna histórico de ocupação de um hospital"""
+    """
+    Retorna histórico de ocupação de um hospital
+
+    A camada (bruto, 15min, 1h) é a mais grossa que atende à resolução pedida e
+    ainda guarda o período; sem resolução, a que dá cerca de 200 pontos.
+    """
     
     try:
         janela_inicio = datetime.utcnow() - timedelta(hours=horas)
         
-        historico = db.query(HistoricoOcupacao).filter(
-            HistoricoOcupacao.unidade_id == unidade_id,
-            HistoricoOcupacao.data_coleta >= janela_inicio
-        ).order_by(HistoricoOcupacao.data_coleta.desc()).all()
+        camada, registros = consultar_historico(db, unidade_id, janela_inicio, resolucao_min, tipo_leito)
         
         return {
             "unidade_id": unidade_id,
             "periodo_horas": horas,
-            "total_registros": len(historico),
-            "registros": [
-                {
-                    "id": h.id,
-                    "data_coleta": h.data_coleta.isoformat(),
-                    "ocupacao_percentual": h.ocupacao_percentual,
-                    "leitos_totais": h.leitos_totais,
-                    "leitos_ocupados": h.leitos_ocupados,
-                    "leitos_disponiveis": h.leitos_disponiveis,
-                    "tipo_leito": h.tipo_leito,
-                    "fonte_dados": h.fonte_dados
-                }
-                for h in historico
-            ]
+            "camada": camada.nome,
+            "resolucao_min": camada.resolucao_min,
+            "total_registros": len(registros),
+            "registros": registros
         }
         
     except Exception as e:
@@ -573,14 +797,25 @@ async def limpar_historico_antigo(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
-    """Remove registros de histórico mais antigos que X dias (manutenção)"""
+    """
+    Compacta o histórico e remove leituras brutas mais antigas que X dias (manutenção)
+
+    A retenção por camadas já é aplicada pela compactação periódica; aqui só são
+    removidas leituras cujos intervalos de 15 minutos já foram agregados.
+    """
     
     try:
-        data_limite = datetime.utcnow() - timedelta(days=dias)
+        compactacao = await executor_db.executar(compactador_historico.compactar)
+        
+        data_limite = inicio_intervalo(datetime.utcnow() - timedelta(days=dias), CAMADAS[1].resolucao_min)
+        agregado_ate = db.query(func.max(HistoricoOcupacaoAgregado.inicio_intervalo)).filter(
+            HistoricoOcupacaoAgregado.resolucao_min == CAMADAS[1].resolucao_min
+        ).scalar()
         
         registros_deletados = db.query(HistoricoOcupacao).filter(
-            HistoricoOcupacao.data_coleta < data_limite
-        ).delete()
+            HistoricoOcupacao.data_coleta < data_limite,
+            HistoricoOcupacao.data_coleta < agregado_ate
+        ).delete(synchronize_session=False) if agregado_ate else 0
         
         db.commit()
         
@@ -589,10 +824,17 @@ async def limpar_historico_antigo(
         return {
             "message": f"{registros_deletados} registros removidos",
             "dias_mantidos": dias,
+            "compactacao": compactacao,
             "executado_por": current_user.email,
             "timestamp": datetime.utcnow().isoformat()
         }
         
+    except ExecutorSaturado as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Banco de dados sobrecarregado. Tente novamente em {e.retry_after}s",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Erro ao limpar histórico: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
@@ -603,35 +845,45 @@ async def get_estatisticas_ingestao(db: Session = Depends(get_db)):
     """Estatísticas do serviço de ingestão"""
     
     try:
-        total_registros = db.query(HistoricoOcupacao).count()
+        total_registros = db.query(func.count(HistoricoOcupacao.id)).scalar()
         
-        # Registros nas últimas 24h
+        # Registros nas últimas 24h (intervalo no índice de data_coleta)
         ultimas_24h = datetime.utcnow() - timedelta(hours=24)
-        registros_24h = db.query(HistoricoOcupacao).filter(
+        registros_24h = db.query(func.count(HistoricoOcupacao.id)).filter(
             HistoricoOcupacao.data_coleta >= ultimas_24h
-        ).count()
+        ).scalar()
         
-        # Unidades únicas
-        unidades_unicas = db.query(HistoricoOcupacao.unidade_id).distinct().count()
-        
-        # Último registro
-        ultimo_registro = db.query(HistoricoOcupacao).order_by(
-            desc(HistoricoOcupacao.data_coleta)
-        ).first()
+        # Unidades e última leitura: estado atual (uma linha por unidade/tipo de leito)
+        unidades_unicas, series_monitoradas, ultima_coleta = db.query(
+            func.count(func.distinct(OcupacaoAtual.unidade_id)),
+            func.count(),
+            func.max(OcupacaoAtual.data_coleta)
+        ).select_from(OcupacaoAtual).one()
         
         return {
             "estatisticas": {
                 "total_registros": total_registros,
                 "registros_ultimas_24h": registros_24h,
                 "unidades_monitoradas": unidades_unicas,
-                "ultimo_registro": ultimo_registro.data_coleta.isoformat() if ultimo_registro else None
+                "series_monitoradas": series_monitoradas,
+                "ultimo_registro": ultima_coleta.isoformat() if ultima_coleta else None,
+                "intervalos_agregados": {
+                    f"{resolucao}min": total
+                    for resolucao, total in db.query(
+                        HistoricoOcupacaoAgregado.resolucao_min, func.count(HistoricoOcupacaoAgregado.id)
+                    ).group_by(HistoricoOcupacaoAgregado.resolucao_min).all()
+                }
             },
             "configuracao": {
-                "janela_tendencia": "6 horas",
-                "limiar_alta": "+5%",
-                "limiar_queda": "-5%",
+                "janela_tendencia": f"{TENDENCIA_JANELA_HORAS:g} horas",
+                "metodo_tendencia": "regressão linear (mínimos quadrados) sobre os horários das leituras",
+                "ewma_meia_vida_min": TENDENCIA_EWMA_MEIA_VIDA_MIN,
+                "limiar_alta": f"+{LIMIAR_VARIACAO:g}%",
+                "limiar_queda": f"-{LIMIAR_VARIACAO:g}%",
                 "limiar_alerta_saturacao": "90%"
             },
+            "motor_tendencia": motor_tendencia.status(),
+            "compactacao": compactador_historico.status(),
             "timestamp": datetime.utcnow().isoformat()
         }
         
@@ -658,7 +910,7 @@ async def simular_historico(
     import random
     
     try:
-        registros_criados = 0
+        linhas = []
         ocupacao_base = random.uniform(60, 85)
         
         for i in range(horas * 2):  # 2 registros por hora (a cada 30min)
@@ -669,26 +921,27 @@ async def simular_historico(
             leitos_totais = 100
             leitos_ocupados = int(ocupacao)
             
-            registro = HistoricoOcupacao(
-                unidade_id=unidade_id,
-                unidade_nome=unidade_nome,
-                tipo_leito="GERAL",
-                ocupacao_percentual=ocupacao,
-                leitos_totais=leitos_totais,
-                leitos_ocupados=leitos_ocupados,
-                leitos_disponiveis=leitos_totais - leitos_ocupados,
-                data_coleta=datetime.utcnow() - timedelta(minutes=30 * (horas * 2 - i)),
-                fonte_dados="SIMULADOR"
-            )
-            db.add(registro)
-            registros_criados += 1
-        
+            linhas.append({
+                "unidade_id": unidade_id,
+                "unidade_nome": unidade_nome,
+                "tipo_leito": "GERAL",
+                "ocupacao_percentual": ocupacao,
+                "leitos_totais": leitos_totais,
+                "leitos_ocupados": leitos_ocupados,
+                "leitos_disponiveis": leitos_totais - leitos_ocupados,
+                "data_coleta": datetime.utcnow() - timedelta(minutes=30 * (horas * 2 - i)),
+                "fonte_dados": "SIMULADOR"
+            })
+        
+        inseridas = inserir_leituras(db, linhas)
+        atualizar_ocupacao_atual(db, inseridas)
         db.commit()
+        motor_tendencia.registrar_lote(leitura_inserida(linha) for linha in inseridas)
         
         return {
             "message": f"Histórico simulado criado com sucesso",
             "unidade_id": unidade_id,
-            "registros_criados": registros_criados,
+            "registros_criados": len(inseridas),
             "periodo_horas": horas
         }
         
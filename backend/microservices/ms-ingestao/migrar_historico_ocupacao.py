@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Script para migrar o histórico de ocupação do MS-Ingestao
+Remove leituras repetidas, cria o índice único (unidade_id, tipo_leito, data_coleta)
+exigido pela deduplicação da ingestão (INSERT ... ON CONFLICT DO NOTHING), remove os
+índices que ele substitui e preenche ocupacao_atual com a última leitura de cada série
+Funciona com SQLite e PostgreSQL (migration_historico_ocupacao_indices.sql: só PostgreSQL)
+
+create_all() cria tabelas novas, mas não acrescenta índices a uma tabela que já
+existe: bancos criados antes da ingestão em lote precisam desta migração.
+
+Uso (em backend/microservices/ms-ingestao, com o mesmo DATABASE_URL do serviço):
+    python migrar_historico_ocupacao.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, inspect, select, text
+from sqlalchemy.orm import Session
+from shared.database import DATABASE_URL, Base, engine, HistoricoOcupacao
+from ocupacao_atual import reconstruir_ocupacao_atual
+
+# Substituídos por idx_historico_unidade_tipo_data (deduplicação da ingestão em lote e colunas únicas)
+INDICES_OBSOLETOS = ("uq_historico_ocupacao_leitura", "ix_historico_ocupacao_unidade_id", "ix_historico_ocupacao_tipo_leito")
+
+
+def remover_duplicadas(conn) -> int:
+    """Mantém a primeira leitura (menor id) de cada unidade/tipo de leito/horário"""
+    H = HistoricoOcupacao
+    primeiras = select(func.min(H.id)).group_by(H.unidade_id, H.tipo_leito, H.data_coleta)
+    return conn.execute(delete(H.__table__).where(H.id.not_in(primeiras))).rowcount
+
+
+def criar_indices(conn) -> list:
+    """Índices do modelo que ainda não existem no banco"""
+    existentes = {indice["name"] for indice in inspect(conn).get_indexes(HistoricoOcupacao.__tablename__)}
+    criados = []
+    for indice in HistoricoOcupacao.__table__.indexes:
+        if indice.name not in existentes:
+            indice.create(conn)
+            criados.append(indice.name)
+    return criados
+
+
+def remover_indices_obsoletos(conn) -> list:
+    """Depois de criar_indices: o ON CONFLICT segue com um índice único válido"""
+    existentes = {indice["name"] for indice in inspect(conn).get_indexes(HistoricoOcupacao.__tablename__)}
+    removidos = [nome for nome in INDICES_OBSOLETOS if nome in existentes]
+    for nome in removidos:
+        conn.execute(text(f"DROP INDEX {nome}"))
+    return removidos
+
+
+def preencher_ocupacao_atual(conn) -> int:
+    """Mesmo upsert da inicialização do serviço (só avança no tempo; pode ser repetido)"""
+    db = Session(bind=conn)
+    series = reconstruir_ocupacao_atual(db)
+    db.flush()
+    return series
+
+
+def migrar():
+    print("🚀 Iniciando migração do histórico de ocupação...")
+    print(f"📍 URL: {DATABASE_URL.split('@')[0] if '@' in DATABASE_URL else DATABASE_URL}")
+    print(f"💾 Tipo de banco: {engine.dialect.name.upper()}")
+
+    # Tabelas novas (ocupacao_atual, agregados) são criadas completas
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as conn:
+        removidas = remover_duplicadas(conn)
+        print(f"✅ Leituras repetidas removidas: {removidas}")
+
+        criados = criar_indices(conn)
+        for nome in criados:
+            print(f"✅ Índice '{nome}' criado")
+        if not criados:
+            print("⚠️  Índices já existentes")
+
+        for nome in remover_indices_obsoletos(conn):
+            print(f"✅ Índice obsoleto '{nome}' removido")
+
+        series = preencher_ocupacao_atual(conn)
+        print(f"✅ ocupacao_atual preenchida: {series} unidades/tipos de leito")
+
+    print(f"\n✅ Migração concluída! Reinicie o MS-Ingestao para ativar a deduplicação.")
+
+
+if __name__ == "__main__":
+    try:
+        migrar()
+    except Exception as e:
+        print(f"\n❌ Erro durante a migração:")
+        print(f"   {str(e)}")
+        sys.exit(1)
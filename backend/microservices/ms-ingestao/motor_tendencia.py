@@ -0,0 +1,361 @@
+"""
+MOTOR DE TENDÊNCIA INCREMENTAL - MS-INGESTAO
+Estado em memória por (unidade_id, tipo_leito), atualizado a cada leitura ingerida,
+em vez de reler e reordenar o histórico a cada consulta
+
+- Buffer circular das leituras da janela (TENDENCIA_JANELA_HORAS, limitado a
+  TENDENCIA_CAPACIDADE_SERIE leituras) com somas corridas de mínimos quadrados:
+  a inclinação (%/h) usa os horários reais das leituras, não uma janela fixa
+- EWMA da ocupação com peso pelo intervalo entre leituras (meia-vida em minutos)
+- Tempo até a saturação = (100 - ocupação atual) / inclinação
+- Consultas são O(1) por série; o estado é reconstruído de historico_ocupacao
+  na inicialização e a cada TENDENCIA_RECONSTRUCAO_S, cobrindo leituras gravadas
+  fora da ingestão; séries sem leituras na janela são descartadas
+"""
+
+import os
+import math
+import heapq
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TENDENCIA_JANELA_HORAS = float(os.getenv("TENDENCIA_JANELA_HORAS", "6"))
+TENDENCIA_CAPACIDADE_SERIE = int(os.getenv("TENDENCIA_CAPACIDADE_SERIE", "720"))
+TENDENCIA_EWMA_MEIA_VIDA_MIN = float(os.getenv("TENDENCIA_EWMA_MEIA_VIDA_MIN", "30"))
+
+# Intervalo da reconstrução periódica a partir do banco (0 desativa)
+TENDENCIA_RECONSTRUCAO_S = float(os.getenv("TENDENCIA_RECONSTRUCAO_S", "300"))
+
+# Variação ajustada na janela (pontos percentuais) que caracteriza ALTA/QUEDA
+LIMIAR_VARIACAO = 5.0
+
+
+class LeituraOcupacao(NamedTuple):
+    """Leitura de ocupação (mesmos nomes de campo de HistoricoOcupacao)"""
+    unidade_id: str
+    unidade_nome: str
+    tipo_leito: str
+    ocupacao_percentual: float
+    leitos_totais: int
+    leitos_ocupados: int
+    leitos_disponiveis: int
+    data_coleta: datetime
+    fonte_dados: Optional[str]
+
+    @classmethod
+    def de_registro(cls, registro: Any) -> "LeituraOcupacao":
+        return cls(*(getattr(registro, campo) for campo in cls._fields))
+
+
+class SerieOcupacao:
+    """
+    Leituras de uma unidade/tipo de leito dentro da janela e estatísticas corridas
+
+    x = horas desde a origem da série (reancorada nos recálculos, evitando
+    perda de precisão); y = ocupação (%). As somas são ajustadas a cada entrada
+    e saída do buffer e recalculadas a cada `capacidade` remoções.
+    """
+
+    def __init__(self, janela_horas: Optional[float] = TENDENCIA_JANELA_HORAS,
+                 capacidade: Optional[int] = TENDENCIA_CAPACIDADE_SERIE,
+                 meia_vida_min: float = TENDENCIA_EWMA_MEIA_VIDA_MIN):
+        # None = sem limite (série montada de um histórico já filtrado)
+        self.janela = timedelta(hours=janela_horas) if janela_horas is not None else None
+        self.capacidade = max(2, capacidade) if capacidade is not None else None
+        self.meia_vida_min = meia_vida_min
+        self.leituras: Deque[LeituraOcupacao] = deque()
+        self.ewma: Optional[float] = None
+        self._origem: Optional[datetime] = None
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._remocoes = 0
+
+    def _x(self, data: datetime) -> float:
+        return (data - self._origem).total_seconds() / 3600
+
+    def _somar(self, leitura: LeituraOcupacao, sinal: int):
+        x, y = self._x(leitura.data_coleta), leitura.ocupacao_percentual
+        self._n += sinal
+        self._sx += sinal * x
+        self._sy += sinal * y
+        self._sxx += sinal * x * x
+        self._sxy += sinal * x * y
+
+    def _atualizar_ewma(self, anterior: Optional[LeituraOcupacao], leitura: LeituraOcupacao):
+        if self.ewma is None or anterior is None:
+            self.ewma = leitura.ocupacao_percentual
+            return
+        minutos = max(0.0, (leitura.data_coleta - anterior.data_coleta).total_seconds() / 60)
+        peso = 1 - math.pow(0.5, minutos / self.meia_vida_min) if self.meia_vida_min > 0 else 1.0
+        self.ewma += peso * (leitura.ocupacao_percentual - self.ewma)
+
+    def _recalcular(self):
+        """Somas e EWMA refeitas a partir do buffer (origem na leitura mais antiga)"""
+        self._origem = self.leituras[0].data_coleta if self.leituras else None
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self.ewma = None
+        anterior = None
+        for leitura in self.leituras:
+            self._somar(leitura, +1)
+            self._atualizar_ewma(anterior, leitura)
+            anterior = leitura
+        self._remocoes = 0
+
+    def expirar(self, agora: datetime):
+        """Remove leituras fora da janela que termina em `agora`"""
+        limite = agora - self.janela if self.janela is not None else None
+        while self.leituras and (
+            (limite is not None and self.leituras[0].data_coleta < limite)
+            or (self.capacidade is not None and len(self.leituras) > self.capacidade)
+        ):
+            self._somar(self.leituras.popleft(), -1)
+            self._remocoes += 1
+        if self._remocoes and (not self.leituras or self._remocoes >= len(self.leituras)):
+            self._recalcular()
+
+    def adicionar(self, leitura: LeituraOcupacao):
+        ultima = self.leituras[-1] if self.leituras else None
+        if ultima is not None and leitura.data_coleta < ultima.data_coleta:
+            # Leitura fora de ordem (lote com datas retroativas): insere na posição e recalcula
+            posicao = len(self.leituras)
+            while posicao > 0 and self.leituras[posicao - 1].data_coleta > leitura.data_coleta:
+                posicao -= 1
+            self.leituras.insert(posicao, leitura)
+            self._recalcular()
+        else:
+            if self._origem is None:
+                self._origem = leitura.data_coleta
+            self.leituras.append(leitura)
+            self._somar(leitura, +1)
+            self._atualizar_ewma(ultima, leitura)
+        self.expirar(self.leituras[-1].data_coleta)
+
+    def adicionar_varias(self, leituras: List[LeituraOcupacao]):
+        """Leituras ordenadas por data; se alguma for anterior à última da série, um único recálculo"""
+        if not leituras:
+            return
+        if not self.leituras or leituras[0].data_coleta >= self.leituras[-1].data_coleta:
+            for leitura in leituras:
+                self.adicionar(leitura)
+            return
+        self.leituras = deque(heapq.merge(self.leituras, leituras, key=lambda l: l.data_coleta))
+        self._recalcular()
+        self.expirar(self.leituras[-1].data_coleta)
+
+    @property
+    def ultima(self) -> Optional[LeituraOcupacao]:
+        return self.leituras[-1] if self.leituras else None
+
+    def inclinacao_por_hora(self) -> Optional[float]:
+        """Inclinação da reta de mínimos quadrados (pontos percentuais por hora)"""
+        if self._n < 2:
+            return None
+        denominador = self._n * self._sxx - self._sx * self._sx
+        if denominador <= 1e-12:
+            return None  # todas as leituras no mesmo instante
+        return (self._n * self._sxy - self._sx * self._sy) / denominador
+
+    def tendencia(self) -> Dict[str, Any]:
+        """Mesmo formato de calcular_tendencia, com inclinação, EWMA e janela real"""
+        inclinacao = self.inclinacao_por_hora()
+        if inclinacao is None:
+            return {
+                "tendencia": "ESTAVEL",
+                "variacao": 0.0,
+                "previsao_saturacao_min": None,
+                "dados_insuficientes": True,
+                "inclinacao_por_hora": None,
+                "ocupacao_ewma": round(self.ewma, 2) if self.ewma is not None else None,
+                "pontos": len(self.leituras),
+                "janela_real_min": 0
+            }
+
+        horas = (self.leituras[-1].data_coleta - self.leituras[0].data_coleta).total_seconds() / 3600
+        variacao = inclinacao * horas  # variação da reta ajustada ao longo da janela observada
+        if variacao > LIMIAR_VARIACAO:
+            tendencia = "ALTA"
+        elif variacao < -LIMIAR_VARIACAO:
+            tendencia = "QUEDA"
+        else:
+            tendencia = "ESTAVEL"
+
+        previsao_saturacao_min = None
+        if tendencia == "ALTA" and inclinacao > 0:
+            percentual_restante = max(0.0, 100 - self.leituras[-1].ocupacao_percentual)
+            previsao_saturacao_min = int(percentual_restante / inclinacao * 60)
+
+        return {
+            "tendencia": tendencia,
+            "variacao": round(variacao, 2),
+            "previsao_saturacao_min": previsao_saturacao_min,
+            "dados_insuficientes": False,
+            "inclinacao_por_hora": round(inclinacao, 3),
+            "ocupacao_ewma": round(self.ewma, 2),
+            "pontos": len(self.leituras),
+            "janela_real_min": int(horas * 60)
+        }
+
+
+def tendencia_de_historico(historico: Iterable[Any]) -> Dict[str, Any]:
+    """Tendência de uma lista de registros já lida do banco (mesmas contas do motor)"""
+    serie = SerieOcupacao(janela_horas=None, capacidade=None)
+    for registro in sorted(historico, key=lambda r: r.data_coleta):
+        serie.adicionar(LeituraOcupacao.de_registro(registro))
+    return serie.tendencia()
+
+
+class MotorTendencia:
+    """Séries por (unidade_id, tipo_leito), alimentadas pela ingestão"""
+
+    def __init__(self, janela_horas: float = TENDENCIA_JANELA_HORAS):
+        self.janela_horas = janela_horas
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], SerieOcupacao] = {}
+        self.pronto = False
+        self.leituras_registradas = 0
+        self.ultima_reconstrucao: Optional[datetime] = None
+        # Leituras registradas enquanto uma reconstrução lê o banco (reaplicadas na troca)
+        self._durante_reconstrucao: Optional[List[LeituraOcupacao]] = None
+
+    def registrar(self, registro: Any):
+        """Aplica uma leitura recém-gravada (HistoricoOcupacao ou LeituraOcupacao)"""
+        leitura = registro if isinstance(registro, LeituraOcupacao) else LeituraOcupacao.de_registro(registro)
+        with self._lock:
+            serie = self._series.get((leitura.unidade_id, leitura.tipo_leito))
+            if serie is None:
+                serie = self._series[(leitura.unidade_id, leitura.tipo_leito)] = SerieOcupacao(self.janela_horas)
+            serie.adicionar(leitura)
+            self.leituras_registradas += 1
+            if self._durante_reconstrucao is not None:
+                self._durante_reconstrucao.append(leitura)
+
+    def registrar_lote(self, leituras: Iterable[LeituraOcupacao]):
+        """Leituras de uma ingestão em lote; as anteriores à janela são ignoradas"""
+        inicio_janela = datetime.utcnow() - timedelta(hours=self.janela_horas)
+        por_serie: Dict[Tuple[str, str], List[LeituraOcupacao]] = {}
+        total = 0
+        for leitura in leituras:
+            total += 1
+            if leitura.data_coleta >= inicio_janela:
+                por_serie.setdefault((leitura.unidade_id, leitura.tipo_leito), []).append(leitura)
+
+        with self._lock:
+            for chave, novas in por_serie.items():
+                novas.sort(key=lambda l: l.data_coleta)
+                serie = self._series.get(chave)
+                if serie is None:
+                    serie = self._series[chave] = SerieOcupacao(self.janela_horas)
+                serie.adicionar_varias(novas)
+            self.leituras_registradas += total
+            if self._durante_reconstrucao is not None:
+                for novas in por_serie.values():
+                    self._durante_reconstrucao.extend(novas)
+
+    def reconstruir(self, db, modelo):
+        """
+        Recarrega as séries com as leituras da janela em historico_ocupacao
+
+        Leituras registradas durante a consulta e ainda ausentes do resultado
+        são reaplicadas antes da troca.
+        """
+        with self._lock:
+            self._durante_reconstrucao = []
+        try:
+            inicio = datetime.utcnow() - timedelta(hours=self.janela_horas)
+            registros = db.query(modelo).filter(modelo.data_coleta >= inicio).order_by(
+                modelo.data_coleta.asc(), modelo.id.asc()
+            ).all()
+
+            series: Dict[Tuple[str, str], SerieOcupacao] = {}
+            lidas = set()
+            for registro in registros:
+                leitura = LeituraOcupacao.de_registro(registro)
+                chave = (leitura.unidade_id, leitura.tipo_leito)
+                if chave not in series:
+                    series[chave] = SerieOcupacao(self.janela_horas)
+                series[chave].adicionar(leitura)
+                lidas.add((*chave, leitura.data_coleta))
+
+            with self._lock:
+                por_serie: Dict[Tuple[str, str], List[LeituraOcupacao]] = {}
+                for leitura in self._durante_reconstrucao:
+                    if (leitura.unidade_id, leitura.tipo_leito, leitura.data_coleta) not in lidas:
+                        por_serie.setdefault((leitura.unidade_id, leitura.tipo_leito), []).append(leitura)
+                for chave, novas in por_serie.items():
+                    novas.sort(key=lambda l: l.data_coleta)
+                    if chave not in series:
+                        series[chave] = SerieOcupacao(self.janela_horas)
+                    series[chave].adicionar_varias(novas)
+                self._series = series
+                self.pronto = True
+                self.ultima_reconstrucao = datetime.utcnow()
+        finally:
+            with self._lock:
+                self._durante_reconstrucao = None
+        logger.info(f"✅ Motor de tendência reconstruído: {len(registros)} leituras, {len(series)} séries")
+
+    def _vigentes(self, agora: datetime) -> List[SerieOcupacao]:
+        """Séries com leituras na janela; as que ficaram vazias saem do motor"""
+        vigentes = []
+        for chave, serie in list(self._series.items()):
+            serie.expirar(agora)
+            if serie.leituras:
+                vigentes.append(serie)
+            else:
+                del self._series[chave]
+        return vigentes
+
+    def series_por_unidade(self, tipo_leito: Optional[str] = None,
+                           unidade_id: Optional[str] = None) -> List[Tuple[LeituraOcupacao, Dict[str, Any]]]:
+        """
+        (última leitura, tendência) de cada unidade com leituras na janela
+
+        Sem tipo_leito, vale a série com a leitura mais recente da unidade.
+        """
+        agora = datetime.utcnow()
+        with self._lock:
+            escolhidas: Dict[str, SerieOcupacao] = {}
+            for serie in self._vigentes(agora):
+                ultima = serie.ultima
+                if (tipo_leito and ultima.tipo_leito != tipo_leito) or (unidade_id and ultima.unidade_id != unidade_id):
+                    continue
+                atual = escolhidas.get(ultima.unidade_id)
+                if atual is None or ultima.data_coleta > atual.ultima.data_coleta:
+                    escolhidas[ultima.unidade_id] = serie
+            return [(serie.ultima, serie.tendencia()) for serie in escolhidas.values()]
+
+    def serie(self, unidade_id: str, tipo_leito: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], List[LeituraOcupacao]]]:
+        """(tendência, leituras da janela) de uma unidade"""
+        agora = datetime.utcnow()
+        with self._lock:
+            candidatas = [
+                s for s in self._vigentes(agora)
+                if s.ultima.unidade_id == unidade_id and (not tipo_leito or s.ultima.tipo_leito == tipo_leito)
+            ]
+            if not candidatas:
+                return None
+            escolhida = max(candidatas, key=lambda s: s.ultima.data_coleta)
+            return escolhida.tendencia(), list(escolhida.leituras)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            series = len(self._series)
+            leituras = sum(len(s.leituras) for s in self._series.values())
+        return {
+            "pronto": self.pronto,
+            "series": series,
+            "leituras_em_memoria": leituras,
+            "leituras_registradas": self.leituras_registradas,
+            "janela_horas": self.janela_horas,
+            "ultima_reconstrucao": self.ultima_reconstrucao.isoformat() if self.ultima_reconstrucao else None
+        }
+
+
+# Instância global
+motor_tendencia = MotorTendencia()
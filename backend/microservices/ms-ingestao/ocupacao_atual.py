@@ -0,0 +1,72 @@
+"""
+ESTADO ATUAL DE OCUPAÇÃO - MS-INGESTAO
+Mantém ocupacao_atual (última leitura de cada unidade/tipo de leito) a partir das
+leituras inseridas em historico_ocupacao
+
+Usado pela ingestão (mesma transação da inserção), pela inicialização do serviço e
+por migrar_historico_ocupacao.py; o upsert só avança no tempo, então pode ser
+repetido sobre todo o histórico sem voltar o estado de nenhuma série.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from shared.database import engine, HistoricoOcupacao, OcupacaoAtual
+from motor_tendencia import LeituraOcupacao
+
+# Colunas devolvidas pelo INSERT ... RETURNING da ingestão (id + campos de LeituraOcupacao)
+COLUNAS_INSERIDAS = (HistoricoOcupacao.id, *(getattr(HistoricoOcupacao, campo) for campo in LeituraOcupacao._fields))
+insert_dialeto = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+
+
+def leitura_inserida(linha: Any) -> LeituraOcupacao:
+    """LeituraOcupacao de uma linha devolvida por inserir_leituras (id + campos na mesma ordem)"""
+    return LeituraOcupacao._make(linha[1:])
+
+
+def atualizar_ocupacao_atual(db: Session, inseridas: Iterable[Any]) -> int:
+    """
+    Leva a ocupacao_atual a leitura mais recente de cada unidade/tipo de leito entre as inseridas
+
+    Upsert que só substitui o estado atual por uma leitura mais nova (reenvios
+    e cargas retroativas não voltam o estado no tempo). Mesma transação da inserção.
+    """
+    mais_recentes: Dict[Tuple[str, str], Any] = {}
+    for linha in inseridas:
+        chave = (linha.unidade_id, linha.tipo_leito)
+        atual = mais_recentes.get(chave)
+        if atual is None or (linha.data_coleta, linha.id) > (atual.data_coleta, atual.id):
+            mais_recentes[chave] = linha
+    if not mais_recentes:
+        return 0
+
+    agora = datetime.utcnow()
+    parametros = [
+        {**leitura_inserida(linha)._asdict(), "historico_id": linha.id, "atualizado_em": agora}
+        for linha in mais_recentes.values()
+    ]
+    comando = insert_dialeto(OcupacaoAtual)
+    comando = comando.on_conflict_do_update(
+        index_elements=[OcupacaoAtual.unidade_id, OcupacaoAtual.tipo_leito],
+        set_={coluna: comando.excluded[coluna] for coluna in parametros[0] if coluna not in ("unidade_id", "tipo_leito")},
+        where=or_(OcupacaoAtual.data_coleta.is_(None), OcupacaoAtual.data_coleta <= comando.excluded.data_coleta)
+    )
+    db.execute(comando, parametros)
+    return len(parametros)
+
+
+def reconstruir_ocupacao_atual(db: Session) -> int:
+    """Leva a ocupacao_atual a última leitura de cada série do histórico (inicialização, migração, escritas fora da ingestão)"""
+    ordem = func.row_number().over(
+        partition_by=(HistoricoOcupacao.unidade_id, HistoricoOcupacao.tipo_leito),
+        order_by=(HistoricoOcupacao.data_coleta.desc(), HistoricoOcupacao.id.desc())
+    ).label("ordem")
+    janela = db.query(*COLUNAS_INSERIDAS, ordem).filter(
+        HistoricoOcupacao.unidade_id.isnot(None), HistoricoOcupacao.tipo_leito.isnot(None)
+    ).subquery()
+    ultimas = db.query(*(janela.c[coluna.key] for coluna in COLUNAS_INSERIDAS)).filter(janela.c.ordem == 1).all()
+    return atualizar_ocupacao_atual(db, ultimas)
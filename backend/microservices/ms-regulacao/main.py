@@ -4,9 +4,10 @@ Responsável por: IA inteligente, pipeline de hospitais, fila de regulação, de
 Integração com LLMs via RAG (Retrieval-Augmented Generation)
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, load_only
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List, Dict, Any
@@ -15,18 +16,23 @@ import os
 import logging
 import json
 import time
+import base64
 
 # Adicionar path para módulos compartilhados
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.database import get_db, PacienteRegulacao, HistoricoDecisoes, create_tables
+from shared.database import get_db, PacienteRegulacao, HistoricoDecisoes, create_tables, normalizar_filtro
 from shared.auth import get_current_user, require_role, Usuario
 from shared.utils import setup_logging, create_audit_log, validate_protocolo, MicroserviceClient
-from shared.biobert_service import extrair_entidades_biobert, is_biobert_disponivel
+from shared.biobert_service import (
+    extrair_entidades_biobert, is_biobert_disponivel, iniciar_carregamento_biobert, obter_status_biobert
+)
+from shared.executores import executor_inferencia, ExecutorSaturado
 from shared.matchmaker_logistico import processar_matchmaking
+from shared.indice_cid10 import avaliar_risco_cid
 
 # Importar integração RAG
-from rag_integration import processar_regulacao_rag, testar_rag_integration
+from rag_integration import processar_regulacao_rag, testar_rag_integration, obter_metricas_contexto_rag
 
 # Configurar logging
 logger = setup_logging("MS-Regulacao")
@@ -45,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Proximo-Cursor"],
 )
 
 # Cliente para comunicação com MS-Transferencia
@@ -113,34 +120,13 @@ def analisar_com_ia_inteligente(paciente_data: dict) -> dict:
     if historico:
         justificativa_partes.append(f"Histórico: {historico[:80]}{'...' if len(historico) > 80 else ''}")
     
-    # === ANÁLISE POR CID (Códigos reais de emergência) ===
-    cids_criticos = {
-        'I21': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Infarto Agudo do Miocárdio'},
-        'I46': {'score': 10, 'risco': 'VERMELHO', 'desc': 'Parada Cardíaca'},
-        'G93.1': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Lesão Cerebral Anóxica'},
-        'R57': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Choque'},
-        'J44.1': {'score': 8, 'risco': 'VERMELHO', 'desc': 'DPOC com Exacerbação'},
-        'N17': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Insuficiência Renal Aguda'},
-        'K92.2': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Hemorragia Gastrointestinal'},
-        'S06': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Traumatismo Craniano'},
-        'I63': {'score': 8, 'risco': 'VERMELHO', 'desc': 'AVC Isquêmico'},
-        'I61': {'score': 9, 'risco': 'VERMELHO', 'desc': 'AVC Hemorrágico'},
-        'J18': {'score': 7, 'risco': 'AMARELO', 'desc': 'Pneumonia'},
-        'E11': {'score': 6, 'risco': 'AMARELO', 'desc': 'Diabetes Mellitus'},
-        'I10': {'score': 5, 'risco': 'AMARELO', 'desc': 'Hipertensão Arterial'},
-        'M79': {'score': 4, 'risco': 'VERDE', 'desc': 'Dor Musculoesquelética'},
-        'M54': {'score': 3, 'risco': 'VERDE', 'desc': 'Dor Lombar'}
-    }
-    
-    # Verificar CID
-    cid_encontrado = None
-    for cid_code, info in cids_criticos.items():
-        if cid.startswith(cid_code):
-            cid_encontrado = info
-            score_prioridade = info['score']
-            classificacao_risco = info['risco']
-            justificativa_partes.append(f"ANÁLISE CID: {cid} ({info['desc']}) = RISCO {info['risco']} (Score: {info['score']}/10)")
-            break
+    # === ANÁLISE POR CID (índice CID-10: prefixo mais longo, ver indice_cid10) ===
+    info = avaliar_risco_cid(cid)
+    cid_encontrado = info is not None
+    if cid_encontrado:
+        score_prioridade = info['score']
+        classificacao_risco = info['risco']
+        justificativa_partes.append(f"ANÁLISE CID: {cid} ({info['desc']}) = RISCO {info['risco']} (Score: {info['score']}/10)")
     
     if not cid_encontrado and cid:
         justificativa_partes.append(f"ANÁLISE CID: {cid} não está na base crítica, mantendo score padrão")
@@ -273,6 +259,8 @@ def analisar_com_ia_inteligente(paciente_data: dict) -> dict:
 async def startup_event():
     """Inicialização do microserviço"""
     create_tables()
+    # Warm-up do BioBERT em segundo plano (análise por regras até ficar pronto)
+    iniciar_carregamento_biobert()
     logger.info("MS-Regulacao iniciado com sucesso")
 
 @app.get("/")
@@ -291,7 +279,9 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "biobert_disponivel": is_biobert_disponivel(),
+        "modelo_biobert": obter_status_biobert(),
         "pipeline_rag": True,
+        "cache_contexto_rag": obter_metricas_contexto_rag(),
         "llm_suportados": ["ollama"]  # Apenas open source
     }
 
@@ -309,11 +299,12 @@ async def processar_regulacao_ia(
     try:
         logger.info(f"🤖 MS-Regulacao processando IA + BioBERT + Matchmaker para protocolo: {paciente.protocolo}")
         
-        # 1. Análise BioBERT do prontuário
+        # 1. Análise BioBERT do prontuário (fora do event loop: requisições concorrentes
+        # entram no mesmo micro-lote; executor saturado cai na análise por regras)
         resultado_biobert = None
         if paciente.prontuario_texto:
             try:
-                biobert_analise = extrair_entidades_biobert(paciente.prontuario_texto)
+                biobert_analise = await executor_inferencia.executar(extrair_entidades_biobert, paciente.prontuario_texto)
                 if biobert_analise["status"] == "sucesso":
                     resultado_biobert = biobert_analise["analise"]
                     logger.info(f"🧬 BioBERT: {biobert_analise['nivel_confianca']} confiança ({biobert_analise['confianca']})")
@@ -435,36 +426,113 @@ async def processar_regulacao_ia(
         logger.error(f"❌ Erro no processamento MS-Regulacao: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
+# Fila de regulação paginada por cursor (keyset): tamanho padrão e máximo da página
+FILA_REGULACAO_LIMITE_PADRAO = int(os.getenv("FILA_REGULACAO_LIMITE_PADRAO", "100"))
+FILA_REGULACAO_LIMITE_MAXIMO = int(os.getenv("FILA_REGULACAO_LIMITE_MAXIMO", "500"))
+
+# Colunas da listagem; os textos longos só são lidos sob demanda
+COLUNAS_FILA = (
+    PacienteRegulacao.id, PacienteRegulacao.protocolo, PacienteRegulacao.data_solicitacao,
+    PacienteRegulacao.especialidade, PacienteRegulacao.cid, PacienteRegulacao.cid_desc,
+    PacienteRegulacao.cidade_origem, PacienteRegulacao.unidade_solicitante,
+    PacienteRegulacao.score_prioridade, PacienteRegulacao.classificacao_risco,
+    PacienteRegulacao.unidade_destino, PacienteRegulacao.prioridade_descricao
+)
+CAMPOS_TEXTO_FILA = ("justificativa_tecnica", "prontuario_texto", "historico_paciente")
+
+
+def _ordem_fila():
+    """Ordem da fila (e do cursor): score desc, data asc, id - nulos por último"""
+    return (
+        PacienteRegulacao.score_prioridade.desc().nullslast(),
+        PacienteRegulacao.data_solicitacao.asc().nullslast(),
+        PacienteRegulacao.id.asc()
+    )
+
+
+def _codificar_cursor(paciente: PacienteRegulacao) -> str:
+    data = paciente.data_solicitacao.isoformat() if paciente.data_solicitacao else None
+    chave = json.dumps([paciente.score_prioridade, data, paciente.id])
+    return base64.urlsafe_b64encode(chave.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(cursor: str):
+    try:
+        score, data, id_paciente = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (
+            int(score) if score is not None else None,
+            datetime.fromisoformat(data) if data is not None else None,
+            int(id_paciente)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def _apos_cursor(score: Optional[int], data: Optional[datetime], id_paciente: int):
+    """Condição 'depois de (score, data, id)' na ordem de _ordem_fila()"""
+    chave = (
+        (PacienteRegulacao.score_prioridade, score, True),
+        (PacienteRegulacao.data_solicitacao, data, False),
+        (PacienteRegulacao.id, id_paciente, False)
+    )
+    alternativas, iguais = [], []
+    for coluna, valor, decrescente in chave:
+        if valor is None:
+            # Nulos vêm por último: só outro nulo empata, nada vem depois
+            iguais.append(coluna.is_(None))
+            continue
+        depois = coluna < valor if decrescente else coluna > valor
+        alternativas.append(and_(*iguais, or_(depois, coluna.is_(None))))
+        iguais.append(coluna == valor)
+    return or_(*alternativas)
+
+
 @app.get("/fila-regulacao")
 async def get_fila_regulacao(
+    response: Response,
     especialidade: Optional[str] = None,
     cidade: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limite: int = Query(FILA_REGULACAO_LIMITE_PADRAO, ge=1, le=FILA_REGULACAO_LIMITE_MAXIMO),
+    incluir_textos: bool = False,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_role(["REGULADOR", "ADMIN"]))
 ):
-    """Buscar fila de regulação - pacientes aguardando decisão do regulador"""
+    """
+    Buscar fila de regulação - pacientes aguardando decisão do regulador
+
+    - especialidade/cidade: igualdade sobre o valor normalizado (sem acentos e
+      maiúsculas/minúsculas), servida pelo índice idx_pacientes_fila_regulacao
+    - Paginação por cursor: o header X-Proximo-Cursor traz o cursor da próxima
+      página (ausente na última)
+    - Prontuário, histórico e justificativa só com incluir_textos=true ou em
+      GET /fila-regulacao/{protocolo}/textos
+    """
     
     try:
         # Buscar pacientes com status 'AGUARDANDO_REGULACAO'
-        query = db.query(PacienteRegulacao).filter(
-            PacienteRegulacao.status == 'AGUARDANDO_REGULACAO'
-        )
+        query = db.query(PacienteRegulacao)
+        if not incluir_textos:
+            query = query.options(load_only(*COLUNAS_FILA))
+        query = query.filter(PacienteRegulacao.status == 'AGUARDANDO_REGULACAO')
         
         # Aplicar filtros
         if especialidade:
-            query = query.filter(PacienteRegulacao.especialidade.ilike(f"%{especialidade}%"))
+            query = query.filter(PacienteRegulacao.especialidade_normalizada == normalizar_filtro(especialidade))
         if cidade:
-            query = query.filter(PacienteRegulacao.cidade_origem.ilike(f"%{cidade}%"))
+            query = query.filter(PacienteRegulacao.cidade_origem_normalizada == normalizar_filtro(cidade))
+        if cursor:
+            query = query.filter(_apos_cursor(*_decodificar_cursor(cursor)))
         
-        # Ordenar por prioridade (score maior primeiro) e data
-        pacientes = query.order_by(
-            PacienteRegulacao.score_prioridade.desc(),
-            PacienteRegulacao.data_solicitacao.asc()
-        ).all()
+        # Ordenar por prioridade (score maior primeiro) e data; uma linha a mais indica próxima página
+        pacientes = query.order_by(*_ordem_fila()).limit(limite + 1).all()
+        if len(pacientes) > limite:
+            pacientes = pacientes[:limite]
+            response.headers["X-Proximo-Cursor"] = _codificar_cursor(pacientes[-1])
         
         resultado = []
         for paciente in pacientes:
-            resultado.append({
+            item = {
                 "protocolo": paciente.protocolo,
                 "data_solicitacao": paciente.data_solicitacao.isoformat() if paciente.data_solicitacao else None,
                 "especialidade": paciente.especialidade,
@@ -474,20 +542,39 @@ async def get_fila_regulacao(
                 "unidade_solicitante": paciente.unidade_solicitante,
                 "score_prioridade": paciente.score_prioridade,
                 "classificacao_risco": paciente.classificacao_risco,
-                "justificativa_tecnica": paciente.justificativa_tecnica,
                 "unidade_destino": paciente.unidade_destino,
-                "prontuario_texto": paciente.prontuario_texto,
-                "historico_paciente": paciente.historico_paciente,
                 "prioridade_descricao": paciente.prioridade_descricao
-            })
+            }
+            if incluir_textos:
+                item.update({campo: getattr(paciente, campo) for campo in CAMPOS_TEXTO_FILA})
+            resultado.append(item)
         
         logger.info(f"Fila de regulação: {len(resultado)} pacientes")
         return resultado
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao buscar fila de regulação: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
+@app.get("/fila-regulacao/{protocolo}/textos")
+async def get_textos_fila_regulacao(
+    protocolo: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_role(["REGULADOR", "ADMIN"]))
+):
+    """Prontuário, histórico e justificativa de um paciente da fila (carregados sob demanda)"""
+    
+    paciente = db.query(PacienteRegulacao).options(
+        load_only(*(getattr(PacienteRegulacao, campo) for campo in CAMPOS_TEXTO_FILA))
+    ).filter(PacienteRegulacao.protocolo == protocolo).first()
+    
+    if not paciente:
+        raise HTTPException(status_code=404, detail="Paciente não encontrado")
+    
+    return {"protocolo": protocolo, **{campo: getattr(paciente, campo) for campo in CAMPOS_TEXTO_FILA}}
+
 @app.post("/decisao-regulador")
 async def registrar_decisao_regulador(
     decisao: DecisaoReguladorRequest,
@@ -704,7 +791,7 @@ async def testar_biobert(
         logger.info(f"🧬 Testando BioBERT para usuário: {current_user.email}")
         
         # Analisar com BioBERT
-        resultado = extrair_entidades_biobert(texto_medico)
+        resultado = await executor_inferencia.executar(extrair_entidades_biobert, texto_medico)
         
         return {
             "texto_analisado": texto_medico,
@@ -716,6 +803,12 @@ async def testar_biobert(
         
     except HTTPException:
         raise
+    except ExecutorSaturado as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Sistema de análise sobrecarregado. Tente novamente em {e.retry_after}s",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Erro no teste BioBERT: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
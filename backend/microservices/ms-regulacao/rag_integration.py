@@ -18,6 +18,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from pipeline_hospitais_goias_rag import (
     gerar_contexto_rag_llama, 
     gerar_prompt_completo_llama,
+    obter_metricas_contexto_rag,
     pipeline_rag
 )
 
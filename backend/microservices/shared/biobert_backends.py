@@ -0,0 +1,204 @@
+"""
+BACKENDS DE INFERÊNCIA DO BIOBERT
+Mesma entrada (tokens em arrays NumPy) e mesma saída (last_hidden_state) para
+todas as implementações, selecionadas por configuração (BIOBERT_BACKEND):
+
+- pytorch       : modelo original em fp32 (referência)
+- pytorch_int8  : quantização dinâmica int8 das camadas Linear (torch.quantization)
+- onnx          : exportação ONNX do mesmo modelo executada no ONNX Runtime (CPU)
+
+Dependências opcionais: onnxruntime só é necessário para o backend "onnx".
+"""
+
+import os
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BIOBERT_BACKEND = os.getenv("BIOBERT_BACKEND", "pytorch")
+BIOBERT_ONNX_DIR = os.getenv("BIOBERT_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "regulacao", "onnx"))
+BIOBERT_THREADS = int(os.getenv("BIOBERT_THREADS", "0"))  # 0 = padrão da biblioteca
+
+# Entradas aceitas pelos modelos BERT (na ordem do forward)
+ENTRADAS_BERT = ("input_ids", "attention_mask", "token_type_ids")
+
+
+class BackendPyTorch:
+    """Modelo transformers original em fp32"""
+
+    nome = "pytorch"
+
+    def __init__(self, nome_modelo: str, tokenizer=None):
+        import torch
+        from transformers import AutoModel
+
+        if BIOBERT_THREADS:
+            torch.set_num_threads(BIOBERT_THREADS)
+        self.nome_modelo = nome_modelo
+        self.modelo = AutoModel.from_pretrained(nome_modelo)
+        self.modelo.eval()
+
+    def inferir(self, entradas: Dict[str, np.ndarray]) -> np.ndarray:
+        """Retorna last_hidden_state com shape (lote, sequência, dimensão)"""
+        import torch
+
+        tensores = {k: torch.from_numpy(v) for k, v in entradas.items() if k in ENTRADAS_BERT}
+        with torch.no_grad():
+            return self.modelo(**tensores).last_hidden_state.numpy()
+
+
+class BackendPyTorchInt8(BackendPyTorch):
+    """Quantização dinâmica int8: pesos das camadas Linear em int8, ativações quantizadas em tempo de execução"""
+
+    nome = "pytorch_int8"
+
+    def __init__(self, nome_modelo: str, tokenizer=None):
+        import torch
+
+        super().__init__(nome_modelo, tokenizer)
+        self.modelo = torch.quantization.quantize_dynamic(self.modelo, {torch.nn.Linear}, dtype=torch.qint8)
+        self.modelo.eval()
+
+
+class BackendONNX:
+    """Exportação ONNX do modelo executada no ONNX Runtime (CPUExecutionProvider)"""
+
+    nome = "onnx"
+
+    def __init__(self, nome_modelo: str, tokenizer=None):
+        import onnxruntime as ort
+
+        self.nome_modelo = nome_modelo
+        self.caminho = os.path.join(BIOBERT_ONNX_DIR, nome_modelo.replace("/", "__") + ".onnx")
+        if not os.path.exists(self.caminho):
+            self._exportar(nome_modelo, tokenizer)
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if BIOBERT_THREADS:
+            opcoes.intra_op_num_threads = BIOBERT_THREADS
+        self.sessao = ort.InferenceSession(self.caminho, sess_options=opcoes, providers=["CPUExecutionProvider"])
+        self._entradas = [e.name for e in self.sessao.get_inputs()]
+
+    def _exportar(self, nome_modelo: str, tokenizer):
+        """Exporta o modelo fp32 uma única vez; o arquivo fica em BIOBERT_ONNX_DIR"""
+        import torch
+        from transformers import AutoModel
+
+        logger.info(f"🧬 Exportando {nome_modelo} para ONNX: {self.caminho}")
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+
+        modelo = AutoModel.from_pretrained(nome_modelo)
+        modelo.eval()
+        exemplo = tokenizer(["Paciente com dor torácica"], return_tensors="pt")
+        eixos_dinamicos = {nome: {0: "lote", 1: "sequencia"} for nome in ENTRADAS_BERT}
+        eixos_dinamicos["last_hidden_state"] = {0: "lote", 1: "sequencia"}
+
+        temporario = self.caminho + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                modelo,
+                tuple(exemplo[nome] for nome in ENTRADAS_BERT),
+                temporario,
+                input_names=list(ENTRADAS_BERT),
+                output_names=["last_hidden_state"],
+                dynamic_axes=eixos_dinamicos,
+                opset_version=14
+            )
+        os.replace(temporario, self.caminho)
+        del modelo
+
+    def inferir(self, entradas: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {nome: entradas[nome].astype(np.int64) for nome in self._entradas if nome in entradas}
+        return self.sessao.run(["last_hidden_state"], feed)[0]
+
+
+BACKENDS = {
+    BackendPyTorch.nome: BackendPyTorch,
+    BackendPyTorchInt8.nome: BackendPyTorchInt8,
+    BackendONNX.nome: BackendONNX,
+}
+
+
+def criar_backend(tipo: str, nome_modelo: str, tokenizer=None):
+    """
+    Instancia o backend configurado; se ele falhar (ex.: onnxruntime ausente)
+    usa o modelo PyTorch fp32 de referência
+    """
+    classe = BACKENDS.get(tipo)
+    if classe is None:
+        logger.warning(f"⚠️ Backend BioBERT desconhecido '{tipo}' - usando pytorch. Opções: {', '.join(BACKENDS)}")
+        classe = BackendPyTorch
+
+    try:
+        backend = classe(nome_modelo, tokenizer)
+        logger.info(f"✅ Backend BioBERT: {backend.nome} ({nome_modelo})")
+        return backend
+    except ImportError as e:
+        if classe is BackendPyTorch:
+            raise
+        logger.warning(f"⚠️ Backend '{tipo}' indisponível ({e}) - usando pytorch fp32")
+        return BackendPyTorch(nome_modelo, tokenizer)
+
+
+def score_confianca(last_hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """
+    Score de confiança por texto: média dos estados ocultos sobre os tokens
+    reais (padding ignorado), seguida da média sobre as dimensões
+    """
+    mascara = attention_mask[..., None].astype(last_hidden_state.dtype)
+    comprimentos = attention_mask.sum(axis=1)[:, None]
+    return ((last_hidden_state * mascara).sum(axis=1) / comprimentos).mean(axis=1)
+
+
+def embeddings_medios(last_hidden_state: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Embedding médio por texto (usado na verificação de paridade)"""
+    mascara = attention_mask[..., None].astype(last_hidden_state.dtype)
+    return (last_hidden_state * mascara).sum(axis=1) / attention_mask.sum(axis=1)[:, None]
+
+
+def verificar_paridade(referencia, candidato, tokenizer, corpus: List[str],
+                       tolerancia_confianca: float = 0.02, similaridade_minima: float = 0.99) -> Dict[str, Any]:
+    """
+    Compara um backend com o fp32 de referência no corpus fixo
+
+    Critérios: diferença absoluta do score de confiança, similaridade de
+    cosseno dos embeddings médios e concordância do nível de confiança
+    (alta/media/baixa) usado na resposta da API.
+    """
+    def nivel(score: float) -> str:
+        return "alta" if score > 0.7 else "media" if score > 0.5 else "baixa"
+
+    diferencas, similaridades, divergencias = [], [], []
+    for texto in corpus:
+        entradas = dict(tokenizer([texto], return_tensors="np", truncation=True, max_length=512, padding="longest"))
+        estados_ref = referencia.inferir(entradas)
+        estados_cand = candidato.inferir(entradas)
+
+        conf_ref = float(score_confianca(estados_ref, entradas["attention_mask"])[0])
+        conf_cand = float(score_confianca(estados_cand, entradas["attention_mask"])[0])
+        emb_ref = embeddings_medios(estados_ref, entradas["attention_mask"])[0]
+        emb_cand = embeddings_medios(estados_cand, entradas["attention_mask"])[0]
+        cosseno = float(np.dot(emb_ref, emb_cand) / (np.linalg.norm(emb_ref) * np.linalg.norm(emb_cand)))
+
+        diferencas.append(abs(conf_ref - conf_cand))
+        similaridades.append(cosseno)
+        if nivel(conf_ref) != nivel(conf_cand):
+            divergencias.append(texto[:60])
+
+    resultado = {
+        "backend": candidato.nome,
+        "textos": len(corpus),
+        "max_diferenca_confianca": round(max(diferencas), 5) if diferencas else 0.0,
+        "min_similaridade_cosseno": round(min(similaridades), 5) if similaridades else 1.0,
+        "divergencias_nivel": divergencias,
+    }
+    resultado["aprovado"] = (
+        resultado["max_diferenca_confianca"] <= tolerancia_confianca
+        and resultado["min_similaridade_cosseno"] >= similaridade_minima
+        and not divergencias
+    )
+    return resultado
@@ -34,13 +34,159 @@ AUDITABILIDADE:
 """
 
 import logging
-import torch
-from typing import Optional, Dict, Any
+import copy
+import hashlib
+import queue
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Callable, Tuple
 from datetime import datetime
 import os
 
+try:
+    from .cache_lru import CacheLRU, CamadaDiscoSQLite, CacheEmCamadas
+    from .biobert_backends import BIOBERT_BACKEND, criar_backend, score_confianca
+    from .biobert_sidecar import ClienteSidecarBioBERT, SidecarIndisponivel
+except ImportError:
+    from cache_lru import CacheLRU, CamadaDiscoSQLite, CacheEmCamadas
+    from biobert_backends import BIOBERT_BACKEND, criar_backend, score_confianca
+    from biobert_sidecar import ClienteSidecarBioBERT, SidecarIndisponivel
+
 logger = logging.getLogger(__name__)
 
+# Estados de prontidão do modelo (expostos no /health)
+ESTADO_NAO_INICIADO = "not_started"
+ESTADO_CARREGANDO = "loading"
+ESTADO_PRONTO = "ready"
+ESTADO_DEGRADADO = "degraded"
+
+# Micro-batching: espera máxima para formar um lote e tamanho máximo do lote
+BIOBERT_LOTE_MAX = int(os.getenv("BIOBERT_LOTE_MAX", "8"))
+BIOBERT_LOTE_ESPERA_MS = float(os.getenv("BIOBERT_LOTE_ESPERA_MS", "5"))
+
+# Cache de resultados: itens em memória, validade e camada opcional em disco (SQLite)
+BIOBERT_CACHE_MAX = int(os.getenv("BIOBERT_CACHE_MAX", "2048"))
+BIOBERT_CACHE_TTL_S = float(os.getenv("BIOBERT_CACHE_TTL_S", "21600"))
+BIOBERT_CACHE_SQLITE = os.getenv("BIOBERT_CACHE_SQLITE", "")
+
+# Análise textual por nível de confiança do modelo
+ANALISE_POR_CONFIANCA = {
+    "alta": "Quadro clínico bem definido. Entidades médicas identificadas com alta confiança.",
+    "media": "Quadro clínico identificado. Algumas entidades médicas detectadas.",
+    "baixa": "Quadro clínico com baixa confiança. Recomenda-se revisão manual."
+}
+
+# "processo": modelo carregado em cada worker | "sidecar": inferência no sidecar (biobert_sidecar.py)
+BIOBERT_MODO = os.getenv("BIOBERT_MODO", "processo")
+
+# Sidecar fora do ar: "regras" responde 'indisponivel' sem carregar o modelo no worker
+# (preserva a economia de memória); "local" carrega uma cópia do modelo em cada worker
+BIOBERT_SIDECAR_FALLBACK = os.getenv("BIOBERT_SIDECAR_FALLBACK", "regras")
+
+
+def normalizar_texto_medico(texto: str) -> str:
+    """Normalização usada na chave do cache: Unicode NFC e espaços colapsados"""
+    return " ".join(unicodedata.normalize("NFC", texto).split())
+
+
+def chave_cache_biobert(texto: str, modelo: str) -> str:
+    """
+    Chave endereçada pelo conteúdo: hash do texto normalizado + nome do modelo
+
+    Textos que diferem só em espaços compartilham a entrada: o que depende do
+    texto exato (entidades) é refeito a cada acerto do cache.
+    """
+    conteudo = f"{modelo}\x00{normalizar_texto_medico(texto)}"
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def criar_cache_biobert() -> CacheEmCamadas:
+    """Cache LRU+TTL em memória e, se BIOBERT_CACHE_SQLITE estiver definido, camada em disco"""
+    disco = None
+    if BIOBERT_CACHE_SQLITE:
+        try:
+            disco = CamadaDiscoSQLite(BIOBERT_CACHE_SQLITE, ttl_s=BIOBERT_CACHE_TTL_S)
+            logger.info(f"✅ Cache BioBERT em disco: {BIOBERT_CACHE_SQLITE}")
+        except Exception as e:
+            logger.warning(f"⚠️ Cache BioBERT em disco indisponível ({e}) - usando apenas memória")
+    memoria = CacheLRU(max_itens=BIOBERT_CACHE_MAX, ttl_s=BIOBERT_CACHE_TTL_S, nome="biobert")
+    return CacheEmCamadas(memoria, disco)
+
+
+class AgendadorMicroLote:
+    """
+    Agrupa textos de chamadas concorrentes em uma única passagem do modelo
+    
+    Cada chamador entrega seu texto e aguarda; a thread do agendador coleta
+    textos por até `espera_ms` ou até `max_itens`, executa `processar_lote`
+    uma vez e devolve a cada chamador o seu resultado.
+    """
+    
+    def __init__(self, processar_lote: Callable[[List[str]], List[Any]],
+                 max_itens: int = BIOBERT_LOTE_MAX, espera_ms: float = BIOBERT_LOTE_ESPERA_MS):
+        self._processar_lote = processar_lote
+        self.max_itens = max(1, max_itens)
+        self.espera_s = max(0.0, espera_ms) / 1000.0
+        self._fila: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._lotes = 0
+        self._itens = 0
+        self._maior_lote = 0
+    
+    def _garantir_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._executar, name="biobert-microlote", daemon=True)
+                    self._thread.start()
+    
+    def submeter(self, texto: str) -> Any:
+        """Enfileira o texto e bloqueia até o lote que o contém ser processado"""
+        futuro: Future = Future()
+        self._garantir_thread()
+        self._fila.put((texto, futuro))
+        return futuro.result()
+    
+    def _executar(self):
+        while True:
+            lote = [self._fila.get()]
+            prazo = time.monotonic() + self.espera_s
+            while len(lote) < self.max_itens:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            
+            textos = [texto for texto, _ in lote]
+            try:
+                resultados = self._processar_lote(textos)
+                for (_, futuro), resultado in zip(lote, resultados):
+                    futuro.set_result(resultado)
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+            
+            self._lotes += 1
+            self._itens += len(lote)
+            self._maior_lote = max(self._maior_lote, len(lote))
+    
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "lotes": self._lotes,
+            "itens": self._itens,
+            "tamanho_medio_lote": round(self._itens / self._lotes, 2) if self._lotes else 0.0,
+            "maior_lote": self._maior_lote,
+            "na_fila": self._fila.qsize(),
+            "max_itens": self.max_itens,
+            "espera_ms": self.espera_s * 1000
+        }
+
 class BioBERTService:
     """
     Serviço para análise de textos médicos com BioBERT
@@ -48,9 +194,16 @@ class BioBERTService:
     """
     
     _instance = None
-    _model = None
+    _backend = None
     _tokenizer = None
     _disponivel = False
+    _nome_modelo = None
+    _agendador = None
+    _cache = None
+    _estado = ESTADO_NAO_INICIADO
+    _erro_carregamento = None
+    _tempo_carregamento = None
+    _thread_carregamento = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -60,21 +213,66 @@ class BioBERTService:
     def __init__(self):
         if not hasattr(self, 'initialized'):
             self.initialized = True
-            self._carregar_modelo()
+            self._cache = criar_cache_biobert()
+            self._lock_carregamento = threading.Lock()
+            self._pronto = threading.Event()
+            # O modelo NÃO é carregado na importação: ver iniciar_carregamento()
+    
+    def iniciar_carregamento(self):
+        """
+        Dispara o carregamento do modelo em thread de fundo (idempotente)
+        
+        Enquanto o estado for 'loading', extrair_entidades retorna 'indisponivel'
+        e a API segue pelo caminho baseado em regras.
+        """
+        with self._lock_carregamento:
+            if self._estado != ESTADO_NAO_INICIADO:
+                return
+            self._estado = ESTADO_CARREGANDO
+            self._thread_carregamento = threading.Thread(
+                target=self._carregar_modelo, name="biobert-warmup", daemon=True
+            )
+            self._thread_carregamento.start()
+    
+    def aguardar_pronto(self, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até o fim do carregamento (scripts e testes); True se o modelo ficou pronto"""
+        self.iniciar_carregamento()
+        self._pronto.wait(timeout)
+        return self._disponivel
+    
+    def status(self) -> Dict[str, Any]:
+        """Estado de prontidão do modelo"""
+        return {
+            "estado": self._estado,
+            "modelo": self._nome_modelo,
+            "backend": self._backend.nome if self._backend else BIOBERT_BACKEND,
+            "tempo_carregamento_s": self._tempo_carregamento,
+            "erro": self._erro_carregamento
+        }
     
     def _carregar_modelo(self):
-        """Carrega o modelo BioBERT (lazy loading)"""
-        if self._model is None:
+        """Carrega o modelo BioBERT no backend configurado em BIOBERT_BACKEND (lazy loading)"""
+        inicio = time.perf_counter()
+        try:
+            self._carregar_backend()
+        finally:
+            self._tempo_carregamento = round(time.perf_counter() - inicio, 2)
+            self._estado = ESTADO_PRONTO if self._disponivel else ESTADO_DEGRADADO
+            self._pronto.set()
+            logger.info(f"🧬 BioBERT estado: {self._estado} ({self._tempo_carregamento}s)")
+    
+    def _carregar_backend(self):
+        if self._backend is None:
             try:
-                logger.info("🧬 Carregando modelo BioBERT...")
+                logger.info(f"🧬 Carregando modelo BioBERT (backend: {BIOBERT_BACKEND})...")
                 
-                from transformers import AutoTokenizer, AutoModel
+                from transformers import AutoTokenizer
                 
                 # Tentar carregar BioBERT primeiro
                 try:
                     model_name = "dmis-lab/biobert-base-cased-v1.1"
                     self._tokenizer = AutoTokenizer.from_pretrained(model_name)
-                    self._model = AutoModel.from_pretrained(model_name)
+                    self._backend = criar_backend(BIOBERT_BACKEND, model_name, self._tokenizer)
                     logger.info(f"✅ BioBERT carregado: {model_name}")
                 except Exception as e:
                     logger.warning(f"⚠️ BioBERT oficial falhou: {e}")
@@ -83,7 +281,7 @@ class BioBERTService:
                     try:
                         model_name = "emilyalsentzer/Bio_ClinicalBERT"
                         self._tokenizer = AutoTokenizer.from_pretrained(model_name)
-                        self._model = AutoModel.from_pretrained(model_name)
+                        self._backend = criar_backend(BIOBERT_BACKEND, model_name, self._tokenizer)
                         logger.info(f"✅ Bio_ClinicalBERT carregado: {model_name}")
                     except Exception as e2:
                         logger.warning(f"⚠️ Bio_ClinicalBERT falhou: {e2}")
@@ -91,39 +289,43 @@ class BioBERTService:
                         # Fallback final para BERT base
                         model_name = "bert-base-uncased"
                         self._tokenizer = AutoTokenizer.from_pretrained(model_name)
-                        self._model = AutoModel.from_pretrained(model_name)
+                        self._backend = criar_backend(BIOBERT_BACKEND, model_name, self._tokenizer)
                         logger.info(f"✅ BERT base carregado: {model_name}")
                 
-                # Colocar em modo de avaliação
-                self._model.eval()
-                
+                # Chave do cache distingue modelo e backend (int8/ONNX não reutilizam resultados fp32)
+                self._nome_modelo = f"{model_name}|{self._backend.nome}"
+                self._agendador = AgendadorMicroLote(self._inferir_lote)
                 self._disponivel = True
                 logger.info("✅ Modelo médico carregado com sucesso")
                 
             except ImportError as e:
                 logger.error(f"❌ Dependências não instaladas: {e}")
                 logger.error("💡 Execute: pip install transformers torch")
+                self._erro_carregamento = str(e)
                 self._disponivel = False
             except Exception as e:
                 logger.error(f"❌ Erro ao carregar modelo médico: {e}")
+                self._erro_carregamento = str(e)
                 self._disponivel = False
     
     def is_disponivel(self) -> bool:
         """Verifica se BioBERT está disponível"""
         return self._disponivel
     
-    def extrair_entidades(self, texto_medico: str) -> Dict[str, Any]:
-        """
-        Extrai entidades médicas do texto usando BioBERT
-        
-        Args:
-            texto_medico: Texto do prontuário ou descrição médica
-            
-        Returns:
-            Dict com análise estruturada
-        """
-        
+    def _resultado_sem_analise(self, texto_medico: str) -> Optional[Dict[str, Any]]:
+        """Resposta para modelo indisponível ou texto insuficiente (None se o texto pode ser analisado)"""
         if not self._disponivel:
+            if self._estado == ESTADO_NAO_INICIADO:
+                self.iniciar_carregamento()
+            if self._estado == ESTADO_CARREGANDO:
+                return {
+                    "status": "indisponivel",
+                    "analise": "Modelo BioBERT em carregamento. Análise por regras aplicada.",
+                    "confianca": 0.0,
+                    "entidades": [],
+                    "estado_modelo": self._estado,
+                    "timestamp": datetime.utcnow().isoformat()
+                }
             return {
                 "status": "indisponivel",
                 "analise": "BioBERT não está disponível. Análise manual necessária.",
@@ -141,71 +343,186 @@ class BioBERTService:
                 "timestamp": datetime.utcnow().isoformat()
             }
         
-        try:
-            # Tokenizar o texto
-            inputs = self._tokenizer(
-                texto_medico,
-                return_tensors="pt",
-                truncation=True,
-                max_length=512,
-                padding=True
-            )
-            
-            # Processar com BioBERT
-            with torch.no_grad():
-                outputs = self._model(**inputs)
-            
-            # Extrair embeddings
-            last_hidden_states = outputs.last_hidden_state
-            attention_weights = torch.mean(last_hidden_states, dim=1)
-            confidence_score = torch.mean(attention_weights).item()
-            
-            # Analisar tokens para identificar entidades médicas
-            tokens = self._tokenizer.convert_ids_to_tokens(inputs['input_ids'][0])
-            entidades_detectadas = self._identificar_entidades_medicas(tokens, texto_medico)
-            
-            # Classificar gravidade baseada no score
-            if confidence_score > 0.7:
-                nivel_confianca = "alta"
-                analise = "Quadro clínico bem definido. Entidades médicas identificadas com alta confiança."
-            elif confidence_score > 0.5:
-                nivel_confianca = "media"
-                analise = "Quadro clínico identificado. Algumas entidades médicas detectadas."
-            else:
-                nivel_confianca = "baixa"
-                analise = "Quadro clínico com baixa confiança. Recomenda-se revisão manual."
-            
-            # Adicionar contexto médico
-            contexto_medico = self._gerar_contexto_medico(entidades_detectadas, confidence_score)
-            
-            return {
-                "status": "sucesso",
-                "analise": f"{analise} {contexto_medico}",
-                "confianca": round(confidence_score, 3),
-                "nivel_confianca": nivel_confianca,
-                "entidades": entidades_detectadas,
-                "tokens_processados": len(tokens),
-                "timestamp": datetime.utcnow().isoformat(),
-                "modelo": "dmis-lab/biobert-v1.1-pubmed",
-                # Informações de validação científica
-                "validacao_cientifica": {
-                    "referencia": "Lee et al. (2020) - Bioinformatics, 36(4), 1234-1240",
-                    "doi": "10.1093/bioinformatics/btz682",
-                    "dados_treinamento": "PubMed (4.5B palavras) + PMC (13.5B palavras)",
-                    "licenca": "Apache 2.0 (Open Source)"
-                }
+        return None
+    
+    def _resultado_erro(self, erro: Exception) -> Dict[str, Any]:
+        logger.error(f"❌ Erro na análise BioBERT: {erro}")
+        return {
+            "status": "erro",
+            "analise": f"Erro na análise automática: {str(erro)}. Revisão manual necessária.",
+            "confianca": 0.0,
+            "entidades": [],
+            "erro": str(erro),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    def _inferir_lote(self, textos: List[str]) -> List[Tuple[float, list]]:
+        """
+        Uma passagem do modelo para todos os textos do lote
+        
+        O lote é preenchido até a maior sequência; a média dos estados ocultos
+        usa a attention_mask para ignorar o padding, de modo que o score de
+        cada texto é igual ao da análise individual.
+        
+        Returns:
+            Lista de (confidence_score, tokens) na ordem dos textos
+        """
+        inputs = dict(self._tokenizer(
+            textos,
+            return_tensors="np",
+            truncation=True,
+            max_length=512,
+            padding="longest"
+        ))
+        
+        last_hidden_states = self._backend.inferir(inputs)
+        
+        # Média por sequência apenas sobre tokens reais, depois média nas dimensões
+        confidence_scores = score_confianca(last_hidden_states, inputs['attention_mask']).tolist()
+        comprimentos = inputs['attention_mask'].sum(axis=1)
+        
+        resultados = []
+        for i, confidence_score in enumerate(confidence_scores):
+            ids = inputs['input_ids'][i][:int(comprimentos[i])].tolist()
+            tokens = self._tokenizer.convert_ids_to_tokens(ids)
+            resultados.append((confidence_score, tokens))
+        return resultados
+    
+    def _montar_resultado(self, texto_medico: str, confidence_score: float, tokens: list) -> Dict[str, Any]:
+        """Monta a análise estruturada a partir do score e dos tokens do modelo"""
+        entidades_detectadas = self._identificar_entidades_medicas(tokens, texto_medico)
+        
+        # Classificar gravidade baseada no score
+        if confidence_score > 0.7:
+            nivel_confianca = "alta"
+        elif confidence_score > 0.5:
+            nivel_confianca = "media"
+        else:
+            nivel_confianca = "baixa"
+        
+        return {
+            "status": "sucesso",
+            "analise": self._analise(nivel_confianca, entidades_detectadas, confidence_score),
+            "confianca": round(confidence_score, 3),
+            "nivel_confianca": nivel_confianca,
+            "entidades": entidades_detectadas,
+            "tokens_processados": len(tokens),
+            "timestamp": datetime.utcnow().isoformat(),
+            "modelo": "dmis-lab/biobert-v1.1-pubmed",
+            # Informações de validação científica
+            "validacao_cientifica": {
+                "referencia": "Lee et al. (2020) - Bioinformatics, 36(4), 1234-1240",
+                "doi": "10.1093/bioinformatics/btz682",
+                "dados_treinamento": "PubMed (4.5B palavras) + PMC (13.5B palavras)",
+                "licenca": "Apache 2.0 (Open Source)"
             }
+        }
+    
+    def _analise(self, nivel_confianca: str, entidades: list, confidence_score: float) -> str:
+        """Análise por nível de confiança + contexto médico das entidades"""
+        return f"{ANALISE_POR_CONFIANCA[nivel_confianca]} {self._gerar_contexto_medico(entidades, confidence_score)}"
+    
+    def _consultar_cache(self, texto_medico: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Retorna (chave, resultado em cache ou None)
+        
+        Do cache vem só o que é do modelo (confiança, tokens); entidades e
+        análise são refeitas sobre o texto recebido, pois a chave colapsa espaços
+        e termos com espaço ("falta de ar") podem não estar no texto recebido.
+        """
+        chave = chave_cache_biobert(texto_medico, self._nome_modelo or "")
+        resultado = self._cache.obter(chave)
+        if resultado is None:
+            return chave, None
+        resultado = copy.deepcopy(resultado)
+        entidades = self._identificar_entidades_medicas([], texto_medico)
+        resultado["entidades"] = entidades
+        resultado["analise"] = self._analise(resultado["nivel_confianca"], entidades, resultado["confianca"])
+        resultado["timestamp"] = datetime.utcnow().isoformat()
+        resultado["cache_hit"] = True
+        return chave, resultado
+    
+    def _armazenar_cache(self, chave: str, resultado: Dict[str, Any]):
+        # Apenas análises bem-sucedidas; erros devem ser refeitos na próxima chamada
+        if resultado.get("status") == "sucesso":
+            self._cache.definir(chave, copy.deepcopy(resultado))
+    
+    def extrair_entidades(self, texto_medico: str) -> Dict[str, Any]:
+        """
+        Extrai entidades médicas do texto usando BioBERT
+        
+        Resultados ficam em cache pelo hash do texto normalizado + modelo;
+        chamadas concorrentes sem cache são agrupadas pelo agendador de
+        micro-lotes em uma única passagem do modelo.
+        
+        Args:
+            texto_medico: Texto do prontuário ou descrição médica
             
+        Returns:
+            Dict com análise estruturada
+        """
+        
+        resultado = self._resultado_sem_analise(texto_medico)
+        if resultado is not None:
+            return resultado
+        
+        chave, resultado = self._consultar_cache(texto_medico)
+        if resultado is not None:
+            return resultado
+        
+        try:
+            confidence_score, tokens = self._agendador.submeter(texto_medico)
+            resultado = self._montar_resultado(texto_medico, confidence_score, tokens)
         except Exception as e:
-            logger.error(f"❌ Erro na análise BioBERT: {e}")
-            return {
-                "status": "erro",
-                "analise": f"Erro na análise automática: {str(e)}. Revisão manual necessária.",
-                "confianca": 0.0,
-                "entidades": [],
-                "erro": str(e),
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            return self._resultado_erro(e)
+        
+        self._armazenar_cache(chave, resultado)
+        return resultado
+    
+    def extrair_entidades_lote(self, textos: List[str], tamanho_lote: int = 16) -> List[Dict[str, Any]]:
+        """
+        Extração em lote para reprocessamentos em massa
+        
+        Os textos são ordenados por tamanho antes de formar os lotes (menos
+        padding por passagem) e os resultados voltam na ordem de entrada.
+        
+        Args:
+            textos: Lista de textos de prontuário
+            tamanho_lote: Textos por passagem do modelo
+            
+        Returns:
+            Lista de análises, uma por texto
+        """
+        resultados: List[Optional[Dict[str, Any]]] = [self._resultado_sem_analise(t) for t in textos]
+        chaves: Dict[int, str] = {}
+        for i, resultado in enumerate(resultados):
+            if resultado is None:
+                chaves[i], resultados[i] = self._consultar_cache(textos[i])
+        pendentes = sorted((i for i, r in enumerate(resultados) if r is None), key=lambda i: len(textos[i]))
+        
+        for inicio in range(0, len(pendentes), max(1, tamanho_lote)):
+            indices = pendentes[inicio:inicio + tamanho_lote]
+            try:
+                saidas = self._inferir_lote([textos[i] for i in indices])
+                for i, (confidence_score, tokens) in zip(indices, saidas):
+                    resultados[i] = self._montar_resultado(textos[i], confidence_score, tokens)
+                    self._armazenar_cache(chaves[i], resultados[i])
+            except Exception as e:
+                for i in indices:
+                    resultados[i] = self._resultado_erro(e)
+        
+        return resultados
+    
+    def metricas(self) -> Dict[str, Any]:
+        """Métricas do agendador de micro-lotes e do cache de resultados"""
+        return {
+            "disponivel": self._disponivel,
+            "estado": self._estado,
+            "modelo": self._nome_modelo,
+            "backend": self._backend.nome if self._backend else BIOBERT_BACKEND,
+            "micro_lotes": self._agendador.metricas() if self._agendador else None,
+            "cache": self._cache.metricas() if self._cache else None
+        }
     
     def _identificar_entidades_medicas(self, tokens: list, texto_original: str) -> list:
         """Identifica entidades médicas nos tokens"""
@@ -347,6 +664,45 @@ class BioBERTService:
 # Instância global (singleton)
 biobert_service = BioBERTService()
 
+# Cliente do sidecar (apenas com BIOBERT_MODO=sidecar)
+_cliente_sidecar = ClienteSidecarBioBERT() if BIOBERT_MODO == "sidecar" else None
+
+def _resultado_sidecar_indisponivel(operacao: str, *args) -> Any:
+    """Resposta sem inferência enquanto o sidecar está fora do ar (BIOBERT_SIDECAR_FALLBACK=regras)"""
+    indisponivel = {
+        "status": "indisponivel",
+        "analise": "Sidecar BioBERT indisponível. Análise por regras aplicada.",
+        "confianca": 0.0,
+        "entidades": [],
+        "estado_modelo": "sidecar_indisponivel",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    if operacao == "extrair_entidades":
+        return indisponivel
+    if operacao == "extrair_entidades_lote":
+        return [dict(indisponivel) for _ in args[0]]
+    if operacao == "analisar_gravidade":
+        return {
+            "gravidade": "indeterminada",
+            "score": 0,
+            "justificativa": "Não foi possível analisar a gravidade"
+        }
+    # status e metricas não carregam o modelo
+    return getattr(biobert_service, operacao)(*args)
+
+def _via_sidecar(operacao: str, *args) -> Any:
+    """Executa a operação no sidecar; sem sidecar (ou fora do ar) usa o fallback configurado"""
+    if _cliente_sidecar is None:
+        return getattr(biobert_service, operacao)(*args)
+    if _cliente_sidecar.disponivel():
+        try:
+            return _cliente_sidecar.chamar(operacao, *args)
+        except SidecarIndisponivel:
+            pass
+    if BIOBERT_SIDECAR_FALLBACK == "local":
+        return getattr(biobert_service, operacao)(*args)
+    return _resultado_sidecar_indisponivel(operacao, *args)
+
 def extrair_entidades_biobert(texto_medico: str) -> Dict[str, Any]:
     """
     Função principal para extração de entidades médicas
@@ -357,7 +713,19 @@ def extrair_entidades_biobert(texto_medico: str) -> Dict[str, Any]:
     Returns:
         Dict com análise BioBERT
     """
-    return biobert_service.extrair_entidades(texto_medico)
+    return _via_sidecar("extrair_entidades", texto_medico)
+
+def extrair_entidades_lote_biobert(textos: List[str]) -> List[Dict[str, Any]]:
+    """
+    Extração em lote (reprocessamento da fila, jobs administrativos)
+    
+    Args:
+        textos: Lista de textos de prontuário
+        
+    Returns:
+        Lista de análises BioBERT na mesma ordem
+    """
+    return _via_sidecar("extrair_entidades_lote", list(textos))
 
 def analisar_gravidade_biobert(texto_medico: str) -> Dict[str, Any]:
     """
@@ -369,7 +737,32 @@ def analisar_gravidade_biobert(texto_medico: str) -> Dict[str, Any]:
     Returns:
         Dict com classificação de gravidade
     """
-    return biobert_service.analisar_gravidade(texto_medico)
+    return _via_sidecar("analisar_gravidade", texto_medico)
+
+def obter_metricas_biobert() -> Dict[str, Any]:
+    """Métricas de desempenho do serviço BioBERT"""
+    metricas = _via_sidecar("metricas")
+    if _cliente_sidecar is not None:
+        metricas = {**metricas, "modo": BIOBERT_MODO, "fallback": BIOBERT_SIDECAR_FALLBACK,
+                    "sidecar": _cliente_sidecar.metricas()}
+    return metricas
+
+def iniciar_carregamento_biobert():
+    """Inicia o warm-up do modelo em segundo plano (chamar no startup da aplicação)"""
+    # No modo sidecar o modelo fica no sidecar; o carregamento local só ocorre no fallback
+    if _cliente_sidecar is None:
+        biobert_service.iniciar_carregamento()
+
+def obter_status_biobert() -> Dict[str, Any]:
+    """Estado de prontidão do modelo: not_started / loading / ready / degraded"""
+    status = _via_sidecar("status")
+    if _cliente_sidecar is not None:
+        if not _cliente_sidecar.disponivel():
+            modo = "sidecar_fallback_local" if BIOBERT_SIDECAR_FALLBACK == "local" else "sidecar_indisponivel"
+        else:
+            modo = BIOBERT_MODO
+        status = {**status, "modo": modo}
+    return status
 
 def is_biobert_disponivel() -> bool:
     """
@@ -378,6 +771,13 @@ def is_biobert_disponivel() -> bool:
     Returns:
         True se disponível, False caso contrário
     """
+    if _cliente_sidecar is not None and _cliente_sidecar.disponivel():
+        try:
+            return _cliente_sidecar.chamar("status").get("estado") == ESTADO_PRONTO
+        except SidecarIndisponivel:
+            pass
+    if _cliente_sidecar is not None and BIOBERT_SIDECAR_FALLBACK != "local":
+        return False
     return biobert_service.is_disponivel()
 
 
@@ -385,7 +785,8 @@ if __name__ == "__main__":
     print("🧬 TESTE BIOBERT SERVICE")
     print("=" * 40)
     
-    # Teste de disponibilidade
+    # Teste de disponibilidade (aguarda o carregamento em segundo plano)
+    biobert_service.aguardar_pronto()
     print(f"BioBERT disponível: {is_biobert_disponivel()}")
     
     if is_biobert_disponivel():
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+SIDECAR DE INFERÊNCIA DO BIOBERT
+Carrega o modelo UMA vez e atende todos os workers do uvicorn (main_unified,
+ms-regulacao) por um Unix socket local, evitando uma cópia do BioBERT por worker.
+
+Protocolo: quadros JSON prefixados pelo tamanho (4 bytes, big-endian)
+    requisição: {"op": "extrair_entidades", "args": ["texto"]}
+    resposta:   {"ok": true, "resultado": {...}}  |  {"ok": false, "erro": "..."}
+
+Operações: extrair_entidades, extrair_entidades_lote, analisar_gravidade, status, metricas
+
+Uso:
+    python biobert_sidecar.py                 # modelo real (BIOBERT_BACKEND)
+    python biobert_sidecar.py --substituto    # respostas determinísticas sem modelo (testes locais)
+
+Nos workers: BIOBERT_MODO=sidecar. Se o sidecar estiver fora do ar, as funções
+de biobert_service respondem 'indisponivel' (caminho por regras) ou, com
+BIOBERT_SIDECAR_FALLBACK=local, carregam o modelo no próprio processo.
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import logging
+import argparse
+import threading
+import socketserver
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BIOBERT_SIDECAR_SOCKET = os.getenv("BIOBERT_SIDECAR_SOCKET", "/tmp/biobert-sidecar.sock")
+BIOBERT_SIDECAR_TIMEOUT_S = float(os.getenv("BIOBERT_SIDECAR_TIMEOUT_S", "30"))
+BIOBERT_SIDECAR_RETRY_S = float(os.getenv("BIOBERT_SIDECAR_RETRY_S", "15"))
+
+OPERACOES = ("extrair_entidades", "extrair_entidades_lote", "analisar_gravidade", "status", "metricas")
+
+_CABECALHO = struct.Struct(">I")
+TAMANHO_MAX_QUADRO = 16 * 1024 * 1024
+
+
+class SidecarIndisponivel(Exception):
+    """Sidecar fora do ar, lento demais ou com resposta inválida"""
+
+
+def _receber_exato(conexao: socket.socket, tamanho: int) -> Optional[bytes]:
+    partes = []
+    while tamanho:
+        parte = conexao.recv(tamanho)
+        if not parte:
+            return None
+        partes.append(parte)
+        tamanho -= len(parte)
+    return b"".join(partes)
+
+
+def enviar_quadro(conexao: socket.socket, mensagem: Dict[str, Any]):
+    corpo = json.dumps(mensagem, ensure_ascii=False, default=str).encode("utf-8")
+    conexao.sendall(_CABECALHO.pack(len(corpo)) + corpo)
+
+
+def receber_quadro(conexao: socket.socket) -> Optional[Dict[str, Any]]:
+    """Lê um quadro completo; None se a conexão foi encerrada"""
+    cabecalho = _receber_exato(conexao, _CABECALHO.size)
+    if cabecalho is None:
+        return None
+    (tamanho,) = _CABECALHO.unpack(cabecalho)
+    if tamanho > TAMANHO_MAX_QUADRO:
+        raise ValueError(f"Quadro de {tamanho} bytes excede o limite")
+    corpo = _receber_exato(conexao, tamanho)
+    if corpo is None:
+        return None
+    return json.loads(corpo.decode("utf-8"))
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+class ServicoSubstituto:
+    """
+    Substituto determinístico do BioBERT para testes locais
+
+    Mesmo formato de resposta do serviço real, sem carregar modelo: entidades
+    pelo dicionário clínico e confiança fixa.
+    """
+
+    CONFIANCA = 0.75
+
+    def __init__(self):
+        try:
+            from .biobert_service import BioBERTService
+        except ImportError:
+            from biobert_service import BioBERTService
+        self._servico = BioBERTService()
+        self._atendidas = 0
+
+    def extrair_entidades(self, texto_medico: str) -> Dict[str, Any]:
+        self._atendidas += 1
+        if not texto_medico or len(texto_medico.strip()) < 3:
+            return {
+                "status": "texto_insuficiente",
+                "analise": "Texto muito curto para análise médica.",
+                "confianca": 0.0,
+                "entidades": []
+            }
+        resultado = self._servico._montar_resultado(texto_medico, self.CONFIANCA, texto_medico.split())
+        resultado["modelo"] = "substituto"
+        return resultado
+
+    def extrair_entidades_lote(self, textos: List[str]) -> List[Dict[str, Any]]:
+        return [self.extrair_entidades(texto) for texto in textos]
+
+    def analisar_gravidade(self, texto_medico: str) -> Dict[str, Any]:
+        # Mesma regra de pontuação do serviço real, sobre as entidades do substituto
+        try:
+            from .biobert_service import BioBERTService
+        except ImportError:
+            from biobert_service import BioBERTService
+        return BioBERTService.analisar_gravidade(self, texto_medico)
+
+    def status(self) -> Dict[str, Any]:
+        return {"estado": "ready", "modelo": "substituto", "backend": "substituto",
+                "tempo_carregamento_s": 0.0, "erro": None}
+
+    def metricas(self) -> Dict[str, Any]:
+        return {"disponivel": True, "estado": "ready", "modelo": "substituto", "atendidas": self._atendidas}
+
+    def is_disponivel(self) -> bool:
+        return True
+
+
+class _ManipuladorSidecar(socketserver.BaseRequestHandler):
+    """Uma conexão persistente por worker; atende requisições em sequência"""
+
+    def handle(self):
+        servico = self.server.servico
+        while True:
+            try:
+                requisicao = receber_quadro(self.request)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Sidecar: conexão descartada ({e})")
+                return
+            if requisicao is None:
+                return
+
+            operacao = requisicao.get("op")
+            try:
+                if operacao not in OPERACOES:
+                    raise ValueError(f"Operação desconhecida: {operacao}")
+                resposta = {"ok": True, "resultado": getattr(servico, operacao)(*requisicao.get("args", []))}
+            except Exception as e:
+                logger.error(f"❌ Sidecar: erro em '{operacao}': {e}")
+                resposta = {"ok": False, "erro": str(e)}
+
+            try:
+                enviar_quadro(self.request, resposta)
+            except OSError:
+                return
+
+
+class ServidorSidecarBioBERT(socketserver.ThreadingUnixStreamServer):
+    """Servidor Unix socket; uma thread por conexão de worker"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, caminho: str, servico):
+        self.caminho = caminho
+        self.servico = servico
+        if os.path.exists(caminho):
+            os.unlink(caminho)  # socket órfão de execução anterior
+        super().__init__(caminho, _ManipuladorSidecar)
+        os.chmod(caminho, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.caminho):
+            os.unlink(self.caminho)
+
+
+# ============================================================================
+# CLIENTE
+# ============================================================================
+
+class ClienteSidecarBioBERT:
+    """
+    Cliente usado pelos workers; uma conexão por thread, reaproveitada
+
+    Após uma falha o sidecar é considerado fora do ar por `retry_s` segundos
+    e as chamadas falham imediatamente (o chamador usa o fallback configurado).
+    """
+
+    def __init__(self, caminho: str = BIOBERT_SIDECAR_SOCKET, timeout_s: float = BIOBERT_SIDECAR_TIMEOUT_S,
+                 retry_s: float = BIOBERT_SIDECAR_RETRY_S):
+        self.caminho = caminho
+        self.timeout_s = timeout_s
+        self.retry_s = retry_s
+        self._local = threading.local()
+        self._indisponivel_ate = 0.0
+        self.chamadas = 0
+        self.falhas = 0
+
+    def disponivel(self) -> bool:
+        return time.monotonic() >= self._indisponivel_ate
+
+    def _conexao(self) -> socket.socket:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Timeout antes do connect: um sidecar travado não prende o worker
+            conexao.settimeout(self.timeout_s)
+            prazo = time.monotonic() + self.timeout_s
+            try:
+                while True:
+                    try:
+                        conexao.connect(self.caminho)
+                        break
+                    except BlockingIOError:
+                        # Unix socket com o backlog cheio responde EAGAIN em vez de aguardar
+                        if time.monotonic() >= prazo:
+                            raise socket.timeout(f"connect excedeu {self.timeout_s:g}s (backlog do sidecar cheio)")
+                        time.sleep(0.01)
+            except OSError:
+                conexao.close()
+                raise
+            self._local.conexao = conexao
+        return conexao
+
+    def _descartar_conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is not None:
+            try:
+                conexao.close()
+            except OSError:
+                pass
+            self._local.conexao = None
+
+    def chamar(self, operacao: str, *args) -> Any:
+        if not self.disponivel():
+            raise SidecarIndisponivel("sidecar marcado como indisponível")
+
+        self.chamadas += 1
+        try:
+            conexao = self._conexao()
+            enviar_quadro(conexao, {"op": operacao, "args": list(args)})
+            resposta = receber_quadro(conexao)
+            if resposta is None:
+                raise ConnectionError("conexão encerrada pelo sidecar")
+        except (OSError, ValueError) as e:
+            self._descartar_conexao()
+            self.falhas += 1
+            self._indisponivel_ate = time.monotonic() + self.retry_s
+            logger.warning(f"⚠️ Sidecar BioBERT indisponível ({e}) - usando o fallback por {self.retry_s:.0f}s")
+            raise SidecarIndisponivel(str(e)) from e
+
+        if not resposta.get("ok"):
+            raise SidecarIndisponivel(resposta.get("erro", "erro desconhecido no sidecar"))
+        return resposta["resultado"]
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "socket": self.caminho,
+            "disponivel": self.disponivel(),
+            "chamadas": self.chamadas,
+            "falhas": self.falhas
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sidecar de inferência do BioBERT (Unix socket)")
+    parser.add_argument("--socket", default=BIOBERT_SIDECAR_SOCKET)
+    parser.add_argument("--substituto", action="store_true", help="Respostas determinísticas sem carregar o modelo")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.substituto:
+        servico = ServicoSubstituto()
+        logger.info("🧪 Sidecar em modo substituto (sem modelo)")
+    else:
+        from biobert_service import biobert_service
+        servico = biobert_service
+        if not servico.aguardar_pronto():
+            logger.warning("⚠️ Modelo BioBERT não carregou - o sidecar responderá 'indisponivel'")
+
+    servidor = ServidorSidecarBioBERT(args.socket, servico)
+    logger.info(f"✅ Sidecar BioBERT ouvindo em {args.socket}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
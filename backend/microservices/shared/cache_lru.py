@@ -0,0 +1,202 @@
+"""
+Caches em memória (LRU + TTL) com camada opcional em disco (SQLite)
+Usados para resultados de análises caras e contextos derivados
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """
+    Cache LRU limitado com expiração opcional (TTL)
+
+    Thread-safe; contabiliza acertos, faltas, remoções por capacidade e expirações.
+    """
+
+    def __init__(self, max_itens: int = 1024, ttl_s: Optional[float] = None, nome: str = "cache"):
+        self.nome = nome
+        self.max_itens = max(1, max_itens)
+        self.ttl_s = ttl_s
+        self._dados: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expiracoes = 0
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        with self._lock:
+            item = self._dados.get(chave, _AUSENTE)
+            if item is _AUSENTE:
+                self.misses += 1
+                return padrao
+            valor, expira_em = item
+            if expira_em is not None and time.monotonic() >= expira_em:
+                del self._dados[chave]
+                self.expiracoes += 1
+                self.misses += 1
+                return padrao
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def definir(self, chave: Hashable, valor: Any):
+        expira_em = time.monotonic() + self.ttl_s if self.ttl_s else None
+        with self._lock:
+            self._dados[chave] = (valor, expira_em)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_itens:
+                self._dados.popitem(last=False)
+                self.evictions += 1
+
+    def remover(self, chave: Hashable) -> bool:
+        with self._lock:
+            return self._dados.pop(chave, _AUSENTE) is not _AUSENTE
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def metricas(self) -> Dict[str, Any]:
+        consultas = self.hits + self.misses
+        return {
+            "itens": len(self._dados),
+            "max_itens": self.max_itens,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / consultas, 3) if consultas else 0.0,
+            "evictions": self.evictions,
+            "expiracoes": self.expiracoes
+        }
+
+
+class CamadaDiscoSQLite:
+    """
+    Camada persistente (sobrevive a reinícios) para valores serializáveis em JSON
+
+    Uma conexão por thread; a limpeza de itens antigos é feita a cada
+    `intervalo_limpeza` gravações para não pesar no caminho quente.
+    """
+
+    def __init__(self, caminho: str, ttl_s: Optional[float] = None, max_itens: int = 100_000,
+                 intervalo_limpeza: int = 500):
+        self.caminho = caminho
+        self.ttl_s = ttl_s
+        self.max_itens = max_itens
+        self.intervalo_limpeza = intervalo_limpeza
+        self._local = threading.local()
+        self._gravacoes = 0
+        self.hits = 0
+        self.misses = 0
+        self.erros = 0
+
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(diretorio, exist_ok=True)
+        with self._conexao() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado_em REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_criado_em ON cache (criado_em)")
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.caminho, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def obter(self, chave: str) -> Any:
+        try:
+            linha = self._conexao().execute(
+                "SELECT valor, criado_em FROM cache WHERE chave = ?", (chave,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.erros += 1
+            logger.warning(f"⚠️ Cache em disco indisponível: {e}")
+            return None
+
+        if linha is None or (self.ttl_s and time.time() - linha[1] >= self.ttl_s):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(linha[0])
+
+    def definir(self, chave: str, valor: Any):
+        try:
+            with self._conexao() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (chave, valor, criado_em) VALUES (?, ?, ?)",
+                    (chave, json.dumps(valor, ensure_ascii=False, default=str), time.time())
+                )
+            self._gravacoes += 1
+            if self._gravacoes % self.intervalo_limpeza == 0:
+                self._limpar_antigos()
+        except sqlite3.Error as e:
+            self.erros += 1
+            logger.warning(f"⚠️ Falha ao gravar no cache em disco: {e}")
+
+    def _limpar_antigos(self):
+        with self._conexao() as conn:
+            if self.ttl_s:
+                conn.execute("DELETE FROM cache WHERE criado_em < ?", (time.time() - self.ttl_s,))
+            conn.execute(
+                "DELETE FROM cache WHERE chave IN (SELECT chave FROM cache ORDER BY criado_em DESC LIMIT -1 OFFSET ?)",
+                (self.max_itens,)
+            )
+
+    def metricas(self) -> Dict[str, Any]:
+        return {
+            "caminho": self.caminho,
+            "hits": self.hits,
+            "misses": self.misses,
+            "erros": self.erros
+        }
+
+
+class CacheEmCamadas:
+    """Memória (LRU + TTL) na frente de uma camada opcional em disco"""
+
+    def __init__(self, memoria: CacheLRU, disco: Optional[CamadaDiscoSQLite] = None):
+        self.memoria = memoria
+        self.disco = disco
+
+    def obter(self, chave: str) -> Any:
+        valor = self.memoria.obter(chave)
+        if valor is not None or self.disco is None:
+            return valor
+        valor = self.disco.obter(chave)
+        if valor is not None:
+            self.memoria.definir(chave, valor)
+        return valor
+
+    def definir(self, chave: str, valor: Any):
+        self.memoria.definir(chave, valor)
+        if self.disco is not None:
+            self.disco.definir(chave, valor)
+
+    def metricas(self) -> Dict[str, Any]:
+        memoria = self.memoria.metricas()
+        hits_disco = self.disco.hits if self.disco else 0
+        consultas = memoria["hits"] + memoria["misses"]
+        return {
+            "memoria": memoria,
+            "disco": self.disco.metricas() if self.disco else None,
+            "hit_rate_total": round((memoria["hits"] + hits_disco) / consultas, 3) if consultas else 0.0
+        }
@@ -0,0 +1,263 @@
+"""
+CATÁLOGO DE HOSPITAIS DE GOIÁS
+Cadastro único (catalogo_hospitais.json) usado pelo pipeline de regulação,
+pelo pipeline RAG (hierarquia SUS) e pelo matchmaker logístico
+
+- O arquivo é carregado em um snapshot imutável e versionado; cada recarga
+  publica um snapshot novo por troca atômica de referência, e requisições em
+  andamento continuam usando o snapshot (e os índices) que já tinham
+- Os índices derivados (elegibilidade, coordenadas, fichas RAG) são montados
+  pelos assinantes ANTES da troca, na thread de monitoramento ou no
+  POST /catalogo-hospitais/recarregar - nunca no caminho da requisição
+- Um catálogo inválido (ou que quebre algum assinante) é rejeitado e o
+  snapshot anterior continua valendo
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOGO_HOSPITAIS_PATH = os.getenv(
+    "CATALOGO_HOSPITAIS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogo_hospitais.json")
+)
+
+# Intervalo entre verificações do arquivo pela thread de monitoramento (0 desativa)
+CATALOGO_HOSPITAIS_INTERVALO_S = float(os.getenv("CATALOGO_HOSPITAIS_INTERVALO_S", "30"))
+
+CAMPOS_PERFIL = ("tipo", "capacidade", "especialidades", "observacoes")
+
+
+class CatalogoInvalido(ValueError):
+    """Arquivo de catálogo com estrutura ou referências inválidas"""
+
+
+class HospitalCatalogo(NamedTuple):
+    sigla: str
+    nome: str
+    cidade: str
+    coordenadas: Optional[Tuple[float, float]]
+    nivel_sus: int
+    aliases: Tuple[str, ...]
+    perfis: MappingProxyType  # pipeline -> {tipo, capacidade, especialidades, observacoes}
+
+
+class SnapshotCatalogoHospitais:
+    """Conteúdo imutável de uma carga do catálogo, já validado e indexado"""
+
+    def __init__(self, dados: Dict[str, Any], assinatura: Optional[Tuple] = None):
+        self.assinatura = assinatura
+        self.carregado_em = datetime.utcnow()
+
+        # Versão = versão declarada + hash do conteúdo (muda a cada edição do arquivo)
+        conteudo = json.dumps(dados, sort_keys=True, ensure_ascii=False)
+        self.versao = f"{dados.get('versao', '0')}+{hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:12]}"
+
+        hospitais = []
+        for entrada in dados.get("hospitais", []):
+            try:
+                coordenadas = entrada.get("coordenadas")
+                perfis = {}
+                for pipeline, perfil in entrada.get("perfis", {}).items():
+                    faltando = [c for c in CAMPOS_PERFIL if c not in perfil]
+                    if faltando:
+                        raise CatalogoInvalido(f"perfil '{pipeline}' sem {', '.join(faltando)}")
+                    perfis[pipeline] = MappingProxyType(dict(perfil, especialidades=tuple(perfil["especialidades"])))
+                hospitais.append(HospitalCatalogo(
+                    sigla=entrada["sigla"],
+                    nome=entrada["nome"],
+                    cidade=entrada["cidade"],
+                    coordenadas=(float(coordenadas[0]), float(coordenadas[1])) if coordenadas else None,
+                    nivel_sus=int(entrada.get("nivel_sus", 1)),
+                    aliases=tuple(entrada.get("aliases", [])),
+                    perfis=MappingProxyType(perfis)
+                ))
+            except (KeyError, TypeError, IndexError, ValueError) as e:
+                raise CatalogoInvalido(f"Hospital inválido {entrada.get('sigla') or entrada.get('nome')}: {e}") from e
+        self.hospitais: Tuple[HospitalCatalogo, ...] = tuple(hospitais)
+
+        self.por_sigla: Dict[str, HospitalCatalogo] = {}
+        for hospital in self.hospitais:
+            if hospital.sigla in self.por_sigla:
+                raise CatalogoInvalido(f"Sigla duplicada no catálogo: {hospital.sigla}")
+            self.por_sigla[hospital.sigla] = hospital
+
+        # Nome completo, sigla e aliases -> hospital (nomes completos prevalecem)
+        self.por_nome: Dict[str, HospitalCatalogo] = {}
+        for hospital in self.hospitais:
+            for chave in (hospital.sigla, *hospital.aliases):
+                self.por_nome.setdefault(chave.upper(), hospital)
+        for hospital in self.hospitais:
+            self.por_nome[hospital.nome.upper()] = hospital
+
+        self._pipelines = {}
+        for pipeline, configuracao in dados.get("pipelines", {}).items():
+            siglas = configuracao.get("hospitais", [])
+            for sigla in siglas:
+                if sigla not in self.por_sigla:
+                    raise CatalogoInvalido(f"Pipeline '{pipeline}' referencia sigla inexistente: {sigla}")
+                if pipeline not in self.por_sigla[sigla].perfis:
+                    raise CatalogoInvalido(f"Hospital {sigla} sem perfil para o pipeline '{pipeline}'")
+            criterios = configuracao.get("criterios_exclusao", {})
+            desconhecidas = set(criterios) - set(self.por_sigla)
+            if desconhecidas:
+                raise CatalogoInvalido(f"Critérios de exclusão para siglas inexistentes: {', '.join(sorted(desconhecidas))}")
+            self._pipelines[pipeline] = {
+                "hospitais": tuple(self.por_sigla[s] for s in siglas),
+                "criterios_exclusao": MappingProxyType(
+                    {self.por_sigla[s].nome: tuple(v) for s, v in criterios.items()}
+                )
+            }
+
+    def hospitais_do_pipeline(self, pipeline: str) -> List[Tuple[HospitalCatalogo, MappingProxyType]]:
+        """(hospital, perfil) na ordem declarada para o pipeline"""
+        configuracao = self._pipelines.get(pipeline)
+        if configuracao is None:
+            raise CatalogoInvalido(f"Pipeline '{pipeline}' não declarado no catálogo")
+        return [(h, h.perfis[pipeline]) for h in configuracao["hospitais"]]
+
+    def criterios_exclusao(self, pipeline: str) -> Dict[str, List[str]]:
+        """Critérios de exclusão do pipeline, por nome completo do hospital"""
+        configuracao = self._pipelines.get(pipeline)
+        if configuracao is None:
+            return {}
+        return {nome: list(criterios) for nome, criterios in configuracao["criterios_exclusao"].items()}
+
+    def buscar(self, nome_ou_sigla: str) -> Optional[HospitalCatalogo]:
+        """Hospital pelo nome completo, sigla ou alias (sem diferenciar maiúsculas)"""
+        return self.por_nome.get((nome_ou_sigla or "").strip().upper())
+
+
+# Assinante: recebe o snapshot candidato, monta o que precisa e devolve a função
+# que publica o resultado (chamada só depois da troca) ou None
+Assinante = Callable[[SnapshotCatalogoHospitais], Optional[Callable[[], None]]]
+
+
+class CatalogoHospitais:
+    """
+    Mantém o snapshot atual do catálogo e notifica os assinantes a cada troca
+
+    obter() nunca lê o disco: a verificação do arquivo fica com a thread de
+    monitoramento (assinatura inode/mtime/tamanho) ou com recarregar().
+    """
+
+    def __init__(self, caminho: str = CATALOGO_HOSPITAIS_PATH, intervalo_s: float = CATALOGO_HOSPITAIS_INTERVALO_S):
+        self.caminho = caminho
+        self.intervalo_s = intervalo_s
+        self._lock = threading.RLock()
+        self._assinantes: List[Assinante] = []
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recargas = 0
+        self.falhas = 0
+        self.ultimo_erro: Optional[str] = None
+        self._snapshot = self._ler()
+        self._assinatura_vista = self._snapshot.assinatura
+        logger.info(f"✅ Catálogo de hospitais v{self._snapshot.versao} carregado ({len(self._snapshot.hospitais)} hospitais)")
+
+    @staticmethod
+    def _assinatura(caminho: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(caminho)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _ler(self) -> SnapshotCatalogoHospitais:
+        assinatura = self._assinatura(self.caminho)
+        with open(self.caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        return SnapshotCatalogoHospitais(dados, assinatura)
+
+    def obter(self) -> SnapshotCatalogoHospitais:
+        """Snapshot atual (sem I/O)"""
+        return self._snapshot
+
+    def assinar(self, assinante: Assinante):
+        """
+        Registra um assinante e o aplica imediatamente ao snapshot atual
+
+        Se for o primeiro assinante, inicia a thread de monitoramento do arquivo.
+        """
+        with self._lock:
+            publicar = assinante(self._snapshot)
+            if publicar:
+                publicar()
+            self._assinantes.append(assinante)
+        self.iniciar_monitoramento()
+
+    def recarregar(self, forcar: bool = False) -> SnapshotCatalogoHospitais:
+        """
+        Relê o arquivo e publica um novo snapshot se o conteúdo mudou
+
+        Levanta exceção (e mantém o snapshot anterior) se o catálogo for
+        inválido ou se algum assinante falhar ao montar seus índices.
+        """
+        with self._lock:
+            anterior = self._snapshot
+            assinatura = self._assinatura(self.caminho)
+            if not forcar and assinatura == self._assinatura_vista:
+                return anterior
+            self._assinatura_vista = assinatura  # um arquivo inválido não é relido até mudar de novo
+
+            try:
+                novo = self._ler()
+                if novo.versao == anterior.versao:
+                    return anterior  # arquivo regravado sem mudança de conteúdo
+
+                # Índices derivados montados fora do caminho da requisição
+                publicacoes = [publicar for publicar in (a(novo) for a in self._assinantes) if publicar]
+            except Exception as e:
+                self.falhas += 1
+                self.ultimo_erro = str(e)
+                logger.error(f"❌ Catálogo de hospitais rejeitado, mantendo v{anterior.versao}: {e}")
+                raise
+
+            self._snapshot = novo
+            for publicar in publicacoes:
+                publicar()
+            self.recargas += 1
+            self.ultimo_erro = None
+            logger.info(f"📦 Catálogo de hospitais atualizado: v{anterior.versao} -> v{novo.versao} "
+                        f"({len(novo.hospitais)} hospitais)")
+            return novo
+
+    def _monitorar(self):
+        while not self._parar.wait(self.intervalo_s):
+            try:
+                self.recarregar()
+            except Exception:
+                pass  # já registrado em recarregar(); tenta de novo quando o arquivo mudar
+
+    def iniciar_monitoramento(self):
+        if self.intervalo_s <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._monitorar, name="catalogo-hospitais", daemon=True)
+        self._thread.start()
+
+    def parar_monitoramento(self):
+        self._parar.set()
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "versao": snapshot.versao,
+            "carregado_em": snapshot.carregado_em.isoformat(),
+            "hospitais": len(snapshot.hospitais),
+            "recargas": self.recargas,
+            "falhas": self.falhas,
+            "ultimo_erro": self.ultimo_erro,
+            "monitoramento_ativo": bool(self._thread and self._thread.is_alive()),
+            "caminho": self.caminho
+        }
+
+
+# Instância global
+catalogo_hospitais = CatalogoHospitais()
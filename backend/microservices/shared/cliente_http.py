@@ -0,0 +1,127 @@
+"""
+Cliente HTTP assíncrono compartilhado entre serviços
+Um único httpx.AsyncClient com conexões keep-alive e limite de conexões por host
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ClienteHTTPCompartilhado:
+    """
+    Pool de conexões HTTP reutilizado por todas as chamadas de saída da API
+
+    - httpx.AsyncClient único (keep-alive, sem novo handshake TCP por chamada)
+    - Semáforo por host: um serviço lento não consome o pool inteiro
+    - Criado no startup e fechado no shutdown da aplicação
+    """
+
+    def __init__(
+        self,
+        max_conexoes: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_por_host: int = 10,
+        timeout: float = 5.0
+    ):
+        self.max_conexoes = max_conexoes
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.max_por_host = max_por_host
+        self.timeout = timeout
+        self._cliente: Optional[httpx.AsyncClient] = None
+        self._semaforos: Dict[str, asyncio.Semaphore] = {}
+        self._requisicoes = 0
+        self._falhas = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self._cliente is not None and not self._cliente.is_closed
+
+    async def iniciar(self):
+        """Cria o pool de conexões (chamado no startup)"""
+        if self.ativo:
+            return
+        self._cliente = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_conexoes,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            )
+        )
+        self._semaforos = {}
+        logger.info(f"✅ Cliente HTTP compartilhado iniciado (máx. {self.max_conexoes} conexões, {self.max_por_host} por host)")
+
+    async def fechar(self):
+        """Fecha as conexões abertas (chamado no shutdown)"""
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+            logger.info("Cliente HTTP compartilhado encerrado")
+
+    def _semaforo(self, url: str) -> asyncio.Semaphore:
+        partes = urlsplit(url)
+        host = f"{partes.hostname}:{partes.port or (443 if partes.scheme == 'https' else 80)}"
+        semaforo = self._semaforos.get(host)
+        if semaforo is None:
+            semaforo = asyncio.Semaphore(self.max_por_host)
+            self._semaforos[host] = semaforo
+        return semaforo
+
+    async def requisicao(self, metodo: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """Executa uma requisição respeitando o limite de conexões do host"""
+        if not self.ativo:
+            # Uso fora do ciclo de vida da aplicação (scripts, testes)
+            logger.warning("⚠️ Cliente HTTP usado antes do startup - iniciando pool sob demanda")
+            await self.iniciar()
+
+        limite = timeout if timeout is not None else self.timeout
+        semaforo = self._semaforo(url)
+        try:
+            await asyncio.wait_for(semaforo.acquire(), timeout=limite)
+        except asyncio.TimeoutError:
+            self._falhas += 1
+            raise httpx.PoolTimeout(f"Limite de conexões por host atingido para {url}")
+
+        try:
+            self._requisicoes += 1
+            return await self._cliente.request(metodo, url, timeout=limite, **kwargs)
+        except httpx.HTTPError:
+            self._falhas += 1
+            raise
+        finally:
+            semaforo.release()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.requisicao("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.requisicao("POST", url, **kwargs)
+
+    def metricas(self) -> dict:
+        return {
+            "ativo": self.ativo,
+            "requisicoes": self._requisicoes,
+            "falhas": self._falhas,
+            "hosts": {
+                host: {"em_uso": self.max_por_host - semaforo._value, "limite": self.max_por_host}
+                for host, semaforo in self._semaforos.items()
+            }
+        }
+
+
+# Instância global
+cliente_http = ClienteHTTPCompartilhado(
+    max_conexoes=int(os.getenv("HTTP_MAX_CONEXOES", "100")),
+    max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+    max_por_host=int(os.getenv("HTTP_MAX_POR_HOST", "10")),
+    timeout=float(os.getenv("HTTP_TIMEOUT_S", "5"))
+)
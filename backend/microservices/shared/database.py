@@ -4,11 +4,13 @@ Mantém compatibilidade com o sistema atual
 SINCRONIZADO com backend/shared/database.py
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, Float
+from sqlalchemy import create_engine, event, Column, Index, Integer, String, DateTime, Text, Boolean, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from typing import Optional
 import os
+import unicodedata
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do .env (subir 2 níveis para encontrar backend/.env)
@@ -87,9 +89,39 @@ class PacienteRegulacao(Base):
     observacoes_alta = Column(Text, nullable=True)  # Observações da alta
     justificativa_negacao = Column(Text, nullable=True)  # Motivo da negação (se negado)
     
+    # ============================================================================
+    # FILA DE REGULAÇÃO - filtros por igualdade (sem LIKE '%...%') e índice composto
+    # Preenchidos por normalizar_filtro() a cada insert/update (migration_fila_regulacao.sql)
+    # ============================================================================
+    especialidade_normalizada = Column(String, nullable=True)
+    cidade_origem_normalizada = Column(String, nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+
+def normalizar_filtro(valor: Optional[str]) -> Optional[str]:
+    """Especialidade/cidade em forma canônica: sem acentos, maiúsculas e espaços simples"""
+    if not valor:
+        return None
+    decomposto = unicodedata.normalize("NFD", valor)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.upper().split()) or None
+
+
+@event.listens_for(PacienteRegulacao, "before_insert")
+@event.listens_for(PacienteRegulacao, "before_update")
+def _normalizar_campos_fila(mapper, connection, paciente):
+    paciente.especialidade_normalizada = normalizar_filtro(paciente.especialidade)
+    paciente.cidade_origem_normalizada = normalizar_filtro(paciente.cidade_origem)
+
+
+# Fila de regulação: status (+ especialidade) -> score desc, data, id (mesma ordem do cursor)
+Index("idx_pacientes_fila_regulacao", PacienteRegulacao.status, PacienteRegulacao.especialidade_normalizada,
+      PacienteRegulacao.score_prioridade.desc(), PacienteRegulacao.data_solicitacao, PacienteRegulacao.id)
+Index("idx_pacientes_fila_status", PacienteRegulacao.status,
+      PacienteRegulacao.score_prioridade.desc(), PacienteRegulacao.data_solicitacao, PacienteRegulacao.id)
+
 class HistoricoDecisoes(Base):
     __tablename__ = "historico_decisoes"
     
@@ -156,9 +188,9 @@ class HistoricoOcupacao(Base):
     __tablename__ = "historico_ocupacao"
     
     id = Column(Integer, primary_key=True, index=True)
-    unidade_id = Column(String, index=True)  # ID/Sigla do hospital
+    unidade_id = Column(String)  # ID/Sigla do hospital
     unidade_nome = Column(String)  # Nome completo do hospital
-    tipo_leito = Column(String, index=True)  # UTI, ENFERMARIA, GERAL, etc.
+    tipo_leito = Column(String)  # UTI, ENFERMARIA, GERAL, etc.
     ocupacao_percentual = Column(Float)  # Taxa de ocupação (0-100)
     leitos_totais = Column(Integer)
     leitos_ocupados = Column(Integer)
@@ -167,6 +199,63 @@ class HistoricoOcupacao(Base):
     fonte_dados = Column(String, default="SCRAPER")  # SCRAPER, MANUAL, API, SIMULADOR
 
 
+# Unidade (+ tipo de leito) e janela de tempo, mais recentes primeiro (migration_historico_ocupacao_indices.sql);
+# único: uma leitura por unidade/tipo de leito/horário, reenvios da ingestão em lote são ignorados
+Index("idx_historico_unidade_tipo_data", HistoricoOcupacao.unidade_id, HistoricoOcupacao.tipo_leito,
+      HistoricoOcupacao.data_coleta.desc(), unique=True)
+
+
+class OcupacaoAtual(Base):
+    """
+    Última leitura de cada unidade/tipo de leito (estado atual)
+    Mantida pela ingestão do MS-Ingestao, para que consultas de estado atual e
+    estatísticas não percorram historico_ocupacao
+    """
+    __tablename__ = "ocupacao_atual"
+
+    unidade_id = Column(String, primary_key=True)
+    tipo_leito = Column(String, primary_key=True)
+    historico_id = Column(Integer)  # id da leitura em historico_ocupacao
+    unidade_nome = Column(String)
+    ocupacao_percentual = Column(Float)
+    leitos_totais = Column(Integer)
+    leitos_ocupados = Column(Integer)
+    leitos_disponiveis = Column(Integer)
+    data_coleta = Column(DateTime, index=True)
+    fonte_dados = Column(String)
+    atualizado_em = Column(DateTime, default=datetime.utcnow)
+
+
+class HistoricoOcupacaoAgregado(Base):
+    """
+    Agregados de historico_ocupacao por intervalo (15 minutos e 1 hora)
+    Mantidos pelo compactador do MS-Ingestao: leituras brutas ficam 48h,
+    intervalos de 15 min 90 dias e intervalos de 1 hora depois disso
+    """
+    __tablename__ = "historico_ocupacao_agregado"
+    __table_args__ = (
+        Index("idx_agregado_unidade_intervalo", "unidade_id", "resolucao_min", "inicio_intervalo", "tipo_leito", unique=True),
+        Index("idx_agregado_resolucao_intervalo", "resolucao_min", "inicio_intervalo"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    resolucao_min = Column(Integer, nullable=False)  # 15 ou 60
+    unidade_id = Column(String, nullable=False)
+    unidade_nome = Column(String)
+    tipo_leito = Column(String)
+    inicio_intervalo = Column(DateTime, nullable=False)
+    ocupacao_min = Column(Float)
+    ocupacao_max = Column(Float)
+    ocupacao_media = Column(Float)
+    ocupacao_ultima = Column(Float)
+    leitos_totais = Column(Integer)  # leitos: última leitura do intervalo
+    leitos_ocupados = Column(Integer)
+    leitos_disponiveis = Column(Integer)
+    amostras = Column(Integer)
+    ultima_coleta = Column(DateTime)
+    fonte_dados = Column(String)
+
+
 # Dependency para obter sessão do banco
 def get_db():
     db = SessionLocal()
@@ -42,6 +42,7 @@ logger = logging.getLogger(__name__)
 
 # Configurações
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+LLAMA_TIMEOUT_S = float(os.getenv("LLAMA_TIMEOUT_S", "60"))
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
 SUPPORTED_FORMATS = ['jpg', 'jpeg', 'png', 'webp', 'bmp', 'pdf']
 
@@ -192,6 +193,72 @@ class DocumentAIService:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    @staticmethod
+    def _requisicao_llama(texto: str, contexto_clinico: str = "") -> Tuple[str, Dict[str, Any]]:
+        """URL e corpo da chamada ao Ollama"""
+        prompt = f"""Você é um assistente médico especializado em análise de documentos clínicos.
+Analise o seguinte texto extraído de um documento médico e forneça:
+
+1. RESUMO CLÍNICO: Resumo dos principais achados
+2. ENTIDADES MÉDICAS: Liste diagnósticos, medicamentos, procedimentos mencionados
+3. ALERTAS: Identifique informações críticas ou urgentes
+4. SUGESTÕES: Recomendações para a equipe de regulação
+
+TEXTO DO DOCUMENTO:
+{texto}
+
+{f'CONTEXTO DO PACIENTE: {contexto_clinico}' if contexto_clinico else ''}
+
+Responda de forma estruturada e objetiva, focando em informações relevantes para regulação hospitalar."""
+
+        return f"{OLLAMA_URL}/api/generate", {
+            "model": "llama3",
+            "prompt": prompt,
+            "stream": False,
+            "options": {
+                "temperature": 0.3,  # Mais determinístico para análise médica
+                "num_predict": 1000
+            }
+        }
+
+    @staticmethod
+    def _resultado_llama(status_code: int, corpo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Converte a resposta HTTP do Ollama no resultado da etapa"""
+        if status_code == 200:
+            return {
+                "status": "sucesso",
+                "analise_llama": corpo.get("response", ""),
+                "modelo": "llama3",
+                "tokens_gerados": corpo.get("eval_count", 0),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        logger.warning(f"⚠️ Llama retornou status {status_code}")
+        return {
+            "status": "erro_llama",
+            "analise_llama": "Análise Llama indisponível",
+            "erro": f"HTTP {status_code}",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _llama_offline() -> Dict[str, Any]:
+        logger.warning("⚠️ Llama não está disponível (conexão recusada)")
+        return {
+            "status": "llama_offline",
+            "analise_llama": "Serviço Llama não está disponível no momento",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    @staticmethod
+    def _erro_llama(e: Exception) -> Dict[str, Any]:
+        logger.error(f"❌ Erro na análise Llama: {e}")
+        return {
+            "status": "erro",
+            "analise_llama": "",
+            "erro": str(e),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
     def analisar_com_llama(self, texto: str, contexto_clinico: str = "") -> Dict[str, Any]:
         """
         Analisa texto médico com Llama 3 para interpretação contextual
@@ -205,70 +272,180 @@ class DocumentAIService:
         """
         
         try:
-            prompt = f"""Você é um assistente médico especializado em análise de documentos clínicos.
-Analise o seguinte texto extraído de um documento médico e forneça:
-
-1. RESUMO CLÍNICO: Resumo dos principais achados
-2. ENTIDADES MÉDICAS: Liste diagnósticos, medicamentos, procedimentos mencionados
-3. ALERTAS: Identifique informações críticas ou urgentes
-4. SUGESTÕES: Recomendações para a equipe de regulação
-
-TEXTO DO DOCUMENTO:
-{texto}
-
-{f'CONTEXTO DO PACIENTE: {contexto_clinico}' if contexto_clinico else ''}
+            url, corpo = self._requisicao_llama(texto, contexto_clinico)
+            response = requests.post(url, json=corpo, timeout=LLAMA_TIMEOUT_S)
+            return self._resultado_llama(response.status_code, response.json() if response.status_code == 200 else None)
+        except requests.exceptions.ConnectionError:
+            return self._llama_offline()
+        except Exception as e:
+            return self._erro_llama(e)
 
-Responda de forma estruturada e objetiva, focando em informações relevantes para regulação hospitalar."""
+    async def analisar_com_llama_async(self, texto: str, contexto_clinico: str = "") -> Dict[str, Any]:
+        """Mesma análise do analisar_com_llama pelo cliente HTTP assíncrono compartilhado"""
+        from cliente_http import cliente_http
+        import httpx
 
-            response = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json={
-                    "model": "llama3",
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.3,  # Mais determinístico para análise médica
-                        "num_predict": 1000
-                    }
-                },
-                timeout=60
-            )
+        try:
+            url, corpo = self._requisicao_llama(texto, contexto_clinico)
+            response = await cliente_http.post(url, json=corpo, timeout=LLAMA_TIMEOUT_S)
+            return self._resultado_llama(response.status_code, response.json() if response.status_code == 200 else None)
+        except httpx.ConnectError:
+            return self._llama_offline()
+        except Exception as e:
+            return self._erro_llama(e)
+    
+    def _etapas_locais(
+        self,
+        image_data: bytes,
+        filename: str,
+        contexto_paciente: str,
+        resultado_final: Dict[str, Any]
+    ) -> str:
+        """
+        OCR e BioBERT (CPU, bloqueantes) - preenche resultado_final e
+        retorna o contexto que será enviado ao Llama
+        """
+        # === ETAPA 1: OCR ===
+        logger.info("📄 Etapa 1: Extraindo texto com OCR...")
+        resultado_ocr = self.extrair_texto_ocr(image_data, filename)
+        resultado_final["etapas"]["ocr"] = resultado_ocr
+        
+        texto_extraido = resultado_ocr.get("texto_extraido", "")
+        
+        if not texto_extraido:
+            logger.warning("⚠️ Nenhum texto extraído do documento")
+            # Tentar análise direta com Llama (visão)
+            resultado_final["etapas"]["ocr"]["nota"] = "Documento sem texto legível ou imagem"
+        
+        # === ETAPA 2: BioBERT ===
+        logger.info("🧬 Etapa 2: Analisando com BioBERT...")
+        
+        try:
+            from biobert_service import extrair_entidades_biobert, is_biobert_disponivel
             
-            if response.status_code == 200:
-                resultado = response.json()
-                resposta_llama = resultado.get("response", "")
-                
-                return {
-                    "status": "sucesso",
-                    "analise_llama": resposta_llama,
-                    "modelo": "llama3",
-                    "tokens_gerados": resultado.get("eval_count", 0),
-                    "timestamp": datetime.utcnow().isoformat()
-                }
+            if is_biobert_disponivel() and texto_extraido:
+                resultado_biobert = extrair_entidades_biobert(texto_extraido)
+                resultado_final["etapas"]["biobert"] = resultado_biobert
+                resultado_final["entidades_detectadas"] = resultado_biobert.get("entidades", [])
             else:
-                logger.warning(f"⚠️ Llama retornou status {response.status_code}")
-                return {
-                    "status": "erro_llama",
-                    "analise_llama": "Análise Llama indisponível",
-                    "erro": f"HTTP {response.status_code}",
-                    "timestamp": datetime.utcnow().isoformat()
+                resultado_final["etapas"]["biobert"] = {
+                    "status": "pulado",
+                    "motivo": "BioBERT indisponível ou sem texto para analisar"
                 }
-                
-        except requests.exceptions.ConnectionError:
-            logger.warning("⚠️ Llama não está disponível (conexão recusada)")
-            return {
-                "status": "llama_offline",
-                "analise_llama": "Serviço Llama não está disponível no momento",
-                "timestamp": datetime.utcnow().isoformat()
+        except ImportError:
+            resultado_final["etapas"]["biobert"] = {
+                "status": "indisponivel",
+                "motivo": "Módulo BioBERT não encontrado"
             }
-        except Exception as e:
-            logger.error(f"❌ Erro na análise Llama: {e}")
-            return {
-                "status": "erro",
-                "analise_llama": "",
-                "erro": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+        
+        # === ETAPA 3: Llama (Interpretação Contextual) ===
+        logger.info("🦙 Etapa 3: Interpretando com Llama 3...")
+        
+        # Preparar contexto completo para Llama
+        contexto_completo = texto_extraido
+        if contexto_paciente:
+            contexto_completo += f"\n\nContexto do paciente: {contexto_paciente}"
+        
+        if resultado_final.get("entidades_detectadas"):
+            entidades_str = ", ".join([e.get("termo", "") for e in resultado_final["entidades_detectadas"]])
+            contexto_completo += f"\n\nEntidades médicas detectadas pelo BioBERT: {entidades_str}"
+        
+        return contexto_completo
+    
+    def _finalizar(
+        self,
+        resultado_final: Dict[str, Any],
+        resultado_llama: Optional[Dict[str, Any]],
+        start_time: datetime
+    ) -> Dict[str, Any]:
+        """Registra a etapa Llama, calcula confiança e alertas"""
+        if resultado_llama is not None:
+            resultado_final["etapas"]["llama"] = resultado_llama
+            resultado_final["resumo_ia"] = resultado_llama.get("analise_llama", "")
+        else:
+            resultado_final["etapas"]["llama"] = {
+                "status": "pulado",
+                "motivo": "Sem conteúdo para analisar"
             }
+        
+        resultado_ocr = resultado_final["etapas"]["ocr"]
+        
+        # === CALCULAR CONFIANÇA GERAL ===
+        # BioBERT é o modelo principal - peso maior na confiança
+        # Referência: Lee et al. (2020) - Bioinformatics, DOI: 10.1093/bioinformatics/btz682
+        # Treinado em 4.5B palavras do PubMed + 13.5B do PMC
+        
+        confianca_ocr = resultado_ocr.get("confianca_ocr", 0)
+        biobert_conf = resultado_final["etapas"].get("biobert", {}).get("confianca", 0)
+        biobert_status = resultado_final["etapas"].get("biobert", {}).get("status", "")
+        llama_ok = resultado_final["etapas"].get("llama", {}).get("status") == "sucesso"
+        
+        # Pesos: BioBERT (60%), OCR (30%), Llama (10% - apenas complemento)
+        if biobert_status == "sucesso" and biobert_conf > 0:
+            # BioBERT processou com sucesso - alta confiabilidade
+            confianca_geral = (
+                biobert_conf * 0.60 +          # BioBERT: modelo principal
+                confianca_ocr * 0.30 +         # OCR: qualidade da extração
+                (0.8 if llama_ok else 0) * 0.10  # Llama: complemento opcional
+            )
+            resultado_final["modelo_principal"] = "BioBERT v1.1 (dmis-lab)"
+            resultado_final["nota_confiabilidade"] = "Análise baseada em modelo científico validado (PubMed/PMC)"
+        elif confianca_ocr > 0:
+            # Apenas OCR disponível
+            confianca_geral = confianca_ocr * 0.7 + (0.3 if llama_ok else 0)
+            resultado_final["modelo_principal"] = "OCR + Llama"
+            resultado_final["nota_confiabilidade"] = "BioBERT indisponível, análise baseada em OCR"
+        else:
+            confianca_geral = 0.3 if llama_ok else 0.0
+            resultado_final["modelo_principal"] = "Llama (fallback)"
+            resultado_final["nota_confiabilidade"] = "Análise limitada - documento sem texto legível"
+        
+        resultado_final["confianca_geral"] = round(confianca_geral, 3)
+        
+        # === IDENTIFICAR ALERTAS ===
+        alertas = []
+        
+        # Alertas baseados em entidades BioBERT
+        entidades_urgentes = ["trauma", "infarto", "avc", "dispneia", "cianose"]
+        for entidade in resultado_final.get("entidades_detectadas", []):
+            if entidade.get("categoria") in entidades_urgentes:
+                alertas.append({
+                    "tipo": "URGENCIA",
+                    "mensagem": f"Detectado: {entidade.get('termo', entidade.get('categoria'))}",
+                    "fonte": "BioBERT"
+                })
+        
+        resultado_final["alertas"] = alertas
+        
+        # === FINALIZAR ===
+        tempo_total = (datetime.utcnow() - start_time).total_seconds()
+        resultado_final["status"] = "sucesso"
+        resultado_final["tempo_total_segundos"] = round(tempo_total, 2)
+        resultado_final["timestamp_fim"] = datetime.utcnow().isoformat()
+        
+        logger.info(f"✅ Documento processado em {tempo_total:.2f}s")
+        
+        return resultado_final
+    
+    @staticmethod
+    def _novo_resultado(start_time: datetime) -> Dict[str, Any]:
+        return {
+            "status": "processando",
+            "etapas": {},
+            "resumo_ia": "",
+            "entidades_detectadas": [],
+            "alertas": [],
+            "confianca_geral": 0.0,
+            "timestamp_inicio": start_time.isoformat()
+        }
+    
+    @staticmethod
+    def _resultado_erro(resultado_final: Dict[str, Any], e: Exception) -> Dict[str, Any]:
+        logger.error(f"❌ Erro no processamento do documento: {e}")
+        resultado_final["status"] = "erro"
+        resultado_final["erro"] = str(e)
+        resultado_final["timestamp_fim"] = datetime.utcnow().isoformat()
+        return resultado_final
     
     def processar_documento_completo(
         self, 
@@ -290,135 +467,44 @@ Responda de forma estruturada e objetiva, focando em informações relevantes pa
         """
         
         start_time = datetime.utcnow()
-        resultado_final = {
-            "status": "processando",
-            "etapas": {},
-            "resumo_ia": "",
-            "entidades_detectadas": [],
-            "alertas": [],
-            "confianca_geral": 0.0,
-            "timestamp_inicio": start_time.isoformat()
-        }
+        resultado_final = self._novo_resultado(start_time)
         
         try:
-            # === ETAPA 1: OCR ===
-            logger.info("📄 Etapa 1: Extraindo texto com OCR...")
-            resultado_ocr = self.extrair_texto_ocr(image_data, filename)
-            resultado_final["etapas"]["ocr"] = resultado_ocr
-            
-            texto_extraido = resultado_ocr.get("texto_extraido", "")
-            
-            if not texto_extraido:
-                logger.warning("⚠️ Nenhum texto extraído do documento")
-                # Tentar análise direta com Llama (visão)
-                resultado_final["etapas"]["ocr"]["nota"] = "Documento sem texto legível ou imagem"
-            
-            # === ETAPA 2: BioBERT ===
-            logger.info("🧬 Etapa 2: Analisando com BioBERT...")
-            
-            try:
-                from biobert_service import extrair_entidades_biobert, is_biobert_disponivel
-                
-                if is_biobert_disponivel() and texto_extraido:
-                    resultado_biobert = extrair_entidades_biobert(texto_extraido)
-                    resultado_final["etapas"]["biobert"] = resultado_biobert
-                    resultado_final["entidades_detectadas"] = resultado_biobert.get("entidades", [])
-                else:
-                    resultado_final["etapas"]["biobert"] = {
-                        "status": "pulado",
-                        "motivo": "BioBERT indisponível ou sem texto para analisar"
-                    }
-            except ImportError:
-                resultado_final["etapas"]["biobert"] = {
-                    "status": "indisponivel",
-                    "motivo": "Módulo BioBERT não encontrado"
-                }
-            
-            # === ETAPA 3: Llama (Interpretação Contextual) ===
-            logger.info("🦙 Etapa 3: Interpretando com Llama 3...")
-            
-            # Preparar contexto completo para Llama
-            contexto_completo = texto_extraido
-            if contexto_paciente:
-                contexto_completo += f"\n\nContexto do paciente: {contexto_paciente}"
-            
-            if resultado_final.get("entidades_detectadas"):
-                entidades_str = ", ".join([e.get("termo", "") for e in resultado_final["entidades_detectadas"]])
-                contexto_completo += f"\n\nEntidades médicas detectadas pelo BioBERT: {entidades_str}"
-            
-            if contexto_completo.strip():
-                resultado_llama = self.analisar_com_llama(contexto_completo)
-                resultado_final["etapas"]["llama"] = resultado_llama
-                resultado_final["resumo_ia"] = resultado_llama.get("analise_llama", "")
-            else:
-                resultado_final["etapas"]["llama"] = {
-                    "status": "pulado",
-                    "motivo": "Sem conteúdo para analisar"
-                }
-            
-            # === CALCULAR CONFIANÇA GERAL ===
-            # BioBERT é o modelo principal - peso maior na confiança
-            # Referência: Lee et al. (2020) - Bioinformatics, DOI: 10.1093/bioinformatics/btz682
-            # Treinado em 4.5B palavras do PubMed + 13.5B do PMC
-            
-            confianca_ocr = resultado_ocr.get("confianca_ocr", 0)
-            biobert_conf = resultado_final["etapas"].get("biobert", {}).get("confianca", 0)
-            biobert_status = resultado_final["etapas"].get("biobert", {}).get("status", "")
-            llama_ok = resultado_final["etapas"].get("llama", {}).get("status") == "sucesso"
-            
-            # Pesos: BioBERT (60%), OCR (30%), Llama (10% - apenas complemento)
-            if biobert_status == "sucesso" and biobert_conf > 0:
-                # BioBERT processou com sucesso - alta confiabilidade
-                confianca_geral = (
-                    biobert_conf * 0.60 +          # BioBERT: modelo principal
-                    confianca_ocr * 0.30 +         # OCR: qualidade da extração
-                    (0.8 if llama_ok else 0) * 0.10  # Llama: complemento opcional
-                )
-                resultado_final["modelo_principal"] = "BioBERT v1.1 (dmis-lab)"
-                resultado_final["nota_confiabilidade"] = "Análise baseada em modelo científico validado (PubMed/PMC)"
-            elif confianca_ocr > 0:
-                # Apenas OCR disponível
-                confianca_geral = confianca_ocr * 0.7 + (0.3 if llama_ok else 0)
-                resultado_final["modelo_principal"] = "OCR + Llama"
-                resultado_final["nota_confiabilidade"] = "BioBERT indisponível, análise baseada em OCR"
-            else:
-                confianca_geral = 0.3 if llama_ok else 0.0
-                resultado_final["modelo_principal"] = "Llama (fallback)"
-                resultado_final["nota_confiabilidade"] = "Análise limitada - documento sem texto legível"
-            
-            resultado_final["confianca_geral"] = round(confianca_geral, 3)
-            
-            # === IDENTIFICAR ALERTAS ===
-            alertas = []
-            
-            # Alertas baseados em entidades BioBERT
-            entidades_urgentes = ["trauma", "infarto", "avc", "dispneia", "cianose"]
-            for entidade in resultado_final.get("entidades_detectadas", []):
-                if entidade.get("categoria") in entidades_urgentes:
-                    alertas.append({
-                        "tipo": "URGENCIA",
-                        "mensagem": f"Detectado: {entidade.get('termo', entidade.get('categoria'))}",
-                        "fonte": "BioBERT"
-                    })
-            
-            resultado_final["alertas"] = alertas
-            
-            # === FINALIZAR ===
-            tempo_total = (datetime.utcnow() - start_time).total_seconds()
-            resultado_final["status"] = "sucesso"
-            resultado_final["tempo_total_segundos"] = round(tempo_total, 2)
-            resultado_final["timestamp_fim"] = datetime.utcnow().isoformat()
-            
-            logger.info(f"✅ Documento processado em {tempo_total:.2f}s")
-            
-            return resultado_final
-            
+            contexto_completo = self._etapas_locais(image_data, filename, contexto_paciente, resultado_final)
+            resultado_llama = self.analisar_com_llama(contexto_completo) if contexto_completo.strip() else None
+            return self._finalizar(resultado_final, resultado_llama, start_time)
+        except Exception as e:
+            return self._resultado_erro(resultado_final, e)
+    
+    async def processar_documento_completo_async(
+        self,
+        image_data: bytes,
+        filename: str = "",
+        contexto_paciente: str = "",
+        executor=None
+    ) -> Dict[str, Any]:
+        """
+        Mesmo pipeline para endpoints async: OCR e BioBERT no executor
+        limitado (ExecutorLimitado) e Llama pelo cliente HTTP compartilhado,
+        sem bloquear o event loop
+
+        ExecutorSaturado sobe para o endpoint responder 503.
+        """
+        from executores import ExecutorSaturado
+        
+        start_time = datetime.utcnow()
+        resultado_final = self._novo_resultado(start_time)
+        
+        try:
+            contexto_completo = await executor.executar(
+                self._etapas_locais, image_data, filename, contexto_paciente, resultado_final
+            )
+            resultado_llama = await self.analisar_com_llama_async(contexto_completo) if contexto_completo.strip() else None
+            return self._finalizar(resultado_final, resultado_llama, start_time)
+        except ExecutorSaturado:
+            raise
         except Exception as e:
-            logger.error(f"❌ Erro no processamento do documento: {e}")
-            resultado_final["status"] = "erro"
-            resultado_final["erro"] = str(e)
-            resultado_final["timestamp_fim"] = datetime.utcnow().isoformat()
-            return resultado_final
+            return self._resultado_erro(resultado_final, e)
 
 
 # Instância global (singleton)
@@ -446,6 +532,31 @@ def processar_documento_medico(
     )
 
 
+async def processar_documento_medico_async(
+    image_data: bytes,
+    filename: str = "",
+    contexto_paciente: str = "",
+    executor=None
+) -> Dict[str, Any]:
+    """
+    Versão para endpoints async de processar_documento_medico
+    
+    Args:
+        image_data: Bytes da imagem/documento
+        filename: Nome do arquivo
+        contexto_paciente: Contexto adicional
+        executor: ExecutorLimitado para OCR e BioBERT (padrão: executor_inferencia)
+        
+    Returns:
+        Dict com análise completa
+    """
+    if executor is None:
+        from executores import executor_inferencia as executor
+    return await document_ai_service.processar_documento_completo_async(
+        image_data, filename, contexto_paciente, executor
+    )
+
+
 def extrair_texto_documento(image_data: bytes, filename: str = "") -> Dict[str, Any]:
     """
     Extrai apenas texto do documento (OCR)
@@ -0,0 +1,158 @@
+"""
+Executores limitados para trabalho bloqueante fora do event loop
+- Inferência (BioBERT + pipeline de hospitais + matchmaker): CPU-bound; a
+  passagem do modelo é feita pela thread do agendador de micro-lotes, e os
+  workers passam a maior parte do tempo aguardando o lote
+- Banco de dados (SQLAlchemy síncrono): I/O bloqueante
+
+Cada executor tem número fixo de workers e fila com capacidade máxima.
+Com a fila cheia a submissão é recusada imediatamente (ExecutorSaturado),
+permitindo à API responder 503 com Retry-After em vez de acumular latência.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Workers de inferência: um chamador bloqueado por texto no lote do BioBERT; com menos
+# workers que BIOBERT_LOTE_MAX os micro-lotes nunca enchem
+INFERENCIA_WORKERS = int(os.getenv("INFERENCIA_WORKERS", os.getenv("BIOBERT_LOTE_MAX", "8")))
+
+
+class ExecutorSaturado(Exception):
+    """Fila do executor cheia - o chamador deve tentar novamente mais tarde"""
+
+    def __init__(self, nome: str, retry_after: int):
+        self.nome = nome
+        self.retry_after = retry_after
+        super().__init__(f"Executor '{nome}' saturado - tente novamente em {retry_after}s")
+
+
+class ExecutorLimitado:
+    """
+    ThreadPoolExecutor com fila limitada e métricas de ocupação
+
+    Threads são suficientes para a inferência: o PyTorch libera o GIL durante
+    as operações de tensor, e o modelo carregado é compartilhado sem cópia.
+    """
+
+    def __init__(self, nome: str, max_workers: int, max_fila: int, retry_after: int = 2):
+        self.nome = nome
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"exec-{nome}")
+        self._lock = threading.Lock()
+        self._pendentes = 0      # submetidas e ainda não concluídas (fila + execução)
+        self._em_execucao = 0
+        self._concluidas = 0
+        self._erros = 0
+        self._rejeitadas = 0
+        self._pico_pendentes = 0
+        self._esperas_ms = deque(maxlen=500)
+        self._execucoes_ms = deque(maxlen=500)
+
+    @property
+    def capacidade(self) -> int:
+        return self.max_workers + self.max_fila
+
+    def _executar_medindo(self, fn: Callable, enfileirado_em: float, args, kwargs):
+        inicio = time.perf_counter()
+        with self._lock:
+            self._em_execucao += 1
+            self._esperas_ms.append((inicio - enfileirado_em) * 1000)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._em_execucao -= 1
+                self._execucoes_ms.append((time.perf_counter() - inicio) * 1000)
+
+    def _liberar(self, futuro: Future):
+        """
+        Callback do Future do pool: libera a vaga só quando a thread termina
+
+        Cancelar a corrotina que aguarda (cliente desconectou) não interrompe a
+        thread; a vaga continua ocupada até o trabalho realmente acabar.
+        """
+        with self._lock:
+            self._pendentes -= 1
+            if futuro.cancelled():
+                return
+            if futuro.exception() is None:
+                self._concluidas += 1
+            else:
+                self._erros += 1
+
+    async def executar(self, fn: Callable, *args, **kwargs) -> Any:
+        """Executa fn em uma thread do pool; recusa com ExecutorSaturado se a fila estiver cheia"""
+        with self._lock:
+            if self._pendentes >= self.capacidade:
+                self._rejeitadas += 1
+                logger.warning(f"⚠️ Executor '{self.nome}' saturado ({self._pendentes}/{self.capacidade}) - requisição recusada")
+                raise ExecutorSaturado(self.nome, self.retry_after)
+            self._pendentes += 1
+            self._pico_pendentes = max(self._pico_pendentes, self._pendentes)
+
+        try:
+            futuro = self._pool.submit(self._executar_medindo, fn, time.perf_counter(), args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pendentes -= 1
+            raise
+        futuro.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(futuro)
+
+    @staticmethod
+    def _media(valores) -> float:
+        return round(sum(valores) / len(valores), 2) if valores else 0.0
+
+    def metricas(self) -> dict:
+        with self._lock:
+            na_fila = max(0, self._pendentes - self._em_execucao)
+            return {
+                "workers": self.max_workers,
+                "capacidade_fila": self.max_fila,
+                "em_execucao": self._em_execucao,
+                "na_fila": na_fila,
+                "saturacao": round(self._pendentes / self.capacidade, 3),
+                "pico_pendentes": self._pico_pendentes,
+                "concluidas": self._concluidas,
+                "erros": self._erros,
+                "rejeitadas": self._rejeitadas,
+                "espera_media_ms": self._media(self._esperas_ms),
+                "execucao_media_ms": self._media(self._execucoes_ms)
+            }
+
+    def encerrar(self, aguardar: bool = True):
+        self._pool.shutdown(wait=aguardar)
+
+
+# Instâncias globais
+executor_inferencia = ExecutorLimitado(
+    "inferencia",
+    max_workers=INFERENCIA_WORKERS,
+    max_fila=int(os.getenv("INFERENCIA_FILA_MAX", "16")),
+    retry_after=int(os.getenv("INFERENCIA_RETRY_AFTER_S", "2"))
+)
+
+executor_db = ExecutorLimitado(
+    "banco_dados",
+    max_workers=int(os.getenv("DB_WORKERS", "4")),
+    max_fila=int(os.getenv("DB_FILA_MAX", "64")),
+    retry_after=int(os.getenv("DB_RETRY_AFTER_S", "1"))
+)
+
+
+def obter_metricas_executores() -> dict:
+    return {
+        executor_inferencia.nome: executor_inferencia.metricas(),
+        executor_db.nome: executor_db.metricas()
+    }
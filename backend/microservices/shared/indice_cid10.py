@@ -0,0 +1,183 @@
+"""
+ÍNDICE CID-10 (TRIE DE PREFIXOS)
+Risco, especialidades e tipo de caso por código CID-10, carregados de
+cid10_indice.json (capítulos A00-Z99, agrupamentos e categorias).
+
+A busca percorre a trie caractere a caractere (O(len(cid))) e cada atributo
+vem do prefixo MAIS LONGO que o define: "I21.9" herda o risco e as
+especialidades de "I21", e "G93.1" tem risco próprio mas herda as
+especialidades de "G93". Capítulos e agrupamentos (faixas) aceitam os mesmos
+atributos. O resultado não depende da ordem de declaração no arquivo.
+
+Risco e especialidades reproduzem as tabelas da triagem (cids_criticos e o
+mapeamento CID -> especialidades): mudar um score muda a classificação dos
+pacientes, então entradas novas entram como mudança clínica à parte.
+
+Usado por analisar_com_ia_inteligente (risco), PipelineHospitaisGoias
+(especialidades, tipo de caso) e PipelineDecisaoRegulacao (tipo de caso RAG).
+"""
+
+import os
+import re
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CID10_INDICE_PATH = os.getenv(
+    "CID10_INDICE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cid10_indice.json")
+)
+
+_NAO_ALFANUMERICO = re.compile(r"[^A-Z0-9]")
+_CATEGORIA = re.compile(r"^[A-Z][0-9]{2}$")
+_PREFIXO = re.compile(r"^[A-Z][0-9]{0,3}$")
+
+# Atributos resolvidos pelo prefixo mais longo
+ATRIBUTOS = ("capitulo", "desc", "risco", "especialidades", "tipo_caso", "tipo_caso_rag", "se_trauma")
+_DADOS = None  # chave do nó da trie que guarda os atributos
+
+
+def normalizar_cid(cid: Optional[str]) -> str:
+    """'i21.9 ' -> 'I219' (sem ponto, espaços ou hífen)"""
+    return _NAO_ALFANUMERICO.sub("", (cid or "").upper())
+
+
+def prefixos_da_faixa(faixa: str) -> List[str]:
+    """
+    Menor conjunto de prefixos que cobre uma faixa de categorias
+
+    "C00-D48" -> ["C", "D0", "D1", "D2", "D3", "D40", ..., "D48"]
+    """
+    inicio, fim = (normalizar_cid(parte) for parte in faixa.split("-"))
+    if not (_CATEGORIA.match(inicio) and _CATEGORIA.match(fim)) or inicio > fim:
+        raise ValueError(f"Faixa CID-10 inválida: {faixa}")
+
+    prefixos = []
+    for letra in (chr(c) for c in range(ord(inicio[0]), ord(fim[0]) + 1)):
+        categorias = [f"{letra}{n:02d}" for n in range(100) if inicio <= f"{letra}{n:02d}" <= fim]
+        if len(categorias) == 100:
+            prefixos.append(letra)
+            continue
+        for dezena in range(10):
+            grupo = [c for c in categorias if c[1] == str(dezena)]
+            if len(grupo) == 10:
+                prefixos.append(f"{letra}{dezena}")
+            else:
+                prefixos.extend(grupo)
+    return prefixos
+
+
+class IndiceCID10:
+    """Trie de prefixos CID-10 com herança de atributos pelo prefixo mais longo"""
+
+    def __init__(self, dados: Dict[str, Any]):
+        self.versao = dados.get("versao", "desconhecida")
+        self._padrao = dict(dados.get("padrao", {}))
+        self._raiz: Dict[Any, Any] = {}
+        self.total_nos = 0
+
+        # Ordem de aplicação: capítulos < agrupamentos < códigos (o mais específico prevalece no mesmo nó)
+        for capitulo in dados.get("capitulos", []):
+            atributos = {"capitulo": {"numero": capitulo["capitulo"], "faixa": capitulo["faixa"], "desc": capitulo["desc"]}}
+            if "especialidades" in capitulo:
+                atributos["especialidades"] = capitulo["especialidades"]
+            for prefixo in prefixos_da_faixa(capitulo["faixa"]):
+                self._definir(prefixo, atributos)
+
+        for agrupamento in dados.get("agrupamentos", []):
+            atributos = {k: v for k, v in agrupamento.items() if k in ATRIBUTOS}
+            for prefixo in prefixos_da_faixa(agrupamento["faixa"]):
+                self._definir(prefixo, atributos)
+
+        for codigo, atributos in dados.get("codigos", {}).items():
+            desconhecidos = set(atributos) - set(ATRIBUTOS)
+            if desconhecidos:
+                raise ValueError(f"Atributos desconhecidos em {codigo}: {', '.join(sorted(desconhecidos))}")
+            self._definir(codigo, atributos)
+
+    def _definir(self, prefixo: str, atributos: Dict[str, Any]):
+        prefixo = normalizar_cid(prefixo)
+        if not _PREFIXO.match(prefixo):
+            raise ValueError(f"Prefixo CID-10 inválido: {prefixo}")
+        no = self._raiz
+        for caractere in prefixo:
+            if caractere not in no:
+                no[caractere] = {}
+                self.total_nos += 1
+            no = no[caractere]
+        dados = no.setdefault(_DADOS, {"prefixo": prefixo})
+        for chave, valor in atributos.items():
+            if chave == "risco":
+                valor = dict(valor, desc=atributos.get("desc"), codigo=prefixo)
+            elif chave == "especialidades":
+                valor = tuple(valor)
+            dados[chave] = valor
+
+    @lru_cache(maxsize=8192)
+    def _resolver(self, codigo: str) -> Dict[str, Any]:
+        resultado = dict(self._padrao, codigo=codigo, prefixo=None)
+        no = self._raiz
+        for caractere in codigo:
+            no = no.get(caractere)
+            if no is None:
+                break
+            dados = no.get(_DADOS)
+            if dados:
+                resultado.update(dados)
+        resultado["especialidades"] = tuple(resultado.get("especialidades") or ())
+        return resultado
+
+    def resolver(self, cid: Optional[str]) -> Dict[str, Any]:
+        """Todos os atributos do código (cópia; listas como tuplas)"""
+        return dict(self._resolver(normalizar_cid(cid)))
+
+    def risco(self, cid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """{'score', 'risco', 'desc', 'codigo'} do prefixo mais longo com risco definido, ou None"""
+        risco = self._resolver(normalizar_cid(cid)).get("risco")
+        if not risco:
+            return None
+        return {"score": risco["score"], "risco": risco["classificacao"], "desc": risco["desc"], "codigo": risco["codigo"]}
+
+    def especialidades(self, cid: Optional[str]) -> List[str]:
+        return list(self._resolver(normalizar_cid(cid))["especialidades"])
+
+    def tipo_caso(self, cid: Optional[str], trauma_nos_sintomas: bool = False, rag: bool = False) -> str:
+        """
+        Tipo de caso do pipeline (rag=False) ou da versão RAG (rag=True)
+
+        Alguns capítulos mudam de tipo quando os sintomas mencionam trauma
+        (ex.: M - osteomuscular), conforme 'se_trauma' no arquivo de dados.
+        """
+        dados = self._resolver(normalizar_cid(cid))
+        chave = "tipo_caso_rag" if rag else "tipo_caso"
+        if trauma_nos_sintomas and dados.get("se_trauma"):
+            return dados["se_trauma"].get(chave, dados[chave])
+        return dados[chave]
+
+    def metricas_cache(self) -> Dict[str, int]:
+        """hits, misses, maxsize e currsize do cache de resolução (compartilhado pelas instâncias)"""
+        return self._resolver.cache_info()._asdict()
+
+    def cobertura(self, codigos: Iterable[str]) -> float:
+        """Fração dos códigos que caem em algum capítulo"""
+        codigos = list(codigos)
+        cobertos = sum(1 for c in codigos if self._resolver(normalizar_cid(c)).get("capitulo"))
+        return cobertos / len(codigos) if codigos else 0.0
+
+
+def carregar_indice_cid10(caminho: str = CID10_INDICE_PATH) -> IndiceCID10:
+    with open(caminho, "r", encoding="utf-8") as f:
+        indice = IndiceCID10(json.load(f))
+    logger.info(f"✅ Índice CID-10 v{indice.versao} carregado ({indice.total_nos} nós)")
+    return indice
+
+
+# Instância global
+indice_cid10 = carregar_indice_cid10()
+
+
+def avaliar_risco_cid(cid: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Risco do CID (score 1-10, VERMELHO/AMARELO/VERDE) ou None se não estiver na base crítica"""
+    return indice_cid10.risco(cid)
@@ -0,0 +1,349 @@
+"""
+LÉXICO CLÍNICO E MATCHER MULTI-PADRÃO
+Léxico versionado de sintomas críticos, entidades médicas e protocolos especiais,
+compilado na importação em um único matcher.
+
+O texto é dobrado UMA vez, sem diferenciar maiúsculas nem acentos
+("vômito" == "vomito" == "VÔMITO"), e cada ocorrência volta com a posição
+(início/fim) no texto original. Abreviações curtas (tc, rm, iam...) só casam
+como palavra inteira.
+
+Os pontos de chamada da triagem (analisar_com_ia_inteligente, entidades do
+BioBERT, protocolos do matchmaker) mantêm a busca `termo in texto.lower()`:
+no CPython ela é mais rápida que o matcher em todos os tamanhos de texto,
+inclusive com a expressão em trie sobre o texto dobrado
+(benchmark_matcher_clinico.py). A re-triagem em lote usa a mesma regra
+(scores_sintomas_em_lote) para reproduzir o score da análise individual.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+LEXICO_VERSAO = "1.0.0"
+
+# Sintomas críticos do prontuário: termo -> ajuste de score e descrição clínica
+SINTOMAS_CRITICOS = {
+    'dor no peito': {'score': +3, 'desc': 'dor torácica'},
+    'falta de ar': {'score': +2, 'desc': 'dispneia'},
+    'inconsciência': {'score': +4, 'desc': 'alteração do nível de consciência'},
+    'convulsão': {'score': +3, 'desc': 'atividade convulsiva'},
+    'hemorragia': {'score': +3, 'desc': 'sangramento ativo'},
+    'vômito': {'score': +1, 'desc': 'êmese'},
+    'febre alta': {'score': +2, 'desc': 'hipertermia'},
+    'pressão baixa': {'score': +2, 'desc': 'hipotensão'},
+    'taquicardia': {'score': +2, 'desc': 'frequência cardíaca elevada'},
+    'cianose': {'score': +3, 'desc': 'cianose'},
+    'rebaixamento': {'score': +3, 'desc': 'rebaixamento do nível de consciência'},
+    'trauma': {'score': +4, 'desc': 'traumatismo'},
+    'acidente': {'score': +4, 'desc': 'trauma por acidente'}
+}
+
+# Entidades médicas (categoria -> termos)
+ENTIDADES_MEDICAS = {
+    # Sintomas
+    "dor": ["dor", "dolor", "pain"],
+    "febre": ["febre", "fever", "hipertermia"],
+    "dispneia": ["dispneia", "falta de ar", "dyspnea"],
+    "cefaleia": ["cefaleia", "dor de cabeça", "headache"],
+    "nausea": ["nausea", "enjoo", "vomito"],
+    "taquicardia": ["taquicardia", "palpitacao"],
+    "hipertensao": ["hipertensao", "pressao alta"],
+    "cianose": ["cianose", "roxidao"],
+
+    # Condições
+    "trauma": ["trauma", "acidente", "lesao"],
+    "infarto": ["infarto", "iam", "miocardio"],
+    "avc": ["avc", "derrame", "stroke"],
+    "pneumonia": ["pneumonia", "infeccao pulmonar"],
+    "diabetes": ["diabetes", "glicemia"],
+    "insuficiencia": ["insuficiencia", "falencia"],
+
+    # Anatomia
+    "torax": ["torax", "peito", "chest"],
+    "abdomen": ["abdomen", "barriga", "abdominal"],
+    "cranio": ["cranio", "cabeca", "head"],
+    "extremidades": ["bracos", "pernas", "membros"],
+
+    # Exames
+    "raio_x": ["raio-x", "radiografia", "rx"],
+    "tomografia": ["tomografia", "tc", "ct"],
+    "ressonancia": ["ressonancia", "rm", "mri"],
+    "eletrocardiograma": ["ecg", "eletrocardiograma"],
+}
+
+# Protocolos especiais, em ordem de prioridade
+PROTOCOLOS_ESPECIAIS = {
+    "PROTOCOLO_OBITO": [
+        "óbito", "morte cerebral", "glasgow 3", "coma irreversível",
+        "morte encefálica", "parada cardiorrespiratória", "sem sinais vitais"
+    ],
+    "PROTOCOLO_QUEIMADOS": ["queimadura", "queimado"],
+}
+
+# Termos que só casam como palavra inteira (evita "tc" em "etc", "rm" em "enfermeira")
+PALAVRA_INTEIRA = {"iam", "tc", "ct", "rm", "rx", "ecg", "mri", "avc", "glasgow 3"}
+
+GRUPO_SINTOMAS = "sintomas_criticos"
+GRUPO_ENTIDADES = "entidades_medicas"
+GRUPO_PROTOCOLOS = "protocolos_especiais"
+
+
+class Ocorrencia(NamedTuple):
+    """Ocorrência de um termo do léxico no texto (posições no texto original)"""
+    grupo: str
+    chave: str
+    termo: str
+    inicio: int
+    fim: int
+
+
+@lru_cache(maxsize=4096)
+def _dobrar_caractere(caractere: str) -> str:
+    decomposto = unicodedata.normalize("NFD", caractere)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _tabela_sem_acentos() -> Dict[str, str]:
+    """Letras acentuadas (Latin-1 e Latin Extended) -> letra base, sempre 1 caractere por 1"""
+    tabela = {}
+    for codigo in range(0x80, 0x250):
+        dobrado = _dobrar_caractere(chr(codigo))
+        if len(dobrado) == 1 and dobrado != chr(codigo):
+            tabela[chr(codigo)] = dobrado
+    return tabela
+
+
+_TABELA_SEM_ACENTOS = _tabela_sem_acentos()
+# Mesma dobra para Latin-1 (texto em português), aplicada em C com bytes.translate
+_TABELA_LATIN1 = bytes(
+    ord(_TABELA_SEM_ACENTOS[chr(i)]) if chr(i) in _TABELA_SEM_ACENTOS and ord(_TABELA_SEM_ACENTOS[chr(i)]) < 0x100 else i
+    for i in range(0x100)
+)
+_NAO_ASCII = re.compile(r"[^\x00-\x7f]")
+_MARCAS_COMBINANTES = re.compile(r"[\u0300-\u036f]")
+
+
+def _sem_acento(m: "re.Match") -> str:
+    caractere = m.group()
+    return _TABELA_SEM_ACENTOS.get(caractere, caractere)
+
+
+def dobrar_texto(texto: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    Remove acentos e converte para minúsculas
+
+    Caminhos rápidos, posições preservadas: ASCII (só lower()), Latin-1
+    (lower() + bytes.translate) e substituição 1:1 apenas dos caracteres não
+    ASCII. Se o tamanho mudar ou houver marcas combinantes soltas (comum em
+    texto de OCR), dobra caractere a caractere e retorna também o mapa
+    posição dobrada -> posição original.
+    """
+    if texto.isascii():
+        return texto.lower(), None
+
+    minusculo = texto.lower()
+    try:
+        # Marcas combinantes e letras que mudam de tamanho no lower() não são Latin-1
+        return minusculo.encode("latin-1").translate(_TABELA_LATIN1).decode("latin-1"), None
+    except UnicodeEncodeError:
+        pass
+
+    dobrado = _NAO_ASCII.sub(_sem_acento, minusculo)
+    if len(dobrado) == len(texto) and not _MARCAS_COMBINANTES.search(dobrado):
+        return dobrado, None
+
+    partes = [_dobrar_caractere(c) for c in texto]
+    mapa = []
+    for i, parte in enumerate(partes):
+        mapa.extend([i] * len(parte))
+    mapa.append(len(texto))
+    return "".join(partes), mapa
+
+
+def _regex_trie(padroes: Iterable[str]) -> str:
+    """Alternativa única em forma de trie: prefixos comuns testados uma vez, maior termo primeiro"""
+    trie: Dict[str, Any] = {}
+    for padrao in padroes:
+        no = trie
+        for caractere in padrao:
+            no = no.setdefault(caractere, {})
+        no[""] = True
+
+    def montar(no: Dict[str, Any]) -> str:
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c != ""]
+        if not ramos:
+            return ""
+        corpo = ramos[0] if len(ramos) == 1 else "(?:" + "|".join(ramos) + ")"
+        return f"(?:{corpo})?" if "" in no else corpo
+
+    return montar(trie)
+
+
+class MatcherClinico:
+    """
+    Matcher multi-padrão pré-compilado
+
+    Os termos (já dobrados) viram uma única expressão em trie; o motor de
+    regex (em C) salta direto para a próxima posição onde algum termo começa
+    e captura o maior termo ali. Os termos menores na mesma posição são
+    prefixos dele (consulta ao conjunto de termos) e a busca seguinte recomeça
+    na posição seguinte, então ocorrências sobrepostas ("dor de cabeça" e
+    "cabeca") são todas reportadas.
+
+    primeiras_ocorrencias (um texto inteiro de uma vez) não precisa de todas as
+    ocorrências: um str.find por termo para na primeira e evita o laço em
+    Python por ocorrência, que domina em textos longos e repetitivos.
+    """
+
+    def __init__(self, termos: Iterable[Tuple[str, str, str]], palavra_inteira: Iterable[str] = ()):
+        """termos: (grupo, chave, termo)"""
+        self._rotulos: Dict[str, List[Tuple[str, str, str]]] = {}
+        for grupo, chave, termo in termos:
+            dobrado, _ = dobrar_texto(termo)
+            self._rotulos.setdefault(dobrado, []).append((grupo, chave, termo))
+
+        palavra_inteira = {dobrar_texto(t)[0] for t in palavra_inteira}
+        self._termos = [(padrao, padrao in palavra_inteira) for padrao in self._rotulos]
+        # Para cada termo, os termos que são prefixos dele (incluindo ele mesmo), do menor ao maior
+        self._prefixos: Dict[str, List[Tuple[str, int, bool]]] = {
+            padrao: sorted(
+                ((p, len(p), p in palavra_inteira) for p in self._rotulos if padrao.startswith(p)),
+                key=lambda item: item[1]
+            )
+            for padrao in self._rotulos
+        }
+        self._regex = re.compile(_regex_trie(self._rotulos))
+
+    @property
+    def total_termos(self) -> int:
+        return len(self._rotulos)
+
+    @staticmethod
+    def _limite_palavra(texto: str, inicio: int, fim: int) -> bool:
+        return (inicio == 0 or not texto[inicio - 1].isalnum()) and (fim == len(texto) or not texto[fim].isalnum())
+
+    def buscar(self, texto: str) -> List[Ocorrencia]:
+        """Todas as ocorrências, em ordem de posição no texto"""
+        if not texto:
+            return []
+        dobrado, mapa = dobrar_texto(texto)
+        ocorrencias = []
+        buscar = self._regex.search
+        m = buscar(dobrado)
+        while m is not None:
+            inicio = m.start()
+            for padrao, comprimento, inteira in self._prefixos[m.group()]:
+                fim = inicio + comprimento
+                if inteira and not self._limite_palavra(dobrado, inicio, fim):
+                    continue
+                inicio_original, fim_original = (mapa[inicio], mapa[fim]) if mapa else (inicio, fim)
+                for grupo, chave, termo in self._rotulos[padrao]:
+                    ocorrencias.append(Ocorrencia(grupo, chave, termo, inicio_original, fim_original))
+            m = buscar(dobrado, inicio + 1)
+        return ocorrencias
+
+    def primeiras_ocorrencias(self, *textos: str) -> Dict[Tuple[str, str, str], Ocorrencia]:
+        """
+        (grupo, chave, termo) -> primeira ocorrência, considerando todos os textos
+
+        Cada texto é dobrado uma vez; cada termo ainda não visto é um str.find
+        (repetido só enquanto um termo de palavra inteira cair dentro de outra palavra).
+        """
+        primeiras: Dict[Tuple[str, str, str], Ocorrencia] = {}
+        vistos: set = set()
+        for texto in textos:
+            if not texto or len(vistos) == len(self._termos):
+                continue
+            dobrado, mapa = dobrar_texto(texto)
+            for padrao, inteira in self._termos:
+                if padrao in vistos:
+                    continue
+                inicio = dobrado.find(padrao)
+                while inteira and inicio >= 0 and not self._limite_palavra(dobrado, inicio, inicio + len(padrao)):
+                    inicio = dobrado.find(padrao, inicio + 1)
+                if inicio < 0:
+                    continue
+                vistos.add(padrao)
+                fim = inicio + len(padrao)
+                inicio_original, fim_original = (mapa[inicio], mapa[fim]) if mapa else (inicio, fim)
+                for grupo, chave, termo in self._rotulos[padrao]:
+                    primeiras[(grupo, chave, termo)] = Ocorrencia(grupo, chave, termo, inicio_original, fim_original)
+        return primeiras
+
+
+def _termos_lexico():
+    for termo in SINTOMAS_CRITICOS:
+        yield GRUPO_SINTOMAS, termo, termo
+    for categoria, termos in ENTIDADES_MEDICAS.items():
+        for termo in termos:
+            yield GRUPO_ENTIDADES, categoria, termo
+    for protocolo, termos in PROTOCOLOS_ESPECIAIS.items():
+        for termo in termos:
+            yield GRUPO_PROTOCOLOS, protocolo, termo
+
+
+# Instância global, compilada na importação
+matcher_clinico = MatcherClinico(_termos_lexico(), PALAVRA_INTEIRA)
+
+
+@lru_cache(maxsize=64)
+def _primeiras_no_texto(texto: str) -> Dict[Tuple[str, str, str], Ocorrencia]:
+    # O mesmo texto passa pelas três funções abaixo: uma varredura por texto (somente leitura)
+    return matcher_clinico.primeiras_ocorrencias(texto)
+
+
+def detectar_sintomas_criticos(texto: str) -> List[Dict[str, Any]]:
+    """Sintomas críticos presentes no texto, na ordem do léxico (ordem da justificativa)"""
+    primeiras = _primeiras_no_texto(texto or "")
+    encontrados = []
+    for termo, info in SINTOMAS_CRITICOS.items():
+        ocorrencia = primeiras.get((GRUPO_SINTOMAS, termo, termo))
+        if ocorrencia:
+            encontrados.append({
+                "sintoma": termo,
+                "score": info["score"],
+                "desc": info["desc"],
+                "inicio": ocorrencia.inicio,
+                "fim": ocorrencia.fim
+            })
+    return encontrados
+
+
+def scores_sintomas_em_lote(textos: Sequence[str]) -> List[int]:
+    """
+    Soma dos scores de sintomas críticos de cada texto
+
+    Mesma regra de analisar_com_ia_inteligente (termo in texto.lower(), com
+    acentos), para que a re-triagem reproduza o score da análise individual.
+    """
+    scores = []
+    for texto in textos:
+        texto_lower = (texto or "").lower()
+        scores.append(sum(info["score"] for termo, info in SINTOMAS_CRITICOS.items() if termo in texto_lower))
+    return scores
+
+
+def identificar_entidades(texto: str) -> List[Dict[str, Any]]:
+    """Entidades médicas (categoria + termo) presentes no texto, na ordem do léxico"""
+    primeiras = _primeiras_no_texto(texto or "")
+    entidades = []
+    for categoria, termos in ENTIDADES_MEDICAS.items():
+        for termo in termos:
+            ocorrencia = primeiras.get((GRUPO_ENTIDADES, categoria, termo))
+            if ocorrencia:
+                entidades.append({
+                    "categoria": categoria,
+                    "termo": termo,
+                    "encontrado": True,
+                    "inicio": ocorrencia.inicio,
+                    "fim": ocorrencia.fim
+                })
+    return entidades
+
+
+def detectar_protocolos(*textos: str) -> List[str]:
+    """Protocolos especiais indicados em qualquer dos textos, em ordem de prioridade"""
+    chaves = {chave for texto in textos for grupo, chave, _ in _primeiras_no_texto(texto or "") if grupo == GRUPO_PROTOCOLOS}
+    return [protocolo for protocolo in PROTOCOLOS_ESPECIAIS if protocolo in chaves]
@@ -11,6 +11,11 @@ from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 
+try:
+    from .catalogo_hospitais import catalogo_hospitais, SnapshotCatalogoHospitais
+except ImportError:
+    from catalogo_hospitais import catalogo_hospitais, SnapshotCatalogoHospitais
+
 logger = logging.getLogger(__name__)
 
 class MatchmakerLogistico:
@@ -20,29 +25,8 @@ class MatchmakerLogistico:
     """
     
     def __init__(self):
-        # Coordenadas reais dos hospitais de Goiás (baseado em dados públicos)
-        self.coordenadas_hospitais = {
-            # === HOSPITAIS DE REFERÊNCIA ESTADUAL ===
-            "HGG": (-16.679, -49.255),  # Hospital Estadual Dr. Alberto Rassi
-            "HUGO": (-16.705, -49.261),  # Hospital de Urgências Dr. Valdemiro Cruz
-            "HUGOL": (-16.643, -49.339),  # Hospital de Urgências de Goiânia
-            "HDT": (-16.685, -49.278),  # Hospital de Doenças Tropicais Dr. Anuar Auad
-            "MATERNO_INFANTIL": (-16.685, -49.278),  # Hospital Materno Infantil
-            
-            # === HOSPITAIS REGIONAIS ===
-            "HEAPA": (-16.823, -49.244),  # Hospital de Aparecida de Goiânia
-            "HUTRIN": (-16.647, -49.347),  # Hospital de Trindade
-            "REGIONAL_FORMOSA": (-15.541, -47.339),  # Hospital de Formosa
-            "REGIONAL_JATAI": (-17.881, -51.714),  # Hospital de Jataí
-            "REGIONAL_URUACU": (-14.520, -49.141),  # Hospital do Centro Norte
-            "REGIONAL_ANAPOLIS": (-16.327, -48.953),  # Hospital de Anápolis
-            
-            # === UPAs ===
-            "UPA_GOIANIA_NORTE": (-16.650, -49.280),
-            "UPA_APARECIDA": (-16.823, -49.244),
-            "UPA_ANAPOLIS": (-16.327, -48.953),
-            
-            # === CIDADES DE ORIGEM COMUNS ===
+        # Coordenadas das cidades de origem comuns (hospitais: catálogo de hospitais)
+        self.coordenadas_cidades = {
             "GOIANIA": (-16.686, -49.265),
             "ANAPOLIS": (-16.327, -48.953),
             "APARECIDA_DE_GOIANIA": (-16.823, -49.244),
@@ -55,20 +39,10 @@ class MatchmakerLogistico:
             "NOVO_GAMA": (-16.081, -48.028)
         }
         
-        # Mapeamento de nomes completos para IDs curtos
-        self.mapeamento_hospitais = {
-            "HOSPITAL ESTADUAL DR ALBERTO RASSI HGG": "HGG",
-            "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO": "HUGO",
-            "HUGOL - HOSPITAL DE URGENCIAS DE GOIANIA": "HUGOL",
-            "HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT": "HDT",
-            "HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO": "MATERNO_INFANTIL",
-            "HEAPA - HOSPITAL ESTADUAL DE APARECIDA DE GOIANIA": "HEAPA",
-            "HUTRIN - HOSPITAL DE TRINDADE": "HUTRIN",
-            "HOSPITAL ESTADUAL DE FORMOSA DR CESAR SAAD FAYAD": "REGIONAL_FORMOSA",
-            "HOSPITAL ESTADUAL DE JATAI": "REGIONAL_JATAI",
-            "HOSPITAL ESTADUAL DO CENTRO NORTE GOIANO": "REGIONAL_URUACU",
-            "HOSPITAL ESTADUAL DE ANAPOLIS DR HENRIQUE SANTILLO": "REGIONAL_ANAPOLIS"
-        }
+        # Coordenadas e nomes dos hospitais: remontados a cada nova versão do catálogo
+        # (snapshot, sigla -> coordenadas, nome completo -> sigla), trocados juntos
+        self._catalogo = None
+        catalogo_hospitais.assinar(self._preparar_catalogo)
         
         # Frota de ambulâncias por região (simulado - em produção viria de API do SAMU)
         self.frota_ambulancias = {
@@ -87,6 +61,28 @@ class MatchmakerLogistico:
             ]
         }
     
+    def _preparar_catalogo(self, snapshot: SnapshotCatalogoHospitais):
+        """Sigla -> coordenadas e nome completo -> sigla dos hospitais georreferenciados"""
+        coordenadas = {h.sigla: h.coordenadas for h in snapshot.hospitais if h.coordenadas}
+        mapeamento = {h.nome: h.sigla for h in snapshot.hospitais if h.coordenadas}
+        
+        def publicar():
+            self._catalogo = (snapshot, coordenadas, mapeamento)
+        
+        return publicar
+    
+    @property
+    def coordenadas_hospitais(self) -> Dict[str, Tuple[float, float]]:
+        return self._catalogo[1]
+    
+    @property
+    def mapeamento_hospitais(self) -> Dict[str, str]:
+        return self._catalogo[2]
+    
+    @property
+    def versao_catalogo(self) -> str:
+        return self._catalogo[0].versao
+    
     def calcular_distancia_km(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Cálculo de Haversine para distância entre dois pontos no globo
@@ -128,13 +124,16 @@ class MatchmakerLogistico:
         
         cidade_upper = cidade.upper().replace(" ", "_")
         
-        # Tentar encontrar coordenadas exatas
-        if cidade_upper in self.coordenadas_hospitais:
-            return self.coordenadas_hospitais[cidade_upper]
+        # Tentar encontrar coordenadas exatas (cidade ou sigla de hospital)
+        if cidade_upper in self.coordenadas_cidades:
+            return self.coordenadas_cidades[cidade_upper]
+        coordenadas_hospitais = self.coordenadas_hospitais
+        if cidade_upper in coordenadas_hospitais:
+            return coordenadas_hospitais[cidade_upper]
         
         # Fallback para Goiânia se não encontrar
         logger.warning(f"Coordenadas não encontradas para {cidade}, usando Goiânia como fallback")
-        return self.coordenadas_hospitais["GOIANIA"]
+        return self.coordenadas_cidades["GOIANIA"]
     
     def obter_coordenadas_hospital(self, nome_hospital: str) -> Tuple[float, float]:
         """
@@ -147,21 +146,23 @@ class MatchmakerLogistico:
             Tupla (latitude, longitude)
         """
         
-        # Tentar mapeamento direto
-        id_curto = self.mapeamento_hospitais.get(nome_hospital)
+        # Mesma versão do catálogo durante toda a busca
+        snapshot, coordenadas_hospitais, mapeamento_hospitais = self._catalogo
         
-        if id_curto and id_curto in self.coordenadas_hospitais:
-            return self.coordenadas_hospitais[id_curto]
+        # Tentar mapeamento direto (nome completo, sigla ou alias)
+        hospital = snapshot.buscar(nome_hospital)
+        if hospital and hospital.coordenadas:
+            return hospital.coordenadas
         
         # Tentar busca parcial
-        for nome_completo, id_hospital in self.mapeamento_hospitais.items():
+        for nome_completo, id_hospital in mapeamento_hospitais.items():
             if any(palavra in nome_hospital.upper() for palavra in nome_completo.split()):
-                if id_hospital in self.coordenadas_hospitais:
-                    return self.coordenadas_hospitais[id_hospital]
+                if id_hospital in coordenadas_hospitais:
+                    return coordenadas_hospitais[id_hospital]
         
         # Fallback para HGG
         logger.warning(f"Hospital não encontrado: {nome_hospital}, usando HGG como fallback")
-        return self.coordenadas_hospitais["HGG"]
+        return coordenadas_hospitais["HGG"]
     
     def calcular_score_logistico(self, distancia_km: float, tipo_caso: str = "NORMAL") -> float:
         """
@@ -0,0 +1,291 @@
+"""
+SNAPSHOT DE OCUPAÇÃO DOS HOSPITAIS
+Cópia local e versionada da ocupação/tendência calculada pelo MS-Ingestao
+(/api/v1/inteligencia/hospitais-disponiveis), consumida pelo seletor de hospitais
+
+- A atualização é feita por uma tarefa periódica (main_unified) e publica um
+  snapshot imutável por troca atômica de referência; a seleção só lê atual()
+  e nunca espera pelo MS-Ingestao
+- Uma atualização que falha (timeout, serviço fora, payload vazio) não apaga
+  nada: o seletor continua usando o último snapshot válido
+- Sem snapshot (MS-Ingestao nunca respondeu) o termo de capacidade é zero e o
+  ranqueamento é exatamente o estático
+- O último snapshot válido só vale por OCUPACAO_IDADE_MAXIMA_S desde a última
+  resposta válida; depois disso vigente() devolve None e o termo volta a zero
+  até o MS-Ingestao responder de novo
+- Só o main_unified agenda a atualização; em processos sem ela (ms-regulacao)
+  o painel fica vazio e a seleção usa apenas o ranqueamento estático
+- Várias linhas do mesmo hospital (tipos de leito, nome e sigla em linhas
+  separadas) viram uma entrada pelo pior caso (agregar_ocupacao)
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+try:
+    from .catalogo_hospitais import catalogo_hospitais
+except ImportError:
+    from catalogo_hospitais import catalogo_hospitais
+
+logger = logging.getLogger(__name__)
+
+# Pesos do termo de capacidade (mesma escala do score do seletor: +5 por especialidade)
+PENALIDADE_ALERTA_SATURACAO = 25
+PENALIDADE_TENDENCIA_ALTA = 5
+BONUS_TENDENCIA_QUEDA = 3
+PENALIDADE_SATURACAO_IMINENTE = {60: 15, 120: 8}  # previsão (min) abaixo do limite -> penalidade
+BONUS_CAPACIDADE_MAXIMO = 5  # +1 a cada 10 pontos percentuais de leitos livres
+
+# Idade máxima (desde a última resposta válida) para o snapshot entrar no score; 0 desativa o limite
+OCUPACAO_IDADE_MAXIMA_S = float(os.getenv("OCUPACAO_IDADE_MAXIMA_S", "900"))
+
+
+class OcupacaoHospital(NamedTuple):
+    nome: str
+    sigla: Optional[str]
+    taxa_ocupacao: float
+    leitos_disponiveis: int
+    tendencia: str  # ALTA, QUEDA, ESTAVEL
+    alerta_saturacao: bool
+    previsao_saturacao_min: Optional[int]
+
+
+def termo_capacidade(ocupacao: Optional[OcupacaoHospital]) -> int:
+    """
+    Ajuste do score de seleção pela ocupação atual e prevista
+
+    Penaliza alerta de saturação, tendência de alta e saturação prevista para
+    as próximas 2h; bonifica leitos livres e tendência de queda.
+    """
+    if ocupacao is None:
+        return 0
+
+    termo = min(BONUS_CAPACIDADE_MAXIMO, max(0, int((100 - ocupacao.taxa_ocupacao) // 10)))
+    if ocupacao.alerta_saturacao:
+        termo -= PENALIDADE_ALERTA_SATURACAO
+    if ocupacao.tendencia == "ALTA":
+        termo -= PENALIDADE_TENDENCIA_ALTA
+    elif ocupacao.tendencia == "QUEDA":
+        termo += BONUS_TENDENCIA_QUEDA
+    if ocupacao.previsao_saturacao_min is not None:
+        for limite, penalidade in sorted(PENALIDADE_SATURACAO_IMINENTE.items()):
+            if ocupacao.previsao_saturacao_min < limite:
+                termo -= penalidade
+                break
+    return termo
+
+
+def agregar_ocupacao(registros: List[OcupacaoHospital]) -> OcupacaoHospital:
+    """
+    Uma entrada por hospital a partir de várias linhas (ex.: uma por tipo de leito)
+
+    Pior caso do que penaliza o hospital (maior taxa, qualquer alerta, ALTA em
+    qualquer linha, menor previsão de saturação) e total de leitos livres;
+    QUEDA só se todas as linhas estão em queda.
+    """
+    if len(registros) == 1:
+        return registros[0]
+    registros = sorted(registros, key=lambda r: (r.nome, r.sigla or ""))
+    tendencias = {r.tendencia for r in registros}
+    previsoes = [r.previsao_saturacao_min for r in registros if r.previsao_saturacao_min is not None]
+    return OcupacaoHospital(
+        nome=registros[0].nome,
+        sigla=next((r.sigla for r in registros if r.sigla), None),
+        taxa_ocupacao=max(r.taxa_ocupacao for r in registros),
+        leitos_disponiveis=sum(r.leitos_disponiveis for r in registros),
+        tendencia="ALTA" if "ALTA" in tendencias else ("QUEDA" if tendencias == {"QUEDA"} else "ESTAVEL"),
+        alerta_saturacao=any(r.alerta_saturacao for r in registros),
+        previsao_saturacao_min=min(previsoes) if previsoes else None
+    )
+
+
+def score_disponibilidade(ocupacao: Optional[OcupacaoHospital], padrao: int = 10) -> int:
+    """Score 0-10 exibido nas fichas RAG (padrao quando não há dados de ocupação)"""
+    if ocupacao is None:
+        return padrao
+    score = round((100 - ocupacao.taxa_ocupacao) / 10)
+    if ocupacao.alerta_saturacao:
+        score -= 3
+    if ocupacao.tendencia == "ALTA":
+        score -= 1
+    return max(0, min(10, score))
+
+
+class SnapshotOcupacao:
+    """
+    Ocupação de uma atualização do MS-Ingestao, indexada por nome, sigla e hospital do catálogo
+
+    hospitais tem uma entrada por hospital (linhas agregadas por agregar_ocupacao).
+    """
+
+    def __init__(self, hospitais: Iterable[Dict[str, Any]], origem: str = "MS-INGESTAO"):
+        self.origem = origem
+        self.gerado_em = datetime.utcnow()
+
+        registros: List[OcupacaoHospital] = []
+        for h in hospitais:
+            nome = h.get("hospital") or h.get("nome") or h.get("unidade_nome")
+            if not nome:
+                continue
+            previsao = h.get("previsao_saturacao_min")
+            registros.append(OcupacaoHospital(
+                nome=nome,
+                sigla=h.get("sigla") or h.get("unidade_id"),
+                taxa_ocupacao=float(h.get("taxa_ocupacao", h.get("ocupacao_atual", 0)) or 0),
+                leitos_disponiveis=int(h.get("leitos_disponiveis", 0) or 0),
+                tendencia=(h.get("tendencia") or "ESTAVEL").upper(),
+                alerta_saturacao=bool(h.get("alerta_saturacao", False)),
+                previsao_saturacao_min=int(previsao) if previsao is not None else None
+            ))
+
+        # Linhas do mesmo hospital do catálogo (ou do mesmo nome, fora dele) são agregadas
+        catalogo = catalogo_hospitais.obter()
+        grupos: Dict[str, List[OcupacaoHospital]] = {}
+        chaves_grupo: Dict[str, List[str]] = {}
+        for registro in registros:
+            hospital = catalogo.buscar(registro.nome) or catalogo.buscar(registro.sigla or "")
+            identidade = hospital.sigla if hospital else registro.nome.strip().upper()
+            grupos.setdefault(identidade, []).append(registro)
+            chaves = chaves_grupo.setdefault(identidade, [])
+            chaves.extend((registro.nome, registro.sigla or ""))
+            if hospital:
+                chaves.extend((hospital.nome, hospital.sigla, *hospital.aliases))
+        agregados = {identidade: agregar_ocupacao(linhas) for identidade, linhas in grupos.items()}
+        self.hospitais = tuple(agregados.values())
+
+        # Versão = hash do conteúdo relevante para o score (não muda com horário de coleta)
+        conteudo = json.dumps(sorted((list(r) for r in self.hospitais), key=lambda r: (r[0], r[1] or "")),
+                              ensure_ascii=False)
+        self.versao = hashlib.sha1(conteudo.encode("utf-8")).hexdigest()[:12]
+
+        # Chaves: nomes e siglas informados + nome/sigla/aliases do hospital correspondente no catálogo
+        self._por_chave: Dict[str, OcupacaoHospital] = {}
+        for identidade, registro in agregados.items():
+            for chave in chaves_grupo[identidade]:
+                if chave:
+                    self._por_chave.setdefault(chave.strip().upper(), registro)
+
+    def buscar(self, nome_ou_sigla: Optional[str]) -> Optional[OcupacaoHospital]:
+        return self._por_chave.get((nome_ou_sigla or "").strip().upper())
+
+    def __len__(self) -> int:
+        return len(self.hospitais)
+
+
+# Assinante: chamado com cada snapshot publicado (deve ser barato - troca de referências)
+AssinanteOcupacao = Callable[[SnapshotOcupacao], None]
+
+
+class PainelOcupacao:
+    """Último snapshot de ocupação válido e seus assinantes (pipelines de seleção)"""
+
+    def __init__(self, idade_maxima_s: float = OCUPACAO_IDADE_MAXIMA_S):
+        self.idade_maxima_s = idade_maxima_s
+        self._lock = threading.Lock()
+        self._snapshot: Optional[SnapshotOcupacao] = None
+        self._assinantes: List[AssinanteOcupacao] = []
+        self.atualizacoes = 0
+        self.publicacoes = 0
+        self.falhas = 0
+        self.ultimo_erro: Optional[str] = None
+        self.ultima_tentativa: Optional[datetime] = None
+        self.ultimo_sucesso: Optional[datetime] = None
+
+    def atual(self) -> Optional[SnapshotOcupacao]:
+        """Snapshot vigente (sem I/O) ou None se o MS-Ingestao nunca respondeu"""
+        return self._snapshot
+
+    def idade_s(self) -> Optional[float]:
+        """Segundos desde a última resposta válida do MS-Ingestao (None se nunca respondeu)"""
+        if self.ultimo_sucesso is None:
+            return None
+        return (datetime.utcnow() - self.ultimo_sucesso).total_seconds()
+
+    def expirado(self) -> bool:
+        """True quando o snapshot atual passou de idade_maxima_s sem nova resposta válida"""
+        idade = self.idade_s()
+        return self.idade_maxima_s > 0 and idade is not None and idade > self.idade_maxima_s
+
+    def vigente(self) -> Optional[SnapshotOcupacao]:
+        """Snapshot que pode entrar no score: atual() ou None se expirado"""
+        snapshot = self._snapshot
+        if snapshot is None or self.expirado():
+            return None
+        return snapshot
+
+    def assinar(self, assinante: AssinanteOcupacao):
+        """Registra um assinante e o aplica ao snapshot atual, se houver"""
+        with self._lock:
+            self._assinantes.append(assinante)
+            snapshot = self._snapshot
+        if snapshot is not None:
+            assinante(snapshot)
+
+    def publicar(self, hospitais: Iterable[Dict[str, Any]], origem: str = "MS-INGESTAO") -> SnapshotOcupacao:
+        """
+        Publica a ocupação recebida se ela mudou; payload vazio é tratado como falha
+
+        Retorna o snapshot vigente após a chamada.
+        """
+        self.ultima_tentativa = datetime.utcnow()
+        novo = SnapshotOcupacao(hospitais, origem)
+        if not novo.hospitais:
+            self.registrar_falha("payload sem hospitais")
+            return self._snapshot
+
+        with self._lock:
+            self.atualizacoes += 1
+            self.ultimo_erro = None
+            self.ultimo_sucesso = self.ultima_tentativa
+            anterior = self._snapshot
+            if anterior is not None and anterior.versao == novo.versao:
+                return anterior
+            self._snapshot = novo
+            self.publicacoes += 1
+            assinantes = list(self._assinantes)
+
+        for assinante in assinantes:
+            try:
+                assinante(novo)
+            except Exception as e:
+                logger.error(f"❌ Assinante do snapshot de ocupação falhou: {e}")
+        logger.info(f"📦 Ocupação dos hospitais atualizada: v{anterior.versao if anterior else '-'} -> "
+                    f"v{novo.versao} ({len(novo)} hospitais, {origem})")
+        return novo
+
+    def registrar_falha(self, erro: str):
+        """Atualização sem dados: mantém o último snapshot válido"""
+        self.ultima_tentativa = datetime.utcnow()
+        self.falhas += 1
+        self.ultimo_erro = erro
+        if self._snapshot is not None:
+            logger.warning(f"⚠️ Ocupação não atualizada ({erro}); mantendo v{self._snapshot.versao}")
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        idade = self.idade_s()
+        return {
+            "versao": snapshot.versao if snapshot else None,
+            "origem": snapshot.origem if snapshot else None,
+            "gerado_em": snapshot.gerado_em.isoformat() if snapshot else None,
+            # Tempo desde a última resposta válida do MS-Ingestao (dados em uso)
+            "idade_s": round(idade, 1) if idade is not None else None,
+            "idade_maxima_s": self.idade_maxima_s,
+            # Snapshot fora do score (termo de capacidade zero) até a próxima resposta válida
+            "expirado": self.expirado(),
+            "hospitais": len(snapshot) if snapshot else 0,
+            "atualizacoes": self.atualizacoes,
+            "publicacoes": self.publicacoes,
+            "falhas": self.falhas,
+            "ultimo_erro": self.ultimo_erro,
+            "ultima_tentativa": self.ultima_tentativa.isoformat() if self.ultima_tentativa else None
+        }
+
+
+# Instância global
+painel_ocupacao = PainelOcupacao()
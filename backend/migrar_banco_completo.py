@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """
 Script para migrar banco de dados completo
-Adiciona todas as colunas necessárias (LGPD + Transferência)
+Adiciona todas as colunas necessárias (LGPD + Transferência + Fila de regulação)
+Preenche as colunas normalizadas da fila e cria seus índices
 Funciona com SQLite e PostgreSQL
+
+Executar antes do deploy: create_all() não acrescenta colunas a tabelas existentes
+e o modelo PacienteRegulacao já consulta as colunas novas.
 """
 
 import sys
@@ -48,7 +52,13 @@ try:
         ("justificativa_negacao", "TEXT"),
     ]
     
-    todas_colunas = colunas_lgpd + colunas_transferencia
+    # Fila de regulação (GET /fila-regulacao): filtros por igualdade, mantidos por normalizar_filtro()
+    colunas_fila = [
+        ("especialidade_normalizada", "VARCHAR(255)"),
+        ("cidade_origem_normalizada", "VARCHAR(255)"),
+    ]
+    
+    todas_colunas = colunas_lgpd + colunas_transferencia + colunas_fila
     
     with engine.connect() as conn:
         # Verificar colunas existentes
@@ -81,6 +91,37 @@ try:
                     print(f"❌ Erro ao adicionar coluna '{coluna}': {e}")
                     conn.rollback()
         
+        # Preencher colunas normalizadas (mesma regra do ORM, sem funções específicas do banco)
+        from shared.database import PacienteRegulacao, normalizar_filtro
+        
+        pendentes = conn.execute(text(
+            "SELECT id, especialidade, cidade_origem FROM pacientes_regulacao "
+            "WHERE (especialidade IS NOT NULL AND especialidade_normalizada IS NULL) "
+            "OR (cidade_origem IS NOT NULL AND cidade_origem_normalizada IS NULL)"
+        )).fetchall()
+        if pendentes:
+            conn.execute(
+                text("UPDATE pacientes_regulacao SET especialidade_normalizada = :especialidade, "
+                     "cidade_origem_normalizada = :cidade WHERE id = :id"),
+                [
+                    {"id": id_, "especialidade": normalizar_filtro(especialidade), "cidade": normalizar_filtro(cidade)}
+                    for id_, especialidade, cidade in pendentes
+                ]
+            )
+            conn.commit()
+        print(f"✅ Colunas normalizadas preenchidas: {len(pendentes)} registros")
+        
+        # Índices da fila (definidos no modelo; DESC aceito pelo SQLite e pelo PostgreSQL)
+        indices_existentes = {indice['name'] for indice in inspect(conn).get_indexes('pacientes_regulacao')}
+        for indice in PacienteRegulacao.__table__.indexes:
+            if indice.name.startswith("idx_pacientes_fila"):
+                if indice.name in indices_existentes:
+                    print(f"⚠️  Índice '{indice.name}' já existe")
+                else:
+                    indice.create(conn)
+                    conn.commit()
+                    print(f"✅ Índice '{indice.name}' criado")
+        
         print(f"\n{'='*60}")
         print(f"📊 RESUMO DA MIGRAÇÃO:")
         print(f"  ✅ Colunas adicionadas: {adicionadas}")
@@ -103,7 +144,8 @@ try:
         print(f"\n🔍 Verificando colunas críticas:")
         colunas_criticas = [
             'protocolo', 'status', 'nome_completo', 'cpf', 'especialidade',
-            'cid', 'tipo_transporte', 'status_ambulancia', 'data_solicitacao_ambulancia'
+            'cid', 'tipo_transporte', 'status_ambulancia', 'data_solicitacao_ambulancia',
+            'especialidade_normalizada', 'cidade_origem_normalizada'
         ]
         
         todas_ok = True
@@ -0,0 +1,36 @@
+-- Migração: Índice da fila de regulação (GET /fila-regulacao)
+-- Data: 2026-10-17
+-- Descrição: Colunas normalizadas de especialidade/cidade (filtro por igualdade em vez de
+-- ILIKE '%...%') e índices compostos na ordem da fila (score desc, data, id)
+-- Uso: python executar_migracao.py migration_fila_regulacao.sql
+-- Somente PostgreSQL; para SQLite (ou qualquer banco) usar python migrar_banco_completo.py
+
+-- Colunas normalizadas (mantidas pelo ORM via normalizar_filtro em shared/database.py)
+ALTER TABLE pacientes_regulacao
+ADD COLUMN IF NOT EXISTS especialidade_normalizada VARCHAR,
+ADD COLUMN IF NOT EXISTS cidade_origem_normalizada VARCHAR;
+
+-- Preencher registros existentes (mesma regra de normalizar_filtro: sem acentos, maiúsculas, espaços simples)
+UPDATE pacientes_regulacao
+SET
+    especialidade_normalizada = NULLIF(regexp_replace(
+        translate(upper(trim(especialidade)), 'ÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑ', 'AAAAAEEEEIIIIOOOOOUUUUCN'),
+        '\s+', ' ', 'g'), ''),
+    cidade_origem_normalizada = NULLIF(regexp_replace(
+        translate(upper(trim(cidade_origem)), 'ÁÀÂÃÄÉÈÊËÍÌÎÏÓÒÔÕÖÚÙÛÜÇÑ', 'AAAAAEEEEIIIIOOOOOUUUUCN'),
+        '\s+', ' ', 'g'), '')
+WHERE (especialidade IS NOT NULL AND especialidade_normalizada IS NULL)
+   OR (cidade_origem IS NOT NULL AND cidade_origem_normalizada IS NULL);
+
+-- Fila filtrada por especialidade e fila completa, na ordem do cursor (score desc, data, id)
+CREATE INDEX IF NOT EXISTS idx_pacientes_fila_regulacao
+ON pacientes_regulacao (status, especialidade_normalizada, score_prioridade DESC NULLS LAST, data_solicitacao, id);
+
+CREATE INDEX IF NOT EXISTS idx_pacientes_fila_status
+ON pacientes_regulacao (status, score_prioridade DESC NULLS LAST, data_solicitacao, id);
+
+-- Verificar resultado
+SELECT COUNT(*) as total_registros,
+       COUNT(especialidade_normalizada) as com_especialidade_normalizada,
+       COUNT(cidade_origem_normalizada) as com_cidade_normalizada
+FROM pacientes_regulacao;
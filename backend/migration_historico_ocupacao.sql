@@ -0,0 +1,22 @@
+-- Migração: Leituras únicas em historico_ocupacao (POST /ingerir-ocupacao-bulk)
+-- Data: 2026-10-17
+-- Descrição: A ingestão em lote ignora leituras repetidas com INSERT ... ON CONFLICT DO NOTHING,
+-- que exige um índice único em (unidade_id, tipo_leito, data_coleta)
+-- Uso: python executar_migracao.py migration_historico_ocupacao.sql
+
+-- Remover leituras duplicadas já gravadas (mantém a de menor id)
+DELETE FROM historico_ocupacao a
+USING historico_ocupacao b
+WHERE a.unidade_id = b.unidade_id
+  AND a.tipo_leito = b.tipo_leito
+  AND a.data_coleta = b.data_coleta
+  AND a.id > b.id;
+
+-- Índice único usado na detecção de duplicadas (mesmo nome do modelo em shared/database.py)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_historico_ocupacao_leitura
+ON historico_ocupacao (unidade_id, tipo_leito, data_coleta);
+
+-- Verificar resultado
+SELECT COUNT(*) as total_registros,
+       COUNT(DISTINCT (unidade_id, tipo_leito, data_coleta)) as leituras_unicas
+FROM historico_ocupacao;
@@ -0,0 +1,70 @@
+-- Migração: Índice composto de historico_ocupacao e estado atual por unidade (MS-Ingestao)
+-- Data: 2026-10-17
+-- Descrição: As consultas do MS-Ingestao filtram unidade (+ tipo de leito) e janela de tempo,
+-- das leituras mais recentes para as mais antigas: um índice único (unidade_id, tipo_leito,
+-- data_coleta DESC) substitui os índices de coluna única e o índice da ingestão em lote.
+-- ocupacao_atual guarda a última leitura de cada unidade/tipo de leito (mantida pela ingestão)
+-- Uso: python executar_migracao.py migration_historico_ocupacao_indices.sql
+-- Somente PostgreSQL (DISTINCT ON, DELETE ... USING). SQLite ou PostgreSQL:
+-- backend/microservices/ms-ingestao/migrar_historico_ocupacao.py
+
+-- Remover leituras duplicadas, caso migration_historico_ocupacao.sql não tenha sido executada
+DELETE FROM historico_ocupacao a
+USING historico_ocupacao b
+WHERE a.unidade_id = b.unidade_id
+  AND a.tipo_leito = b.tipo_leito
+  AND a.data_coleta = b.data_coleta
+  AND a.id > b.id;
+
+-- Índice composto (criado antes de remover o índice único anterior: ON CONFLICT segue válido)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_historico_unidade_tipo_data
+ON historico_ocupacao (unidade_id, tipo_leito, data_coleta DESC);
+
+DROP INDEX IF EXISTS uq_historico_ocupacao_leitura;
+DROP INDEX IF EXISTS ix_historico_ocupacao_unidade_id;
+DROP INDEX IF EXISTS ix_historico_ocupacao_tipo_leito;
+
+-- Estado atual por unidade/tipo de leito (mesmo esquema do modelo OcupacaoAtual)
+CREATE TABLE IF NOT EXISTS ocupacao_atual (
+    unidade_id VARCHAR NOT NULL,
+    tipo_leito VARCHAR NOT NULL,
+    historico_id INTEGER,
+    unidade_nome VARCHAR,
+    ocupacao_percentual FLOAT,
+    leitos_totais INTEGER,
+    leitos_ocupados INTEGER,
+    leitos_disponiveis INTEGER,
+    data_coleta TIMESTAMP,
+    fonte_dados VARCHAR,
+    atualizado_em TIMESTAMP,
+    PRIMARY KEY (unidade_id, tipo_leito)
+);
+
+CREATE INDEX IF NOT EXISTS ix_ocupacao_atual_data_coleta ON ocupacao_atual (data_coleta);
+
+-- Preencher com a leitura mais recente de cada unidade/tipo de leito (sem voltar o estado no tempo)
+INSERT INTO ocupacao_atual (
+    unidade_id, tipo_leito, historico_id, unidade_nome, ocupacao_percentual, leitos_totais,
+    leitos_ocupados, leitos_disponiveis, data_coleta, fonte_dados, atualizado_em
+)
+SELECT DISTINCT ON (unidade_id, tipo_leito)
+    unidade_id, tipo_leito, id, unidade_nome, ocupacao_percentual, leitos_totais,
+    leitos_ocupados, leitos_disponiveis, data_coleta, fonte_dados, NOW() AT TIME ZONE 'UTC'
+FROM historico_ocupacao
+WHERE unidade_id IS NOT NULL AND tipo_leito IS NOT NULL
+ORDER BY unidade_id, tipo_leito, data_coleta DESC, id DESC
+ON CONFLICT (unidade_id, tipo_leito) DO UPDATE SET
+    historico_id = EXCLUDED.historico_id,
+    unidade_nome = EXCLUDED.unidade_nome,
+    ocupacao_percentual = EXCLUDED.ocupacao_percentual,
+    leitos_totais = EXCLUDED.leitos_totais,
+    leitos_ocupados = EXCLUDED.leitos_ocupados,
+    leitos_disponiveis = EXCLUDED.leitos_disponiveis,
+    data_coleta = EXCLUDED.data_coleta,
+    fonte_dados = EXCLUDED.fonte_dados,
+    atualizado_em = EXCLUDED.atualizado_em
+WHERE ocupacao_atual.data_coleta IS NULL OR ocupacao_atual.data_coleta <= EXCLUDED.data_coleta;
+
+-- Verificar resultado
+SELECT (SELECT COUNT(*) FROM ocupacao_atual) as series_estado_atual,
+       (SELECT COUNT(DISTINCT (unidade_id, tipo_leito)) FROM historico_ocupacao) as series_historico;
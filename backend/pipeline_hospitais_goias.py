@@ -6,27 +6,171 @@ Preparado para integracao com Llama 3 e outros LLMs (RAG - Retrieval-Augmented G
 """
 
 from typing import Dict, List, Optional, Tuple, Any
+import os
+import sys
 import logging
 import json
 from datetime import datetime
 
+# Contextos RAG em cache (por versão do catálogo e da ocupação); LRU limitado
+CONTEXTO_RAG_CACHE_MAX = int(os.getenv("CONTEXTO_RAG_CACHE_MAX", "512"))
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microservices', 'shared'))
+from indice_cid10 import indice_cid10
+from catalogo_hospitais import catalogo_hospitais, SnapshotCatalogoHospitais
+from cache_lru import CacheLRU
+from snapshot_ocupacao import painel_ocupacao, SnapshotOcupacao, termo_capacidade, score_disponibilidade
+
 logger = logging.getLogger(__name__)
 
+# Critérios de exclusão do catálogo -> regra (tipo_caso, idade, sexo) que exclui o hospital.
+# Só podem depender da idade e do sexo pelo perfil demográfico do índice de elegibilidade
+# (IndiceElegibilidadeHospitais.PERFIS). Critérios sem regra (DOR_CRONICA,
+# CONSULTA_AMBULATORIAL) vão apenas para as restrições das fichas do RAG.
+REGRAS_EXCLUSAO = {
+    "CASOS_ELETIVOS": lambda tipo_caso, idade, sexo: tipo_caso == "ORTOPEDIA_ELETIVA",
+    "BAIXA_COMPLEXIDADE": lambda tipo_caso, idade, sexo: tipo_caso == "CLINICO_GERAL",
+    "ADULTOS_MASCULINOS": lambda tipo_caso, idade, sexo: sexo == "MASCULINO" and (idade is None or idade > 15),
+    # Gestação só é conhecida pelo tipo de caso: fora de obstetrícia e pediatria, exclui
+    "MULHERES_NAO_GRAVIDAS_ACIMA_15": lambda tipo_caso, idade, sexo: tipo_caso not in ("OBSTETRICIA", "PEDIATRIA"),
+    "NAO_INFECCIOSO": lambda tipo_caso, idade, sexo: tipo_caso != "INFECTOLOGIA",
+}
+
 
 class HospitalGoias:
     """Classe para representar um hospital com suas especialidades"""
     
     def __init__(self, nome: str, cidade: str, tipo: str, especialidades: List[str], 
-                 capacidade: str, observacoes: str = ""):
+                 capacidade: str, observacoes: str = "", sigla: str = None,
+                 restricoes: List[str] = ()):
         self.nome = nome
         self.cidade = cidade
         self.tipo = tipo  # REFERENCIA, REGIONAL, ESPECIALIZADO
         self.especialidades = especialidades
         self.capacidade = capacidade  # ALTA, MEDIA, BAIXA
         self.observacoes = observacoes
+        self.sigla = sigla  # sigla do catálogo
+        self.restricoes = frozenset(restricoes)  # critérios de exclusão do catálogo (REGRAS_EXCLUSAO)
         self.score_disponibilidade = 10  # Simulado - em producao viria de API real
 
 
+class IndiceElegibilidadeHospitais:
+    """
+    Índice de elegibilidade montado uma vez por catálogo de hospitais
+
+    Cada especialidade vira um bitset de hospitais (bit i = i-ésimo hospital do
+    catálogo) e cada tipo de caso guarda a máscara de hospitais permitidos e a
+    ordem pré-ranqueada pelo score estático (tipo, capacidade, bônus e
+    penalidades do tipo de caso). A seleção passa a ser OR/AND de inteiros e
+    um re-ranqueamento O(k) só com os fatores dinâmicos (especialidades em comum
+    e termo de capacidade do snapshot de ocupação).
+    """
+
+    # Tipos de caso de _classificar_tipo_caso; outros são montados sob demanda
+    TIPOS_CASO = ("TRAUMA", "EMERGENCIA", "OBSTETRICIA", "PEDIATRIA", "INFECTOLOGIA",
+                  "ORTOPEDIA_ELETIVA", "CLINICO_GERAL")
+
+    # Perfis demográficos -> (idade, sexo) representativos para os critérios de exclusão
+    PERFIS = {None: (None, None), "ADULTO_MASCULINO": (None, "MASCULINO")}
+
+    def __init__(self, pipeline: 'PipelineHospitaisGoias', hospitais: List[HospitalGoias]):
+        self._pipeline = pipeline
+        self.hospitais = tuple(hospitais)
+        self.especialidades_por_hospital = tuple(frozenset(h.especialidades) for h in self.hospitais)
+
+        self.por_especialidade: Dict[str, int] = {}
+        for i, especialidades in enumerate(self.especialidades_por_hospital):
+            for esp in especialidades:
+                self.por_especialidade[esp] = self.por_especialidade.get(esp, 0) | (1 << i)
+
+        self._por_tipo_caso: Dict[str, Dict[str, Any]] = {}
+        for tipo_caso in self.TIPOS_CASO:
+            self._entrada_tipo_caso(tipo_caso)
+        
+        # (snapshot, termos por hospital, maior termo) do último snapshot de ocupação visto
+        self._capacidade: Optional[Tuple[SnapshotOcupacao, Tuple[int, ...], int]] = None
+
+    @staticmethod
+    def perfil_demografico(idade: int = None, sexo: str = None) -> Optional[str]:
+        if sexo == "MASCULINO" and (idade is None or idade > 15):
+            return "ADULTO_MASCULINO"
+        return None
+
+    def _entrada_tipo_caso(self, tipo_caso: str) -> Dict[str, Any]:
+        entrada = self._por_tipo_caso.get(tipo_caso)
+        if entrada is None:
+            permitidos = {}
+            for perfil, (idade, sexo) in self.PERFIS.items():
+                mascara = 0
+                for i, hospital in enumerate(self.hospitais):
+                    if not self._pipeline._aplicar_criterios_exclusao(hospital, tipo_caso, idade, sexo):
+                        mascara |= 1 << i
+                permitidos[perfil] = mascara
+
+            scores = tuple(self._pipeline._score_estatico(h, tipo_caso) for h in self.hospitais)
+            entrada = {
+                "permitidos": permitidos,
+                "scores": scores,
+                # Empate: ordem do catálogo (mesmo critério do ranqueamento original)
+                "ordem": tuple(sorted(range(len(self.hospitais)), key=lambda i: (-scores[i], i)))
+            }
+            self._por_tipo_caso[tipo_caso] = entrada
+        return entrada
+
+    def candidatos(self, especialidades: List[str], tipo_caso: str,
+                   idade: int = None, sexo: str = None) -> List[int]:
+        """Índices dos hospitais elegíveis, em ordem decrescente de score estático"""
+        mascara = 0
+        for esp in especialidades:
+            mascara |= self.por_especialidade.get(esp, 0)
+        entrada = self._entrada_tipo_caso(tipo_caso)
+        mascara &= entrada["permitidos"][self.perfil_demografico(idade, sexo)]
+        return [i for i in entrada["ordem"] if mascara >> i & 1]
+
+    def termos_capacidade(self, ocupacao: Optional[SnapshotOcupacao]) -> Tuple[Optional[Tuple[int, ...]], int]:
+        """(termo de capacidade por hospital, maior termo), calculados uma vez por snapshot de ocupação"""
+        if ocupacao is None:
+            return None, 0
+        cache = self._capacidade
+        if cache is None or cache[0] is not ocupacao:
+            termos = tuple(termo_capacidade(ocupacao.buscar(h.nome)) for h in self.hospitais)
+            cache = (ocupacao, termos, max(termos, default=0))
+            self._capacidade = cache
+        return cache[1], cache[2]
+
+    def melhor(self, candidatos: List[int], especialidades: List[str], tipo_caso: str,
+               ocupacao: Optional[SnapshotOcupacao] = None) -> Optional[HospitalGoias]:
+        """
+        Re-ranqueia os candidatos com os fatores dinâmicos: +5 por especialidade em
+        comum e o termo de capacidade da ocupação atual (0 sem snapshot)
+
+        Como os candidatos vêm ordenados pelo score estático e o bônus dinâmico é
+        limitado (especialidades + maior termo de capacidade do snapshot), a
+        varredura para assim que nenhum candidato restante pode vencer. A
+        elegibilidade (score > 0) não depende da ocupação: um hospital lotado
+        perde posições, mas não é trocado pelo fallback geral.
+        """
+        scores = self._entrada_tipo_caso(tipo_caso)["scores"]
+        requeridas = frozenset(especialidades)
+        termos, termo_maximo = self.termos_capacidade(ocupacao)
+        bonus_maximo = 5 * len(requeridas) + termo_maximo
+
+        melhor_indice = None
+        melhor_score = 0
+        for i in candidatos:
+            if melhor_indice is not None and scores[i] + bonus_maximo < melhor_score:
+                break
+            score = scores[i] + 5 * len(requeridas & self.especialidades_por_hospital[i])
+            if score <= 0:
+                continue
+            if termos is not None:
+                score += termos[i]
+            if melhor_indice is None or score > melhor_score or (score == melhor_score and i < melhor_indice):
+                melhor_score = score
+                melhor_indice = i
+        return self.hospitais[melhor_indice] if melhor_indice is not None else None
+
+
 class PipelineDecisaoRegulacao:
     """
     Extensão do Pipeline para servir de base de conhecimento (RAG Ready)
@@ -35,8 +179,24 @@ class PipelineDecisaoRegulacao:
     
     def __init__(self, pipeline_hospitais: 'PipelineHospitaisGoias'):
         self.pipeline = pipeline_hospitais
-        self.contexto_cache = {}
+        self.contexto_cache = CacheLRU(max_itens=CONTEXTO_RAG_CACHE_MAX, nome="contexto_rag")
+        self.fichas: Dict[str, Dict[str, Any]] = {}
+        catalogo_hospitais.assinar(self._preparar_catalogo)
+    
+    def _preparar_catalogo(self, snapshot: SnapshotCatalogoHospitais):
+        """Pré-monta as fichas dos hospitais da nova versão do catálogo"""
+        criterios_exclusao = self.pipeline._definir_criterios_exclusao(snapshot)
+        fichas = {
+            hospital.nome: self._montar_ficha(hospital, criterios_exclusao)
+            for hospital in self.pipeline._carregar_hospitais_goias(snapshot)
+        }
+        
+        def publicar():
+            self.fichas = fichas
+            self.contexto_cache.limpar()  # chaves da versão anterior não seriam mais consultadas
         
+        return publicar
+    
     def formatar_para_ia(self, hospital: HospitalGoias) -> Dict[str, Any]:
         """
         Transforma o objeto Hospital em uma 'ficha técnica' estruturada para o LLM
@@ -44,13 +204,32 @@ class PipelineDecisaoRegulacao:
         Returns:
             Dict com informações estruturadas do hospital para prompt injection
         """
+        ficha = self.fichas.get(hospital.nome)
+        if ficha is None:
+            ficha = self._montar_ficha(hospital, self.pipeline.criterios_exclusao)
+        ficha = dict(ficha)
+        
+        # Disponibilidade real quando há snapshot de ocupação (contextos em cache por versao_ocupacao)
+        ocupacao = self.pipeline.ocupacao.buscar(hospital.nome) if self.pipeline.ocupacao else None
+        if ocupacao:
+            ficha["score_disponibilidade"] = score_disponibilidade(ocupacao, hospital.score_disponibilidade)
+            ficha["ocupacao_atual"] = {
+                "taxa_ocupacao": ocupacao.taxa_ocupacao,
+                "leitos_disponiveis": ocupacao.leitos_disponiveis,
+                "tendencia": ocupacao.tendencia,
+                "alerta_saturacao": ocupacao.alerta_saturacao,
+                "previsao_saturacao_min": ocupacao.previsao_saturacao_min
+            }
+        return ficha
+    
+    def _montar_ficha(self, hospital: HospitalGoias, criterios_exclusao: Dict[str, List[str]]) -> Dict[str, Any]:
         return {
             "hospital": hospital.nome,
             "cidade": hospital.cidade,
             "perfil_clinico": hospital.tipo,
             "nivel_complexidade": hospital.capacidade,
             "especialidades_disponiveis": hospital.especialidades,
-            "restricoes_severas": self.pipeline.criterios_exclusao.get(hospital.nome, []),
+            "restricoes_severas": criterios_exclusao.get(hospital.nome, []),
             "score_disponibilidade": hospital.score_disponibilidade,
             "observacoes_clinicas": hospital.observacoes,
             "adequacao_casos": self._gerar_adequacao_casos(hospital)
@@ -60,10 +239,12 @@ class PipelineDecisaoRegulacao:
         """Gera descrição de adequação para diferentes tipos de casos"""
         adequacao = {}
         
+        referencia = self.pipeline.REFERENCIA_TIPO_CASO
+        
         # Casos de trauma
         if "TRAUMATOLOGIA" in hospital.especialidades:
             adequacao["trauma"] = "Adequado para casos de trauma e urgência"
-        elif hospital.nome == "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
+        elif hospital.sigla == referencia["TRAUMA"]:
             adequacao["trauma"] = "ESPECIALIZADO em trauma - PRIMEIRA ESCOLHA para emergências traumáticas"
         
         # Casos cardiológicos
@@ -81,18 +262,18 @@ class PipelineDecisaoRegulacao:
                 adequacao["neurologia"] = "Neurologia clínica disponível"
         
         # Casos ortopédicos NÃO traumáticos
-        if "ORTOPEDIA" in hospital.especialidades and hospital.nome != "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
+        if "ORTOPEDIA" in hospital.especialidades and "CASOS_ELETIVOS" not in hospital.restricoes:
             adequacao["ortopedia_eletiva"] = "Adequado para casos ortopédicos eletivos (dor lombar, artrose, etc.)"
         
         # Casos obstétricos
         if "OBSTETRICIA" in hospital.especialidades:
-            if hospital.nome == "HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO":
+            if hospital.sigla == referencia["OBSTETRICIA"]:
                 adequacao["obstetricia"] = "ESPECIALIZADO materno-infantil - PRIMEIRA ESCOLHA para gestantes"
             else:
                 adequacao["obstetricia"] = "Obstetrícia disponível"
         
         # Casos infecciosos
-        if hospital.nome == "HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT":
+        if hospital.sigla == referencia["INFECTOLOGIA"]:
             adequacao["infectologia"] = "ESPECIALIZADO em doenças infecciosas e tropicais - ÚNICA OPÇÃO para casos infecciosos complexos"
         
         return adequacao
@@ -111,10 +292,13 @@ class PipelineDecisaoRegulacao:
             JSON string formatado para prompt injection no LLM
         """
         
-        # Cache key para otimização
-        cache_key = f"{especialidade_requerida}_{cid}_{tipo_caso}"
-        if cache_key in self.contexto_cache:
-            return self.contexto_cache[cache_key]
+        # Cache por versão do catálogo e da ocupação: uma nova versão de qualquer
+        # um dos dois gera chaves novas e o contexto antigo nunca é servido
+        cache_key = (self.pipeline.versao_catalogo, self.pipeline.versao_ocupacao,
+                     especialidade_requerida, cid, tipo_caso)
+        resultado = self.contexto_cache.obter(cache_key)
+        if resultado is not None:
+            return resultado
         
         # Busca hospitais que possuem a especialidade
         filtrados = []
@@ -150,7 +334,7 @@ class PipelineDecisaoRegulacao:
         resultado = json.dumps(contexto_completo, indent=2, ensure_ascii=False)
         
         # Cache do resultado
-        self.contexto_cache[cache_key] = resultado
+        self.contexto_cache.definir(cache_key, resultado)
         
         return resultado
     
@@ -174,7 +358,10 @@ class PipelineDecisaoRegulacao:
     
     def _ordenar_por_adequacao(self, hospitais: List[HospitalGoias], 
                               especialidade: str, cid: str, tipo_caso: str) -> List[HospitalGoias]:
-        """Ordena hospitais por adequação ao caso específico"""
+        """Ordena hospitais por adequação ao caso específico (e capacidade, se houver ocupação)"""
+        
+        ocupacao = self.pipeline.ocupacao
+        referencia = self.pipeline.REFERENCIA_TIPO_CASO.get(tipo_caso)
         
         def calcular_score_adequacao(hospital: HospitalGoias) -> int:
             score = 0
@@ -201,28 +388,26 @@ class PipelineDecisaoRegulacao:
             if tipo_caso == "TRAUMA":
                 if "TRAUMATOLOGIA" in hospital.especialidades:
                     score += 25
-                if hospital.nome == "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
-                    score += 30  # HUGO é THE BEST para trauma
             
             elif tipo_caso == "ORTOPEDIA_ELETIVA":
-                if hospital.nome == "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
+                if "CASOS_ELETIVOS" in hospital.restricoes:
                     score -= 50  # HUGO NÃO atende eletivo
                 elif "ORTOPEDIA" in hospital.especialidades:
                     score += 20
             
-            elif tipo_caso == "OBSTETRICIA":
-                if hospital.nome == "HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO":
-                    score += 30  # Materno-infantil é THE BEST
-            
-            elif tipo_caso == "INFECTOLOGIA":
-                if hospital.nome == "HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT":
-                    score += 30  # HDT é THE BEST para infecção
+            # Hospital de referência do tipo de caso (HUGO, Materno-infantil, HDT)
+            if referencia is not None and hospital.sigla == referencia:
+                score += 30
             
             # Penalidades por CID específicos
             if cid and cid.startswith("M54"):  # Dor lombar
-                if hospital.nome == "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
+                if "DOR_CRONICA" in hospital.restricoes:
                     score -= 100  # NUNCA mandar dor lombar para HUGO
             
+            # Ocupação atual e prevista (0 sem snapshot de ocupação)
+            if ocupacao is not None:
+                score += termo_capacidade(ocupacao.buscar(hospital.nome))
+            
             return score
         
         return sorted(hospitais, key=calcular_score_adequacao, reverse=True)
@@ -328,51 +513,9 @@ Com base nos dados do paciente e no contexto de hospitais disponíveis, selecion
         if not cid:
             return "CLINICO_GERAL"
         
-        # Casos de trauma (códigos S e T)
-        if any(cid.startswith(trauma) for trauma in ["S0", "S1", "S2", "S3", "S4", "S5", "S6", "S7", "S8", "S9", "T0"]):
-            return "TRAUMA"
-        
-        # Casos de emergência cardiológica
-        if cid.startswith(("I21", "I46", "I20", "I50")):
-            return "EMERGENCIA_CARDIOLOGICA"
-        
-        # Casos de emergência neurológica
-        if cid.startswith(("I61", "I63", "G93", "S06")):
-            return "EMERGENCIA_NEUROLOGICA"
-        
-        # Casos obstétricos
-        if cid.startswith("O"):
-            return "OBSTETRICIA"
-        
-        # Casos pediátricos
-        if cid.startswith("P"):
-            return "PEDIATRIA"
-        
-        # Casos infecciosos
-        if cid.startswith(("A", "B")):
-            return "INFECTOLOGIA"
-        
-        # Casos ortopédicos não traumáticos (M - musculoesquelético)
-        if cid.startswith("M"):
-            # Verificar se há menção de trauma nos sintomas
-            if any(palavra in sintomas.lower() for palavra in ["trauma", "acidente", "queda", "fratura"]):
-                return "TRAUMA"
-            else:
-                return "ORTOPEDIA_ELETIVA"
-        
-        # Casos respiratórios
-        if cid.startswith("J"):
-            return "PNEUMOLOGIA"
-        
-        # Casos renais
-        if cid.startswith("N"):
-            return "NEFROLOGIA"
-        
-        # Casos cirúrgicos gerais
-        if cid.startswith("K"):
-            return "CIRURGIA_GERAL"
-        
-        return "CLINICO_GERAL"
+        # Índice CID-10: tipo do prefixo mais longo (trauma S/T0, emergências, capítulos O/P/A-B/M/J/N/K)
+        trauma_nos_sintomas = any(palavra in (sintomas or "").lower() for palavra in ["trauma", "acidente", "queda", "fratura"])
+        return indice_cid10.tipo_caso(cid, trauma_nos_sintomas, rag=True)
     
     def processar_resposta_llm(self, resposta_llm: str) -> Dict[str, Any]:
         """
@@ -407,7 +550,7 @@ Com base nos dados do paciente e no contexto de hospitais disponíveis, selecion
             
             if not hospital_valido:
                 logger.warning(f"Hospital '{hospital_escolhido}' não encontrado na base. Usando fallback.")
-                resposta["hospital_escolhido"] = "HOSPITAL ESTADUAL DR ALBERTO RASSI HGG"
+                resposta["hospital_escolhido"] = self.pipeline.hospital_fallback
                 resposta["justificativa_tecnica"] += " [FALLBACK: Hospital original não encontrado]"
             
             # Adicionar metadados
@@ -422,7 +565,7 @@ Com base nos dados do paciente e no contexto de hospitais disponíveis, selecion
             
             # Fallback em caso de erro
             return {
-                "hospital_escolhido": "HOSPITAL ESTADUAL DR ALBERTO RASSI HGG",
+                "hospital_escolhido": self.pipeline.hospital_fallback,
                 "justificativa_tecnica": f"Erro no processamento da resposta do LLM: {str(e)}. Usando hospital de referência como fallback.",
                 "score_adequacao": 5,
                 "tipo_transporte": "USB",
@@ -438,264 +581,98 @@ Com base nos dados do paciente e no contexto de hospitais disponíveis, selecion
 class PipelineHospitaisGoias:
     """Pipeline inteligente para seleção de hospitais em Goiás"""
     
+    PIPELINE_CATALOGO = "regulacao"
+    
+    # Hospital de referência (sigla do catálogo) por tipo de caso
+    REFERENCIA_TIPO_CASO = {"TRAUMA": "HUGO", "OBSTETRICIA": "MATERNO_INFANTIL", "INFECTOLOGIA": "HDT"}
+    
+    # Hospital geral quando nenhum específico é elegível
+    SIGLA_FALLBACK = "HGG"
+    
     def __init__(self):
-        self.hospitais = self._carregar_hospitais_goias()
-        self.mapeamento_cid_especialidade = self._criar_mapeamento_cid()
-        self.criterios_exclusao = self._definir_criterios_exclusao()
+        # Hospitais, critérios e índice de elegibilidade vêm do catálogo e são
+        # remontados (fora do caminho da requisição) a cada nova versão dele
+        self.versao_catalogo = None
+        # Snapshot de ocupação refletido nos scores (None: sem dados de ocupação ou snapshot expirado)
+        self._ocupacao: Optional[SnapshotOcupacao] = None
+        catalogo_hospitais.assinar(self._preparar_catalogo)
+        painel_ocupacao.assinar(self._publicar_ocupacao)
+    
+    def _preparar_catalogo(self, snapshot: SnapshotCatalogoHospitais):
+        """Monta hospitais, critérios e índice da nova versão; a publicação é uma troca de referências"""
+        hospitais = self._carregar_hospitais_goias(snapshot)
+        criterios_exclusao = self._definir_criterios_exclusao(snapshot)
+        indice = IndiceElegibilidadeHospitais(self, hospitais)
+        fallback = snapshot.buscar(self.SIGLA_FALLBACK)
+        
+        def publicar():
+            self.criterios_exclusao = criterios_exclusao
+            self.hospital_fallback = fallback.nome if fallback else self.SIGLA_FALLBACK
+            self._hospitais = hospitais
+            self.indice_elegibilidade = indice
+            self.versao_catalogo = snapshot.versao
+            logger.info(f"✅ Índice de elegibilidade: {len(indice.hospitais)} hospitais, "
+                        f"{len(indice.por_especialidade)} especialidades (catálogo v{snapshot.versao})")
+        
+        return publicar
+    
+    def _publicar_ocupacao(self, snapshot: SnapshotOcupacao):
+        """Novo snapshot de ocupação: os termos de capacidade são calculados no primeiro uso"""
+        self._ocupacao = snapshot
+    
+    @property
+    def ocupacao(self) -> Optional[SnapshotOcupacao]:
+        """Último snapshot publicado, ou None se expirou (OCUPACAO_IDADE_MAXIMA_S)"""
+        if self._ocupacao is None or painel_ocupacao.expirado():
+            return None
+        return self._ocupacao
+    
+    @property
+    def versao_ocupacao(self) -> Optional[str]:
+        ocupacao = self.ocupacao
+        return ocupacao.versao if ocupacao else None
     
-    def _carregar_hospitais_goias(self) -> List[HospitalGoias]:
-        """Carrega todos os hospitais de grande complexidade de Goiás com dados reais"""
+    @property
+    def hospitais(self) -> List[HospitalGoias]:
+        return self._hospitais
+    
+    @hospitais.setter
+    def hospitais(self, hospitais: List[HospitalGoias]):
+        """Trocar o catálogo reconstrói o índice de elegibilidade"""
+        self._hospitais = list(hospitais)
+        self.reconstruir_indice()
+    
+    def reconstruir_indice(self):
+        """Remonta o índice de elegibilidade (chamar após alterar hospitais ou critérios no lugar)"""
+        indice = IndiceElegibilidadeHospitais(self, self._hospitais)
+        self.indice_elegibilidade = indice  # troca atômica: leitores concorrentes veem o antigo ou o novo
+        logger.info(f"✅ Índice de elegibilidade: {len(indice.hospitais)} hospitais, "
+                    f"{len(indice.por_especialidade)} especialidades")
+    
+    def _carregar_hospitais_goias(self, snapshot: SnapshotCatalogoHospitais = None) -> List[HospitalGoias]:
+        """Hospitais de grande complexidade de Goiás do catálogo (perfil 'regulacao')"""
         
+        snapshot = snapshot or catalogo_hospitais.obter()
+        criterios_exclusao = snapshot.criterios_exclusao(self.PIPELINE_CATALOGO)
         return [
-            # === HOSPITAIS DE REFERÊNCIA ESTADUAL ===
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DR ALBERTO RASSI HGG",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "CARDIOLOGIA", "CARDIOLOGIA_INTERVENCIONISTA", "HEMODINAMICA",
-                    "CIRURGIA_CARDIOVASCULAR", "UTI_CARDIOLOGICA", "MARCAPASSO",
-                    "NEUROLOGIA", "NEUROCIRURGIA", "AVC", "EPILEPSIA",
-                    "CIRURGIA_GERAL", "CIRURGIA_VASCULAR", "ANGIOLOGIA",
-                    "NEFROLOGIA", "HEMODIALISE", "TRANSPLANTE_RENAL",
-                    "ENDOCRINOLOGIA", "DIABETES", "TIREOIDE",
-                    "CLINICA_MEDICA", "GERIATRIA", "UTI_GERAL"
-                ],
-                capacidade="ALTA",
-                observacoes="Principal hospital de referência. Cardiologia e neurologia 24h. Transplantes."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "TRAUMATOLOGIA", "ORTOPEDIA_TRAUMA", "NEUROCIRURGIA_TRAUMA",
-                    "CIRURGIA_GERAL_URGENCIA", "CIRURGIA_VASCULAR_URGENCIA",
-                    "QUEIMADOS", "UTI_TRAUMA", "POLITRAUMATISMO",
-                    "EMERGENCIA_GERAL", "TOXICOLOGIA", "PSIQUIATRIA_URGENCIA"
-                ],
-                capacidade="ALTA",
-                observacoes="ESPECIALIZADO EM TRAUMA E URGÊNCIA. NÃO para casos eletivos ou baixa complexidade."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE ANAPOLIS DR HENRIQUE SANTILLO",
-                cidade="ANAPOLIS",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "CARDIOLOGIA", "HEMODINAMICA", "CIRURGIA_CARDIOVASCULAR",
-                    "NEUROLOGIA", "NEUROCIRURGIA", "AVC",
-                    "ORTOPEDIA", "TRAUMATOLOGIA", "CIRURGIA_ORTOPEDICA",
-                    "NEFROLOGIA", "HEMODIALISE", "TRANSPLANTE_RENAL",
-                    "ONCOLOGIA", "QUIMIOTERAPIA", "RADIOTERAPIA",
-                    "CIRURGIA_GERAL", "CIRURGIA_ONCOLOGICA",
-                    "CLINICA_MEDICA", "UTI_GERAL", "UTI_CARDIOLOGICA"
-                ],
-                capacidade="ALTA",
-                observacoes="Referência regional. Oncologia e transplantes. Atende região metropolitana."
-            ),
-            
-            # === HOSPITAIS ESPECIALIZADOS ===
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO",
-                cidade="GOIANIA",
-                tipo="ESPECIALIZADO",
-                especialidades=[
-                    "OBSTETRICIA", "GINECOLOGIA", "NEONATOLOGIA", "UTI_NEONATAL",
-                    "PEDIATRIA", "UTI_PEDIATRICA", "CIRURGIA_PEDIATRICA",
-                    "CARDIOLOGIA_PEDIATRICA", "NEUROLOGIA_PEDIATRICA",
-                    "ALTO_RISCO_OBSTETRICO", "PREMATUROS"
-                ],
-                capacidade="ALTA",
-                observacoes="EXCLUSIVO materno-infantil. Não atende adultos."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT",
-                cidade="GOIANIA",
-                tipo="ESPECIALIZADO",
-                especialidades=[
-                    "INFECTOLOGIA", "DOENCAS_TROPICAIS", "HIV_AIDS",
-                    "HEPATITES", "TUBERCULOSE", "HANSENIASE",
-                    "MALARIA", "DENGUE", "CHIKUNGUNYA", "ZIKA",
-                    "UTI_INFECTOLOGIA"
-                ],
-                capacidade="MEDIA",
-                observacoes="ESPECIALIZADO em doenças infecciosas e tropicais."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL DE URGENCIAS DA REGIAO NOROESTE HURN",
-                cidade="CERES",
-                tipo="REGIONAL",
-                especialidades=[
-                    "EMERGENCIA_GERAL", "CLINICA_MEDICA", "CIRURGIA_GERAL",
-                    "ORTOPEDIA", "TRAUMATOLOGIA", "PEDIATRIA",
-                    "OBSTETRICIA", "GINECOLOGIA", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região noroeste de Goiás."
-            ),
-            
-            # === HOSPITAIS REGIONAIS ===
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE FORMOSA DR CESAR SAAD FAYAD",
-                cidade="FORMOSA",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA",
-                    "CARDIOLOGIA", "NEUROLOGIA", "NEFROLOGIA",
-                    "PEDIATRIA", "OBSTETRICIA", "GINECOLOGIA",
-                    "UTI_GERAL", "EMERGENCIA_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região nordeste de Goiás e entorno do DF."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DO CENTRO NORTE GOIANO",
-                cidade="URUACU",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA",
-                    "PEDIATRIA", "OBSTETRICIA", "GINECOLOGIA",
-                    "EMERGENCIA_GERAL", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região centro-norte de Goiás."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE JATAI",
-                cidade="JATAI",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA",
-                    "CARDIOLOGIA", "NEUROLOGIA", "PEDIATRIA",
-                    "OBSTETRICIA", "GINECOLOGIA", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região sudoeste de Goiás."
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE LUZIANIA",
-                cidade="LUZIANIA",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA",
-                    "PEDIATRIA", "OBSTETRICIA", "GINECOLOGIA",
-                    "EMERGENCIA_GERAL", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região sul de Goiás e entorno do DF."
-            ),
-            
-            # === HOSPITAIS MUNICIPAIS DE GRANDE PORTE ===
-            HospitalGoias(
-                nome="HOSPITAL MUNICIPAL DE APARECIDA DE GOIANIA",
-                cidade="APARECIDA_DE_GOIANIA",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA",
-                    "CARDIOLOGIA", "PEDIATRIA", "OBSTETRICIA",
-                    "EMERGENCIA_GERAL", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Atende região metropolitana de Goiânia."
-            ),
-            
             HospitalGoias(
-                nome="HOSPITAL MUNICIPAL DE MOZARLANDIA",
-                cidade="MOZARLANDIA",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA",
-                    "PEDIATRIA", "OBSTETRICIA", "EMERGENCIA_GERAL"
-                ],
-                capacidade="BAIXA",
-                observacoes="Hospital regional de menor porte."
+                nome=hospital.nome,
+                cidade=hospital.cidade,
+                tipo=perfil["tipo"],
+                especialidades=list(perfil["especialidades"]),
+                capacidade=perfil["capacidade"],
+                observacoes=perfil["observacoes"],
+                sigla=hospital.sigla,
+                restricoes=criterios_exclusao.get(hospital.nome, ())
             )
+            for hospital, perfil in snapshot.hospitais_do_pipeline(self.PIPELINE_CATALOGO)
         ]
     
-    def _criar_mapeamento_cid(self) -> Dict[str, List[str]]:
-        """Mapeia CIDs para especialidades necessárias"""
-        
-        return {
-            # === CARDIOLOGIA ===
-            "I21": ["CARDIOLOGIA", "CARDIOLOGIA_INTERVENCIONISTA", "HEMODINAMICA", "UTI_CARDIOLOGICA"],  # Infarto
-            "I20": ["CARDIOLOGIA", "HEMODINAMICA"],  # Angina
-            "I46": ["CARDIOLOGIA", "UTI_CARDIOLOGICA", "EMERGENCIA_GERAL"],  # Parada cardíaca
-            "I50": ["CARDIOLOGIA", "UTI_CARDIOLOGICA"],  # Insuficiência cardíaca
-            "I47": ["CARDIOLOGIA", "UTI_CARDIOLOGICA"],  # Taquicardia paroxística
-            
-            # === NEUROLOGIA/NEUROCIRURGIA ===
-            "I61": ["NEUROLOGIA", "NEUROCIRURGIA", "AVC", "UTI_GERAL"],  # AVC hemorrágico
-            "I63": ["NEUROLOGIA", "AVC", "UTI_GERAL"],  # AVC isquêmico
-            "G93": ["NEUROLOGIA", "NEUROCIRURGIA", "UTI_GERAL"],  # Lesão cerebral
-            "S06": ["NEUROCIRURGIA", "NEUROCIRURGIA_TRAUMA", "UTI_TRAUMA"],  # Traumatismo craniano
-            "G40": ["NEUROLOGIA", "EPILEPSIA"],  # Epilepsia
-            
-            # === TRAUMA/ORTOPEDIA ===
-            "S72": ["TRAUMATOLOGIA", "ORTOPEDIA_TRAUMA", "CIRURGIA_ORTOPEDICA"],  # Fratura fêmur
-            "S82": ["TRAUMATOLOGIA", "ORTOPEDIA_TRAUMA"],  # Fratura perna
-            "S42": ["ORTOPEDIA", "TRAUMATOLOGIA"],  # Fratura úmero
-            "T07": ["TRAUMATOLOGIA", "UTI_TRAUMA", "POLITRAUMATISMO"],  # Politraumatismo
-            
-            # === ORTOPEDIA ELETIVA (NÃO TRAUMA) ===
-            "M54": ["ORTOPEDIA", "CLINICA_MEDICA"],  # Dor lombar - NÃO É TRAUMA
-            "M79": ["ORTOPEDIA", "CLINICA_MEDICA"],  # Dor musculoesquelética - NÃO É TRAUMA
-            "M25": ["ORTOPEDIA"],  # Artropatias - NÃO É TRAUMA
-            "M17": ["ORTOPEDIA"],  # Artrose joelho - NÃO É TRAUMA
-            
-            # === CIRURGIA GERAL ===
-            "K35": ["CIRURGIA_GERAL", "CIRURGIA_GERAL_URGENCIA"],  # Apendicite
-            "K80": ["CIRURGIA_GERAL"],  # Colelitíase
-            "K92": ["CIRURGIA_GERAL", "CIRURGIA_GERAL_URGENCIA"],  # Hemorragia GI
-            
-            # === PNEUMOLOGIA/CLÍNICA ===
-            "J18": ["CLINICA_MEDICA", "UTI_GERAL"],  # Pneumonia
-            "J44": ["CLINICA_MEDICA", "UTI_GERAL"],  # DPOC
-            "J45": ["CLINICA_MEDICA"],  # Asma
-            
-            # === NEFROLOGIA ===
-            "N17": ["NEFROLOGIA", "HEMODIALISE", "UTI_GERAL"],  # Insuficiência renal aguda
-            "N18": ["NEFROLOGIA", "HEMODIALISE"],  # Insuficiência renal crônica
-            
-            # === INFECTOLOGIA ===
-            "A15": ["INFECTOLOGIA", "TUBERCULOSE"],  # Tuberculose
-            "B20": ["INFECTOLOGIA", "HIV_AIDS"],  # HIV
-            "A90": ["INFECTOLOGIA", "DENGUE"],  # Dengue
-            
-            # === OBSTETRÍCIA ===
-            "O80": ["OBSTETRICIA"],  # Parto normal
-            "O82": ["OBSTETRICIA", "CIRURGIA_GERAL"],  # Cesariana
-            "O14": ["OBSTETRICIA", "ALTO_RISCO_OBSTETRICO"],  # Pré-eclâmpsia
-            
-            # === PEDIATRIA ===
-            "P07": ["NEONATOLOGIA", "UTI_NEONATAL"],  # Prematuridade
-            "J20": ["PEDIATRIA"],  # Bronquiolite (quando em criança)
-        }
-    
-    def _definir_criterios_exclusao(self) -> Dict[str, List[str]]:
-        """Define critérios de exclusão para hospitais específicos"""
+    def _definir_criterios_exclusao(self, snapshot: SnapshotCatalogoHospitais = None) -> Dict[str, List[str]]:
+        """Critérios de exclusão por hospital, do catálogo"""
         
-        return {
-            "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO": [
-                "CASOS_ELETIVOS",  # Não atende casos eletivos
-                "BAIXA_COMPLEXIDADE",  # Não atende baixa complexidade
-                "DOR_CRONICA",  # Não atende dor crônica
-                "CONSULTA_AMBULATORIAL"  # Não é ambulatório
-            ],
-            "HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO": [
-                "ADULTOS_MASCULINOS",  # Não atende homens adultos
-                "MULHERES_NAO_GRAVIDAS_ACIMA_15"  # Só mulheres grávidas ou até 15 anos
-            ],
-            "HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT": [
-                "NAO_INFECCIOSO"  # Só doenças infecciosas
-            ]
-        }
+        snapshot = snapshot or catalogo_hospitais.obter()
+        return snapshot.criterios_exclusao(self.PIPELINE_CATALOGO)
     
     def selecionar_hospital_inteligente(self, cid: str, especialidade: str, sintomas: str, 
                                       idade: int = None, sexo: str = None, 
@@ -715,31 +692,26 @@ class PipelineHospitaisGoias:
         # 2. Classificar tipo de caso
         tipo_caso = self._classificar_tipo_caso(cid, sintomas, gravidade)
         
-        # 3. Filtrar hospitais adequados
-        hospitais_adequados = self._filtrar_hospitais_adequados(
-            especialidades_necessarias, tipo_caso, idade, sexo
-        )
+        # 3. Filtrar hospitais adequados (índice de elegibilidade, já em ordem de score estático)
+        indice = self.indice_elegibilidade
+        candidatos = indice.candidatos(especialidades_necessarias, tipo_caso, idade, sexo)
         
-        # 4. Ranquear por adequação
-        hospital_escolhido = self._ranquear_hospitais(hospitais_adequados, especialidades_necessarias, tipo_caso)
+        # 4. Ranquear por adequação e capacidade (re-ranqueamento O(k) dos candidatos)
+        ocupacao = self.ocupacao
+        hospital_escolhido = indice.melhor(candidatos, especialidades_necessarias, tipo_caso, ocupacao)
         
         if hospital_escolhido:
-            justificativa = self._gerar_justificativa(hospital_escolhido, especialidades_necessarias, tipo_caso)
+            justificativa = self._gerar_justificativa(hospital_escolhido, especialidades_necessarias, tipo_caso, ocupacao)
             return hospital_escolhido.nome, justificativa, 10
         else:
             # Fallback para hospital geral
-            return "HOSPITAL ESTADUAL DR ALBERTO RASSI HGG", "Hospital de referência geral - nenhum hospital específico identificado", 5
+            return self.hospital_fallback, "Hospital de referência geral - nenhum hospital específico identificado", 5
     
     def _identificar_especialidades(self, cid: str, especialidade: str, sintomas: str) -> List[str]:
         """Identifica especialidades necessárias baseado em CID e sintomas"""
         
-        especialidades = []
-        
-        # Buscar por CID
-        for cid_prefix, specs in self.mapeamento_cid_especialidade.items():
-            if cid.startswith(cid_prefix):
-                especialidades.extend(specs)
-                break
+        # Buscar por CID (prefixo mais longo - ver cid10_indice.json)
+        especialidades = indice_cid10.especialidades(cid)
         
         # Adicionar especialidade informada
         if especialidade:
@@ -759,79 +731,23 @@ class PipelineHospitaisGoias:
     def _classificar_tipo_caso(self, cid: str, sintomas: str, gravidade: str) -> str:
         """Classifica o tipo de caso"""
         
-        # Casos de trauma
-        if any(trauma_cid in cid for trauma_cid in ["S0", "S1", "S2", "S3", "S4", "S5", "S6", "S7", "S8", "S9", "T0"]):
-            return "TRAUMA"
-        
-        # Casos de emergência
-        emergencia_cids = ["I21", "I46", "I61", "I63", "N17", "K35"]
-        if any(cid.startswith(emerg) for emerg in emergencia_cids):
-            return "EMERGENCIA"
-        
-        # Casos obstétricos
-        if cid.startswith("O"):
-            return "OBSTETRICIA"
-        
-        # Casos pediátricos (seria melhor ter a idade)
-        if cid.startswith("P"):
-            return "PEDIATRIA"
-        
-        # Casos infecciosos
-        if cid.startswith("A") or cid.startswith("B"):
-            return "INFECTOLOGIA"
-        
-        # Casos ortopédicos não traumáticos
-        if cid.startswith("M") and "trauma" not in sintomas.lower():
-            return "ORTOPEDIA_ELETIVA"
-        
-        # Casos clínicos gerais
-        return "CLINICO_GERAL"
+        # Índice CID-10: trauma (S/T0) > emergência > capítulo; M com trauma nos sintomas não é eletivo
+        return indice_cid10.tipo_caso(cid, "trauma" in (sintomas or "").lower())
     
     def _filtrar_hospitais_adequados(self, especialidades: List[str], tipo_caso: str, 
                                    idade: int = None, sexo: str = None) -> List[HospitalGoias]:
         """Filtra hospitais que podem atender o caso"""
         
-        hospitais_adequados = []
-        
-        for hospital in self.hospitais:
-            # Verificar se tem as especialidades necessárias
-            tem_especialidade = any(esp in hospital.especialidades for esp in especialidades)
-            
-            if not tem_especialidade:
-                continue
-            
-            # Aplicar critérios de exclusão
-            if self._aplicar_criterios_exclusao(hospital, tipo_caso, idade, sexo):
-                continue
-            
-            hospitais_adequados.append(hospital)
-        
-        return hospitais_adequados
+        indice = self.indice_elegibilidade
+        return [indice.hospitais[i] for i in indice.candidatos(especialidades, tipo_caso, idade, sexo)]
     
     def _aplicar_criterios_exclusao(self, hospital: HospitalGoias, tipo_caso: str, 
                                   idade: int = None, sexo: str = None) -> bool:
-        """Retorna True se o hospital deve ser excluído"""
-        
-        exclusoes = self.criterios_exclusao.get(hospital.nome, [])
+        """Retorna True se o hospital deve ser excluído (critérios de exclusão do catálogo)"""
         
-        # HUGO: Não atende casos eletivos ou baixa complexidade
-        if hospital.nome == "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
-            if tipo_caso in ["ORTOPEDIA_ELETIVA", "CLINICO_GERAL"]:
-                return True  # EXCLUIR
-        
-        # Materno-infantil: Só mulheres e crianças
-        if hospital.nome == "HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO":
-            if sexo == "MASCULINO" and (idade is None or idade > 15):
-                return True  # EXCLUIR
-            if tipo_caso not in ["OBSTETRICIA", "PEDIATRIA"]:
-                return True  # EXCLUIR
-        
-        # HDT: Só doenças infecciosas
-        if hospital.nome == "HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT":
-            if tipo_caso != "INFECTOLOGIA":
-                return True  # EXCLUIR
-        
-        return False  # NÃO EXCLUIR
+        # HUGO: eletivos e baixa complexidade; Materno-infantil: só gestantes e crianças; HDT: só infecciosas
+        return any(REGRAS_EXCLUSAO[criterio](tipo_caso, idade, sexo)
+                   for criterio in hospital.restricoes if criterio in REGRAS_EXCLUSAO)
     
     def _ranquear_hospitais(self, hospitais: List[HospitalGoias], especialidades: List[str], 
                           tipo_caso: str) -> Optional[HospitalGoias]:
@@ -840,49 +756,65 @@ class PipelineHospitaisGoias:
         if not hospitais:
             return None
         
-        melhor_hospital = None
-        melhor_score = 0
+        indice = self.indice_elegibilidade
+        posicoes = {id(h): i for i, h in enumerate(indice.hospitais)}
+        if all(id(h) in posicoes for h in hospitais):
+            scores = indice._entrada_tipo_caso(tipo_caso)["scores"]
+            candidatos = sorted((posicoes[id(h)] for h in hospitais), key=lambda i: (-scores[i], i))
+            return indice.melhor(candidatos, especialidades, tipo_caso, self.ocupacao)
         
+        # Hospitais fora do catálogo indexado: ranqueamento direto
+        ocupacao = self.ocupacao
+        melhor_hospital = None
+        melhor_score = None
         for hospital in hospitais:
-            score = 0
-            
-            # Score por tipo de hospital
-            if hospital.tipo == "REFERENCIA":
-                score += 10
-            elif hospital.tipo == "ESPECIALIZADO":
-                score += 15  # Especializado é melhor para sua área
-            elif hospital.tipo == "REGIONAL":
-                score += 5
-            
-            # Score por capacidade
-            if hospital.capacidade == "ALTA":
-                score += 10
-            elif hospital.capacidade == "MEDIA":
-                score += 5
-            
-            # Score por especialidades específicas
-            especialidades_match = sum(1 for esp in especialidades if esp in hospital.especialidades)
-            score += especialidades_match * 5
-            
-            # Bonus para hospitais específicos por tipo de caso
-            if tipo_caso == "TRAUMA" and "TRAUMATOLOGIA" in hospital.especialidades:
-                score += 20
-            if tipo_caso == "EMERGENCIA" and hospital.tipo == "REFERENCIA":
-                score += 15
-            if tipo_caso == "OBSTETRICIA" and "OBSTETRICIA" in hospital.especialidades:
-                score += 20
-            
-            # Penalidade para casos inadequados
-            if tipo_caso == "ORTOPEDIA_ELETIVA" and hospital.nome == "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO":
-                score -= 50  # FORTE PENALIDADE
-            
-            if score > melhor_score:
+            score = self._score_estatico(hospital, tipo_caso)
+            score += sum(1 for esp in especialidades if esp in hospital.especialidades) * 5
+            if score <= 0:
+                continue
+            if ocupacao is not None:
+                score += termo_capacidade(ocupacao.buscar(hospital.nome))
+            if melhor_score is None or score > melhor_score:
                 melhor_score = score
                 melhor_hospital = hospital
         
         return melhor_hospital
     
-    def _gerar_justificativa(self, hospital: HospitalGoias, especialidades: List[str], tipo_caso: str) -> str:
+    def _score_estatico(self, hospital: HospitalGoias, tipo_caso: str) -> int:
+        """Parte do score que só depende do hospital e do tipo de caso (pré-calculada no índice)"""
+        
+        score = 0
+        
+        # Score por tipo de hospital
+        if hospital.tipo == "REFERENCIA":
+            score += 10
+        elif hospital.tipo == "ESPECIALIZADO":
+            score += 15  # Especializado é melhor para sua área
+        elif hospital.tipo == "REGIONAL":
+            score += 5
+        
+        # Score por capacidade
+        if hospital.capacidade == "ALTA":
+            score += 10
+        elif hospital.capacidade == "MEDIA":
+            score += 5
+        
+        # Bonus para hospitais específicos por tipo de caso
+        if tipo_caso == "TRAUMA" and "TRAUMATOLOGIA" in hospital.especialidades:
+            score += 20
+        if tipo_caso == "EMERGENCIA" and hospital.tipo == "REFERENCIA":
+            score += 15
+        if tipo_caso == "OBSTETRICIA" and "OBSTETRICIA" in hospital.especialidades:
+            score += 20
+        
+        # Penalidade para casos inadequados
+        if tipo_caso == "ORTOPEDIA_ELETIVA" and "CASOS_ELETIVOS" in hospital.restricoes:
+            score -= 50  # FORTE PENALIDADE
+        
+        return score
+    
+    def _gerar_justificativa(self, hospital: HospitalGoias, especialidades: List[str], tipo_caso: str,
+                            ocupacao: Optional[SnapshotOcupacao] = None) -> str:
         """Gera justificativa para a escolha do hospital"""
         
         justificativas = []
@@ -912,6 +844,14 @@ class PipelineHospitaisGoias:
         elif tipo_caso == "EMERGENCIA":
             justificativas.append("Preparado para emergências médicas")
         
+        # Ocupação atual (MS-Ingestao)
+        dados_ocupacao = ocupacao.buscar(hospital.nome) if ocupacao else None
+        if dados_ocupacao:
+            texto = f"Ocupação {dados_ocupacao.taxa_ocupacao:.0f}% (tendência {dados_ocupacao.tendencia})"
+            if dados_ocupacao.alerta_saturacao:
+                texto += " - próximo da saturação"
+            justificativas.append(texto)
+        
         return " | ".join(justificativas)
 
 # Instância global do pipeline
@@ -920,6 +860,10 @@ pipeline_hospitais = PipelineHospitaisGoias()
 # Instância global do pipeline RAG
 pipeline_rag = PipelineDecisaoRegulacao(pipeline_hospitais)
 
+def obter_metricas_contexto_rag() -> Dict[str, Any]:
+    """Acertos/faltas do cache de contextos RAG"""
+    return pipeline_rag.contexto_cache.metricas()
+
 def selecionar_hospital_goias(cid: str, especialidade: str, sintomas: str, 
                             idade: int = None, sexo: str = None, 
                             gravidade: str = "MODERADA") -> Tuple[str, str]:
@@ -5,10 +5,20 @@ Sistema de "peneira" inteligente para hierarquia do SUS:
 UPA -> Hospitais Regionais -> Hospitais de Referência (HGG, HUGO, HDT)
 """
 
+import os
+import sys
 import json
 from typing import Dict, List, Optional, Any
 import logging
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microservices', 'shared'))
+from catalogo_hospitais import catalogo_hospitais, SnapshotCatalogoHospitais
+from cache_lru import CacheLRU
+from snapshot_ocupacao import painel_ocupacao, SnapshotOcupacao, termo_capacidade, score_disponibilidade
+
+# Contextos de hospitais em cache (por versão do catálogo e da ocupação); LRU limitado
+CONTEXTO_RAG_CACHE_MAX = int(os.getenv("CONTEXTO_RAG_CACHE_MAX", "512"))
+
 logger = logging.getLogger(__name__)
 
 class HospitalGoias:
@@ -31,210 +41,94 @@ class PipelineDecisaoRegulacao:
     para o Llama 3 no processo de regulação médica
     """
     
+    PIPELINE_CATALOGO = "rag_sus"
+    
     def __init__(self):
-        self.hospitais = self._carregar_hospitais_goias()
-        self.criterios_exclusao = self._definir_criterios_exclusao()
+        # Hospitais, critérios e fichas vêm do catálogo (remontados a cada nova versão)
+        self.versao_catalogo = None
+        # Snapshot de ocupação refletido nas fichas e na ordenação (None: sem dados de ocupação ou snapshot expirado)
+        self._ocupacao: Optional[SnapshotOcupacao] = None
+        self.contexto_cache = CacheLRU(max_itens=CONTEXTO_RAG_CACHE_MAX, nome="contexto_rag_sus")
+        catalogo_hospitais.assinar(self._preparar_catalogo)
+        painel_ocupacao.assinar(self._publicar_ocupacao)
+    
+    def _preparar_catalogo(self, snapshot: SnapshotCatalogoHospitais):
+        """Monta hospitais, critérios e fichas da nova versão; a publicação é uma troca de referências"""
+        hospitais = self._carregar_hospitais_goias(snapshot)
+        criterios_exclusao = self._definir_criterios_exclusao(snapshot)
+        fichas = {h.nome: self._montar_ficha(h, criterios_exclusao) for h in hospitais}
+        
+        def publicar():
+            self.hospitais = hospitais
+            self.criterios_exclusao = criterios_exclusao
+            self.fichas = fichas
+            self.versao_catalogo = snapshot.versao
+            self.contexto_cache.limpar()  # chaves da versão anterior não seriam mais consultadas
+        
+        return publicar
+    
+    def _publicar_ocupacao(self, snapshot: SnapshotOcupacao):
+        """Novo snapshot de ocupação: contextos passam a usar chaves da nova versão"""
+        self._ocupacao = snapshot
+    
+    @property
+    def ocupacao(self) -> Optional[SnapshotOcupacao]:
+        """Último snapshot publicado, ou None se expirou (OCUPACAO_IDADE_MAXIMA_S)"""
+        if self._ocupacao is None or painel_ocupacao.expirado():
+            return None
+        return self._ocupacao
     
-    def _carregar_hospitais_goias(self) -> List[HospitalGoias]:
-        """Carrega hospitais com hierarquia SUS real de Goiás"""
+    @property
+    def versao_ocupacao(self) -> Optional[str]:
+        ocupacao = self.ocupacao
+        return ocupacao.versao if ocupacao else None
+    
+    def _carregar_hospitais_goias(self, snapshot: SnapshotCatalogoHospitais = None) -> List[HospitalGoias]:
+        """Hospitais com hierarquia SUS real de Goiás, do catálogo (perfil 'rag_sus')"""
         
+        snapshot = snapshot or catalogo_hospitais.obter()
         return [
-            # === NÍVEL 3: HOSPITAIS DE REFERÊNCIA ESTADUAL ===
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DR ALBERTO RASSI HGG",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "CARDIOLOGIA", "CARDIOLOGIA_INTERVENCIONISTA", "HEMODINAMICA",
-                    "NEUROLOGIA", "NEUROCIRURGIA", "AVC", "NEFROLOGIA", "HEMODIALISE",
-                    "TRANSPLANTE_RENAL", "ENDOCRINOLOGIA", "CIRURGIA_GERAL", "UTI_GERAL"
-                ],
-                capacidade="ALTA",
-                observacoes="Principal hospital de referência estadual. Cardiologia e neurologia 24h.",
-                nivel_sus=3
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "TRAUMATOLOGIA", "ORTOPEDIA_TRAUMA", "NEUROCIRURGIA_TRAUMA",
-                    "QUEIMADOS", "UTI_TRAUMA", "POLITRAUMATISMO", "EMERGENCIA_GERAL"
-                ],
-                capacidade="ALTA",
-                observacoes="EXCLUSIVO para trauma e urgência. NÃO atende casos eletivos.",
-                nivel_sus=3
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "INFECTOLOGIA", "DOENCAS_TROPICAIS", "HIV_AIDS", "TUBERCULOSE",
-                    "HEPATITES", "MALARIA", "DENGUE", "UTI_INFECTOLOGIA"
-                ],
-                capacidade="MEDIA",
-                observacoes="EXCLUSIVO para doenças infecciosas e tropicais.",
-                nivel_sus=3
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "OBSTETRICIA", "GINECOLOGIA", "NEONATOLOGIA", "UTI_NEONATAL",
-                    "PEDIATRIA", "UTI_PEDIATRICA", "ALTO_RISCO_OBSTETRICO"
-                ],
-                capacidade="ALTA",
-                observacoes="EXCLUSIVO materno-infantil. Não atende adultos masculinos.",
-                nivel_sus=3
-            ),
-            
-            # === NÍVEL 3: NOVOS HOSPITAIS DE REFERÊNCIA (DADOS REAIS) ===
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE ANAPOLIS DR HENRIQUE SANTILLO",
-                cidade="ANAPOLIS",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "CARDIOLOGIA", "HEMODINAMICA", "NEUROLOGIA", "NEUROCIRURGIA",
-                    "ORTOPEDIA", "NEFROLOGIA", "ONCOLOGIA", "QUIMIOTERAPIA", "UTI_GERAL"
-                ],
-                capacidade="ALTA",
-                observacoes="Referência regional. Oncologia e hemodinâmica.",
-                nivel_sus=3
-            ),
-            
-            HospitalGoias(
-                nome="HUGOL - HOSPITAL DE URGENCIAS DE GOIANIA",
-                cidade="GOIANIA",
-                tipo="REFERENCIA",
-                especialidades=[
-                    "TRAUMATOLOGIA", "QUEIMADOS", "NEUROCIRURGIA_TRAUMA", 
-                    "ORTOPEDIA_TRAUMA", "UTI_TRAUMA", "EMERGENCIA_GERAL"
-                ],
-                capacidade="ALTA",
-                observacoes="Alta complexidade em trauma. Mais novo e tecnológico que HUGO.",
-                nivel_sus=3
-            ),
-            
-            # === NÍVEL 2: HOSPITAIS REGIONAIS ===
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE FORMOSA DR CESAR SAAD FAYAD",
-                cidade="FORMOSA",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA", "CARDIOLOGIA",
-                    "NEUROLOGIA", "PEDIATRIA", "OBSTETRICIA", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região nordeste e entorno do DF.",
-                nivel_sus=2
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DE JATAI",
-                cidade="JATAI",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA", "CARDIOLOGIA",
-                    "PEDIATRIA", "OBSTETRICIA", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região sudoeste de Goiás.",
-                nivel_sus=2
-            ),
-            
-            HospitalGoias(
-                nome="HOSPITAL ESTADUAL DO CENTRO NORTE GOIANO",
-                cidade="URUACU",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "ORTOPEDIA", "PEDIATRIA",
-                    "OBSTETRICIA", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência para região centro-norte.",
-                nivel_sus=2
-            ),
-            
-            # === NÍVEL 2: HOSPITAIS METROPOLITANOS (DADOS REAIS ADICIONADOS) ===
-            HospitalGoias(
-                nome="HEAPA - HOSPITAL ESTADUAL DE APARECIDA DE GOIANIA",
-                cidade="APARECIDA_DE_GOIANIA",
-                tipo="REGIONAL",
-                especialidades=[
-                    "ORTOPEDIA", "CIRURGIA_GERAL", "CLINICA_MEDICA", "CARDIOLOGIA",
-                    "TRAUMATOLOGIA", "UTI_GERAL"
-                ],
-                capacidade="MEDIA",
-                observacoes="Referência em Ortopedia na região metropolitana.",
-                nivel_sus=2
-            ),
-            
-            HospitalGoias(
-                nome="HUTRIN - HOSPITAL DE TRINDADE",
-                cidade="TRINDADE",
-                tipo="REGIONAL",
-                especialidades=[
-                    "CLINICA_MEDICA", "CIRURGIA_GERAL", "CIRURGIA_ELETIVA", 
-                    "ORTOPEDIA", "CARDIOLOGIA"
-                ],
-                capacidade="MEDIA",
-                observacoes="Foco em Clínica Médica e Cirurgia Eletiva. Ideal para aliviar grandes hospitais.",
-                nivel_sus=2
-            ),
-            
-            # === NÍVEL 1: UPAs (Unidades de Pronto Atendimento) ===
-            HospitalGoias(
-                nome="UPA GOIANIA NORTE",
-                cidade="GOIANIA",
-                tipo="UPA",
-                especialidades=[
-                    "EMERGENCIA_GERAL", "CLINICA_MEDICA", "PEDIATRIA", "ORTOPEDIA_BASICA"
-                ],
-                capacidade="BAIXA",
-                observacoes="Pronto atendimento 24h. Casos de baixa e média complexidade.",
-                nivel_sus=1
-            ),
-            
             HospitalGoias(
-                nome="UPA APARECIDA DE GOIANIA",
-                cidade="APARECIDA_DE_GOIANIA",
-                tipo="UPA",
-                especialidades=[
-                    "EMERGENCIA_GERAL", "CLINICA_MEDICA", "PEDIATRIA", "ORTOPEDIA_BASICA"
-                ],
-                capacidade="BAIXA",
-                observacoes="Pronto atendimento região metropolitana.",
-                nivel_sus=1
+                nome=hospital.nome,
+                cidade=hospital.cidade,
+                tipo=perfil["tipo"],
+                especialidades=list(perfil["especialidades"]),
+                capacidade=perfil["capacidade"],
+                observacoes=perfil["observacoes"],
+                nivel_sus=hospital.nivel_sus
             )
+            for hospital, perfil in snapshot.hospitais_do_pipeline(self.PIPELINE_CATALOGO)
         ]
     
-    def _definir_criterios_exclusao(self) -> Dict[str, List[str]]:
-        """Define critérios de exclusão rígidos por hospital"""
+    def _definir_criterios_exclusao(self, snapshot: SnapshotCatalogoHospitais = None) -> Dict[str, List[str]]:
+        """Critérios de exclusão rígidos por hospital, do catálogo"""
         
-        return {
-            "HOSPITAL DE URGENCIAS DE GOIAS DR VALDEMIRO CRUZ HUGO": [
-                "CASOS_ELETIVOS", "BAIXA_COMPLEXIDADE", "DOR_CRONICA", "CONSULTA_AMBULATORIAL"
-            ],
-            "HUGOL - HOSPITAL DE URGENCIAS DE GOIANIA": [
-                "CASOS_ELETIVOS", "BAIXA_COMPLEXIDADE", "DOR_CRONICA"
-            ],
-            "HOSPITAL ESTADUAL MATERNO INFANTIL DR JURANDIR DO NASCIMENTO": [
-                "ADULTOS_MASCULINOS", "MULHERES_NAO_GRAVIDAS_ACIMA_15"
-            ],
-            "HOSPITAL DE DOENCAS TROPICAIS DR ANUAR AUAD HDT": [
-                "NAO_INFECCIOSO"
-            ]
-        }
+        snapshot = snapshot or catalogo_hospitais.obter()
+        return snapshot.criterios_exclusao(self.PIPELINE_CATALOGO)
     
     def formatar_para_ia(self, hospital: HospitalGoias) -> Dict[str, Any]:
         """
         Transforma o objeto Hospital em uma 'ficha técnica' para o Llama
         """
+        ficha = self.fichas.get(hospital.nome)
+        if ficha is None:
+            ficha = self._montar_ficha(hospital, self.criterios_exclusao)
+        ficha = dict(ficha)
+        
+        # Disponibilidade real quando há snapshot de ocupação do MS-Ingestao
+        ocupacao = self.ocupacao.buscar(hospital.nome) if self.ocupacao else None
+        if ocupacao:
+            ficha["score_disponibilidade"] = score_disponibilidade(ocupacao, hospital.score_disponibilidade)
+            ficha["ocupacao_atual"] = {
+                "taxa_ocupacao": ocupacao.taxa_ocupacao,
+                "leitos_disponiveis": ocupacao.leitos_disponiveis,
+                "tendencia": ocupacao.tendencia,
+                "alerta_saturacao": ocupacao.alerta_saturacao,
+                "previsao_saturacao_min": ocupacao.previsao_saturacao_min
+            }
+        return ficha
+    
+    def _montar_ficha(self, hospital: HospitalGoias, criterios_exclusao: Dict[str, List[str]]) -> Dict[str, Any]:
         return {
             "hospital": hospital.nome,
             "cidade": hospital.cidade,
@@ -242,7 +136,7 @@ class PipelineDecisaoRegulacao:
             "nivel_sus": hospital.nivel_sus,  # 1=UPA, 2=Regional, 3=Referência
             "capacidade": hospital.capacidade,
             "especialidades_disponiveis": hospital.especialidades,
-            "restricoes_severas": self.criterios_exclusao.get(hospital.nome, []),
+            "restricoes_severas": criterios_exclusao.get(hospital.nome, []),
             "score_disponibilidade": hospital.score_disponibilidade,
             "observacoes_clinicas": hospital.observacoes
         }
@@ -312,8 +206,13 @@ class PipelineDecisaoRegulacao:
             
             # Se não tem local adequado, manter todos (vai para capital)
         
-        # Ordenar por nível SUS (3=Referência primeiro) e capacidade
-        hospitais_filtrados.sort(key=lambda x: (x.nivel_sus, x.capacidade == "ALTA"), reverse=True)
+        # Ordenar por nível SUS (3=Referência primeiro), capacidade e ocupação atual/prevista
+        ocupacao = self.ocupacao
+        hospitais_filtrados.sort(
+            key=lambda x: (x.nivel_sus, x.capacidade == "ALTA",
+                           termo_capacidade(ocupacao.buscar(x.nome)) if ocupacao else 0),
+            reverse=True
+        )
         
         return hospitais_filtrados
     
@@ -323,6 +222,12 @@ class PipelineDecisaoRegulacao:
         Filtra e ordena os hospitais para enviar apenas o relevante ao Prompt do Llama
         """
         
+        # Cache por versão do catálogo e da ocupação (versões novas geram chaves novas)
+        cache_key = (self.versao_catalogo, self.versao_ocupacao, especialidade_requerida, cid, cidade_paciente, gravidade)
+        contexto = self.contexto_cache.obter(cache_key)
+        if contexto is not None:
+            return contexto
+        
         # Aplicar filtros de peneira
         hospitais_filtrados = self.aplicar_filtro_peneira(
             especialidade_requerida, cid, cidade_paciente, gravidade
@@ -334,7 +239,9 @@ class PipelineDecisaoRegulacao:
         # Formatar para IA
         contexto_hospitais = [self.formatar_para_ia(h) for h in top_hospitais]
         
-        return json.dumps(contexto_hospitais, indent=2, ensure_ascii=False)
+        contexto = json.dumps(contexto_hospitais, indent=2, ensure_ascii=False)
+        self.contexto_cache.definir(cache_key, contexto)
+        return contexto
     
     def gerar_prompt_llama(self, dados_paciente: Dict[str, Any], 
                           resultado_biobert: str = None) -> str:
@@ -401,6 +308,10 @@ def gerar_contexto_rag_llama(especialidade: str, cid: str = None,
     """
     return pipeline_rag.gerar_contexto_hospitais(especialidade, cid, cidade_paciente)
 
+def obter_metricas_contexto_rag() -> Dict[str, Any]:
+    """Acertos/faltas do cache de contextos de hospitais"""
+    return pipeline_rag.contexto_cache.metricas()
+
 def gerar_prompt_completo_llama(dados_paciente: Dict[str, Any], 
                                resultado_biobert: str = None) -> str:
     """
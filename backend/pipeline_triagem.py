@@ -0,0 +1,402 @@
+"""
+PIPELINE DE TRIAGEM EM ETAPAS
+analisar_com_ia_inteligente dividido em etapas explícitas e cronometradas:
+
+    extrair     BioBERT sobre o prontuário (o resultado só entra na justificativa)
+    pontuar     score do CID, sintomas críticos, prioridade declarada e classificação
+    selecionar  hospital pelo pipeline de Goiás (classificação como gravidade)
+    logistica   transporte pelo risco + matchmaker logístico
+    explicar    justificativa estruturada e decisão final
+
+extrair e pontuar não dependem uma da outra: o BioBERT roda em uma thread do
+pool de etapas enquanto o score é calculado na thread da requisição. Cada
+etapa registra tempo de parede e acerto de cache; os tempos vão para
+metadata["etapas"] da decisão e para /metricas/desempenho (triagem_etapas).
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microservices', 'shared'))
+from indice_cid10 import avaliar_risco_cid, indice_cid10
+from catalogo_hospitais import catalogo_hospitais
+from executores import INFERENCIA_WORKERS
+
+logger = logging.getLogger(__name__)
+
+ETAPAS = ("extrair", "pontuar", "selecionar", "logistica", "explicar")
+
+# Threads para etapas executadas em paralelo (hoje: BioBERT ao lado do score); uma por
+# triagem concorrente, para que cada worker de inferência tenha seu texto no micro-lote
+TRIAGEM_ETAPAS_WORKERS = int(os.getenv("TRIAGEM_ETAPAS_WORKERS", str(INFERENCIA_WORKERS)))
+
+# Destino quando o pipeline de hospitais falha (nome resolvido no catálogo)
+SIGLA_HOSPITAL_FALLBACK = "HGG"
+
+
+def hospital_fallback() -> str:
+    """Nome do hospital de fallback na versão atual do catálogo (a sigla, se ele não estiver lá)"""
+    hospital = catalogo_hospitais.obter().buscar(SIGLA_HOSPITAL_FALLBACK)
+    return hospital.nome if hospital else SIGLA_HOSPITAL_FALLBACK
+
+
+class MetricasEtapas:
+    """Tempos (últimas 500 execuções), erros e acertos de cache por etapa"""
+
+    def __init__(self, etapas=ETAPAS, janela: int = 500):
+        self._lock = threading.Lock()
+        self._tempos_ms = {etapa: deque(maxlen=janela) for etapa in etapas}
+        self._execucoes = dict.fromkeys(etapas, 0)
+        self._erros = dict.fromkeys(etapas, 0)
+        self._cache_hits = dict.fromkeys(etapas, 0)
+
+    def registrar(self, etapa: str, tempo_ms: float, cache_hit: bool = False, erro: bool = False):
+        with self._lock:
+            self._tempos_ms[etapa].append(tempo_ms)
+            self._execucoes[etapa] += 1
+            self._erros[etapa] += int(erro)
+            self._cache_hits[etapa] += int(bool(cache_hit))
+
+    @staticmethod
+    def _percentil(ordenados: List[float], p: float) -> float:
+        if not ordenados:
+            return 0.0
+        return round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))], 2)
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            resultado = {}
+            for etapa, tempos in self._tempos_ms.items():
+                ordenados = sorted(tempos)
+                resultado[etapa] = {
+                    "execucoes": self._execucoes[etapa],
+                    "erros": self._erros[etapa],
+                    "cache_hits": self._cache_hits[etapa],
+                    "media_ms": round(sum(ordenados) / len(ordenados), 2) if ordenados else 0.0,
+                    "p50_ms": self._percentil(ordenados, 0.50),
+                    "p95_ms": self._percentil(ordenados, 0.95),
+                    "max_ms": round(ordenados[-1], 2) if ordenados else 0.0
+                }
+        # Cache em memória usado pela etapa pontuar (totais do processo)
+        resultado["caches"] = {
+            "indice_cid10": indice_cid10.metricas_cache()
+        }
+        return resultado
+
+
+class ContextoTriagem:
+    """Entrada normalizada e resultados parciais de uma triagem"""
+
+    def __init__(self, paciente_data: dict):
+        self.paciente_data = paciente_data
+        self.protocolo = paciente_data.get('protocolo', 'N/A')
+        self.especialidade = paciente_data.get('especialidade', '').upper()
+        self.cid = paciente_data.get('cid', '')
+        self.cid_desc = paciente_data.get('cid_desc', '')
+        self.prontuario = paciente_data.get('prontuario_texto', '')
+        self.historico = paciente_data.get('historico_paciente', '')
+        self.prioridade_desc = paciente_data.get('prioridade_descricao', 'Normal')
+
+        # extrair
+        self.resultado_biobert: Optional[str] = None
+        self.biobert_usado = False
+        # pontuar
+        self.score_prioridade = 5  # Base
+        self.classificacao_risco = "AMARELO"
+        self.sintomas_encontrados: List[str] = []
+        # selecionar
+        self.unidade_destino: Optional[str] = None
+        # logistica
+        self.logistica: Dict[str, Any] = {}
+        self.resultado_matchmaker: Optional[Dict[str, Any]] = None
+        self.matchmaker_usado = False
+
+        # Partes da justificativa por etapa (explicar monta na ordem clínica)
+        self.justificativa: Dict[str, List[str]] = {etapa: [] for etapa in ETAPAS}
+        self.etapas: Dict[str, Dict[str, Any]] = {}
+        self.decisao: Dict[str, Any] = {}
+
+
+class PipelineTriagem:
+    """
+    Triagem em etapas: extrair || pontuar -> selecionar -> logistica -> explicar
+
+    As dependências opcionais (BioBERT, matchmaker) são injetadas; None
+    significa indisponível e a etapa correspondente é pulada/reduzida.
+    """
+
+    def __init__(self, selecionar_hospital: Callable[..., Any],
+                 extrair_biobert: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 processar_matchmaking: Optional[Callable[[dict, dict], Dict[str, Any]]] = None,
+                 max_workers: int = TRIAGEM_ETAPAS_WORKERS):
+        self.selecionar_hospital = selecionar_hospital
+        self.extrair_biobert = extrair_biobert
+        self.processar_matchmaking = processar_matchmaking
+        self.metricas = MetricasEtapas()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="triagem-etapa")
+
+    def _executar_etapa(self, nome: str, etapa: Callable[[ContextoTriagem], Optional[bool]], contexto: ContextoTriagem):
+        """Executa uma etapa medindo o tempo; a etapa retorna True quando veio de cache"""
+        inicio = time.perf_counter()
+        cache_hit, erro = False, False
+        try:
+            cache_hit = bool(etapa(contexto))
+        except Exception:
+            erro = True
+            raise
+        finally:
+            tempo_ms = (time.perf_counter() - inicio) * 1000
+            contexto.etapas[nome] = {"tempo_ms": round(tempo_ms, 3), "cache_hit": cache_hit}
+            self.metricas.registrar(nome, tempo_ms, cache_hit, erro)
+
+    # ------------------------------------------------------------------ etapas
+
+    def _extrair(self, ctx: ContextoTriagem) -> bool:
+        """BioBERT sobre o prontuário (falhas não interrompem a triagem)"""
+        cache_hit = False
+        try:
+            logger.info(f"Analisando com BioBERT: {ctx.protocolo}")
+            biobert_analise = self.extrair_biobert(ctx.prontuario)
+            cache_hit = bool(biobert_analise.get("cache_hit"))
+
+            # Se BioBERT processou (independente da confiança), marcar como usado
+            if biobert_analise.get("status") in ["sucesso", "texto_insuficiente"]:
+                ctx.resultado_biobert = biobert_analise.get("analise", "Análise BioBERT realizada")
+                ctx.biobert_usado = True
+                confianca = biobert_analise.get('nivel_confianca', 'N/A')
+                entidades_count = len(biobert_analise.get('entidades', []))
+                logger.info(f"BioBERT: {confianca} confiança, {entidades_count} entidades detectadas")
+            else:
+                ctx.resultado_biobert = biobert_analise.get("analise", "Análise BioBERT com erro")
+                ctx.biobert_usado = False
+                logger.warning(f"BioBERT: {biobert_analise.get('status', 'status_desconhecido')}")
+        except Exception as e:
+            logger.error(f"Erro BioBERT: {e}")
+            ctx.resultado_biobert = "Análise BioBERT indisponível"
+            ctx.biobert_usado = False
+
+        if ctx.resultado_biobert:
+            ctx.justificativa["extrair"].append(
+                f"BIOBERT: {ctx.resultado_biobert[:100]}{'...' if len(ctx.resultado_biobert) > 100 else ''}"
+            )
+        return cache_hit
+
+    def _pontuar(self, ctx: ContextoTriagem) -> None:
+        """Score 1-10 e classificação de risco (CID, sintomas críticos, prioridade declarada)"""
+        partes = ctx.justificativa["pontuar"]
+
+        # === ANÁLISE POR CID (índice CID-10: prefixo mais longo, ver indice_cid10) ===
+        info = avaliar_risco_cid(ctx.cid)
+        if info is not None:
+            ctx.score_prioridade = info['score']
+            ctx.classificacao_risco = info['risco']
+            partes.append(f"ANÁLISE CID: {ctx.cid} ({info['desc']}) = RISCO {info['risco']} (Score: {info['score']}/10)")
+        elif ctx.cid:
+            partes.append(f"ANÁLISE CID: {ctx.cid} não está na base crítica, mantendo score padrão")
+
+        # === ANÁLISE DE SINTOMAS NO PRONTUÁRIO ===
+        sintomas_criticos = {
+            'dor no peito': {'score': +3, 'desc': 'dor torácica'},
+            'falta de ar': {'score': +2, 'desc': 'dispneia'},
+            'inconsciência': {'score': +4, 'desc': 'alteração do nível de consciência'},
+            'convulsão': {'score': +3, 'desc': 'atividade convulsiva'},
+            'hemorragia': {'score': +3, 'desc': 'sangramento ativo'},
+            'vômito': {'score': +1, 'desc': 'êmese'},
+            'febre alta': {'score': +2, 'desc': 'hipertermia'},
+            'pressão baixa': {'score': +2, 'desc': 'hipotensão'},
+            'taquicardia': {'score': +2, 'desc': 'frequência cardíaca elevada'},
+            'cianose': {'score': +3, 'desc': 'cianose'},
+            'rebaixamento': {'score': +3, 'desc': 'rebaixamento do nível de consciência'},
+            'trauma': {'score': +4, 'desc': 'traumatismo'},
+            'acidente': {'score': +4, 'desc': 'trauma por acidente'}
+        }
+
+        prontuario_lower = ctx.prontuario.lower()
+        score_sintomas = 0
+
+        for sintoma, info in sintomas_criticos.items():
+            if sintoma in prontuario_lower:
+                ctx.score_prioridade += info['score']
+                score_sintomas += info['score']
+                ctx.sintomas_encontrados.append(info['desc'])
+
+        if ctx.sintomas_encontrados:
+            partes.append(f"SINTOMAS DETECTADOS: {', '.join(ctx.sintomas_encontrados)} (+{score_sintomas} pontos)")
+        else:
+            partes.append("SINTOMAS: Nenhum sintoma crítico detectado no texto")
+
+        # === ANÁLISE DE PRIORIDADE DECLARADA ===
+        if 'urgente' in ctx.prioridade_desc.lower() or 'emergência' in ctx.prioridade_desc.lower():
+            ctx.score_prioridade += 2
+            partes.append(f"PRIORIDADE: '{ctx.prioridade_desc}' = +2 pontos por urgência")
+        else:
+            partes.append(f"PRIORIDADE: '{ctx.prioridade_desc}' = sem ajuste adicional")
+
+        # === AJUSTAR CLASSIFICAÇÃO FINAL ===
+        if ctx.score_prioridade >= 8:
+            ctx.classificacao_risco = "VERMELHO"
+        elif ctx.score_prioridade >= 6:
+            ctx.classificacao_risco = "AMARELO"
+        else:
+            ctx.classificacao_risco = "VERDE"
+
+        # Limitar score
+        ctx.score_prioridade = min(10, max(1, ctx.score_prioridade))
+
+    def _selecionar(self, ctx: ContextoTriagem) -> None:
+        """Hospital pelo pipeline de Goiás (fallback: HGG)"""
+        partes = ctx.justificativa["selecionar"]
+        try:
+            ctx.unidade_destino, motivo_escolha = self.selecionar_hospital(
+                cid=ctx.cid,
+                especialidade=ctx.especialidade,
+                sintomas=ctx.prontuario,
+                gravidade=ctx.classificacao_risco
+            )
+            partes.append(f"HOSPITAL SELECIONADO PELO PIPELINE: {ctx.unidade_destino}")
+            partes.append(f"JUSTIFICATIVA TÉCNICA: {motivo_escolha}")
+        except Exception as e:
+            logger.error(f"Erro no pipeline de hospitais: {e}")
+            ctx.unidade_destino = hospital_fallback()
+            partes.append(f"HOSPITAL FALLBACK: {ctx.unidade_destino} - Pipeline indisponível")
+
+    def _logistica(self, ctx: ContextoTriagem) -> None:
+        """Transporte pelo risco e, se disponível, matchmaker logístico (ambulância e rota)"""
+        partes = ctx.justificativa["logistica"]
+        tipo_transporte = "USB"  # Padrão
+        acionar_ambulancia = True
+
+        if ctx.classificacao_risco == "VERMELHO":
+            tipo_transporte = "USA"  # Unidade de Suporte Avançado
+            previsao_vaga = "Imediato"
+            partes.append("TRANSPORTE: USA (Suporte Avançado) devido ao alto risco")
+        elif ctx.classificacao_risco == "AMARELO":
+            tipo_transporte = "USB"  # Unidade de Suporte Básico
+            previsao_vaga = "1-2 horas"
+            partes.append("TRANSPORTE: USB (Suporte Básico) adequado para o risco")
+        else:
+            previsao_vaga = "4-8 horas"
+            if ctx.score_prioridade <= 3:
+                acionar_ambulancia = False
+                partes.append("TRANSPORTE: Próprio pode ser considerado (baixo risco)")
+            else:
+                partes.append("TRANSPORTE: USB (Suporte Básico) para baixo risco")
+
+        ctx.logistica = {
+            "acionar_ambulancia": acionar_ambulancia,
+            "tipo_transporte": tipo_transporte,
+            "previsao_vaga_h": previsao_vaga
+        }
+
+        if self.processar_matchmaking is None:
+            return
+        try:
+            logger.info(f"Processando Matchmaker Logístico: {ctx.protocolo}")
+            # O matchmaker só lê hospital, classificação e score da decisão
+            ctx.resultado_matchmaker = self.processar_matchmaking(ctx.paciente_data, {
+                "analise_decisoria": {
+                    "score_prioridade": ctx.score_prioridade,
+                    "classificacao_risco": ctx.classificacao_risco,
+                    "unidade_destino_sugerida": ctx.unidade_destino
+                },
+                "logistica": ctx.logistica
+            })
+            ctx.matchmaker_usado = True
+            logistico = ctx.resultado_matchmaker['matchmaking_logistico']
+            logger.info(f"Matchmaker: {logistico['distancia_km']}km - {logistico['tempo_estimado_min']}min")
+        except Exception as e:
+            logger.error(f"Erro Matchmaker: {e}")
+            # Continuar sem matchmaker se falhar
+            ctx.resultado_matchmaker = None
+            ctx.matchmaker_usado = False
+
+    def _explicar(self, ctx: ContextoTriagem) -> None:
+        """Justificativa estruturada na ordem clínica e decisão final"""
+        partes = [f"DADOS INSERIDOS - Protocolo: {ctx.protocolo}"]
+        if ctx.especialidade:
+            partes.append(f"Especialidade: {ctx.especialidade}")
+        if ctx.cid:
+            partes.append(f"CID: {ctx.cid} ({ctx.cid_desc})" if ctx.cid_desc else f"CID: {ctx.cid}")
+        if ctx.prontuario:
+            partes.append(f"Quadro clínico: {ctx.prontuario[:100]}{'...' if len(ctx.prontuario) > 100 else ''}")
+        if ctx.historico:
+            partes.append(f"Histórico: {ctx.historico[:80]}{'...' if len(ctx.historico) > 80 else ''}")
+        for etapa in ("extrair", "pontuar", "selecionar", "logistica"):
+            partes.extend(ctx.justificativa[etapa])
+
+        justificativa_final = " | ".join(partes) + \
+            f" | SCORE FINAL: {ctx.score_prioridade}/10 = RISCO {ctx.classificacao_risco}"
+
+        decisao = {
+            "analise_decisoria": {
+                "score_prioridade": ctx.score_prioridade,
+                "classificacao_risco": ctx.classificacao_risco,
+                "unidade_destino_sugerida": ctx.unidade_destino,
+                "justificativa_clinica": justificativa_final
+            },
+            "logistica": ctx.logistica,
+            "protocolo_especial": {
+                "tipo": "NORMAL",
+                "instrucoes_imediatas": "Monitorização de sinais vitais durante transporte"
+            }
+        }
+        if ctx.matchmaker_usado:
+            # Integrar dados do matchmaker na decisão
+            for chave in ("matchmaking_logistico", "ambulancia_sugerida", "rota_otimizada", "protocolo_especial"):
+                decisao[chave] = ctx.resultado_matchmaker[chave]
+        ctx.decisao = decisao
+
+    # ---------------------------------------------------------------- execução
+
+    def analisar(self, paciente_data: dict) -> dict:
+        """Triagem completa; retorna a decisão no formato de analisar_com_ia_inteligente"""
+        start_time = time.time()
+        ctx = ContextoTriagem(paciente_data)
+
+        # extrair (BioBERT) em paralelo com pontuar
+        futuro_extrair = None
+        if self.extrair_biobert is not None and ctx.prontuario:
+            futuro_extrair = self._pool.submit(self._executar_etapa, "extrair", self._extrair, ctx)
+        self._executar_etapa("pontuar", self._pontuar, ctx)
+        if futuro_extrair is not None:
+            futuro_extrair.result()
+
+        self._executar_etapa("selecionar", self._selecionar, ctx)
+        self._executar_etapa("logistica", self._logistica, ctx)
+        self._executar_etapa("explicar", self._explicar, ctx)
+
+        tempo_processamento = time.time() - start_time
+        decisao = ctx.decisao
+        decisao["metadata"] = {
+            "ia_engine": "IA Inteligente v4.0 - BIOBERT + MATCHMAKER + PIPELINE HOSPITAIS GOIÁS",
+            "tempo_processamento": tempo_processamento,
+            "biobert_usado": ctx.biobert_usado,
+            "biobert_disponivel": self.extrair_biobert is not None,
+            "matchmaker_usado": ctx.matchmaker_usado,
+            "matchmaker_disponivel": self.processar_matchmaking is not None,
+            # Tempo de parede por etapa (extrair e pontuar se sobrepõem)
+            "etapas": ctx.etapas,
+            "dados_analisados": {
+                "protocolo": ctx.protocolo,
+                "especialidade": ctx.especialidade,
+                "cid": ctx.cid,
+                "sintomas_detectados": len(ctx.sintomas_encontrados),
+                "hospital_justificado": True,
+                "pipeline_hospitais": True,
+                "pipeline_ativo": True,
+                "sistema": "unificado"
+            }
+        }
+
+        logger.info(f"IA processou {ctx.protocolo} em {tempo_processamento:.2f}s - "
+                    f"BioBERT: {ctx.biobert_usado} - Matchmaker: {ctx.matchmaker_usado}")
+        return decisao
+
+    def encerrar(self, aguardar: bool = True):
+        self._pool.shutdown(wait=aguardar)
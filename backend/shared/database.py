@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, Float
+from sqlalchemy import create_engine, event, Column, Index, Integer, String, DateTime, Text, Boolean, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+from typing import Optional
 import os
+import unicodedata
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente do arquivo .env
@@ -99,9 +101,39 @@ class PacienteRegulacao(Base):
     observacoes_alta = Column(Text, nullable=True)  # Observações da alta
     justificativa_negacao = Column(Text, nullable=True)  # Motivo da negação (se negado)
     
+    # ============================================================================
+    # FILA DE REGULAÇÃO - filtros por igualdade (sem LIKE '%...%') e índice composto
+    # Preenchidos por normalizar_filtro() a cada insert/update (migration_fila_regulacao.sql)
+    # ============================================================================
+    especialidade_normalizada = Column(String, nullable=True)
+    cidade_origem_normalizada = Column(String, nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+
+def normalizar_filtro(valor: Optional[str]) -> Optional[str]:
+    """Especialidade/cidade em forma canônica: sem acentos, maiúsculas e espaços simples"""
+    if not valor:
+        return None
+    decomposto = unicodedata.normalize("NFD", valor)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.upper().split()) or None
+
+
+@event.listens_for(PacienteRegulacao, "before_insert")
+@event.listens_for(PacienteRegulacao, "before_update")
+def _normalizar_campos_fila(mapper, connection, paciente):
+    paciente.especialidade_normalizada = normalizar_filtro(paciente.especialidade)
+    paciente.cidade_origem_normalizada = normalizar_filtro(paciente.cidade_origem)
+
+
+# Fila de regulação: status (+ especialidade) -> score desc, data, id (mesma ordem do cursor)
+Index("idx_pacientes_fila_regulacao", PacienteRegulacao.status, PacienteRegulacao.especialidade_normalizada,
+      PacienteRegulacao.score_prioridade.desc(), PacienteRegulacao.data_solicitacao, PacienteRegulacao.id)
+Index("idx_pacientes_fila_status", PacienteRegulacao.status,
+      PacienteRegulacao.score_prioridade.desc(), PacienteRegulacao.data_solicitacao, PacienteRegulacao.id)
+
 class HistoricoDecisoes(Base):
     __tablename__ = "historico_decisoes"
     
@@ -0,0 +1,232 @@
+"""
+SNAPSHOT EM MEMÓRIA DOS DADOS DO PORTAL DA TRANSPARÊNCIA SES-GO
+Cache dos arquivos dados_*.json usados pelo /dashboard/leitos
+
+- Os arquivos são lidos uma única vez e mantidos em memória
+- A invalidação é feita por assinatura do arquivo (inode, mtime, tamanho) ou
+  por sinal explícito de recarga (POST /dashboard/recarregar, enviado pelo
+  atualizar_dados_transparencia.py após gravar os arquivos)
+- Agregados (contagens, status_summary, unidades_pressao) são pré-calculados
+  na carga, de modo que cada requisição apenas lê o snapshot atual
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Arquivos publicados pelo Portal da Transparência (Pentaho)
+ARQUIVOS_DASHBOARD = ('admitidos', 'alta', 'em_regulacao', 'em_transito', 'ultima_atualizacao')
+
+# Categorias com registros paginados em /dashboard/dados-brutos/{categoria}
+CATEGORIAS_DADOS_BRUTOS = ('admitidos', 'alta', 'em_regulacao', 'em_transito')
+
+# Intervalo mínimo entre verificações de assinatura (evita os.stat a cada request)
+INTERVALO_VERIFICACAO_S = float(os.getenv("DASHBOARD_SNAPSHOT_INTERVALO_S", "1.0"))
+
+
+def resolver_diretorio_dados() -> str:
+    """
+    Diretório dos arquivos JSON
+    No Docker: /app/dados_*.json (montados via volume)
+    Local: ../dados_*.json (relativo ao backend)
+    """
+    if os.path.exists('/app/dados_admitidos.json'):
+        return '/app'
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def processar_unidades_pressao(dados_em_regulacao):
+    """Processa dados de unidades com pressão na regulação"""
+    try:
+        unidades_count = {}
+
+        for paciente in dados_em_regulacao:
+            # Os dados JSON são arrays, não dicionários
+            # Estrutura: [id, protocolo, data, status, tipo_leito, tipo_leito_desc, cpf, codigo, especialidade, unidade_origem, cidade, unidade_destino, data_regulacao, complexo]
+            if isinstance(paciente, list) and len(paciente) >= 11:
+                unidade = paciente[9] if len(paciente) > 9 else 'Unidade não informada'  # unidade_origem
+                cidade = paciente[10] if len(paciente) > 10 else 'Cidade não informada'  # cidade
+
+                # Limpar nome da unidade (remover código se houver)
+                if unidade and ' / ' in str(unidade):
+                    unidade = str(unidade).split(' / ')[-1]
+
+                chave = f"{unidade} - {cidade}"
+                if chave not in unidades_count:
+                    unidades_count[chave] = {
+                        "unidade_executante_desc": unidade,
+                        "cidade": cidade,
+                        "pacientes_em_fila": 0
+                    }
+                unidades_count[chave]["pacientes_em_fila"] += 1
+
+        # Ordenar por número de pacientes (maior pressão primeiro)
+        unidades_ordenadas = sorted(
+            unidades_count.values(),
+            key=lambda x: x["pacientes_em_fila"],
+            reverse=True
+        )
+
+        return unidades_ordenadas[:10]  # Top 10 unidades com mais pressão
+
+    except Exception as e:
+        logger.error(f"Erro ao processar unidades: {e}")
+        return []
+
+
+class SnapshotDadosDashboard:
+    """Conteúdo imutável de uma carga dos arquivos JSON com agregados prontos"""
+
+    def __init__(self, dados: Dict[str, list], assinaturas: Dict[str, Optional[Tuple]]):
+        self.dados = dados
+        self.assinaturas = assinaturas
+        self.carregado_em = datetime.utcnow()
+
+        # Versão derivada das assinaturas dos arquivos (estável entre processos)
+        chave = json.dumps([[nome, assinaturas.get(nome)] for nome in ARQUIVOS_DASHBOARD])
+        self.versao = hashlib.sha1(chave.encode('utf-8')).hexdigest()[:16]
+
+        # === AGREGADOS PRÉ-CALCULADOS ===
+        admitidos = len(dados.get('admitidos', []))
+        alta = len(dados.get('alta', []))
+        em_regulacao = len(dados.get('em_regulacao', []))
+        em_transito = len(dados.get('em_transito', []))
+
+        self.agregados = {
+            "leitos_disponiveis": alta,
+            "pacientes_admitidos": admitidos,
+            "em_regulacao": em_regulacao,
+            "em_transito": em_transito,
+            "total_registros": sum(len(v) for v in dados.values() if isinstance(v, list)),
+            "status_summary": [
+                {"status": "ADMITIDOS", "count": admitidos},
+                {"status": "EM_REGULACAO", "count": em_regulacao},
+                {"status": "EM_TRANSITO", "count": em_transito},
+                {"status": "ALTA", "count": alta}
+            ],
+            "unidades_pressao": processar_unidades_pressao(dados.get('em_regulacao', []))
+        }
+
+    def pagina_dados_brutos(self, categoria: str, offset: int = 0, limit: int = 100) -> dict:
+        """Retorna uma página dos registros brutos de uma categoria"""
+        registros = self.dados.get(categoria, [])
+        offset = max(0, offset)
+        limit = max(0, limit)
+        pagina = registros[offset:offset + limit]
+        proximo = offset + len(pagina)
+
+        return {
+            "categoria": categoria,
+            "total": len(registros),
+            "offset": offset,
+            "limit": limit,
+            "registros": pagina,
+            "proximo_offset": proximo if proximo < len(registros) else None,
+            "versao_dados": self.versao
+        }
+
+
+class CacheSnapshotDashboard:
+    """
+    Mantém o snapshot atual dos arquivos dados_*.json
+
+    Leitores recebem sempre um snapshot completo (troca atômica de referência);
+    apenas arquivos cuja assinatura mudou são relidos do disco.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, intervalo_verificacao: float = INTERVALO_VERIFICACAO_S):
+        self._base_dir = base_dir
+        self.intervalo_verificacao = intervalo_verificacao
+        self._snapshot: Optional[SnapshotDadosDashboard] = None
+        self._ultima_verificacao = 0.0
+        self._lock = threading.Lock()
+        self.recargas = 0
+
+    @property
+    def base_dir(self) -> str:
+        return self._base_dir or resolver_diretorio_dados()
+
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.base_dir, f'dados_{nome}.json')
+
+    @staticmethod
+    def _assinatura(caminho: str) -> Optional[Tuple[int, int, int]]:
+        """Assinatura (inode, mtime_ns, tamanho) - muda quando o arquivo é substituído ou reescrito"""
+        try:
+            st = os.stat(caminho)
+            return (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _ler_arquivo(self, nome: str, caminho: str) -> list:
+        if not os.path.exists(caminho):
+            logger.warning(f"Arquivo não encontrado: {caminho}")
+            return []
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            logger.info(f"Carregado {nome}: {len(dados) if isinstance(dados, list) else 1} registros")
+            return dados
+        except Exception as e:
+            logger.error(f"Erro ao carregar {nome}: {e}")
+            return []
+
+    def _recarregar(self, forcar: bool = False) -> SnapshotDadosDashboard:
+        """Relê apenas os arquivos alterados e publica um novo snapshot"""
+        anterior = self._snapshot
+        assinaturas = {nome: self._assinatura(self._caminho(nome)) for nome in ARQUIVOS_DASHBOARD}
+
+        if anterior and not forcar and assinaturas == anterior.assinaturas:
+            return anterior
+
+        dados = {}
+        for nome in ARQUIVOS_DASHBOARD:
+            if anterior and not forcar and anterior.assinaturas.get(nome) == assinaturas[nome]:
+                dados[nome] = anterior.dados[nome]
+            else:
+                dados[nome] = self._ler_arquivo(nome, self._caminho(nome))
+
+        snapshot = SnapshotDadosDashboard(dados, assinaturas)
+        self._snapshot = snapshot
+        self.recargas += 1
+        logger.info(f"📦 Snapshot do dashboard atualizado (versão {snapshot.versao}, {snapshot.agregados['total_registros']} registros)")
+        return snapshot
+
+    def obter(self) -> SnapshotDadosDashboard:
+        """Retorna o snapshot atual, verificando os arquivos no máximo uma vez por intervalo"""
+        agora = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot and agora - self._ultima_verificacao < self.intervalo_verificacao:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not snapshot and self._snapshot is not None:
+                return self._snapshot
+            self._ultima_verificacao = agora
+            return self._recarregar()
+
+    def invalidar(self) -> SnapshotDadosDashboard:
+        """Sinal de recarga: força a releitura de todos os arquivos"""
+        with self._lock:
+            self._ultima_verificacao = time.monotonic()
+            return self._recarregar(forcar=True)
+
+    def status(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "versao": snapshot.versao if snapshot else None,
+            "carregado_em": snapshot.carregado_em.isoformat() if snapshot else None,
+            "recargas": self.recargas,
+            "base_dir": self.base_dir
+        }
+
+
+# Instância global
+snapshot_dashboard = CacheSnapshotDashboard()
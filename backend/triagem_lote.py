@@ -0,0 +1,227 @@
+"""
+RE-TRIAGEM EM LOTE DA FILA DE REGULAÇÃO
+Recalcula score_prioridade e classificacao_risco de muitos pacientes de uma vez
+(ex.: após mudar pesos de sintomas ou a tabela CID-10 de risco)
+
+- Mesmas regras de analisar_com_ia_inteligente (score do CID, sintomas críticos
+  do prontuário, +2 por prioridade urgente, VERMELHO >= 8, AMARELO >= 6),
+  aplicadas em colunas NumPy: cada CID distinto e cada prontuário distinto são
+  avaliados uma única vez e o resto é aritmética vetorizada
+- Os pacientes são lidos do banco em lotes por keyset (id > último id), sem
+  OFFSET e sem carregar a fila inteira em memória
+- Em dry_run nada é gravado: o resultado traz as transições de classificação
+  e uma amostra das diferenças; fora dele, cada lote é gravado com
+  bulk_update_mappings e commit próprio
+- A justificativa_tecnica das linhas alteradas é substituída por uma
+  justificativa da re-triagem (componentes do novo score e o score anterior):
+  a da triagem individual descreve o score antigo e deixaria de conferir
+"""
+
+import os
+import sys
+import time
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'microservices', 'shared'))
+from lexico_clinico import scores_sintomas_em_lote
+from indice_cid10 import avaliar_risco_cid
+
+from shared.database import PacienteRegulacao
+
+logger = logging.getLogger(__name__)
+
+# Regras de analisar_com_ia_inteligente
+SCORE_BASE = 5  # CID fora da base crítica
+BONUS_PRIORIDADE_URGENTE = 2
+TERMOS_PRIORIDADE_URGENTE = ("urgente", "emergência")
+LIMIAR_VERMELHO = 8
+LIMIAR_AMARELO = 6
+SCORE_MINIMO, SCORE_MAXIMO = 1, 10
+
+TAMANHO_LOTE_PADRAO = int(os.getenv("RETRIAGEM_TAMANHO_LOTE", "500"))
+
+
+def _score_cid(cid: str) -> int:
+    info = avaliar_risco_cid(cid)
+    return info['score'] if info else SCORE_BASE
+
+
+def _por_valor_distinto(valores: Sequence[str], funcao) -> np.ndarray:
+    """
+    Avalia cada valor distinto uma vez e espalha o resultado pela coluna
+
+    funcao recebe a lista de valores distintos e devolve um score para cada um.
+    """
+    if not len(valores):
+        return np.zeros(0, dtype=np.int64)
+    distintos, inverso = np.unique(np.asarray(valores, dtype=object), return_inverse=True)
+    return np.asarray(funcao(list(distintos)), dtype=np.int64)[inverso]
+
+
+def analisar_lote(pacientes: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Score e classificação de risco de vários pacientes (versão em colunas de
+    analisar_com_ia_inteligente, sem BioBERT, hospital ou logística)
+
+    Args:
+        pacientes: dicts com 'cid', 'prontuario_texto' e 'prioridade_descricao'
+
+    Returns:
+        Colunas alinhadas com a entrada: score_cid, score_sintomas, urgente,
+        score_bruto, score_prioridade (1-10) e classificacao_risco
+    """
+    cids = [p.get('cid') or '' for p in pacientes]
+    textos = [p.get('prontuario_texto') or '' for p in pacientes]
+    prioridades = np.array([(p.get('prioridade_descricao') or 'Normal') for p in pacientes], dtype=str)
+
+    score_cid = _por_valor_distinto(cids, lambda distintos: [_score_cid(cid) for cid in distintos])
+    # Sintomas: mesma busca por substring da análise individual, uma vez por prontuário distinto
+    score_sintomas = _por_valor_distinto(textos, scores_sintomas_em_lote)
+
+    urgente = np.zeros(len(pacientes), dtype=bool)
+    if len(pacientes):
+        prioridades = np.char.lower(prioridades)
+        for termo in TERMOS_PRIORIDADE_URGENTE:
+            urgente |= np.char.find(prioridades, termo) >= 0
+
+    # A classificação usa o score antes do limite 1-10 (como na análise individual)
+    score_bruto = score_cid + score_sintomas + BONUS_PRIORIDADE_URGENTE * urgente
+    classificacao = np.select(
+        [score_bruto >= LIMIAR_VERMELHO, score_bruto >= LIMIAR_AMARELO],
+        ["VERMELHO", "AMARELO"],
+        default="VERDE"
+    )
+
+    return {
+        "score_cid": score_cid,
+        "score_sintomas": score_sintomas,
+        "urgente": urgente,
+        "score_bruto": score_bruto,
+        "score_prioridade": np.clip(score_bruto, SCORE_MINIMO, SCORE_MAXIMO),
+        "classificacao_risco": classificacao
+    }
+
+
+def justificativa_retriagem(protocolo: str, cid: str, score_cid: int, score_sintomas: int, urgente: bool,
+                            score_anterior, classificacao_anterior, score_novo: int, classificacao_nova: str,
+                            quando: datetime) -> str:
+    """Justificativa gravada na linha re-triada (mesmo formato ' | ' e 'SCORE FINAL' da triagem individual)"""
+    partes = [f"RE-TRIAGEM EM LOTE ({quando:%Y-%m-%d %H:%M} UTC) - Protocolo: {protocolo}"]
+    partes.append(f"CID: {cid} (score {score_cid})" if cid else f"CID não informado (score base {score_cid})")
+    if score_sintomas:
+        partes.append(f"Sintomas críticos no prontuário: +{score_sintomas}")
+    if urgente:
+        partes.append(f"Prioridade urgente: +{BONUS_PRIORIDADE_URGENTE}")
+    partes.append(f"Anterior: {'-' if score_anterior is None else score_anterior}/10 = "
+                  f"RISCO {classificacao_anterior or 'SEM_CLASSIFICACAO'}")
+    return " | ".join(partes) + f" | SCORE FINAL: {score_novo}/10 = RISCO {classificacao_nova}"
+
+
+def iterar_fila(db: Session, status: str, tamanho_lote: int = TAMANHO_LOTE_PADRAO) -> Iterator[List[Any]]:
+    """Lotes de pacientes do status informado, em ordem de id (paginação por keyset)"""
+    ultimo_id = 0
+    while True:
+        lote = (
+            db.query(
+                PacienteRegulacao.id,
+                PacienteRegulacao.protocolo,
+                PacienteRegulacao.cid,
+                PacienteRegulacao.prontuario_texto,
+                PacienteRegulacao.prioridade_descricao,
+                PacienteRegulacao.score_prioridade,
+                PacienteRegulacao.classificacao_risco
+            )
+            .filter(PacienteRegulacao.status == status, PacienteRegulacao.id > ultimo_id)
+            .order_by(PacienteRegulacao.id)
+            .limit(tamanho_lote)
+            .all()
+        )
+        if not lote:
+            return
+        yield lote
+        ultimo_id = lote[-1].id
+
+
+def retriar_fila(db: Session, status: str = "AGUARDANDO_REGULACAO", dry_run: bool = True,
+                 tamanho_lote: int = TAMANHO_LOTE_PADRAO, max_diferencas: int = 100) -> Dict[str, Any]:
+    """
+    Re-triagem de todos os pacientes de um status
+
+    Só os pacientes cujo score ou classificação mudou são gravados, com a
+    justificativa_tecnica da re-triagem no lugar da anterior.
+    Retorna totais, transições de classificação (ex.: 'AMARELO->VERMELHO'),
+    até max_diferencas diferenças e a vazão em pacientes por segundo.
+    """
+    inicio = time.perf_counter()
+    total = alterados = lotes = 0
+    transicoes: Counter = Counter()
+    diferencas: List[Dict[str, Any]] = []
+
+    for lote in iterar_fila(db, status, max(1, tamanho_lote)):
+        lotes += 1
+        total += len(lote)
+        resultado = analisar_lote([linha._asdict() for linha in lote])
+
+        score_novo = resultado["score_prioridade"]
+        classificacao_nova = resultado["classificacao_risco"]
+        score_anterior = np.array([-1 if l.score_prioridade is None else l.score_prioridade for l in lote], dtype=np.int64)
+        classificacao_anterior = np.array([l.classificacao_risco or "" for l in lote], dtype=str)
+
+        mudou = (score_anterior != score_novo) | (classificacao_anterior != classificacao_nova)
+        posicoes = np.flatnonzero(mudou)
+        if not len(posicoes):
+            continue
+        alterados += len(posicoes)
+
+        for i in posicoes:
+            transicoes[f"{classificacao_anterior[i] or 'SEM_CLASSIFICACAO'}->{classificacao_nova[i]}"] += 1
+            if len(diferencas) < max_diferencas:
+                diferencas.append({
+                    "protocolo": lote[i].protocolo,
+                    "cid": lote[i].cid,
+                    "score_anterior": lote[i].score_prioridade,
+                    "score_novo": int(score_novo[i]),
+                    "classificacao_anterior": lote[i].classificacao_risco,
+                    "classificacao_nova": str(classificacao_nova[i])
+                })
+
+        if not dry_run:
+            agora = datetime.utcnow()
+            db.bulk_update_mappings(PacienteRegulacao, [
+                {
+                    "id": lote[i].id,
+                    "score_prioridade": int(score_novo[i]),
+                    "classificacao_risco": str(classificacao_nova[i]),
+                    "justificativa_tecnica": justificativa_retriagem(
+                        lote[i].protocolo, lote[i].cid, int(resultado["score_cid"][i]),
+                        int(resultado["score_sintomas"][i]), bool(resultado["urgente"][i]),
+                        lote[i].score_prioridade, lote[i].classificacao_risco,
+                        int(score_novo[i]), str(classificacao_nova[i]), agora
+                    ),
+                    "updated_at": agora
+                }
+                for i in posicoes
+            ])
+            db.commit()
+
+    tempo = time.perf_counter() - inicio
+    logger.info(f"✅ Re-triagem {'(dry run) ' if dry_run else ''}de {status}: {total} pacientes, "
+                f"{alterados} alterados em {tempo:.2f}s")
+    return {
+        "status": status,
+        "dry_run": dry_run,
+        "total_analisados": total,
+        "total_alterados": alterados,
+        "lotes": lotes,
+        "transicoes": dict(transicoes.most_common()),
+        "diferencas": diferencas,
+        "diferencas_truncadas": alterados > len(diferencas),
+        "tempo_s": round(tempo, 3),
+        "pacientes_por_segundo": round(total / tempo, 1) if tempo > 0 else None
+    }
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DOS BACKENDS DO BIOBERT - LIFE IA
+Compara os backends de inferência em CPU (BIOBERT_BACKEND):
+
+- pytorch       : fp32 (referência)
+- pytorch_int8  : quantização dinâmica int8
+- onnx          : ONNX Runtime
+
+Métricas coletadas:
+- Paridade com o fp32 no corpus fixo (score de confiança, similaridade dos embeddings)
+- Latência p50/p95 por texto e por lote de 8 textos
+- Memória: RSS após carregar o modelo (cada backend medido em processo próprio)
+
+Uso:
+    python benchmark_biobert_backends.py [--backends pytorch,pytorch_int8,onnx] [--repeticoes 5]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, Any, List
+
+DIR_SHARED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.append(DIR_SHARED)
+
+CORPUS_PATH = os.path.join(DIR_SHARED, "corpus_paridade_biobert.json")
+MODELO_PADRAO = os.getenv("BIOBERT_MODELO", "dmis-lab/biobert-base-cased-v1.1")
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+def carregar_corpus() -> List[str]:
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)["textos"]
+
+
+def rss_mb() -> float:
+    """RSS atual do processo (Linux: /proc/self/status)"""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def medir_backend(tipo: str, repeticoes: int) -> Dict[str, Any]:
+    """Executado em processo próprio: memória e latência de um backend"""
+    from transformers import AutoTokenizer
+    from biobert_backends import BACKENDS
+
+    corpus = carregar_corpus()
+    rss_inicial = rss_mb()
+    inicio = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(MODELO_PADRAO)
+    backend = BACKENDS[tipo](MODELO_PADRAO, tokenizer)
+    tempo_carga = time.perf_counter() - inicio
+    rss_carregado = rss_mb()
+
+    def tokenizar(textos):
+        return dict(tokenizer(textos, return_tensors="np", truncation=True, max_length=512, padding="longest"))
+
+    # Aquecimento
+    backend.inferir(tokenizar(corpus[:2]))
+
+    individuais = []
+    for _ in range(repeticoes):
+        for texto in corpus:
+            entradas = tokenizar([texto])
+            t0 = time.perf_counter()
+            backend.inferir(entradas)
+            individuais.append((time.perf_counter() - t0) * 1000)
+
+    lotes = []
+    for _ in range(repeticoes):
+        for i in range(0, len(corpus), 8):
+            entradas = tokenizar(corpus[i:i + 8])
+            t0 = time.perf_counter()
+            backend.inferir(entradas)
+            lotes.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        "backend": tipo,
+        "tempo_carga_s": round(tempo_carga, 2),
+        "rss_modelo_mb": round(rss_carregado - rss_inicial, 1),
+        "rss_pico_mb": round(rss_mb(), 1),
+        "p50_texto_ms": round(statistics.median(individuais), 2),
+        "p95_texto_ms": round(percentil(individuais, 0.95), 2),
+        "p50_lote8_ms": round(statistics.median(lotes), 2),
+        "p95_lote8_ms": round(percentil(lotes, 0.95), 2),
+    }
+
+
+def medir_em_subprocesso(tipo: str, repeticoes: int) -> Dict[str, Any]:
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--medir", tipo, "--repeticoes", str(repeticoes)],
+        capture_output=True, text=True
+    )
+    if saida.returncode != 0:
+        return {"backend": tipo, "erro": saida.stderr.strip().splitlines()[-1] if saida.stderr else "falha"}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def verificar_paridade_backends(tipos: List[str]) -> Dict[str, Any]:
+    from transformers import AutoTokenizer
+    from biobert_backends import BACKENDS, BackendPyTorch, verificar_paridade
+
+    corpus = carregar_corpus()
+    tokenizer = AutoTokenizer.from_pretrained(MODELO_PADRAO)
+    referencia = BackendPyTorch(MODELO_PADRAO, tokenizer)
+
+    resultados = {}
+    for tipo in tipos:
+        if tipo == BackendPyTorch.nome:
+            continue
+        try:
+            candidato = BACKENDS[tipo](MODELO_PADRAO, tokenizer)
+        except ImportError as e:
+            resultados[tipo] = {"backend": tipo, "erro": str(e), "aprovado": False}
+            continue
+        resultados[tipo] = verificar_paridade(referencia, candidato, tokenizer, corpus)
+        del candidato
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends do BioBERT")
+    parser.add_argument("--backends", default="pytorch,pytorch_int8,onnx")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--medir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir_backend(args.medir, args.repeticoes)))
+        return
+
+    tipos = [t.strip() for t in args.backends.split(",") if t.strip()]
+
+    print_header("BENCHMARK BACKENDS BIOBERT - LIFE IA")
+    print(f"🧬 Modelo: {MODELO_PADRAO}")
+    print(f"📄 Corpus: {len(carregar_corpus())} prontuários ({CORPUS_PATH})")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    # 1. Paridade com fp32
+    print_header("1. PARIDADE COM FP32")
+    paridade = verificar_paridade_backends(tipos)
+    for tipo, resultado in paridade.items():
+        print(f"\n📊 {tipo}")
+        if "erro" in resultado:
+            print_metric("Erro", resultado["erro"], "error")
+            continue
+        print_metric("Máx. diferença de confiança", f"{resultado['max_diferenca_confianca']:.5f}",
+                     "ok" if resultado["max_diferenca_confianca"] <= 0.02 else "error")
+        print_metric("Mín. similaridade cosseno", f"{resultado['min_similaridade_cosseno']:.5f}",
+                     "ok" if resultado["min_similaridade_cosseno"] >= 0.99 else "error")
+        print_metric("Divergências de nível", str(len(resultado["divergencias_nivel"])),
+                     "ok" if not resultado["divergencias_nivel"] else "error")
+        print_metric("Resultado", "APROVADO" if resultado["aprovado"] else "REPROVADO",
+                     "ok" if resultado["aprovado"] else "error")
+
+    # 2. Latência e memória (processo isolado por backend)
+    print_header("2. LATÊNCIA E MEMÓRIA")
+    desempenho = {}
+    for tipo in tipos:
+        print(f"\n📊 {tipo}")
+        resultado = medir_em_subprocesso(tipo, args.repeticoes)
+        desempenho[tipo] = resultado
+        if "erro" in resultado:
+            print_metric("Erro", resultado["erro"], "error")
+            continue
+        print_metric("Carga", f"{resultado['tempo_carga_s']:.2f} s")
+        print_metric("RSS do modelo", f"{resultado['rss_modelo_mb']:.0f} MB")
+        print_metric("Latência p50 / p95 (1 texto)", f"{resultado['p50_texto_ms']:.1f} / {resultado['p95_texto_ms']:.1f} ms")
+        print_metric("Latência p50 / p95 (lote 8)", f"{resultado['p50_lote8_ms']:.1f} / {resultado['p95_lote8_ms']:.1f} ms")
+
+    with open("benchmark_biobert_backends.json", "w", encoding="utf-8") as f:
+        json.dump({"modelo": MODELO_PADRAO, "paridade": paridade, "desempenho": desempenho,
+                   "data": datetime.now().isoformat()}, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados salvos em: benchmark_biobert_backends.json")
+
+    if any(not r.get("aprovado") for r in paridade.values()):
+        print(f"\n{Colors.RED}✗ Algum backend não atingiu a paridade com o fp32{Colors.END}")
+        sys.exit(1)
+    print(f"\n✅ Benchmark concluído com sucesso!")
+
+
+if __name__ == "__main__":
+    main()
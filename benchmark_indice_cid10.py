@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DO ÍNDICE CID-10 - LIFE IA
+Compara as tabelas antigas (dicionários percorridos com startswith em
+analisar_com_ia_inteligente e no pipeline de hospitais) com a trie de
+prefixos do índice CID-10, em todo o espaço de códigos A00-Z99 (+ subcódigos)
+
+Métricas coletadas:
+- Paridade do tipo de caso (clássico e RAG, com e sem trauma nos sintomas)
+- Paridade de risco e especialidades com as tabelas antigas em todo o espaço de códigos
+- Cobertura por capítulo
+- Tempo médio por consulta (tabelas antigas x trie)
+
+Uso:
+    python benchmark_indice_cid10.py [--repeticoes 5]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared"))
+
+from indice_cid10 import indice_cid10  # noqa: E402
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+# ============================================================================
+# TABELAS ANTIGAS (reprodução fiel, para comparação)
+# ============================================================================
+
+CIDS_CRITICOS_ANTIGO = {
+    'I21': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Infarto Agudo do Miocárdio'},
+    'I46': {'score': 10, 'risco': 'VERMELHO', 'desc': 'Parada Cardíaca'},
+    'G93.1': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Lesão Cerebral Anóxica'},
+    'R57': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Choque'},
+    'J44.1': {'score': 8, 'risco': 'VERMELHO', 'desc': 'DPOC com Exacerbação'},
+    'N17': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Insuficiência Renal Aguda'},
+    'K92.2': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Hemorragia Gastrointestinal'},
+    'S06': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Traumatismo Craniano'},
+    'I63': {'score': 8, 'risco': 'VERMELHO', 'desc': 'AVC Isquêmico'},
+    'I61': {'score': 9, 'risco': 'VERMELHO', 'desc': 'AVC Hemorrágico'},
+    'J18': {'score': 7, 'risco': 'AMARELO', 'desc': 'Pneumonia'},
+    'E11': {'score': 6, 'risco': 'AMARELO', 'desc': 'Diabetes Mellitus'},
+    'I10': {'score': 5, 'risco': 'AMARELO', 'desc': 'Hipertensão Arterial'},
+    'M79': {'score': 4, 'risco': 'VERDE', 'desc': 'Dor Musculoesquelética'},
+    'M54': {'score': 3, 'risco': 'VERDE', 'desc': 'Dor Lombar'}
+}
+
+MAPEAMENTO_CID_ANTIGO = {
+    "I21": ["CARDIOLOGIA", "CARDIOLOGIA_INTERVENCIONISTA", "HEMODINAMICA", "UTI_CARDIOLOGICA"],
+    "I20": ["CARDIOLOGIA", "HEMODINAMICA"],
+    "I46": ["CARDIOLOGIA", "UTI_CARDIOLOGICA", "EMERGENCIA_GERAL"],
+    "I50": ["CARDIOLOGIA", "UTI_CARDIOLOGICA"],
+    "I47": ["CARDIOLOGIA", "UTI_CARDIOLOGICA"],
+    "I61": ["NEUROLOGIA", "NEUROCIRURGIA", "AVC", "UTI_GERAL"],
+    "I63": ["NEUROLOGIA", "AVC", "UTI_GERAL"],
+    "G93": ["NEUROLOGIA", "NEUROCIRURGIA", "UTI_GERAL"],
+    "S06": ["NEUROCIRURGIA", "NEUROCIRURGIA_TRAUMA", "UTI_TRAUMA"],
+    "G40": ["NEUROLOGIA", "EPILEPSIA"],
+    "S72": ["TRAUMATOLOGIA", "ORTOPEDIA_TRAUMA", "CIRURGIA_ORTOPEDICA"],
+    "S82": ["TRAUMATOLOGIA", "ORTOPEDIA_TRAUMA"],
+    "S42": ["ORTOPEDIA", "TRAUMATOLOGIA"],
+    "T07": ["TRAUMATOLOGIA", "UTI_TRAUMA", "POLITRAUMATISMO"],
+    "M54": ["ORTOPEDIA", "CLINICA_MEDICA"],
+    "M79": ["ORTOPEDIA", "CLINICA_MEDICA"],
+    "M25": ["ORTOPEDIA"],
+    "M17": ["ORTOPEDIA"],
+    "K35": ["CIRURGIA_GERAL", "CIRURGIA_GERAL_URGENCIA"],
+    "K80": ["CIRURGIA_GERAL"],
+    "K92": ["CIRURGIA_GERAL", "CIRURGIA_GERAL_URGENCIA"],
+    "J18": ["CLINICA_MEDICA", "UTI_GERAL"],
+    "J44": ["CLINICA_MEDICA", "UTI_GERAL"],
+    "J45": ["CLINICA_MEDICA"],
+    "N17": ["NEFROLOGIA", "HEMODIALISE", "UTI_GERAL"],
+    "N18": ["NEFROLOGIA", "HEMODIALISE"],
+    "A15": ["INFECTOLOGIA", "TUBERCULOSE"],
+    "B20": ["INFECTOLOGIA", "HIV_AIDS"],
+    "A90": ["INFECTOLOGIA", "DENGUE"],
+    "O80": ["OBSTETRICIA"],
+    "O82": ["OBSTETRICIA", "CIRURGIA_GERAL"],
+    "O14": ["OBSTETRICIA", "ALTO_RISCO_OBSTETRICO"],
+    "P07": ["NEONATOLOGIA", "UTI_NEONATAL"],
+    "J20": ["PEDIATRIA"],
+}
+
+TRAUMA_ANTIGO = ["S0", "S1", "S2", "S3", "S4", "S5", "S6", "S7", "S8", "S9", "T0"]
+
+
+def risco_antigo(cid: str):
+    for cid_code, info in CIDS_CRITICOS_ANTIGO.items():
+        if cid.startswith(cid_code):
+            return info
+    return None
+
+
+def especialidades_antigas(cid: str):
+    for cid_prefix, specs in MAPEAMENTO_CID_ANTIGO.items():
+        if cid.startswith(cid_prefix):
+            return specs
+    return []
+
+
+def tipo_caso_antigo(cid: str, sintomas: str) -> str:
+    if any(trauma_cid in cid for trauma_cid in TRAUMA_ANTIGO):
+        return "TRAUMA"
+    if any(cid.startswith(emerg) for emerg in ["I21", "I46", "I61", "I63", "N17", "K35"]):
+        return "EMERGENCIA"
+    if cid.startswith("O"):
+        return "OBSTETRICIA"
+    if cid.startswith("P"):
+        return "PEDIATRIA"
+    if cid.startswith("A") or cid.startswith("B"):
+        return "INFECTOLOGIA"
+    if cid.startswith("M") and "trauma" not in sintomas.lower():
+        return "ORTOPEDIA_ELETIVA"
+    return "CLINICO_GERAL"
+
+
+def tipo_caso_rag_antigo(cid: str, sintomas: str) -> str:
+    if not cid:
+        return "CLINICO_GERAL"
+    if any(cid.startswith(trauma) for trauma in TRAUMA_ANTIGO):
+        return "TRAUMA"
+    if cid.startswith(("I21", "I46", "I20", "I50")):
+        return "EMERGENCIA_CARDIOLOGICA"
+    if cid.startswith(("I61", "I63", "G93", "S06")):
+        return "EMERGENCIA_NEUROLOGICA"
+    if cid.startswith("O"):
+        return "OBSTETRICIA"
+    if cid.startswith("P"):
+        return "PEDIATRIA"
+    if cid.startswith(("A", "B")):
+        return "INFECTOLOGIA"
+    if cid.startswith("M"):
+        if any(palavra in sintomas.lower() for palavra in ["trauma", "acidente", "queda", "fratura"]):
+            return "TRAUMA"
+        return "ORTOPEDIA_ELETIVA"
+    if cid.startswith("J"):
+        return "PNEUMOLOGIA"
+    if cid.startswith("N"):
+        return "NEFROLOGIA"
+    if cid.startswith("K"):
+        return "CIRURGIA_GERAL"
+    return "CLINICO_GERAL"
+
+
+# ============================================================================
+# TRIE
+# ============================================================================
+
+def tipo_caso_trie(cid: str, sintomas: str) -> str:
+    return indice_cid10.tipo_caso(cid, "trauma" in sintomas.lower())
+
+
+def tipo_caso_rag_trie(cid: str, sintomas: str) -> str:
+    if not cid:
+        return "CLINICO_GERAL"
+    trauma = any(palavra in sintomas.lower() for palavra in ["trauma", "acidente", "queda", "fratura"])
+    return indice_cid10.tipo_caso(cid, trauma, rag=True)
+
+
+def gerar_codigos():
+    """Todas as categorias A00-Z99 e seus subcódigos .0-.9"""
+    codigos = []
+    for letra in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        for n in range(100):
+            categoria = f"{letra}{n:02d}"
+            codigos.append(categoria)
+            codigos.extend(f"{categoria}.{s}" for s in range(10))
+    return codigos
+
+
+def medir(funcao, codigos, repeticoes: int) -> float:
+    """Mediana do tempo por consulta em microssegundos"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for codigo in codigos:
+            funcao(codigo)
+        tempos.append((time.perf_counter() - inicio) / len(codigos) * 1e6)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice CID-10")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK ÍNDICE CID-10 - LIFE IA")
+    print(f"📚 Índice: versão {indice_cid10.versao} ({indice_cid10.total_nos} nós)")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    codigos = gerar_codigos()
+    print(f"🔢 Códigos avaliados: {len(codigos):,}")
+
+    print_header("1. PARIDADE DO TIPO DE CASO")
+    for sintomas in ("", "paciente vítima de trauma após queda"):
+        rotulo = "com trauma" if sintomas else "sem trauma"
+        for nome, antigo, novo in (("Clássico", tipo_caso_antigo, tipo_caso_trie),
+                                   ("RAG", tipo_caso_rag_antigo, tipo_caso_rag_trie)):
+            divergentes = [c for c in codigos if antigo(c, sintomas) != novo(c, sintomas)]
+            paridade = 1 - len(divergentes) / len(codigos)
+            print_metric(f"{nome} ({rotulo})", f"{paridade:.2%}", "ok" if not divergentes else "error")
+            for codigo in divergentes[:5]:
+                print(f"    {codigo}: antigo={antigo(codigo, sintomas)} trie={novo(codigo, sintomas)}")
+
+    print_header("2. RISCO E ESPECIALIDADES")
+    def risco_resumido(risco):
+        return (risco["score"], risco["risco"]) if risco else None
+
+    risco_divergente = [c for c in codigos if risco_resumido(risco_antigo(c)) != risco_resumido(indice_cid10.risco(c))]
+    print_metric("Risco igual à tabela antiga", f"{len(codigos) - len(risco_divergente):,}/{len(codigos):,}",
+                 "ok" if not risco_divergente else "error")
+    for codigo in risco_divergente[:5]:
+        print(f"    {codigo}: antigo={risco_resumido(risco_antigo(codigo))} trie={risco_resumido(indice_cid10.risco(codigo))}")
+
+    esp_divergente = [c for c in codigos if especialidades_antigas(c) != indice_cid10.especialidades(c)]
+    print_metric("Especialidades iguais ao mapeamento antigo", f"{len(codigos) - len(esp_divergente):,}/{len(codigos):,}",
+                 "ok" if not esp_divergente else "error")
+    for codigo in esp_divergente[:5]:
+        print(f"    {codigo}: antigo={especialidades_antigas(codigo)} trie={indice_cid10.especialidades(codigo)}")
+
+    print_header("3. COBERTURA POR CAPÍTULO")
+    print_metric("Códigos em algum capítulo", f"{indice_cid10.cobertura(codigos):.2%}")
+    por_capitulo = {}
+    for codigo in codigos:
+        capitulo = indice_cid10.resolver(codigo).get("capitulo")
+        chave = capitulo["numero"] if capitulo else "(sem capítulo)"
+        por_capitulo[chave] = por_capitulo.get(chave, 0) + 1
+    for chave, total in por_capitulo.items():
+        print(f"    {chave:>15}: {total:,}")
+
+    print_header("4. TEMPO POR CONSULTA")
+    indice_cid10._resolver.cache_clear()
+    consultas = (
+        ("Risco", risco_antigo, indice_cid10.risco),
+        ("Especialidades", especialidades_antigas, indice_cid10.especialidades),
+        ("Tipo de caso RAG", lambda c: tipo_caso_rag_antigo(c, ""), lambda c: tipo_caso_rag_trie(c, "")),
+    )
+    for nome, antigo, novo in consultas:
+        tempo_antigo = medir(antigo, codigos, args.repeticoes)
+        tempo_novo = medir(novo, codigos, args.repeticoes)
+        print(f"\n📊 {nome}")
+        print_metric("Tabela antiga (startswith por entrada)", f"{tempo_antigo:.2f} µs")
+        print_metric("Trie de prefixos", f"{tempo_novo:.2f} µs", "ok" if tempo_novo <= tempo_antigo else "warn")
+
+    print(f"\n✅ Benchmark concluído com sucesso!")
+
+
+if __name__ == "__main__":
+    main()
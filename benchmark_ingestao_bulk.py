@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+TESTE DE CARGA - INGESTÃO EM LOTE MS-INGESTAO - LIFE IA
+Mede linhas/segundo de POST /ingerir-ocupacao-bulk (NDJSON e CSV) em lotes de 10 mil
+leituras, comparando com /ingerir-ocupacao-batch e com o reenvio de um lote já gravado
+(todas as leituras duplicadas)
+
+Sem --url, o MS-Ingestao roda no próprio processo (TestClient) sobre um SQLite temporário.
+
+Uso:
+    python benchmark_ingestao_bulk.py [--lotes 5] [--linhas 10000] [--url http://localhost:8004]
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
+import importlib.util
+from datetime import datetime, timedelta
+
+MICROSERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices")
+
+CAMPOS = ("unidade_id", "unidade_nome", "tipo_leito", "ocupacao_percentual", "leitos_totais",
+          "leitos_ocupados", "leitos_disponiveis", "fonte_dados", "data_coleta")
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+def criar_cliente(url: str = None):
+    """Cliente HTTP para o servidor informado ou TestClient com SQLite temporário"""
+    if url:
+        import httpx
+        return httpx.Client(base_url=url, timeout=300)
+
+    diretorio = tempfile.mkdtemp(prefix="bench_bulk_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(diretorio, 'historico.db')}"
+    os.environ.setdefault("HISTORICO_COMPACTACAO_INTERVALO_S", "0")
+    sys.path.insert(0, MICROSERVICES_DIR)
+    sys.path.insert(0, os.path.join(MICROSERVICES_DIR, "ms-ingestao"))
+    spec = importlib.util.spec_from_file_location("ms_ingestao_main", os.path.join(MICROSERVICES_DIR, "ms-ingestao", "main.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+
+    from fastapi.testclient import TestClient
+    return TestClient(modulo.app)  # o "with" executa startup/shutdown
+
+
+def gerar_lote(numero: int, linhas: int, unidades: int = 200) -> list:
+    """Leituras com data_coleta da fonte: um lote = um instante por série, lotes em minutos distintos"""
+    aleatorio = random.Random(numero)
+    base = datetime.utcnow() - timedelta(hours=3) + timedelta(seconds=numero)
+    registros = []
+    for i in range(linhas):
+        ocupacao = round(aleatorio.uniform(40, 99), 1)
+        registros.append({
+            "unidade_id": f"H{i % unidades:03d}",
+            "unidade_nome": f"Hospital {i % unidades:03d}",
+            "tipo_leito": "UTI" if i % 2 else "ENFERMARIA",
+            "ocupacao_percentual": ocupacao,
+            "leitos_totais": 50,
+            "leitos_ocupados": int(ocupacao / 2),
+            "leitos_disponiveis": 50 - int(ocupacao / 2),
+            "fonte_dados": "CARGA",
+            "data_coleta": (base + timedelta(milliseconds=i)).isoformat()
+        })
+    return registros
+
+
+def como_ndjson(registros: list) -> bytes:
+    return "\n".join(json.dumps(r) for r in registros).encode("utf-8")
+
+
+def como_csv(registros: list) -> bytes:
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=CAMPOS)
+    escritor.writeheader()
+    escritor.writerows(registros)
+    return saida.getvalue().encode("utf-8")
+
+
+def enviar(cliente, caminho: str, **kwargs):
+    inicio = time.perf_counter()
+    resposta = cliente.post(caminho, **kwargs)
+    tempo = time.perf_counter() - inicio
+    resposta.raise_for_status()
+    return resposta.json(), tempo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da ingestão em lote do MS-Ingestao")
+    parser.add_argument("--lotes", type=int, default=5)
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--url", default=None, help="MS-Ingestao em execução (padrão: no próprio processo)")
+    args = parser.parse_args()
+
+    print_header("TESTE DE CARGA - INGESTÃO EM LOTE")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"📦 {args.lotes} lotes de {args.linhas:,} leituras por formato ({args.url or 'TestClient + SQLite'})")
+
+    with criar_cliente(args.url) as cliente:
+        executar_carga(cliente, args)
+
+    print(f"\n✅ Teste de carga concluído com sucesso!")
+
+
+def executar_carga(cliente, args):
+    formatos = (
+        ("NDJSON (/ingerir-ocupacao-bulk)", "/ingerir-ocupacao-bulk",
+         lambda r: {"content": como_ndjson(r), "headers": {"Content-Type": "application/x-ndjson"}}),
+        ("CSV (/ingerir-ocupacao-bulk)", "/ingerir-ocupacao-bulk",
+         lambda r: {"content": como_csv(r), "headers": {"Content-Type": "text/csv"}}),
+        ("JSON (/ingerir-ocupacao-batch)", "/ingerir-ocupacao-batch",
+         lambda r: {"json": {"registros": r}}),
+    )
+
+    numero_lote = 0
+    ultimo_lote = None
+    for indice, (nome, caminho, corpo) in enumerate(formatos, 1):
+        print_header(f"{indice}. {nome}")
+        total_linhas, total_tempo = 0, 0.0
+        for _ in range(args.lotes):
+            numero_lote += 1
+            ultimo_lote = gerar_lote(numero_lote, args.linhas)
+            resposta, tempo = enviar(cliente, caminho, **corpo(ultimo_lote))
+            duplicados = resposta.get("duplicados", 0)
+            if duplicados:
+                print_metric("Duplicadas inesperadas", str(duplicados), "error")
+            total_linhas += args.linhas
+            total_tempo += tempo
+        print_metric("Linhas/segundo", f"{total_linhas / total_tempo:,.0f}")
+        print_metric("Tempo por lote", f"{total_tempo / args.lotes * 1000:.0f}ms")
+
+    print_header(f"{len(formatos) + 1}. REENVIO (DEDUPLICAÇÃO)")
+    resposta, tempo = enviar(cliente, "/ingerir-ocupacao-bulk", content=como_ndjson(ultimo_lote),
+                             headers={"Content-Type": "application/x-ndjson"})
+    print_metric("Linhas/segundo", f"{args.linhas / tempo:,.0f}")
+    print_metric("Duplicadas ignoradas", f"{resposta['duplicados']:,} de {resposta['recebidos']:,}",
+                 "ok" if resposta["duplicados"] == resposta["recebidos"] else "error")
+
+
+if __name__ == "__main__":
+    main()
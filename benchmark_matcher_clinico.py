@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DO MATCHER CLÍNICO - LIFE IA
+Compara a busca antiga (um `termo in texto.lower()` por termo, em cada um dos
+três pontos de chamada) e a mesma busca com remoção de acentos (cobertura
+equivalente) com o matcher do léxico clínico (texto dobrado uma vez + posições)
+
+Métricas coletadas:
+- Tempo mediano por texto (sintomas + entidades + protocolos) em textos longos de OCR
+- Razão de tempo de cada busca sobre o matcher (> 1: matcher mais rápido), colorida pelo valor
+- Termos adicionais encontrados pelo matcher (variações de acento/caixa)
+
+Uso:
+    python benchmark_matcher_clinico.py [--repeticoes 20]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared"))
+
+from lexico_clinico import (  # noqa: E402
+    SINTOMAS_CRITICOS, ENTIDADES_MEDICAS, PROTOCOLOS_ESPECIAIS, LEXICO_VERSAO, matcher_clinico,
+    detectar_sintomas_criticos, identificar_entidades, detectar_protocolos, _primeiras_no_texto, dobrar_texto
+)
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+def status_razao(razao: float) -> str:
+    """Verde: matcher mais rápido | amarelo: até 25% mais lento | vermelho: além disso"""
+    return "ok" if razao >= 1 else "warn" if razao >= 0.8 else "erro"
+
+
+FRASES_OCR = [
+    "Paciente admitido com DOR NO PEITO e falta de ar há 2 horas.",
+    "Refere vomito e febre alta, PRESSAO BAIXA na admissão.",
+    "Evolui com rebaixamento do nível de consciência, Glasgow 9.",
+    "TC de crânio sem alterações agudas. ECG com supra de ST.",
+    "Histórico de IAM prévio, diabetes e hipertensão arterial.",
+    "Sinais vitais: PA 90x60 mmHg, FC 120 bpm, SatO2 88%.",
+    "Exame físico: abdômen flácido, indolor à palpação; membros sem edema.",
+    "Prescrito dipirona 1g EV, ondansetrona 8mg EV, SF 0,9% 1000ml.",
+    "Acidente automobilístico com trauma em membros inferiores.",
+    "Enfermagem relata cianose de extremidades e taquicardia.",
+]
+
+
+def gerar_texto_ocr(tamanho: int, semente: int = 42) -> str:
+    """Texto longo de prontuário digitalizado: frases clínicas + ruído de OCR"""
+    aleatorio = random.Random(semente)
+    partes, total = [], 0
+    while total < tamanho:
+        frase = aleatorio.choice(FRASES_OCR)
+        if aleatorio.random() < 0.2:
+            frase = frase.replace("o", "0", 1)  # ruído típico de OCR
+        partes.append(frase)
+        total += len(frase) + 1
+    return " ".join(partes)[:tamanho]
+
+
+def busca_antiga(texto: str):
+    """Reprodução da busca anterior nos três pontos de chamada"""
+    texto_lower = texto.lower()
+    sintomas = [info["desc"] for termo, info in SINTOMAS_CRITICOS.items() if termo in texto_lower]
+    entidades = [(c, t) for c, termos in ENTIDADES_MEDICAS.items() for t in termos if t in texto_lower]
+    palavras_obito = PROTOCOLOS_ESPECIAIS["PROTOCOLO_OBITO"] + ["obito"]
+    obito = any(p in texto_lower for p in palavras_obito)
+    queimados = any(p in texto_lower for p in ["queimadura", "queimado"])
+    return sintomas, entidades, obito, queimados
+
+
+def busca_antiga_sem_acentos(texto: str):
+    """Mesma busca por substring, com texto e termos sem acento (cobertura equivalente, sem posições)"""
+    texto_dobrado = dobrar_texto(texto)[0]
+    sintomas = [info["desc"] for termo, info in SINTOMAS_CRITICOS.items() if dobrar_texto(termo)[0] in texto_dobrado]
+    entidades = [(c, t) for c, termos in ENTIDADES_MEDICAS.items() for t in termos if t in texto_dobrado]
+    obito = any(dobrar_texto(p)[0] in texto_dobrado for p in PROTOCOLOS_ESPECIAIS["PROTOCOLO_OBITO"])
+    queimados = any(p in texto_dobrado for p in ["queimadura", "queimado"])
+    return sintomas, entidades, obito, queimados
+
+
+def busca_nova(texto: str):
+    _primeiras_no_texto.cache_clear()  # mede a varredura, não o cache por texto
+    sintomas = [s["desc"] for s in detectar_sintomas_criticos(texto)]
+    entidades = [(e["categoria"], e["termo"]) for e in identificar_entidades(texto)]
+    protocolos = detectar_protocolos(texto)
+    return sintomas, entidades, "PROTOCOLO_OBITO" in protocolos, "PROTOCOLO_QUEIMADOS" in protocolos
+
+
+def medir(funcao, texto: str, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(texto)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do matcher clínico")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK MATCHER CLÍNICO - LIFE IA")
+    print(f"📚 Léxico: versão {LEXICO_VERSAO} ({matcher_clinico.total_termos} termos)")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    print_header("1. TEMPO POR TEXTO (SINTOMAS + ENTIDADES + PROTOCOLOS)")
+    for tamanho in (500, 5_000, 50_000, 200_000):
+        texto = gerar_texto_ocr(tamanho)
+        antigo = medir(busca_antiga, texto, args.repeticoes)
+        antigo_sem_acentos = medir(busca_antiga_sem_acentos, texto, args.repeticoes)
+        novo = medir(busca_nova, texto, args.repeticoes)
+        print(f"\n📊 Texto de {tamanho:,} caracteres")
+        print_metric("Busca antiga (substring por termo)", f"{antigo:.3f} ms")
+        print_metric("Substring por termo + remoção de acentos", f"{antigo_sem_acentos:.3f} ms")
+        print_metric("Matcher do léxico", f"{novo:.3f} ms", status_razao(antigo / novo) if novo else "ok")
+        if novo:
+            print_metric("Razão busca antiga / matcher", f"{antigo / novo:.2f}x", status_razao(antigo / novo))
+            print_metric("Razão cobertura equivalente / matcher", f"{antigo_sem_acentos / novo:.2f}x",
+                         status_razao(antigo_sem_acentos / novo))
+
+    print_header("2. COBERTURA (ACENTOS E CAIXA)")
+    texto = " ".join(FRASES_OCR)
+    sintomas_antigos, entidades_antigas, _, _ = busca_antiga(texto)
+    sintomas_novos, entidades_novas, _, _ = busca_nova(texto)
+    print_metric("Sintomas (antiga / matcher)", f"{len(sintomas_antigos)} / {len(sintomas_novos)}")
+    print_metric("Entidades (antiga / matcher)", f"{len(entidades_antigas)} / {len(entidades_novas)}")
+    adicionais = sorted(set(entidades_novas) - set(entidades_antigas))
+    if adicionais:
+        print_metric("Entidades encontradas só pelo matcher", ", ".join(t for _, t in adicionais), "warn")
+    removidas = sorted(set(entidades_antigas) - set(entidades_novas))
+    if removidas:
+        print_metric("Falsos positivos eliminados (palavra inteira)", ", ".join(t for _, t in removidas))
+
+    print(f"\n✅ Benchmark concluído com sucesso!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK MS-INGESTAO - HOSPITAIS DISPONÍVEIS - LIFE IA
+Compara a montagem da janela de tendência de /api/v1/inteligencia/hospitais-disponiveis:
+consulta do último registro + uma consulta de histórico por unidade (1 + N) versus
+buscar_janela_ocupacao (ocupacao_atual + uma consulta com ROW_NUMBER) versus o motor de tendência
+incremental em memória (motor_tendencia.py)
+
+Métricas coletadas:
+- Consultas SQL e tempo por chamada (janela e endpoint completo)
+- Divergências de último registro/histórico entre os dois caminhos
+- Reconstrução do motor, custo por leitura ingerida e paridade com calcular_tendencia
+
+Uso:
+    python benchmark_ms_ingestao.py [--unidades 120] [--dias 7] [--repeticoes 5]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import importlib.util
+from datetime import datetime, timedelta
+
+MICROSERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices")
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+def carregar_ms_ingestao(database_url: str):
+    """Importa ms-ingestao/main.py apontando para um banco SQLite temporário"""
+    os.environ["DATABASE_URL"] = database_url
+    sys.path.insert(0, MICROSERVICES_DIR)
+    sys.path.insert(0, os.path.join(MICROSERVICES_DIR, "ms-ingestao"))
+    spec = importlib.util.spec_from_file_location("ms_ingestao_main", os.path.join(MICROSERVICES_DIR, "ms-ingestao", "main.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def popular_historico(ms, unidades: int, dias: int, semente: int = 42) -> int:
+    """Uma semana (por padrão) de leituras a cada 30 min, UTI e ENFERMARIA por unidade"""
+    aleatorio = random.Random(semente)
+    agora = datetime.utcnow()
+    amostras = dias * 48
+    linhas = []
+    for u in range(unidades):
+        for t, tipo in enumerate(("UTI", "ENFERMARIA")):
+            ocupacao = aleatorio.uniform(40, 95)
+            for i in range(amostras):
+                ocupacao = min(100.0, max(0.0, ocupacao + aleatorio.uniform(-3, 3.2)))
+                linhas.append({
+                    "unidade_id": f"H{u:03d}",
+                    "unidade_nome": f"Hospital {u:03d}",
+                    "tipo_leito": tipo,
+                    "ocupacao_percentual": round(ocupacao, 1),
+                    "leitos_totais": 50,
+                    "leitos_ocupados": int(ocupacao / 2),
+                    "leitos_disponiveis": 50 - int(ocupacao / 2),
+                    # Séries deslocadas em segundos para não haver empate de data entre tipos
+                    "data_coleta": agora - timedelta(minutes=30 * (amostras - 1 - i), seconds=t * 7 + u % 5),
+                    "fonte_dados": "SIMULADOR"
+                })
+    db = ms.SessionLocal()
+    try:
+        db.bulk_insert_mappings(ms.HistoricoOcupacao, linhas)
+        ms.reconstruir_ocupacao_atual(db)  # carga direta não passa pela ingestão
+        db.commit()
+    finally:
+        db.close()
+    return len(linhas)
+
+
+def janela_uma_consulta_por_unidade(ms, db, janela_inicio):
+    """Caminho anterior: último registro por unidade + histórico de cada unidade (1 + N consultas)"""
+    from sqlalchemy import func
+    H = ms.HistoricoOcupacao
+    subquery = db.query(H.unidade_id, func.max(H.data_coleta).label('max_data')).filter(
+        H.data_coleta >= janela_inicio
+    ).group_by(H.unidade_id).subquery()
+    ultimos = db.query(H).join(
+        subquery, (H.unidade_id == subquery.c.unidade_id) & (H.data_coleta == subquery.c.max_data)
+    ).all()
+    return [
+        (registro, db.query(H).filter(
+            H.unidade_id == registro.unidade_id, H.data_coleta >= janela_inicio
+        ).order_by(H.data_coleta.asc()).limit(12).all())
+        for registro in ultimos
+    ]
+
+
+class ContadorConsultas:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.total = 0
+        event.listen(engine, "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+def medir(funcao, contador: ContadorConsultas, repeticoes: int):
+    consultas_antes = contador.total
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    tempo_ms = (time.perf_counter() - inicio) / repeticoes * 1000
+    return resultado, tempo_ms, (contador.total - consultas_antes) // repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de hospitais-disponiveis no MS-Ingestao")
+    parser.add_argument("--unidades", type=int, default=120)
+    parser.add_argument("--dias", type=int, default=7)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK MS-INGESTAO - HOSPITAIS DISPONÍVEIS")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    diretorio = tempfile.mkdtemp(prefix="bench_ingestao_")
+    ms = carregar_ms_ingestao(f"sqlite:///{os.path.join(diretorio, 'historico.db')}")
+    total = popular_historico(ms, args.unidades, args.dias)
+    print(f"📦 {total:,} leituras ({args.unidades} unidades x 2 tipos de leito x {args.dias} dias a cada 30 min)")
+
+    contador = ContadorConsultas(ms.engine)
+    db = ms.SessionLocal()
+    janela_inicio = datetime.utcnow() - timedelta(hours=ms.JANELA_ANALISE_HORAS)
+
+    print_header("1. JANELA DE TENDÊNCIA")
+    antigo, tempo_antigo, consultas_antigo = medir(
+        lambda: janela_uma_consulta_por_unidade(ms, db, janela_inicio), contador, args.repeticoes)
+    novo, tempo_novo, consultas_novo = medir(
+        lambda: ms.buscar_janela_ocupacao(db, janela_inicio), contador, args.repeticoes)
+
+    def chaves(janela):
+        # Caminho novo devolve o estado atual (ocupacao_atual), que aponta para a leitura do histórico
+        return {r.unidade_id: (getattr(r, "historico_id", None) or r.id, [h.id for h in historico]) for r, historico in janela}
+
+    divergencias = sum(1 for u, v in chaves(antigo).items() if chaves(novo).get(u) != v)
+    print_metric("1 + N consultas", f"{tempo_antigo:.1f}ms ({consultas_antigo} consultas)")
+    print_metric("buscar_janela_ocupacao", f"{tempo_novo:.1f}ms ({consultas_novo} consulta)",
+                 "ok" if tempo_novo <= tempo_antigo else "warn")
+    print_metric("Divergências", f"{divergencias} de {len(antigo)} unidades", "ok" if divergencias == 0 else "error")
+
+    print_header("2. ENDPOINT COMPLETO")
+    for tipo_leito in (None, "UTI"):
+        resposta, tempo, consultas = medir(
+            lambda: asyncio.run(ms.get_hospitais_preditivo(tipo_leito=tipo_leito, db=db)), contador, args.repeticoes)
+        print_metric(f"tipo_leito={tipo_leito or 'todos'}",
+                     f"{tempo:.1f}ms, {consultas} consulta(s), {len(resposta['hospitais'])} hospitais")
+
+    print_header("3. MOTOR DE TENDÊNCIA INCREMENTAL")
+    motor = ms.motor_tendencia
+    inicio = time.perf_counter()
+    motor.reconstruir(db, ms.HistoricoOcupacao)
+    print_metric("Reconstrução", f"{(time.perf_counter() - inicio) * 1000:.1f}ms ({motor.status()['leituras_em_memoria']:,} leituras)")
+
+    for tipo_leito in (None, "UTI"):
+        resposta, tempo, consultas = medir(
+            lambda: asyncio.run(ms.get_hospitais_preditivo(tipo_leito=tipo_leito, db=db)), contador, args.repeticoes)
+        print_metric(f"Endpoint tipo_leito={tipo_leito or 'todos'}",
+                     f"{tempo:.1f}ms, {consultas} consulta(s), {len(resposta['hospitais'])} hospitais",
+                     "ok" if consultas == 0 else "warn")
+
+    # Paridade: série do motor x calcular_tendencia sobre a mesma janela lida do banco
+    H = ms.HistoricoOcupacao
+    janela_inicio = datetime.utcnow() - timedelta(hours=ms.JANELA_ANALISE_HORAS)
+    divergencias = 0
+    for ultima, resultado in motor.series_por_unidade("UTI"):
+        historico = db.query(H).filter(
+            H.unidade_id == ultima.unidade_id, H.tipo_leito == "UTI", H.data_coleta >= janela_inicio
+        ).all()
+        esperado = ms.calcular_tendencia(historico)
+        if any(resultado[c] != esperado[c] for c in ("tendencia", "variacao", "previsao_saturacao_min", "inclinacao_por_hora")):
+            divergencias += 1
+    print_metric("Divergências (UTI)", f"{divergencias} de {args.unidades} unidades", "ok" if divergencias == 0 else "error")
+
+    leituras = [
+        ms.LeituraOcupacao(f"H{i % args.unidades:03d}", "Hospital", "UTI", 70.0 + i % 7, 50, 35, 15,
+                           datetime.utcnow(), "BENCHMARK")
+        for i in range(10000)
+    ]
+    inicio = time.perf_counter()
+    for leitura in leituras:
+        motor.registrar(leitura)
+    print_metric("Custo por leitura ingerida", f"{(time.perf_counter() - inicio) / len(leituras) * 1e6:.1f}µs")
+
+    db.close()
+    print(f"\n✅ Benchmark concluído com sucesso!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DE INICIALIZAÇÃO - LIFE IA
+Mede o tempo até a API unificada responder e o consumo de memória
+
+Métricas coletadas:
+- Tempo de importação do main_unified e RSS de pico após a importação
+- Tempo até o primeiro 200 em /health (uvicorn em processo separado)
+- Tempo até o modelo BioBERT sair de 'loading' (ready/degraded)
+- RSS de pico (VmHWM) do processo do servidor
+
+Uso:
+    python benchmark_startup.py [--porta 8010] [--timeout 300]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+def medir_importacao() -> Dict[str, Any]:
+    """Importa main_unified em processo novo e mede tempo e RSS de pico"""
+    codigo = (
+        "import time, resource, json\n"
+        "t = time.perf_counter()\n"
+        "import main_unified\n"
+        "dt = time.perf_counter() - t\n"
+        "print(json.dumps({'tempo_s': dt, 'rss_pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))\n"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if saida.returncode != 0:
+        return {"erro": saida.stderr.strip().splitlines()[-1] if saida.stderr else "falha"}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def rss_pico_processo(pid: int) -> Optional[float]:
+    """VmHWM (pico de RSS) de um processo, em MB (Linux)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def consultar_health(url: str) -> Optional[dict]:
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resposta:
+            if resposta.status == 200:
+                return json.loads(resposta.read())
+    except Exception:
+        return None
+    return None
+
+
+def medir_servidor(porta: int, timeout: float) -> Dict[str, Any]:
+    """Sobe o uvicorn e mede o tempo até /health responder e até o modelo estar pronto"""
+    url = f"http://127.0.0.1:{porta}/health"
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main_unified:app", "--host", "127.0.0.1", "--port", str(porta)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    resultado: Dict[str, Any] = {}
+    try:
+        while time.perf_counter() - inicio < timeout:
+            health = consultar_health(url)
+            if health is not None:
+                if "primeiro_health_s" not in resultado:
+                    resultado["primeiro_health_s"] = round(time.perf_counter() - inicio, 2)
+                    resultado["rss_primeiro_health_mb"] = rss_pico_processo(processo.pid)
+                estado = health.get("modelo_biobert", {}).get("estado")
+                if estado in ("ready", "degraded"):
+                    resultado["modelo_estado"] = estado
+                    resultado["modelo_pronto_s"] = round(time.perf_counter() - inicio, 2)
+                    break
+            if processo.poll() is not None:
+                resultado["erro"] = f"servidor encerrou com código {processo.returncode}"
+                break
+            time.sleep(0.05)
+        else:
+            resultado["erro"] = f"timeout de {timeout}s"
+        resultado["rss_pico_mb"] = rss_pico_processo(processo.pid)
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização da API unificada")
+    parser.add_argument("--porta", type=int, default=8010)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK DE INICIALIZAÇÃO - LIFE IA")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    resultados = {}
+
+    print_header("1. IMPORTAÇÃO DO MAIN_UNIFIED")
+    importacao = medir_importacao()
+    resultados["importacao"] = importacao
+    if "erro" in importacao:
+        print_metric("Erro", importacao["erro"], "error")
+    else:
+        print_metric("Tempo de importação", f"{importacao['tempo_s']:.2f} s", "ok" if importacao["tempo_s"] < 1 else "warn")
+        print_metric("RSS de pico", f"{importacao['rss_pico_mb']:.0f} MB")
+
+    print_header("2. SERVIDOR (UVICORN)")
+    servidor = medir_servidor(args.porta, args.timeout)
+    resultados["servidor"] = servidor
+    if "primeiro_health_s" in servidor:
+        print_metric("Primeiro /health 200", f"{servidor['primeiro_health_s']:.2f} s",
+                     "ok" if servidor["primeiro_health_s"] < 1 else "warn")
+        print_metric("RSS no primeiro /health", f"{servidor.get('rss_primeiro_health_mb') or 0:.0f} MB")
+    if "modelo_pronto_s" in servidor:
+        print_metric(f"Modelo BioBERT ({servidor['modelo_estado']})", f"{servidor['modelo_pronto_s']:.2f} s",
+                     "ok" if servidor["modelo_estado"] == "ready" else "warn")
+    if servidor.get("rss_pico_mb"):
+        print_metric("RSS de pico do servidor", f"{servidor['rss_pico_mb']:.0f} MB")
+    if "erro" in servidor:
+        print_metric("Erro", servidor["erro"], "error")
+
+    with open("benchmark_startup.json", "w", encoding="utf-8") as f:
+        json.dump({**resultados, "data": datetime.now().isoformat()}, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados salvos em: benchmark_startup.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DA RE-TRIAGEM EM LOTE - LIFE IA
+Compara a re-triagem paciente a paciente (regras de analisar_com_ia_inteligente
+aplicadas linha a linha) com analisar_lote (colunas NumPy)
+
+Métricas coletadas:
+- Pacientes por segundo em filas de 1k a 100k pacientes
+- Divergências de score/classificação entre os dois caminhos
+
+Uso:
+    python benchmark_triagem_lote.py [--pacientes 50000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from triagem_lote import analisar_lote  # noqa: E402
+from lexico_clinico import SINTOMAS_CRITICOS  # noqa: E402
+from indice_cid10 import avaliar_risco_cid  # noqa: E402
+
+
+# Cores para output
+class Colors:
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BLUE = '\033[94m'
+    BOLD = '\033[1m'
+    END = '\033[0m'
+
+
+def print_header(text: str):
+    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{text.center(60)}{Colors.END}")
+    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.END}\n")
+
+
+def print_metric(name: str, value: str, status: str = "ok"):
+    color = Colors.GREEN if status == "ok" else Colors.YELLOW if status == "warn" else Colors.RED
+    print(f"  {name}: {color}{value}{Colors.END}")
+
+
+CIDS = ["I21", "I21.9", "I46", "S06", "O80", "A90", "M54", "J18", "F20", "C50", "R57", "K35", "Z00", ""]
+PRONTUARIOS = [
+    "Paciente com dor no peito e falta de ar há 2 horas.",
+    "Refere vomito e febre alta, PRESSÃO BAIXA na admissão.",
+    "Evolui com rebaixamento do nível de consciência, Glasgow 9, convulsão.",
+    "Dor lombar crônica, sem sinais de alarme.",
+    "",
+]
+PRIORIDADES = ["Normal", "Urgente", "Emergência", "Eletivo", ""]
+
+
+def gerar_fila(total: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    return [
+        {
+            "cid": aleatorio.choice(CIDS),
+            # Textos variados como na fila real (cada prontuário é único)
+            "prontuario_texto": f"{aleatorio.choice(PRONTUARIOS)} Protocolo {i}.",
+            "prioridade_descricao": aleatorio.choice(PRIORIDADES)
+        }
+        for i in range(total)
+    ]
+
+
+def triagem_individual(paciente: dict):
+    """Regras de analisar_com_ia_inteligente, um paciente por vez"""
+    info = avaliar_risco_cid(paciente["cid"])
+    score = info["score"] if info else 5
+    prontuario_lower = paciente["prontuario_texto"].lower()
+    score += sum(info["score"] for sintoma, info in SINTOMAS_CRITICOS.items() if sintoma in prontuario_lower)
+    prioridade = (paciente["prioridade_descricao"] or "Normal").lower()
+    if "urgente" in prioridade or "emergência" in prioridade:
+        score += 2
+    classificacao = "VERMELHO" if score >= 8 else "AMARELO" if score >= 6 else "VERDE"
+    return min(10, max(1, score)), classificacao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da re-triagem em lote")
+    parser.add_argument("--pacientes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print_header("BENCHMARK RE-TRIAGEM EM LOTE - LIFE IA")
+    print(f"📅 Data: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    print_header("1. VAZÃO (PACIENTES POR SEGUNDO)")
+    for total in sorted({1_000, 10_000, args.pacientes}):
+        fila = gerar_fila(total)
+
+        inicio = time.perf_counter()
+        individuais = [triagem_individual(p) for p in fila]
+        tempo_individual = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        lote = analisar_lote(fila)
+        tempo_lote = time.perf_counter() - inicio
+
+        divergencias = sum(
+            1 for i, (score, classificacao) in enumerate(individuais)
+            if score != lote["score_prioridade"][i] or classificacao != lote["classificacao_risco"][i]
+        )
+        print(f"\n📊 Fila de {total:,} pacientes")
+        print_metric("Paciente a paciente", f"{total / tempo_individual:,.0f} pacientes/s")
+        print_metric("analisar_lote", f"{total / tempo_lote:,.0f} pacientes/s",
+                     "ok" if tempo_lote <= tempo_individual else "warn")
+        print_metric("Divergências", str(divergencias), "ok" if divergencias == 0 else "error")
+
+    print(f"\n✅ Benchmark concluído com sucesso!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Teste do sidecar do BioBERT em modo substituto (backend/microservices/shared/biobert_sidecar.py)
+Roda no próprio processo, sem carregar o modelo:
+- workers com BIOBERT_MODO=sidecar recebem as respostas do sidecar
+- sidecar travado (backlog cheio, nunca aceita) falha dentro do timeout em vez de prender o worker
+- com o sidecar fora do ar e BIOBERT_SIDECAR_FALLBACK=regras, a resposta é 'indisponivel'
+  e o modelo não é carregado no worker
+"""
+
+import os
+import sys
+import time
+import socket
+import logging
+import tempfile
+import threading
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_biobert_sidecar_")
+SOCKET = os.path.join(DIRETORIO, "sidecar.sock")
+os.environ["BIOBERT_MODO"] = "sidecar"
+os.environ["BIOBERT_SIDECAR_SOCKET"] = SOCKET
+os.environ["BIOBERT_SIDECAR_FALLBACK"] = "regras"
+os.environ["BIOBERT_SIDECAR_TIMEOUT_S"] = "2"
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.insert(0, SHARED_DIR)
+logging.disable(logging.CRITICAL)
+
+import biobert_service
+from biobert_sidecar import ServidorSidecarBioBERT, ServicoSubstituto, ClienteSidecarBioBERT, SidecarIndisponivel
+
+TEXTO = "Paciente com dor torácica e dispneia há 2 horas"
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def iniciar_sidecar():
+    servidor = ServidorSidecarBioBERT(SOCKET, ServicoSubstituto())
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+def teste_respostas_do_sidecar():
+    print_header("1. WORKER ATENDIDO PELO SIDECAR")
+    servidor = iniciar_sidecar()
+    try:
+        resultado = biobert_service.extrair_entidades_biobert(TEXTO)
+        lote = biobert_service.extrair_entidades_lote_biobert([TEXTO, "febre"])
+        status = biobert_service.obter_status_biobert()
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    sucesso = resultado["modelo"] == "substituto" and resultado["status"] == "sucesso" and \
+        [r["modelo"] for r in lote] == ["substituto", "substituto"] and status["modo"] == "sidecar" and \
+        biobert_service.biobert_service.status()["estado"] == biobert_service.ESTADO_NAO_INICIADO
+    print_resultado("Respostas do substituto, sem modelo no worker", sucesso,
+                    f"Entidades: {[e['categoria'] for e in resultado['entidades']]} | Modo: {status['modo']}")
+    return sucesso
+
+def teste_sidecar_travado():
+    print_header("2. SIDECAR TRAVADO NÃO PRENDE O WORKER")
+    caminho = os.path.join(DIRETORIO, "travado.sock")
+    servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    servidor.bind(caminho)
+    servidor.listen(0)  # nunca chama accept()
+    ocupantes = []
+    for _ in range(4):
+        ocupante = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        ocupante.setblocking(False)
+        try:
+            ocupante.connect(caminho)
+        except BlockingIOError:
+            pass
+        ocupantes.append(ocupante)
+
+    cliente = ClienteSidecarBioBERT(caminho, timeout_s=0.3, retry_s=60)
+    resultado = []
+
+    def chamar():
+        inicio = time.perf_counter()
+        try:
+            cliente.chamar("status")
+            resultado.append(("respondeu", time.perf_counter() - inicio))
+        except SidecarIndisponivel:
+            resultado.append(("indisponivel", time.perf_counter() - inicio))
+
+    thread = threading.Thread(target=chamar, daemon=True)
+    thread.start()
+    thread.join(5)
+    for s in ocupantes + [servidor]:
+        s.close()
+    sucesso = not thread.is_alive() and resultado and resultado[0][0] == "indisponivel" and \
+        resultado[0][1] < 2 and not cliente.disponivel() and cliente.falhas == 1
+    detalhe = f"{resultado[0][0]} em {resultado[0][1]:.2f}s" if resultado else "chamada ainda bloqueada após 5s"
+    print_resultado("Falha dentro do timeout e sidecar marcado indisponível", sucesso, detalhe)
+    return sucesso
+
+def teste_fallback_por_regras():
+    print_header("3. FALLBACK SEM CARREGAR O MODELO")
+    # Sidecar do teste 1 encerrado: a conexão persistente desta thread deixa de valer
+    biobert_service._cliente_sidecar._descartar_conexao()
+    resultado = biobert_service.extrair_entidades_biobert(TEXTO)
+    gravidade = biobert_service.analisar_gravidade_biobert(TEXTO)
+    lote = biobert_service.extrair_entidades_lote_biobert([TEXTO, "febre"])
+    status = biobert_service.obter_status_biobert()
+    sucesso = resultado["status"] == "indisponivel" and gravidade["gravidade"] == "indeterminada" and \
+        [r["status"] for r in lote] == ["indisponivel", "indisponivel"] and \
+        status["modo"] == "sidecar_indisponivel" and not biobert_service.is_biobert_disponivel() and \
+        biobert_service.biobert_service.status()["estado"] == biobert_service.ESTADO_NAO_INICIADO
+    print_resultado("'indisponivel' e modelo local não iniciado", sucesso,
+                    f"Status: {resultado['status']} | Modo: {status['modo']} | "
+                    f"Modelo local: {biobert_service.biobert_service.status()['estado']}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO SIDECAR DO BIOBERT (SUBSTITUTO)")
+    print("="*60)
+
+    resultados = [
+        ("Respostas do sidecar", teste_respostas_do_sidecar()),
+        ("Sidecar travado", teste_sidecar_travado()),
+        ("Fallback por regras", teste_fallback_por_regras()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
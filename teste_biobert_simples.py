@@ -6,11 +6,13 @@ import os
 sys.path.append('backend/microservices/shared')
 
 try:
-    from biobert_service import extrair_entidades_biobert, is_biobert_disponivel
+    from biobert_service import extrair_entidades_biobert, is_biobert_disponivel, biobert_service
     
     print("🧬 TESTE BIOBERT SIMPLES")
     print("=" * 40)
     
+    # O modelo carrega em segundo plano; aguardar o warm-up
+    biobert_service.aguardar_pronto()
     print(f"BioBERT disponível: {is_biobert_disponivel()}")
     
     if is_biobert_disponivel():
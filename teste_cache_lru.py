@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Teste dos caches LRU + TTL com camada em disco (backend/microservices/shared/cache_lru.py)
+Roda no próprio processo sobre um SQLite temporário:
+- remoção por capacidade na ordem LRU (leitura renova o item)
+- expiração por TTL na memória e no disco
+- item encontrado só no disco é promovido para a memória
+- a camada em disco sobrevive a um reinício (nova instância no mesmo arquivo)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_cache_lru_")
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.insert(0, SHARED_DIR)
+
+from cache_lru import CacheLRU, CamadaDiscoSQLite, CacheEmCamadas
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def teste_ordem_lru():
+    print_header("1. REMOÇÃO NA ORDEM LRU")
+    cache = CacheLRU(max_itens=3, nome="teste")
+    for chave in ("a", "b", "c"):
+        cache.definir(chave, chave.upper())
+    cache.obter("a")          # "a" passa a ser o mais recente
+    cache.definir("d", "D")   # remove "b"
+    cache.definir("c", "C2")  # regravar renova "c"
+    cache.definir("e", "E")   # remove "a"
+    presentes = [chave for chave in "abcde" if cache.obter(chave) is not None]
+    metricas = cache.metricas()
+    sucesso = presentes == ["c", "d", "e"] and cache.obter("c") == "C2" and metricas["evictions"] == 2 and len(cache) == 3
+    print_resultado("Menos recentemente usados saem primeiro", sucesso,
+                    f"Presentes: {presentes} | Evictions: {metricas['evictions']}")
+    return sucesso
+
+def teste_expiracao_ttl():
+    print_header("2. EXPIRAÇÃO POR TTL")
+    memoria = CacheLRU(max_itens=10, ttl_s=0.05)
+    disco = CamadaDiscoSQLite(os.path.join(DIRETORIO, "ttl.db"), ttl_s=0.05)
+    memoria.definir("cid", {"score": 9})
+    disco.definir("cid", {"score": 9})
+    antes = (memoria.obter("cid"), disco.obter("cid"))
+    time.sleep(0.08)
+    depois = (memoria.obter("cid"), disco.obter("cid"))
+    sucesso = antes == ({"score": 9}, {"score": 9}) and depois == (None, None) and \
+        memoria.metricas()["expiracoes"] == 1 and len(memoria) == 0
+    print_resultado("Itens vencidos não são devolvidos", sucesso, f"Antes: {antes} | Depois: {depois}")
+    return sucesso
+
+def teste_promocao_disco_memoria():
+    print_header("3. PROMOÇÃO DO DISCO PARA A MEMÓRIA")
+    cache = CacheEmCamadas(CacheLRU(max_itens=10), CamadaDiscoSQLite(os.path.join(DIRETORIO, "promocao.db")))
+    cache.definir("texto", {"entidades": ["dor torácica"]})
+    cache.memoria.limpar()
+    primeira = cache.obter("texto")
+    promovido = len(cache.memoria) == 1
+    segunda = cache.obter("texto")
+    metricas = cache.metricas()
+    sucesso = primeira == segunda == {"entidades": ["dor torácica"]} and promovido and \
+        metricas["disco"]["hits"] == 1 and metricas["memoria"]["hits"] == 1
+    print_resultado("Segunda leitura atendida pela memória", sucesso,
+                    f"Hits disco: {metricas['disco']['hits']} | Hits memória: {metricas['memoria']['hits']} | "
+                    f"Hit rate total: {metricas['hit_rate_total']}")
+    return sucesso
+
+def teste_reinicio_camada_disco():
+    print_header("4. CAMADA EM DISCO SOBREVIVE AO REINÍCIO")
+    caminho = os.path.join(DIRETORIO, "reinicio.db")
+    antes = CacheEmCamadas(CacheLRU(max_itens=10), CamadaDiscoSQLite(caminho, ttl_s=3600))
+    antes.definir("biobert:abc", {"confianca": 0.91, "entidades": []})
+    antes.disco._conexao().close()
+
+    # Nova instância (outro processo após reinício): memória vazia, mesmo arquivo
+    depois = CacheEmCamadas(CacheLRU(max_itens=10), CamadaDiscoSQLite(caminho, ttl_s=3600))
+    lidos = []
+    thread = threading.Thread(target=lambda: lidos.append(depois.obter("biobert:abc")))
+    thread.start()
+    thread.join()
+    sucesso = lidos == [{"confianca": 0.91, "entidades": []}] and depois.obter("ausente") is None and \
+        depois.disco.metricas()["erros"] == 0
+    print_resultado("Valor lido pela nova instância (em outra thread)", sucesso, f"Lido: {lidos}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DOS CACHES LRU + TTL")
+    print("="*60)
+
+    resultados = [
+        ("Ordem LRU", teste_ordem_lru()),
+        ("Expiração por TTL", teste_expiracao_ttl()),
+        ("Promoção disco -> memória", teste_promocao_disco_memoria()),
+        ("Reinício da camada em disco", teste_reinicio_camada_disco()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de respostas dos endpoints públicos (backend/cache_respostas.py)
+Roda no próprio processo sobre um SQLite temporário:
+- single-flight e invalidação por tags (inclusive cálculo iniciado antes da invalidação)
+- projeção de campos permitidos (sem dados pessoais nem justificativa clínica)
+- /consulta-paciente e /metricas-impacto com sessão própria e 503 com executor saturado
+"""
+
+import os
+import sys
+import json
+import asyncio
+import hashlib
+import tempfile
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_cache_respostas_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'regulacao.db')}"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+from shared.database import SessionLocal, PacienteRegulacao, HistoricoDecisoes, create_tables
+from cache_respostas import (
+    CacheRespostasPublicas, cache_respostas_publicas, projetar_campos, tag_paciente, CAMPOS_CONSULTA_PACIENTE
+)
+import main_unified
+from executores import ExecutorSaturado
+
+create_tables()
+cliente = TestClient(main_unified.app)
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def chaves(valor):
+    """Todas as chaves de dicionários, em qualquer nível"""
+    if isinstance(valor, dict):
+        return set(valor) | set().union(*(chaves(v) for v in valor.values()))
+    if isinstance(valor, list):
+        return set().union(*(chaves(v) for v in valor))
+    return set()
+
+def teste_single_flight():
+    print_header("1. SINGLE-FLIGHT E INVALIDAÇÃO")
+    cache = CacheRespostasPublicas(ttl_s=60)
+    chamadas = []
+
+    async def calcular():
+        chamadas.append(1)
+        await asyncio.sleep(0.05)
+        return {"valor": len(chamadas)}
+
+    async def cenario():
+        chave = cache.chave("teste", 1)
+        respostas = await asyncio.gather(*(cache.obter_ou_calcular(chave, calcular, tags=("t",)) for _ in range(20)))
+        cache.invalidar(("t",))
+        depois = await cache.obter_ou_calcular(chave, calcular, tags=("t",))
+
+        # Invalidação durante o cálculo: a resposta é devolvida, mas não guardada
+        tarefa = asyncio.ensure_future(cache.obter_ou_calcular(cache.chave("teste", 2), calcular, tags=("t",)))
+        await asyncio.sleep(0.01)
+        cache.invalidar(("t",))
+        await tarefa
+        return respostas, depois
+
+    respostas, depois = asyncio.run(cenario())
+    sucesso = all(r == {"valor": 1} for r in respostas) and depois == {"valor": 2} and \
+        cache.coalescidas == 19 and cache.descartadas == 1 and len(chamadas) == 3
+    print_resultado("Uma execução por chave", sucesso,
+                    f"Cálculos: {len(chamadas)} | Coalescidas: {cache.coalescidas} | Descartadas: {cache.descartadas}")
+    return sucesso
+
+def teste_chave():
+    print_header("2. CHAVE DA CONSULTA")
+    partes = ("consulta-paciente", "cpf", "12345678901")
+    sha256_simples = hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode("utf-8")).hexdigest()
+    sucesso = CacheRespostasPublicas.chave(*partes) == CacheRespostasPublicas.chave(*partes) and \
+        CacheRespostasPublicas.chave(*partes) != sha256_simples
+    print_resultado("HMAC com segredo do processo", sucesso)
+    return sucesso
+
+def teste_projecao():
+    print_header("3. PROJEÇÃO DE CAMPOS PERMITIDOS")
+    resposta = {
+        "encontrado": True,
+        "paciente": {
+            "protocolo": "P-1", "nome_completo": "Maria", "cpf": "12345678901",
+            "historico_movimentacoes": [{"data": "2026-10-17", "observacoes": "ok", "justificativa_clinica": "IAM"}]
+        }
+    }
+    projetada = projetar_campos(resposta, CAMPOS_CONSULTA_PACIENTE)
+    sucesso = chaves(projetada) <= CAMPOS_CONSULTA_PACIENTE and projetada["paciente"]["protocolo"] == "P-1" and \
+        projetada["paciente"]["historico_movimentacoes"] == [{"data": "2026-10-17", "observacoes": "ok"}]
+    print_resultado("Só campos permitidos", sucesso, f"Chaves: {sorted(chaves(projetada))}")
+    return sucesso
+
+def teste_consulta_paciente():
+    """Justificativa clínica fora da resposta e do cache; alteração do paciente invalida a consulta"""
+    print_header("4. /consulta-paciente")
+    db = SessionLocal()
+    db.add(PacienteRegulacao(protocolo="CACHE-1", status="AGUARDANDO_REGULACAO", especialidade="Cardiologia",
+                             nome_completo="Maria da Silva", cpf="12345678901"))
+    db.add(HistoricoDecisoes(protocolo="CACHE-1", tempo_processamento=0.1, decisao_ia=json.dumps({
+        "analise_decisoria": {"classificacao_risco": "VERMELHO", "justificativa_clinica": "Dor torácica com supra de ST"}
+    })))
+    db.commit()
+    db.close()
+
+    consulta = {"tipo_busca": "protocolo", "valor_busca": "CACHE-1"}
+    primeira = cliente.post("/consulta-paciente", json=consulta)
+    chave = cache_respostas_publicas.chave("consulta-paciente", "protocolo", "CACHE-1")
+    em_cache = cache_respostas_publicas.cache.obter(chave)
+    texto = json.dumps(primeira.json(), ensure_ascii=False) + json.dumps(em_cache[0] if em_cache else None, ensure_ascii=False)
+
+    db = SessionLocal()
+    db.query(PacienteRegulacao).filter(PacienteRegulacao.protocolo == "CACHE-1").one().status = "EM_TRANSFERENCIA"
+    db.commit()
+    db.close()
+    segunda = cliente.post("/consulta-paciente", json=consulta)
+
+    sucesso = primeira.status_code == 200 and em_cache is not None and "supra de ST" not in texto and \
+        "Maria" not in texto and segunda.json()["paciente"]["status"] == "EM_TRANSFERENCIA" and \
+        tag_paciente("CACHE-1") in em_cache[1]
+    print_resultado("Sem justificativa clínica e invalidado no commit", sucesso,
+                    f"Status após alteração: {segunda.json()['paciente']['status']}")
+    return sucesso
+
+def teste_metricas_saturado():
+    print_header("5. /metricas-impacto COM EXECUTOR SATURADO")
+    cache_respostas_publicas.invalidar_tudo()
+    original = main_unified.executor_db.executar
+
+    async def saturado(*args, **kwargs):
+        raise ExecutorSaturado(main_unified.executor_db.nome, 2)
+
+    main_unified.executor_db.executar = saturado
+    try:
+        resposta = cliente.get("/metricas-impacto")
+    finally:
+        main_unified.executor_db.executar = original
+    normal = cliente.get("/metricas-impacto")
+    sucesso = resposta.status_code == 503 and resposta.headers.get("Retry-After") == "2" and \
+        resposta.json()["detail"].startswith("Banco de dados sobrecarregado") and normal.status_code == 200 and normal.json()["metricas_operacionais"]["total_pacientes_processados"] >= 1
+    print_resultado("503 com Retry-After", sucesso, f"Saturado: {resposta.status_code} | Normal: {normal.status_code}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO CACHE DE RESPOSTAS PÚBLICAS")
+    print("="*60)
+
+    resultados = [
+        ("Single-flight e invalidação", teste_single_flight()),
+        ("Chave da consulta", teste_chave()),
+        ("Projeção de campos", teste_projecao()),
+        ("/consulta-paciente", teste_consulta_paciente()),
+        ("/metricas-impacto saturado", teste_metricas_saturado()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Teste do compactador de histórico do MS-Ingestao (camadas bruto / 15min / 1h)
+Roda no próprio processo sobre um SQLite temporário, com horários simulados
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_compactador_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'historico.db')}"
+MICROSERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices")
+sys.path.insert(0, MICROSERVICES_DIR)
+sys.path.insert(0, os.path.join(MICROSERVICES_DIR, "ms-ingestao"))
+
+from sqlalchemy import func
+from shared.database import Base, engine, SessionLocal, HistoricoOcupacao, HistoricoOcupacaoAgregado
+from compactador_historico import compactador_historico, escolher_camada, inicio_intervalo
+
+Base.metadata.create_all(bind=engine)
+
+AGORA = datetime(2026, 10, 17, 12, 3)
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def limpar():
+    db = SessionLocal()
+    db.query(HistoricoOcupacao).delete()
+    db.query(HistoricoOcupacaoAgregado).delete()
+    db.commit()
+    db.close()
+
+def inserir(horarios, ocupacao=50.0, unidade_id="HGG"):
+    db = SessionLocal()
+    db.bulk_insert_mappings(HistoricoOcupacao, [
+        {
+            "unidade_id": unidade_id, "unidade_nome": unidade_id, "tipo_leito": "UTI",
+            "ocupacao_percentual": ocupacao, "leitos_totais": 10, "leitos_ocupados": 5,
+            "leitos_disponiveis": 5, "data_coleta": horario, "fonte_dados": "TESTE"
+        }
+        for horario in horarios
+    ])
+    db.commit()
+    db.close()
+
+def amostras(resolucao_min, desde=None, ate=None):
+    db = SessionLocal()
+    A = HistoricoOcupacaoAgregado
+    query = db.query(func.coalesce(func.sum(A.amostras), 0)).filter(A.resolucao_min == resolucao_min)
+    if desde is not None:
+        query = query.filter(A.inicio_intervalo >= desde, A.inicio_intervalo < ate)
+    total = query.scalar()
+    db.close()
+    return total
+
+def brutos():
+    db = SessionLocal()
+    total = db.query(func.count(HistoricoOcupacao.id)).scalar()
+    db.close()
+    return total
+
+def teste_agregacao():
+    """Toda leitura está nas brutas ainda não vencidas ou nos intervalos de 15 min"""
+    print_header("1. AGREGAÇÃO E RETENÇÃO")
+    limpar()
+    inserir([AGORA - timedelta(minutes=10 * i, seconds=1) for i in range(600)])  # ~100 horas
+
+    resultado = compactador_historico.compactar(agora=AGORA)
+    db = SessionLocal()
+    pendentes = db.query(func.count(HistoricoOcupacao.id)).filter(
+        HistoricoOcupacao.data_coleta >= inicio_intervalo(AGORA, 15)).scalar()
+    db.close()
+    sucesso = resultado["removidos"]["bruto"] > 0 and amostras(15) + pendentes == 600
+    print_resultado("Leituras preservadas", sucesso,
+                    f"Removidas: {resultado['removidos']['bruto']} | 15 min: {amostras(15)} | Intervalo aberto: {pendentes}")
+    return sucesso
+
+def teste_retroativas_alem_da_retencao():
+    """Leituras 4 dias atrás (intervalos sem brutas) chegam aos 15 min antes de serem removidas"""
+    print_header("2. LEITURAS RETROATIVAS (4 DIAS)")
+    limpar()
+    inserir([AGORA - timedelta(minutes=10 * i) for i in range(200)])
+    compactador_historico.compactar(agora=AGORA)
+
+    quatro_dias = AGORA - timedelta(days=4)
+    inserir([quatro_dias - timedelta(minutes=i) for i in range(6)], ocupacao=70.0)
+    resultado = compactador_historico.compactar(agora=AGORA)
+    faixa = (inicio_intervalo(quatro_dias, 60) - timedelta(hours=1), inicio_intervalo(quatro_dias, 60) + timedelta(hours=1))
+    sucesso = resultado["removidos"]["bruto"] == 6 and amostras(15, *faixa) == 6 and amostras(60, *faixa) == 6
+
+    # Mais leituras no mesmo intervalo, já sem brutas: somadas ao agregado existente
+    inserir([quatro_dias - timedelta(minutes=i) for i in range(6, 9)], ocupacao=90.0)
+    compactador_historico.compactar(agora=AGORA)
+    sucesso = sucesso and amostras(15, *faixa) == 9 and amostras(60, *faixa) == 9
+    print_resultado("Retroativas agregadas", sucesso,
+                    f"15 min: {amostras(15, *faixa)} | 1h: {amostras(60, *faixa)} (esperado 9)")
+    return sucesso
+
+def teste_retroativas_alem_dos_15min():
+    """Leituras além da retenção de 15 min vão direto para os intervalos de 1 hora"""
+    print_header("3. LEITURAS RETROATIVAS (100 DIAS)")
+    limpar()
+    inserir([AGORA - timedelta(minutes=10 * i) for i in range(50)])
+    compactador_historico.compactar(agora=AGORA)
+
+    cem_dias = AGORA - timedelta(days=100)
+    inserir([cem_dias], ocupacao=10.0)
+    compactador_historico.compactar(agora=AGORA)
+    faixa = (cem_dias - timedelta(hours=1), cem_dias + timedelta(hours=1))
+    sucesso = amostras(60, *faixa) == 1 and amostras(15, *faixa) == 0 and brutos() < 51
+    print_resultado("Leitura na camada de 1 hora", sucesso, f"1h: {amostras(60, *faixa)} | 15 min: {amostras(15, *faixa)}")
+    return sucesso
+
+def teste_retroativas_faixa_intermediaria():
+    """Leitura 10 horas atrás (brutas retidas, fora da janela de recompactação)"""
+    print_header("4. LEITURAS RETROATIVAS (10 HORAS)")
+    limpar()
+    inserir([AGORA - timedelta(minutes=10 * i, seconds=1) for i in range(100)])
+    compactador_historico.compactar(agora=AGORA)
+    antes = amostras(15)
+
+    inserir([AGORA - timedelta(hours=10, seconds=30)], ocupacao=99.0)
+    compactador_historico.compactar(agora=AGORA)
+    segunda = compactador_historico.compactar(agora=AGORA)
+    sucesso = amostras(15) == antes + 1 and segunda["removidos"]["bruto"] == 0
+    print_resultado("Intervalo reagregado", sucesso, f"Amostras: {antes} -> {amostras(15)}")
+    return sucesso
+
+def teste_escolher_camada():
+    print_header("5. ESCOLHA DA CAMADA")
+    casos = [
+        (AGORA - timedelta(hours=6), 0, "bruto"),
+        (AGORA - timedelta(days=7), None, "15min"),
+        (AGORA - timedelta(days=30), None, "1h"),
+        (AGORA - timedelta(days=3), 0, "15min"),
+        (AGORA - timedelta(days=200), 15, "1h"),
+    ]
+    sucesso = True
+    for inicio, resolucao, esperada in casos:
+        camada = escolher_camada(inicio, resolucao, agora=AGORA)
+        sucesso = sucesso and camada.nome == esperada
+        print(f"   {AGORA - inicio} / resolução {resolucao}: {camada.nome} (esperado {esperada})")
+    print_resultado("Camadas", sucesso)
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO COMPACTADOR DE HISTÓRICO - MS-INGESTAO")
+    print("="*60)
+
+    resultados = [
+        ("Agregação e retenção", teste_agregacao()),
+        ("Retroativas (4 dias)", teste_retroativas_alem_da_retencao()),
+        ("Retroativas (100 dias)", teste_retroativas_alem_dos_15min()),
+        ("Retroativas (10 horas)", teste_retroativas_faixa_intermediaria()),
+        ("Escolha da camada", teste_escolher_camada()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Teste do ETag / 304 do /dashboard/leitos (resposta pré-serializada do main_unified)
+Roda no próprio processo, sobre cópias dos dados_*.json e com a ocupação do MS-Ingestao em cache:
+- If-None-Match com o ETag forte atual, com o mesmo ETag fraco (W/) ou em lista retorna 304
+- If-None-Match diferente retorna 200 com o corpo e o ETag atual
+- o ETag muda quando muda a versão do snapshot dos arquivos ou a versao_ocupacao
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO = tempfile.mkdtemp(prefix="teste_dashboard_etag_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'regulacao.db')}"
+BACKEND_DIR = os.path.join(RAIZ, "backend")
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+from shared.database import create_tables
+import main_unified
+
+create_tables()
+cliente = TestClient(main_unified.app)
+
+for arquivo in os.listdir(RAIZ):
+    if arquivo.startswith("dados_") and arquivo.endswith(".json"):
+        shutil.copy(os.path.join(RAIZ, arquivo), DIRETORIO)
+main_unified.snapshot_dashboard._base_dir = DIRETORIO
+main_unified.snapshot_dashboard.intervalo_verificacao = 0
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def publicar_ocupacao(taxa):
+    """Payload do MS-Ingestao em cache, como após um GET bem-sucedido"""
+    dados = {"hospitais": [{"hospital": "HOSPITAL TESTE", "sigla": "HT", "taxa_ocupacao": taxa,
+                            "leitos_totais": 10, "leitos_disponiveis": 2}]}
+    main_unified._ms_ingestao_cache.update({
+        "dados": dados, "timestamp": datetime.now(), "offline_until": None,
+        "versao": main_unified.calcular_versao_conteudo(dados)
+    })
+
+def leitos(if_none_match=None):
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    return cliente.get("/dashboard/leitos", headers=headers)
+
+publicar_ocupacao(75.0)
+
+def teste_etag_correspondente():
+    print_header("1. IF-NONE-MATCH CORRESPONDENTE -> 304")
+    primeira = leitos()
+    etag = primeira.headers.get("etag")
+    forte = leitos(etag)
+    fraco = leitos(f"W/{etag}")
+    lista = leitos(f'"outro", {etag}')
+    sucesso = primeira.status_code == 200 and etag and not etag.startswith("W/") and \
+        all(r.status_code == 304 and r.headers.get("etag") == etag and not r.content for r in (forte, fraco, lista))
+    print_resultado("Forte, fraco (W/) e em lista", sucesso,
+                    f"ETag: {etag} | Forte: {forte.status_code} | Fraco: {fraco.status_code} | Lista: {lista.status_code}")
+    return sucesso
+
+def teste_etag_diferente():
+    print_header("2. IF-NONE-MATCH DIFERENTE -> 200")
+    atual = leitos().headers.get("etag")
+    resposta = leitos('"versao-antiga"')
+    sucesso = resposta.status_code == 200 and resposta.headers.get("etag") == atual and \
+        "versao_ocupacao" in resposta.json()
+    print_resultado("Corpo reenviado com o ETag atual", sucesso,
+                    f"Status: {resposta.status_code} | {len(resposta.content)} bytes")
+    return sucesso
+
+def teste_etag_muda_com_versoes():
+    print_header("3. ETAG ACOMPANHA AS VERSÕES DE ENTRADA")
+    inicial = leitos()
+    etag_inicial, versao_ocupacao = inicial.headers["etag"], inicial.json()["versao_ocupacao"]
+
+    publicar_ocupacao(92.5)
+    ocupacao = leitos(etag_inicial)
+
+    versao_snapshot = main_unified.snapshot_dashboard.obter().versao
+    caminho = os.path.join(DIRETORIO, "dados_ultima_atualizacao.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump([{"data": "2026-10-17T08:00:00"}], f)
+    arquivos = leitos(ocupacao.headers["etag"])
+
+    sucesso = ocupacao.status_code == 200 and ocupacao.headers["etag"] != etag_inicial and \
+        ocupacao.json()["versao_ocupacao"] != versao_ocupacao and \
+        main_unified.snapshot_dashboard.obter().versao != versao_snapshot and \
+        arquivos.status_code == 200 and arquivos.headers["etag"] not in (etag_inicial, ocupacao.headers["etag"])
+    print_resultado("Nova ocupação e novo snapshot geram novos ETags", sucesso,
+                    f"Ocupação: {ocupacao.status_code} | Arquivos: {arquivos.status_code} | "
+                    f"Construções: {main_unified._dashboard_resposta_cache['construcoes']}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO ETAG DO DASHBOARD")
+    print("="*60)
+
+    resultados = [
+        ("ETag correspondente", teste_etag_correspondente()),
+        ("ETag diferente", teste_etag_diferente()),
+        ("ETag muda com as versões", teste_etag_muda_com_versoes()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Teste dos sinais de recarga (POST /dashboard/recarregar e /catalogo-hospitais/recarregar)
+Roda no próprio processo sobre um SQLite temporário:
+- sem token ou com usuário que não é ADMIN a recarga é recusada
+- com token de ADMIN o snapshot é recarregado
+- a recarga do catálogo roda no executor de banco/I-O, não no de inferência
+"""
+
+import os
+import sys
+import tempfile
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_dashboard_recarga_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'regulacao.db')}"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+from shared.database import SessionLocal, create_tables
+import main_unified
+
+create_tables()
+cliente = TestClient(main_unified.app)
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def token(email, tipo_usuario):
+    """Usuário no banco e token como o emitido por /login"""
+    db = SessionLocal()
+    db.add(main_unified.Usuario(email=email, nome=email, tipo_usuario=tipo_usuario, senha_hash="-"))
+    db.commit()
+    db.close()
+    return {"Authorization": f"Bearer {main_unified.create_access_token(data={'sub': email})}"}
+
+def teste_recarga_exige_admin():
+    print_header("1. RECARGA APENAS PARA ADMIN")
+    anonima = cliente.post("/dashboard/recarregar")
+    regulador = cliente.post("/dashboard/recarregar", headers=token("regulador@teste.gov.br", "REGULADOR"))
+    admin = cliente.post("/dashboard/recarregar", headers=token("admin.recarga@teste.gov.br", "ADMIN"))
+    sucesso = anonima.status_code in (401, 403) and regulador.status_code == 403 and \
+        admin.status_code == 200 and "versao_dados" in admin.json()
+    print_resultado("Anônimo e regulador recusados, ADMIN recarrega", sucesso,
+                    f"Anônimo: {anonima.status_code} | Regulador: {regulador.status_code} | ADMIN: {admin.status_code}")
+    return sucesso
+
+def teste_catalogo_exige_admin():
+    print_header("2. RECARGA DO CATÁLOGO DE HOSPITAIS")
+    anonima = cliente.post("/catalogo-hospitais/recarregar")
+    inferencia, banco = (e.metricas()["concluidas"] for e in (main_unified.executor_inferencia, main_unified.executor_db))
+    admin = cliente.post("/catalogo-hospitais/recarregar", headers=token("admin.catalogo@teste.gov.br", "ADMIN"))
+    # A recarga roda no executor de I/O, sem ocupar vaga da inferência
+    no_executor_db = main_unified.executor_db.metricas()["concluidas"] == banco + 1 and \
+        main_unified.executor_inferencia.metricas()["concluidas"] == inferencia
+    sucesso = anonima.status_code in (401, 403) and admin.status_code == 200 and "versao_catalogo" in admin.json() and \
+        no_executor_db
+    print_resultado("Anônimo recusado, ADMIN recarrega no executor de I/O", sucesso,
+                    f"Anônimo: {anonima.status_code} | ADMIN: {admin.status_code} | Executor de banco: {no_executor_db}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DA RECARGA DO DASHBOARD")
+    print("="*60)
+
+    resultados = [
+        ("Recarga exige ADMIN", teste_recarga_exige_admin()),
+        ("Catálogo exige ADMIN", teste_catalogo_exige_admin()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
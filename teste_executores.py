@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Teste dos executores limitados (backend/microservices/shared/executores.py)
+Roda no próprio processo:
+- cancelar a corrotina que aguarda (cliente desconectou) não libera a vaga
+  enquanto a thread ainda executa; novas submissões continuam recusadas
+- tarefa cancelada ainda na fila libera a vaga e não chega a executar
+- concluídas, erros e rejeitadas contados nas métricas
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import threading
+
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.insert(0, SHARED_DIR)
+logging.disable(logging.CRITICAL)
+
+from executores import ExecutorLimitado, ExecutorSaturado
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+async def aguardar_ate(condicao, limite_s=5.0):
+    for _ in range(int(limite_s / 0.01)):
+        if condicao():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+async def tentar(executor, fn):
+    try:
+        return await executor.executar(fn)
+    except ExecutorSaturado:
+        return "saturado"
+
+def teste_cancelamento_em_execucao():
+    print_header("1. CANCELAMENTO COM A THREAD EM EXECUÇÃO")
+    executor = ExecutorLimitado("teste_cancelamento", max_workers=1, max_fila=0, retry_after=1)
+    iniciou, liberar = threading.Event(), threading.Event()
+
+    def trabalho_lento():
+        iniciou.set()
+        liberar.wait(5)
+        return "ok"
+
+    async def cenario():
+        tarefa = asyncio.create_task(executor.executar(trabalho_lento))
+        await aguardar_ate(iniciou.is_set)
+        tarefa.cancel()
+        await asyncio.gather(tarefa, return_exceptions=True)
+        durante = executor.metricas()
+        recusada = await tentar(executor, lambda: "nova")
+        liberar.set()
+        await aguardar_ate(lambda: executor.metricas()["saturacao"] == 0)
+        depois = executor.metricas()
+        aceita = await tentar(executor, lambda: "nova")
+        return tarefa.cancelled(), durante, recusada, depois, aceita
+
+    try:
+        cancelada, durante, recusada, depois, aceita = asyncio.run(cenario())
+    finally:
+        liberar.set()
+        executor.encerrar()
+    sucesso = cancelada and durante["em_execucao"] == 1 and durante["saturacao"] == 1.0 and \
+        recusada == "saturado" and depois["saturacao"] == 0 and depois["concluidas"] == 1 and aceita == "nova"
+    print_resultado("Vaga ocupada até a thread terminar", sucesso,
+                    f"Durante: {durante['em_execucao']} em execução, saturação {durante['saturacao']} | "
+                    f"Nova submissão: {recusada} -> {aceita}")
+    return sucesso
+
+def teste_cancelamento_na_fila():
+    print_header("2. CANCELAMENTO AINDA NA FILA")
+    executor = ExecutorLimitado("teste_fila", max_workers=1, max_fila=1, retry_after=1)
+    iniciou, liberar = threading.Event(), threading.Event()
+    executadas = []
+
+    def ocupar():
+        iniciou.set()
+        liberar.wait(5)
+
+    async def cenario():
+        primeira = asyncio.create_task(executor.executar(ocupar))
+        await aguardar_ate(iniciou.is_set)
+        na_fila = asyncio.create_task(executor.executar(executadas.append, "na_fila"))
+        await asyncio.sleep(0.05)
+        na_fila.cancel()
+        await asyncio.gather(na_fila, return_exceptions=True)
+        apos_cancelar = executor.metricas()
+        liberar.set()
+        await primeira
+        return apos_cancelar
+
+    try:
+        apos_cancelar = asyncio.run(cenario())
+    finally:
+        liberar.set()
+        executor.encerrar()
+    sucesso = apos_cancelar["saturacao"] == 0.5 and executadas == []
+    print_resultado("Vaga liberada sem executar", sucesso,
+                    f"Saturação após cancelar: {apos_cancelar['saturacao']} | Executadas: {executadas}")
+    return sucesso
+
+def teste_metricas():
+    print_header("3. MÉTRICAS DE CONCLUSÃO, ERRO E REJEIÇÃO")
+    executor = ExecutorLimitado("teste_metricas", max_workers=1, max_fila=1, retry_after=3)
+    liberar = threading.Event()
+
+    def falhar():
+        raise ValueError("falha")
+
+    async def cenario():
+        await executor.executar(sum, [1, 2])
+        try:
+            await executor.executar(falhar)
+        except ValueError:
+            pass
+        ocupadas = [asyncio.create_task(executor.executar(liberar.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        try:
+            await executor.executar(sum, [1])
+            retry_after = None
+        except ExecutorSaturado as e:
+            retry_after = e.retry_after
+        liberar.set()
+        await asyncio.gather(*ocupadas)
+        return retry_after
+
+    try:
+        retry_after = asyncio.run(cenario())
+    finally:
+        liberar.set()
+        executor.encerrar()
+    metricas = executor.metricas()
+    sucesso = retry_after == 3 and metricas["concluidas"] == 3 and metricas["erros"] == 1 and \
+        metricas["rejeitadas"] == 1 and metricas["saturacao"] == 0
+    print_resultado("Contadores corretos", sucesso,
+                    f"Concluídas: {metricas['concluidas']} | Erros: {metricas['erros']} | Rejeitadas: {metricas['rejeitadas']}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DOS EXECUTORES LIMITADOS")
+    print("="*60)
+
+    resultados = [
+        ("Cancelamento em execução", teste_cancelamento_em_execucao()),
+        ("Cancelamento na fila", teste_cancelamento_na_fila()),
+        ("Métricas", teste_metricas()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Teste do índice de posições da fila de regulação em memória (backend/fila_posicoes.py)
+Roda no próprio processo sobre um SQLite temporário:
+- posição e total iguais à contagem no banco após inclusões, mudanças de score,
+  status e especialidade (sem diferenciar acentos/maiúsculas) e remoções
+- rollback não altera o índice
+- escritas fora da sessão (bulk_update_mappings) só entram após reconstruir()
+- a contagem no banco (fallback sem índice) dá a mesma posição do índice em empates
+- com a última reconstrução mais velha que FILA_POSICOES_IDADE_MAXIMA_S o índice
+  deixa de responder (a consulta volta a contar no banco)
+"""
+
+import os
+import sys
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_fila_posicoes_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'regulacao.db')}"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from shared.database import SessionLocal, PacienteRegulacao, create_tables, normalizar_filtro
+from fila_posicoes import indice_fila, posicao_na_fila, posicao_no_banco, chave_fila, STATUS_FILA
+
+create_tables()
+
+ESPECIALIDADES = ["Cardiologia", "CARDIOLOGIA ", "Neurologia", "Ortopedia e Traumatologia", "cárdiologia"]
+INICIO = datetime(2026, 10, 17, 8)
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def posicoes_do_banco():
+    """(posição, total) de cada paciente na fila, contados direto do banco"""
+    db = SessionLocal()
+    pacientes = db.query(PacienteRegulacao).filter(PacienteRegulacao.status == STATUS_FILA).all()
+    db.close()
+    filas = {}
+    for p in pacientes:
+        filas.setdefault(normalizar_filtro(p.especialidade) or "", []).append(p)
+    posicoes = {}
+    for fila in filas.values():
+        fila.sort(key=lambda p: chave_fila(p.score_prioridade, p.data_solicitacao, p.id))
+        for i, p in enumerate(fila):
+            posicoes[p.protocolo] = (i + 1, len(fila))
+    return posicoes
+
+def posicoes_do_indice():
+    db = SessionLocal()
+    protocolos = [p for (p,) in db.query(PacienteRegulacao.protocolo).all()]
+    db.close()
+    return {p: posicao for p in protocolos if (posicao := posicao_na_fila(p)) is not None}
+
+def teste_posicoes_iguais_ao_banco():
+    print_header("1. POSIÇÕES IGUAIS À CONTAGEM NO BANCO")
+    aleatorio = random.Random(17)
+    db = SessionLocal()
+    for i in range(60):
+        db.add(PacienteRegulacao(
+            protocolo=f"FILA-{i}", status=STATUS_FILA, especialidade=aleatorio.choice(ESPECIALIDADES),
+            score_prioridade=aleatorio.choice([None, 3, 5, 5, 8, 10]),
+            data_solicitacao=INICIO + timedelta(minutes=aleatorio.randint(0, 30))
+        ))
+    db.commit()
+    db.close()
+    indice_fila.reconstruir()
+
+    for rodada in range(5):
+        db = SessionLocal()
+        pacientes = db.query(PacienteRegulacao).all()
+        for p in aleatorio.sample(pacientes, 10):
+            acao = aleatorio.choice(["score", "status", "especialidade", "remover"])
+            if acao == "score":
+                p.score_prioridade = aleatorio.randint(1, 10)
+            elif acao == "status":
+                p.status = aleatorio.choice([STATUS_FILA, "EM_REGULACAO", "ADMITIDO"])
+            elif acao == "especialidade":
+                p.especialidade = aleatorio.choice(ESPECIALIDADES)
+            else:
+                db.delete(p)
+        db.add(PacienteRegulacao(protocolo=f"NOVO-{rodada}", status=STATUS_FILA, especialidade="Neurologia",
+                                 score_prioridade=9, data_solicitacao=INICIO))
+        db.commit()
+        db.close()
+
+    esperado = posicoes_do_banco()
+    sucesso = posicoes_do_indice() == esperado and len(esperado) > 0
+    print_resultado("Índice = banco após 5 rodadas de alterações", sucesso,
+                    f"{len(esperado)} pacientes na fila | {indice_fila.status()['especialidades']} especialidades")
+    return sucesso
+
+def teste_rollback():
+    print_header("2. ROLLBACK NÃO ALTERA O ÍNDICE")
+    antes = posicoes_do_indice()
+    db = SessionLocal()
+    paciente = db.query(PacienteRegulacao).filter(PacienteRegulacao.status == STATUS_FILA).first()
+    paciente.score_prioridade = 100
+    db.add(PacienteRegulacao(protocolo="ROLLBACK-1", status=STATUS_FILA, especialidade="Neurologia", score_prioridade=10))
+    db.flush()
+    db.rollback()
+    db.close()
+    sucesso = posicoes_do_indice() == antes and posicao_na_fila("ROLLBACK-1") is None
+    print_resultado("Alterações descartadas", sucesso)
+    return sucesso
+
+def teste_escrita_fora_da_sessao():
+    print_header("3. ESCRITA FORA DA SESSÃO E RECONSTRUÇÃO")
+    db = SessionLocal()
+    ids = [p.id for p in db.query(PacienteRegulacao).filter(PacienteRegulacao.status == STATUS_FILA).limit(5)]
+    db.bulk_update_mappings(PacienteRegulacao, [{"id": i, "status": "ADMITIDO"} for i in ids])
+    db.commit()
+    db.close()
+    desatualizado = posicoes_do_indice() != posicoes_do_banco()
+    indice_fila.reconstruir()
+    sucesso = desatualizado and posicoes_do_indice() == posicoes_do_banco()
+    print_resultado("reconstruir() cobre bulk_update_mappings", sucesso,
+                    f"Reconstruções: {indice_fila.status()['reconstrucoes']}")
+    return sucesso
+
+def teste_empates_banco_e_indice():
+    print_header("4. CONTAGEM NO BANCO = ÍNDICE EM EMPATES")
+    db = SessionLocal()
+    # Mesmo score e mesma data, sem score, sem data e grafias diferentes da especialidade
+    for i in range(12):
+        db.add(PacienteRegulacao(
+            protocolo=f"EMPATE-{i}", status=STATUS_FILA, especialidade=["Cirurgia Vascular", "CIRURGIA  VASCULAR", "cirurgia vascular"][i % 3],
+            score_prioridade=[7, 7, None][i % 3] if i % 4 else 7,
+            data_solicitacao=None if i in (5, 9) else INICIO
+        ))
+    db.commit()
+    pacientes = db.query(PacienteRegulacao).filter(PacienteRegulacao.status == STATUS_FILA).all()
+    no_banco = {p.protocolo: posicao_no_banco(db, p) for p in pacientes}
+    db.close()
+    empates = {p: posicao for p, posicao in no_banco.items() if p.startswith("EMPATE-")}
+    sucesso = no_banco == posicoes_do_indice() == posicoes_do_banco() and \
+        sorted(posicao for posicao, _ in empates.values()) == list(range(1, 13))
+    print_resultado("Mesma posição pelas duas vias", sucesso,
+                    f"{len(no_banco)} pacientes | Empates: {dict(sorted(empates.items(), key=lambda e: e[1]))}")
+    return sucesso
+
+def teste_indice_expirado():
+    print_header("5. ÍNDICE EXPIRADO DEIXA DE RESPONDER")
+    protocolo = next(iter(posicoes_do_banco()))
+    antes = posicao_na_fila(protocolo)
+    reconstruido_em = indice_fila.ultima_reconstrucao
+    indice_fila.ultima_reconstrucao = reconstruido_em - timedelta(seconds=indice_fila.idade_maxima_s + 1)
+    expirado = (posicao_na_fila(protocolo), indice_fila.status()["expirado"])
+    indice_fila.reconstruir()
+    sucesso = antes is not None and expirado == (None, True) and posicao_na_fila(protocolo) == antes
+    print_resultado("None após a idade máxima, de volta após reconstruir()", sucesso,
+                    f"Idade máxima: {indice_fila.idade_maxima_s:g}s | Antes: {antes} | Expirado: {expirado}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO ÍNDICE DE POSIÇÕES DA FILA")
+    print("="*60)
+
+    resultados = [
+        ("Posições iguais ao banco", teste_posicoes_iguais_ao_banco()),
+        ("Rollback", teste_rollback()),
+        ("Escrita fora da sessão", teste_escrita_fora_da_sessao()),
+        ("Empates: banco e índice", teste_empates_banco_e_indice()),
+        ("Índice expirado", teste_indice_expirado()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
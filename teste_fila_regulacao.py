@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Teste da fila de regulação paginada por cursor (MS-Regulacao)
+Roda no próprio processo sobre um SQLite temporário:
+- cursor keyset (score desc, data, id - nulos por último) sem repetir nem pular pacientes
+- filtros por igualdade sobre especialidade/cidade normalizadas
+- migrar_banco_completo.py em uma tabela anterior às colunas normalizadas
+"""
+
+import os
+import sys
+import random
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_fila_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'regulacao.db')}"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, os.path.join(BACKEND_DIR, "microservices"))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "microservices", "ms-regulacao"))
+
+from sqlalchemy import MetaData, Table, create_engine, text
+from shared.database import Base, engine, SessionLocal, PacienteRegulacao, normalizar_filtro
+from main import _ordem_fila, _apos_cursor, _codificar_cursor, _decodificar_cursor
+
+Base.metadata.create_all(bind=engine)
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def popular(total=300):
+    aleatorio = random.Random(18)
+    base = datetime(2026, 10, 1)
+    db = SessionLocal()
+    for i in range(total):
+        db.add(PacienteRegulacao(
+            protocolo=f"FILA-{i:04d}",
+            status="AGUARDANDO_REGULACAO",
+            especialidade=aleatorio.choice(["Cardiologia", "CARDIOLOGIA ", "Ortopedia", "Clínica  Médica", None]),
+            cidade_origem=aleatorio.choice(["Goiânia", "GOIANIA", "Anápolis", None]),
+            # Empates e nulos de propósito: o cursor precisa desempatar por data e id
+            score_prioridade=aleatorio.choice([None, 3, 5, 5, 8, 10]),
+            data_solicitacao=aleatorio.choice([None, base + timedelta(hours=aleatorio.randint(0, 48))])
+        ))
+    db.commit()
+    db.close()
+
+def paginar(filtros=(), limite=17):
+    """Percorre a fila página a página, como o endpoint (limite + 1 indica próxima página)"""
+    db = SessionLocal()
+    protocolos, cursor = [], None
+    while True:
+        query = db.query(PacienteRegulacao).filter(PacienteRegulacao.status == "AGUARDANDO_REGULACAO", *filtros)
+        if cursor:
+            query = query.filter(_apos_cursor(*_decodificar_cursor(cursor)))
+        pagina = query.order_by(*_ordem_fila()).limit(limite + 1).all()
+        protocolos.extend(p.protocolo for p in pagina[:limite])
+        if len(pagina) <= limite:
+            break
+        cursor = _codificar_cursor(pagina[limite - 1])
+    completa = [p.protocolo for p in db.query(PacienteRegulacao).filter(
+        PacienteRegulacao.status == "AGUARDANDO_REGULACAO", *filtros).order_by(*_ordem_fila())]
+    db.close()
+    return protocolos, completa
+
+def teste_cursor():
+    print_header("1. PAGINAÇÃO POR CURSOR")
+    protocolos, completa = paginar()
+    sucesso = protocolos == completa and len(set(protocolos)) == len(completa)
+    print_resultado("Páginas = fila completa", sucesso, f"{len(protocolos)} de {len(completa)} pacientes")
+    return sucesso
+
+def teste_filtro_normalizado():
+    print_header("2. FILTRO POR ESPECIALIDADE NORMALIZADA")
+    filtro = PacienteRegulacao.especialidade_normalizada == normalizar_filtro("cardiologia")
+    protocolos, completa = paginar((filtro,))
+    db = SessionLocal()
+    esperados = sum(1 for (e,) in db.query(PacienteRegulacao.especialidade) if e and e.strip().upper() == "CARDIOLOGIA")
+    db.close()
+    sucesso = protocolos == completa and len(protocolos) == esperados and \
+        normalizar_filtro("  Clínica   médica ") == "CLINICA MEDICA"
+    print_resultado("Igualdade sem acentos/maiúsculas", sucesso, f"{len(protocolos)} pacientes (esperado {esperados})")
+    return sucesso
+
+def teste_cursor_invalido():
+    print_header("3. CURSOR INVÁLIDO")
+    try:
+        _decodificar_cursor("nao-e-um-cursor")
+        sucesso = False
+    except Exception as e:
+        sucesso = getattr(e, "status_code", None) == 400
+    print_resultado("HTTP 400", sucesso)
+    return sucesso
+
+def teste_migracao_banco_existente():
+    """Tabela criada antes das colunas normalizadas: o ORM só consulta depois da migração"""
+    print_header("4. MIGRAÇÃO DE BANCO EXISTENTE")
+    url = f"sqlite:///{os.path.join(DIRETORIO, 'antigo.db')}"
+    antigo = create_engine(url)
+    metadata = MetaData()
+    Table("pacientes_regulacao", metadata, *(
+        coluna._copy() for coluna in PacienteRegulacao.__table__.columns
+        if coluna.name not in ("especialidade_normalizada", "cidade_origem_normalizada")
+    ))
+    metadata.create_all(antigo)
+    with antigo.begin() as conn:
+        conn.execute(text("INSERT INTO pacientes_regulacao (protocolo, status, especialidade, cidade_origem) "
+                          "VALUES ('ANTIGO-1', 'AGUARDANDO_REGULACAO', 'Ortopédia', 'Anápolis')"))
+
+    saida = subprocess.run([sys.executable, "migrar_banco_completo.py"], cwd=BACKEND_DIR,
+                           env={**os.environ, "DATABASE_URL": url}, capture_output=True, text=True)
+    with antigo.connect() as conn:
+        linha = conn.execute(text("SELECT especialidade_normalizada, cidade_origem_normalizada "
+                                  "FROM pacientes_regulacao")).one()
+        indices = {nome for (nome,) in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'pacientes_regulacao'"))}
+    sucesso = saida.returncode == 0 and tuple(linha) == ("ORTOPEDIA", "ANAPOLIS") and \
+        {"idx_pacientes_fila_regulacao", "idx_pacientes_fila_status"} <= indices
+    print_resultado("Colunas, preenchimento e índices", sucesso, f"{tuple(linha)} | índices da fila: "
+                    f"{sorted(i for i in indices if i.startswith('idx_pacientes_fila'))}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DA FILA DE REGULAÇÃO (CURSOR)")
+    print("="*60)
+
+    popular()
+    resultados = [
+        ("Paginação por cursor", teste_cursor()),
+        ("Filtro normalizado", teste_filtro_normalizado()),
+        ("Cursor inválido", teste_cursor_invalido()),
+        ("Migração de banco existente", teste_migracao_banco_existente()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Teste do índice CID-10 por prefixo (backend/microservices/shared/indice_cid10.py)
+Roda no próprio processo, sem serviços:
+- normalização e expansão das faixas de capítulo
+- subcódigos herdam do prefixo mais longo (I21.9 -> I21), independente da ordem de declaração
+- tipo de caso com e sem trauma nos sintomas; atributos desconhecidos são recusados
+- tabela de risco e especialidades iguais às da triagem anterior ao índice
+"""
+
+import os
+import sys
+import json
+import copy
+
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.insert(0, SHARED_DIR)
+
+from indice_cid10 import (IndiceCID10, CID10_INDICE_PATH, indice_cid10, normalizar_cid,
+                          prefixos_da_faixa, avaliar_risco_cid)
+
+with open(CID10_INDICE_PATH, "r", encoding="utf-8") as f:
+    DADOS = json.load(f)
+
+CODIGOS = ["I21", "I21.9", "S06", "S06.0", "M54", "M54.5", "C50", "D48", "D49", "A92", "J18", "Z99", "U07", "XX", ""]
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def teste_normalizacao_e_faixas():
+    print_header("1. NORMALIZAÇÃO E FAIXAS")
+    faixa = prefixos_da_faixa("C00-D48")
+    sucesso = normalizar_cid("i21.9 ") == "I219" and \
+        faixa[0] == "C" and "D0" in faixa and "D48" in faixa and "D49" not in faixa and \
+        indice_cid10.resolver("D48")["capitulo"]["numero"] == "II" and indice_cid10.resolver("D49").get("capitulo") is None and \
+        indice_cid10.resolver("D50")["capitulo"]["numero"] == "III"
+    print_resultado("C00-D48 cobre C inteiro e D00-D48", sucesso, f"Prefixos: {faixa}")
+    return sucesso
+
+def teste_prefixo_mais_longo():
+    print_header("2. HERANÇA PELO PREFIXO MAIS LONGO")
+    subcodigo = avaliar_risco_cid("i21.9")
+    sucesso = subcodigo == avaliar_risco_cid("I21") and subcodigo["codigo"] == "I21" and \
+        subcodigo["risco"] == "VERMELHO" and avaliar_risco_cid("C50") is None and avaliar_risco_cid(None) is None and \
+        indice_cid10.especialidades("I21.9") == indice_cid10.especialidades("I21")
+    print_resultado("I21.9 herda o risco de I21", sucesso,
+                    f"I21.9: {subcodigo['score']} {subcodigo['risco']} ({subcodigo['desc']})")
+    return sucesso
+
+def teste_ordem_de_declaracao():
+    print_header("3. INDEPENDENTE DA ORDEM DE DECLARAÇÃO")
+    invertidos = copy.deepcopy(DADOS)
+    invertidos["capitulos"].reverse()
+    invertidos["agrupamentos"].reverse()
+    invertidos["codigos"] = dict(reversed(list(invertidos["codigos"].items())))
+    invertido = IndiceCID10(invertidos)
+    diferentes = [c for c in CODIGOS if invertido.resolver(c) != indice_cid10.resolver(c)]
+    sucesso = not diferentes and invertido.total_nos == indice_cid10.total_nos
+    print_resultado("Mesmos atributos com listas invertidas", sucesso,
+                    f"{len(CODIGOS)} códigos comparados | Diferentes: {diferentes or 'nenhum'}")
+    return sucesso
+
+def teste_tipo_caso():
+    print_header("4. TIPO DE CASO E VALIDAÇÃO")
+    dados_invalidos = copy.deepcopy(DADOS)
+    dados_invalidos["codigos"]["I21"]["gravidade"] = "ALTA"
+    try:
+        IndiceCID10(dados_invalidos)
+        recusado = False
+    except ValueError:
+        recusado = True
+    sucesso = indice_cid10.tipo_caso("S06.0") == "TRAUMA" and \
+        indice_cid10.tipo_caso("M54") == "ORTOPEDIA_ELETIVA" and \
+        indice_cid10.tipo_caso("M54", trauma_nos_sintomas=True) == "CLINICO_GERAL" and \
+        indice_cid10.tipo_caso("M54", trauma_nos_sintomas=True, rag=True) == "TRAUMA" and \
+        indice_cid10.tipo_caso("I21", rag=True) == "EMERGENCIA_CARDIOLOGICA" and \
+        indice_cid10.tipo_caso("XX") == "CLINICO_GERAL" and recusado
+    print_resultado("Trauma nos sintomas muda o tipo do capítulo M", sucesso,
+                    f"M54 com trauma: {indice_cid10.tipo_caso('M54', True)} / RAG {indice_cid10.tipo_caso('M54', True, rag=True)} | "
+                    f"Atributo desconhecido recusado: {recusado}")
+    return sucesso
+
+# Tabela de risco de analisar_com_ia_inteligente antes do índice (score, classificação)
+RISCO_TRIAGEM = {
+    'I21': (9, 'VERMELHO'), 'I46': (10, 'VERMELHO'), 'G93.1': (9, 'VERMELHO'), 'R57': (9, 'VERMELHO'),
+    'J44.1': (8, 'VERMELHO'), 'N17': (8, 'VERMELHO'), 'K92.2': (8, 'VERMELHO'), 'S06': (8, 'VERMELHO'),
+    'I63': (8, 'VERMELHO'), 'I61': (9, 'VERMELHO'), 'J18': (7, 'AMARELO'), 'E11': (6, 'AMARELO'),
+    'I10': (5, 'AMARELO'), 'M79': (4, 'VERDE'), 'M54': (3, 'VERDE')
+}
+
+def teste_tabela_de_risco():
+    print_header("5. RISCO E ESPECIALIDADES DA TRIAGEM")
+    codigos_com_risco = {normalizar_cid(c) for c, info in DADOS["codigos"].items() if "risco" in info}
+    divergentes = [c for c, (score, risco) in RISCO_TRIAGEM.items()
+                   if (avaliar_risco_cid(c) or {}).get("score") != score or avaliar_risco_cid(c)["risco"] != risco]
+    sem_base = [c for c in ("I26", "I50", "A41", "O15", "J96", "R40.2", "K35") if avaliar_risco_cid(c) is not None]
+    sucesso = codigos_com_risco == {normalizar_cid(c) for c in RISCO_TRIAGEM} and not divergentes and not sem_base and \
+        indice_cid10.especialidades("I25") == [] and indice_cid10.especialidades("C50") == [] and \
+        indice_cid10.especialidades("I50") == ["CARDIOLOGIA", "UTI_CARDIOLOGICA"]
+    print_resultado("Mesmos 15 códigos, scores e classificações; sem especialidades por capítulo", sucesso,
+                    f"Códigos com risco: {len(codigos_com_risco)} | Divergentes: {divergentes or 'nenhum'} | "
+                    f"Fora da base com risco: {sem_base or 'nenhum'}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO ÍNDICE CID-10")
+    print("="*60)
+
+    resultados = [
+        ("Normalização e faixas", teste_normalizacao_e_faixas()),
+        ("Prefixo mais longo", teste_prefixo_mais_longo()),
+        ("Ordem de declaração", teste_ordem_de_declaracao()),
+        ("Tipo de caso", teste_tipo_caso()),
+        ("Tabela de risco", teste_tabela_de_risco()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Teste do léxico clínico e do matcher multi-padrão (backend/microservices/shared/lexico_clinico.py)
+Roda no próprio processo, sem o modelo BioBERT carregado:
+- acentos, caixa e posições no texto original (inclusive texto de OCR com marcas combinantes)
+- abreviações só como palavra inteira
+- dobra rápida (Latin-1) igual à dobra caractere a caractere
+- cache do BioBERT: entidades de um texto que difere só em espaços são as do texto recebido
+"""
+
+import os
+import sys
+import unicodedata
+
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.insert(0, SHARED_DIR)
+
+from lexico_clinico import (
+    matcher_clinico, dobrar_texto, _dobrar_caractere, detectar_sintomas_criticos,
+    identificar_entidades, detectar_protocolos, scores_sintomas_em_lote
+)
+from biobert_service import BioBERTService
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def trechos(texto, itens, campo):
+    return {item[campo]: texto[item["inicio"]:item["fim"]] for item in itens}
+
+def teste_acentos_e_posicoes():
+    print_header("1. ACENTOS, CAIXA E POSIÇÕES")
+    texto = "Paciente com VÔMITO, Dor No Peito e convulsao."
+    ocr = unicodedata.normalize("NFD", "Relato de vômito e hemorragia")  # acentos como marcas soltas
+    sintomas = trechos(texto, detectar_sintomas_criticos(texto), "sintoma")
+    sintomas_ocr = trechos(ocr, detectar_sintomas_criticos(ocr), "sintoma")
+    sucesso = sintomas == {"dor no peito": "Dor No Peito", "convulsão": "convulsao", "vômito": "VÔMITO"} and \
+        sintomas_ocr == {"hemorragia": "hemorragia", "vômito": unicodedata.normalize("NFD", "vômito")}
+    print_resultado("Trechos no texto original", sucesso, f"{sintomas} | OCR: {sorted(sintomas_ocr)}")
+    return sucesso
+
+def teste_palavra_inteira():
+    print_header("2. ABREVIAÇÕES COMO PALAVRA INTEIRA")
+    entidades = {e["termo"] for e in identificar_entidades("Enfermeira solicitou TC, etc. Histórico de IAM.")}
+    sucesso = {"tc", "iam"} <= entidades and "rm" not in entidades and \
+        detectar_protocolos("Queimadura de 2º grau", "Glasgow 3 sem sinais vitais") == ["PROTOCOLO_OBITO", "PROTOCOLO_QUEIMADOS"] and \
+        detectar_protocolos("Glasgow 13") == []
+    print_resultado("tc/iam como palavra, rm fora de 'enfermeira'", sucesso, f"{sorted(entidades)}")
+    return sucesso
+
+def teste_dobra_rapida():
+    print_header("3. DOBRA RÁPIDA (LATIN-1) E SCORES EM LOTE")
+    textos = ["Ação, CORAÇÃO, Pressão, ñandu, Æ, ½, ß", "".join(chr(c) for c in range(0x20, 0x100)), "İstanbul"]
+    sucesso = True
+    for texto in textos:
+        dobrado, mapa = dobrar_texto(texto)
+        lento = "".join(_dobrar_caractere(c) for c in texto)
+        sucesso = sucesso and dobrado == lento and (mapa is None or len(mapa) == len(dobrado) + 1)
+    scores = scores_sintomas_em_lote(["dor no peito", "", "FEBRE ALTA e vômito"])
+    sucesso = sucesso and scores == [3, 0, 3]
+    print_resultado("Igual à dobra caractere a caractere", sucesso, f"Scores em lote: {scores}")
+    return sucesso
+
+def teste_primeiras_igual_buscar():
+    print_header("4. PRIMEIRAS OCORRÊNCIAS = BUSCA COMPLETA")
+    texto = "dor de cabeça, DOR no peito; tc de crânio; etc; falta de ar e febre. Dor de cabeça de novo."
+    completas = {}
+    for ocorrencia in matcher_clinico.buscar(texto):
+        completas.setdefault((ocorrencia.grupo, ocorrencia.chave, ocorrencia.termo), ocorrencia)
+    sucesso = matcher_clinico.primeiras_ocorrencias(texto) == completas
+    print_resultado("Mesmas ocorrências e posições", sucesso, f"{len(completas)} termos")
+    return sucesso
+
+def teste_cache_biobert_entidades():
+    """Entrada do cache gravada por um texto e lida por outro que difere só em espaços"""
+    print_header("5. CACHE DO BIOBERT: ENTIDADES DO TEXTO RECEBIDO")
+    servico = BioBERTService()
+    gravado = "Falta de ar e febre"
+    recebido = "  Falta   de ar\n\ne   febre  "
+    chave, _ = servico._consultar_cache(gravado)
+    servico._armazenar_cache(chave, servico._montar_resultado(gravado, 0.8, ["[CLS]", "[SEP]"]))
+
+    chave_recebido, resultado = servico._consultar_cache(recebido)
+    termos = [e["termo"] for e in resultado["entidades"]] if resultado else []
+    sucesso = chave_recebido == chave and resultado is not None and resultado["cache_hit"] and \
+        termos == ["febre"] and "falta de ar" not in resultado["analise"]
+    print_resultado("Entidades recalculadas no acerto", sucesso, f"Termos: {termos}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO LÉXICO CLÍNICO")
+    print("="*60)
+
+    resultados = [
+        ("Acentos e posições", teste_acentos_e_posicoes()),
+        ("Palavra inteira", teste_palavra_inteira()),
+        ("Dobra rápida", teste_dobra_rapida()),
+        ("Primeiras ocorrências", teste_primeiras_igual_buscar()),
+        ("Cache do BioBERT", teste_cache_biobert_entidades()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
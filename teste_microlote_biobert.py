@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Teste do micro-lote do BioBERT com o executor de inferência (sem o modelo carregado)
+Roda no próprio processo:
+- BIOBERT_LOTE_MAX triagens concorrentes pelo executor de inferência formam um único lote
+  (workers de inferência e de etapas da triagem dimensionados pelo tamanho do lote)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "microservices", "shared"))
+logging.disable(logging.CRITICAL)
+
+from executores import ExecutorLimitado, INFERENCIA_WORKERS, executor_inferencia
+from biobert_service import AgendadorMicroLote, BIOBERT_LOTE_MAX
+from pipeline_triagem import PipelineTriagem, TRIAGEM_ETAPAS_WORKERS
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def criar_agendador():
+    def processar_lote(textos):
+        time.sleep(0.02)  # passagem do modelo
+        return [(0.9, ["[CLS]", "[SEP]"]) for _ in textos]
+    return AgendadorMicroLote(processar_lote, max_itens=BIOBERT_LOTE_MAX, espera_ms=200)
+
+def teste_dimensionamento():
+    print_header("1. WORKERS DIMENSIONADOS PELO LOTE")
+    sucesso = INFERENCIA_WORKERS >= BIOBERT_LOTE_MAX and TRIAGEM_ETAPAS_WORKERS >= BIOBERT_LOTE_MAX and \
+        executor_inferencia.max_workers == INFERENCIA_WORKERS
+    print_resultado("Inferência e etapas >= BIOBERT_LOTE_MAX", sucesso,
+                    f"Inferência: {INFERENCIA_WORKERS} | Etapas: {TRIAGEM_ETAPAS_WORKERS} | Lote: {BIOBERT_LOTE_MAX}")
+    return sucesso
+
+def teste_triagens_concorrentes():
+    print_header("2. TRIAGENS CONCORRENTES EM UM LOTE")
+    agendador = criar_agendador()
+
+    def extrair(texto):
+        confianca, _ = agendador.submeter(texto)
+        return {"status": "sucesso", "analise": "ok", "nivel_confianca": "ALTA", "confianca": confianca, "entidades": []}
+
+    triagem = PipelineTriagem(selecionar_hospital=lambda **_: ("HOSPITAL TESTE", "teste"), extrair_biobert=extrair)
+    executor = ExecutorLimitado("inferencia_teste", max_workers=INFERENCIA_WORKERS, max_fila=64, retry_after=1)
+
+    async def cenario():
+        pacientes = [{"protocolo": f"LOTE-{i}", "cid": "I21", "prontuario_texto": f"dor no peito {i}"}
+                     for i in range(BIOBERT_LOTE_MAX)]
+        return await asyncio.gather(*(executor.executar(triagem.analisar, p) for p in pacientes))
+
+    try:
+        decisoes = asyncio.run(cenario())
+    finally:
+        executor.encerrar()
+        triagem.encerrar()
+    metricas = agendador.metricas()
+    sucesso = len(decisoes) == BIOBERT_LOTE_MAX and metricas["lotes"] == 1 and metricas["maior_lote"] == BIOBERT_LOTE_MAX
+    print_resultado("Um lote com todos os textos", sucesso,
+                    f"Lotes: {metricas['lotes']} | Maior lote: {metricas['maior_lote']}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO MICRO-LOTE DO BIOBERT")
+    print("="*60)
+
+    resultados = [
+        ("Dimensionamento dos workers", teste_dimensionamento()),
+        ("Triagens concorrentes", teste_triagens_concorrentes()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
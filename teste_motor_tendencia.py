@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Teste do motor de tendência incremental do MS-Ingestao (motor_tendencia.py)
+Roda no próprio processo sobre um SQLite temporário:
+- tendência incremental igual à calculada sobre o histórico lido do banco
+- reconstrução: leituras gravadas fora da ingestão entram; as registradas durante a leitura não se perdem
+- séries sem leituras na janela saem do motor
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_motor_tendencia_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'tendencia.db')}"
+MICROSERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices")
+sys.path.insert(0, MICROSERVICES_DIR)
+sys.path.insert(0, os.path.join(MICROSERVICES_DIR, "ms-ingestao"))
+
+from shared.database import Base, engine, SessionLocal, HistoricoOcupacao
+from motor_tendencia import MotorTendencia, LeituraOcupacao, tendencia_de_historico
+
+Base.metadata.create_all(bind=engine)
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def leitura(unidade_id, data_coleta, ocupacao, tipo_leito="UTI"):
+    return LeituraOcupacao(unidade_id, unidade_id, tipo_leito, ocupacao, 10, int(ocupacao / 10),
+                           10 - int(ocupacao / 10), data_coleta, "TESTE")
+
+def gravar(leituras):
+    db = SessionLocal()
+    db.bulk_insert_mappings(HistoricoOcupacao, [l._asdict() for l in leituras])
+    db.commit()
+    db.close()
+
+class SessaoComIngestao:
+    """Sessão que registra uma leitura no motor enquanto a reconstrução consulta o banco"""
+
+    def __init__(self, db, motor, durante):
+        self._db, self._motor, self._durante = db, motor, durante
+
+    def query(self, *args, **kwargs):
+        self._motor.registrar(self._durante)
+        return self._db.query(*args, **kwargs)
+
+def teste_incremental_igual_historico():
+    print_header("1. TENDÊNCIA INCREMENTAL = HISTÓRICO")
+    motor = MotorTendencia(janela_horas=6)
+    inicio = datetime.utcnow() - timedelta(hours=2)
+    leituras = [leitura("HGG", inicio + timedelta(minutes=15 * i), 50 + 2 * i) for i in range(8)]
+    for l in reversed(leituras[4:]):
+        motor.registrar(l)
+    motor.registrar_lote(leituras[:4])  # lote retroativo
+    tendencia, janela = motor.serie("HGG")
+    esperado = tendencia_de_historico(leituras)
+    sucesso = tendencia == esperado and tendencia["tendencia"] == "ALTA" and len(janela) == 8
+    print_resultado("Mesmas contas", sucesso,
+                    f"{tendencia['tendencia']} | {tendencia['inclinacao_por_hora']}%/h | saturação em {tendencia['previsao_saturacao_min']} min")
+    return sucesso
+
+def teste_reconstrucao():
+    print_header("2. RECONSTRUÇÃO A PARTIR DO BANCO")
+    motor = MotorTendencia(janela_horas=6)
+    agora = datetime.utcnow()
+    motor.registrar(leitura("HGG", agora - timedelta(minutes=30), 60))
+    gravadas_fora = [leitura("HGG", agora - timedelta(minutes=30), 60), leitura("HUGO", agora - timedelta(minutes=20), 70)]
+    gravar(gravadas_fora)
+    durante = leitura("HGG", agora - timedelta(minutes=5), 65)
+
+    db = SessionLocal()
+    try:
+        motor.reconstruir(SessaoComIngestao(db, motor, durante), HistoricoOcupacao)
+    finally:
+        db.close()
+    hgg = motor.serie("HGG")
+    hugo = motor.serie("HUGO")
+    sucesso = hugo is not None and hgg is not None and \
+        [l.ocupacao_percentual for l in hgg[1]] == [60, 65] and motor._durante_reconstrucao is None
+    print_resultado("Leituras de fora e de durante a reconstrução", sucesso,
+                    f"HGG: {[l.ocupacao_percentual for l in hgg[1]] if hgg else None} | HUGO: {hugo is not None}")
+    return sucesso
+
+def teste_series_vazias_descartadas():
+    print_header("3. SÉRIES SEM LEITURAS NA JANELA")
+    motor = MotorTendencia(janela_horas=1)
+    agora = datetime.utcnow()
+    motor.registrar(leitura("HGG", agora - timedelta(minutes=10), 50))
+    motor.registrar(leitura("DESATIVADA", agora - timedelta(hours=3), 50))
+    antes = motor.status()["series"]
+    unidades = [ultima.unidade_id for ultima, _ in motor.series_por_unidade()]
+    depois = motor.status()["series"]
+    sucesso = antes == 2 and depois == 1 and unidades == ["HGG"] and motor.serie("DESATIVADA") is None
+    print_resultado("Série expirada removida", sucesso, f"Séries: {antes} -> {depois}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO MOTOR DE TENDÊNCIA - MS-INGESTAO")
+    print("="*60)
+
+    resultados = [
+        ("Incremental = histórico", teste_incremental_igual_historico()),
+        ("Reconstrução", teste_reconstrucao()),
+        ("Séries vazias descartadas", teste_series_vazias_descartadas()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Teste das regras do pipeline de hospitais guiadas pelo catálogo (backend/pipeline_hospitais_goias.py)
+Roda no próprio processo, sobre cópias editadas de catalogo_hospitais.json:
+- exclusões, bônus e fallback seguem a sigla e os critérios de exclusão, não o nome completo
+- remover um critério do catálogo libera o hospital sem alterar código
+"""
+
+import os
+import sys
+import copy
+import json
+import logging
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+logging.disable(logging.CRITICAL)
+
+from pipeline_hospitais_goias import PipelineHospitaisGoias, PipelineDecisaoRegulacao, IndiceElegibilidadeHospitais
+from catalogo_hospitais import CATALOGO_HOSPITAIS_PATH, SnapshotCatalogoHospitais
+
+with open(CATALOGO_HOSPITAIS_PATH, encoding="utf-8") as arquivo:
+    CATALOGO = json.load(arquivo)
+
+PERFIS = [(None, None), (40, "MASCULINO"), (30, "FEMININO"), (5, "MASCULINO")]
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def publicar(pipeline, dados):
+    pipeline._preparar_catalogo(SnapshotCatalogoHospitais(dados))()
+    return pipeline
+
+def catalogo_renomeado(*siglas):
+    """Cópia do catálogo com o nome completo das siglas trocado"""
+    dados = copy.deepcopy(CATALOGO)
+    for hospital in dados["hospitais"]:
+        if hospital["sigla"] in siglas:
+            hospital["nome"] = f"{hospital['nome']} (NOVO NOME)"
+    return dados
+
+def exclusoes(pipeline):
+    return {
+        (h.sigla, tipo_caso, idade, sexo): pipeline._aplicar_criterios_exclusao(h, tipo_caso, idade, sexo)
+        for h in pipeline.hospitais
+        for tipo_caso in IndiceElegibilidadeHospitais.TIPOS_CASO
+        for idade, sexo in PERFIS
+    }
+
+def teste_nome_completo_irrelevante():
+    print_header("1. REGRAS POR SIGLA E CRITÉRIOS")
+    original = PipelineHospitaisGoias()
+    renomeado = publicar(PipelineHospitaisGoias(), catalogo_renomeado("HUGO", "MATERNO_INFANTIL", "HDT", "HGG"))
+    rag = PipelineDecisaoRegulacao(renomeado)
+    hdt = next(h for h in renomeado.hospitais if h.sigla == "HDT")
+    excluidos = sorted({(s, t) for (s, t, _, _), excluir in exclusoes(renomeado).items() if excluir and t == "CLINICO_GERAL"})
+
+    sucesso = exclusoes(original) == exclusoes(renomeado) and \
+        renomeado._score_estatico(next(h for h in renomeado.hospitais if h.sigla == "HUGO"), "ORTOPEDIA_ELETIVA") < 0 and \
+        "infectologia" in rag._gerar_adequacao_casos(hdt) and \
+        renomeado.selecionar_hospital_inteligente("A90", "INFECTOLOGIA", "", 30, "MASCULINO")[0] == hdt.nome and \
+        renomeado.selecionar_hospital_inteligente("Z00", "", "")[0].endswith("(NOVO NOME)")
+    print_resultado("Mesmas exclusões com nomes trocados", sucesso, f"Excluídos de CLINICO_GERAL: {excluidos}")
+    return sucesso
+
+def teste_criterios_do_catalogo():
+    print_header("2. CRITÉRIOS EDITADOS NO CATÁLOGO")
+    dados = copy.deepcopy(CATALOGO)
+    del dados["pipelines"]["regulacao"]["criterios_exclusao"]["HDT"]
+    pipeline = publicar(PipelineHospitaisGoias(), dados)
+    hdt = next(h for h in pipeline.hospitais if h.sigla == "HDT")
+    hugo = next(h for h in pipeline.hospitais if h.sigla == "HUGO")
+    sucesso = not pipeline._aplicar_criterios_exclusao(hdt, "CLINICO_GERAL") and \
+        pipeline._aplicar_criterios_exclusao(hugo, "CLINICO_GERAL") and \
+        hdt.nome in [h.nome for h in pipeline._filtrar_hospitais_adequados(["INFECTOLOGIA"], "CLINICO_GERAL")]
+    print_resultado("HDT liberado sem critério NAO_INFECCIOSO", sucesso, f"Restrições HUGO: {sorted(hugo.restricoes)}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO PIPELINE DE HOSPITAIS - CATÁLOGO")
+    print("="*60)
+
+    resultados = [
+        ("Regras por sigla e critérios", teste_nome_completo_irrelevante()),
+        ("Critérios editados no catálogo", teste_criterios_do_catalogo()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
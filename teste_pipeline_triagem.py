@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Teste da triagem em etapas (backend/pipeline_triagem.py)
+Roda no próprio processo, com o pipeline de hospitais e o matchmaker reais e um
+extrator BioBERT fixo (o mesmo nas duas versões):
+- para entradas fixas a decisão é igual à do analisar_com_ia_inteligente
+  monolítico (referência abaixo): score, risco, hospital, logística,
+  justificativa, protocolo especial e metadados
+- metadata["etapas"] traz o tempo de cada etapa executada, coerente com
+  tempo_processamento (extrair e pontuar se sobrepõem)
+- com o pipeline de hospitais fora, o fallback é o HGG do catálogo
+"""
+
+import os
+import sys
+import time
+import logging
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "microservices", "shared"))
+logging.disable(logging.CRITICAL)
+
+from pipeline_triagem import PipelineTriagem, ETAPAS, hospital_fallback
+from pipeline_hospitais_goias import selecionar_hospital_goias
+from matchmaker_logistico import processar_matchmaking
+from catalogo_hospitais import catalogo_hospitais
+
+ENTRADAS = [
+    {"protocolo": "ETAPAS-1", "especialidade": "Cardiologia", "cid": "I21.0", "cid_desc": "Infarto agudo",
+     "prontuario_texto": "Paciente com dor no peito e falta de ar, taquicardia", "historico_paciente": "Hipertenso",
+     "prioridade_descricao": "Urgente", "cidade_origem": "ANAPOLIS"},
+    {"protocolo": "ETAPAS-2", "especialidade": "Clínica Médica", "cid": "J18.9",
+     "prontuario_texto": "Tosse produtiva e febre", "prioridade_descricao": "Normal"},
+    {"protocolo": "ETAPAS-3", "especialidade": "Ortopedia", "cid": "M54.5",
+     "prontuario_texto": "Dor lombar crônica", "prioridade_descricao": "Eletiva"},
+    {"protocolo": "ETAPAS-4", "especialidade": "Neurocirurgia", "cid": "S06.0",
+     "prontuario_texto": "Vítima de acidente de moto com rebaixamento " * 4, "prioridade_descricao": "Emergência",
+     "cidade_origem": "GOIANIA"},
+    {"protocolo": "ETAPAS-5", "especialidade": "", "cid": "Z00", "prontuario_texto": ""},
+]
+
+
+def extrair_fixo(texto: str) -> dict:
+    """BioBERT determinístico: 'sucesso' para textos longos, 'texto_insuficiente' para curtos"""
+    if len(texto) < 20:
+        return {"status": "texto_insuficiente", "analise": "Texto insuficiente", "entidades": []}
+    return {"status": "sucesso", "analise": f"Entidades extraídas de: {texto}", "nivel_confianca": "alta",
+            "entidades": [{"texto": texto.split()[0]}]}
+
+
+def selecionar_indisponivel(**kwargs):
+    raise RuntimeError("pipeline de hospitais fora")
+
+
+def analisar_referencia(paciente_data: dict, selecionar_hospital, extrair_biobert, processar_matchmaking) -> dict:
+    """analisar_com_ia_inteligente antes da divisão em etapas (dependências injetadas)"""
+    start_time = time.time()
+    BIOBERT_DISPONIVEL = extrair_biobert is not None
+    MATCHMAKER_DISPONIVEL = processar_matchmaking is not None
+
+    protocolo = paciente_data.get('protocolo', 'N/A')
+    especialidade = paciente_data.get('especialidade', '').upper()
+    cid = paciente_data.get('cid', '')
+    cid_desc = paciente_data.get('cid_desc', '')
+    prontuario = paciente_data.get('prontuario_texto', '')
+    historico = paciente_data.get('historico_paciente', '')
+    prioridade_desc = paciente_data.get('prioridade_descricao', 'Normal')
+
+    resultado_biobert = None
+    biobert_usado = False
+    if BIOBERT_DISPONIVEL and prontuario:
+        try:
+            biobert_analise = extrair_biobert(prontuario)
+            if biobert_analise.get("status") in ["sucesso", "texto_insuficiente"]:
+                resultado_biobert = biobert_analise.get("analise", "Análise BioBERT realizada")
+                biobert_usado = True
+            else:
+                resultado_biobert = biobert_analise.get("analise", "Análise BioBERT com erro")
+                biobert_usado = False
+        except Exception:
+            resultado_biobert = "Análise BioBERT indisponível"
+            biobert_usado = False
+
+    score_prioridade = 5
+    classificacao_risco = "AMARELO"
+    justificativa_partes = []
+
+    justificativa_partes.append(f"DADOS INSERIDOS - Protocolo: {protocolo}")
+    if especialidade:
+        justificativa_partes.append(f"Especialidade: {especialidade}")
+    if cid:
+        justificativa_partes.append(f"CID: {cid} ({cid_desc})" if cid_desc else f"CID: {cid}")
+    if prontuario:
+        justificativa_partes.append(f"Quadro clínico: {prontuario[:100]}{'...' if len(prontuario) > 100 else ''}")
+    if historico:
+        justificativa_partes.append(f"Histórico: {historico[:80]}{'...' if len(historico) > 80 else ''}")
+    if resultado_biobert:
+        justificativa_partes.append(f"BIOBERT: {resultado_biobert[:100]}{'...' if len(resultado_biobert) > 100 else ''}")
+
+    cids_criticos = {
+        'I21': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Infarto Agudo do Miocárdio'},
+        'I46': {'score': 10, 'risco': 'VERMELHO', 'desc': 'Parada Cardíaca'},
+        'G93.1': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Lesão Cerebral Anóxica'},
+        'R57': {'score': 9, 'risco': 'VERMELHO', 'desc': 'Choque'},
+        'J44.1': {'score': 8, 'risco': 'VERMELHO', 'desc': 'DPOC com Exacerbação'},
+        'N17': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Insuficiência Renal Aguda'},
+        'K92.2': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Hemorragia Gastrointestinal'},
+        'S06': {'score': 8, 'risco': 'VERMELHO', 'desc': 'Traumatismo Craniano'},
+        'I63': {'score': 8, 'risco': 'VERMELHO', 'desc': 'AVC Isquêmico'},
+        'I61': {'score': 9, 'risco': 'VERMELHO', 'desc': 'AVC Hemorrágico'},
+        'J18': {'score': 7, 'risco': 'AMARELO', 'desc': 'Pneumonia'},
+        'E11': {'score': 6, 'risco': 'AMARELO', 'desc': 'Diabetes Mellitus'},
+        'I10': {'score': 5, 'risco': 'AMARELO', 'desc': 'Hipertensão Arterial'},
+        'M79': {'score': 4, 'risco': 'VERDE', 'desc': 'Dor Musculoesquelética'},
+        'M54': {'score': 3, 'risco': 'VERDE', 'desc': 'Dor Lombar'}
+    }
+    cid_encontrado = None
+    for cid_code, info in cids_criticos.items():
+        if cid.startswith(cid_code):
+            cid_encontrado = info
+            score_prioridade = info['score']
+            classificacao_risco = info['risco']
+            justificativa_partes.append(f"ANÁLISE CID: {cid} ({info['desc']}) = RISCO {info['risco']} (Score: {info['score']}/10)")
+            break
+    if not cid_encontrado and cid:
+        justificativa_partes.append(f"ANÁLISE CID: {cid} não está na base crítica, mantendo score padrão")
+
+    sintomas_criticos = {
+        'dor no peito': {'score': +3, 'desc': 'dor torácica'},
+        'falta de ar': {'score': +2, 'desc': 'dispneia'},
+        'inconsciência': {'score': +4, 'desc': 'alteração do nível de consciência'},
+        'convulsão': {'score': +3, 'desc': 'atividade convulsiva'},
+        'hemorragia': {'score': +3, 'desc': 'sangramento ativo'},
+        'vômito': {'score': +1, 'desc': 'êmese'},
+        'febre alta': {'score': +2, 'desc': 'hipertermia'},
+        'pressão baixa': {'score': +2, 'desc': 'hipotensão'},
+        'taquicardia': {'score': +2, 'desc': 'frequência cardíaca elevada'},
+        'cianose': {'score': +3, 'desc': 'cianose'},
+        'rebaixamento': {'score': +3, 'desc': 'rebaixamento do nível de consciência'},
+        'trauma': {'score': +4, 'desc': 'traumatismo'},
+        'acidente': {'score': +4, 'desc': 'trauma por acidente'}
+    }
+    prontuario_lower = prontuario.lower()
+    sintomas_encontrados = []
+    score_sintomas = 0
+    for sintoma, info in sintomas_criticos.items():
+        if sintoma in prontuario_lower:
+            score_prioridade += info['score']
+            score_sintomas += info['score']
+            sintomas_encontrados.append(info['desc'])
+    if sintomas_encontrados:
+        justificativa_partes.append(f"SINTOMAS DETECTADOS: {', '.join(sintomas_encontrados)} (+{score_sintomas} pontos)")
+    else:
+        justificativa_partes.append("SINTOMAS: Nenhum sintoma crítico detectado no texto")
+
+    if 'urgente' in prioridade_desc.lower() or 'emergência' in prioridade_desc.lower():
+        score_prioridade += 2
+        justificativa_partes.append(f"PRIORIDADE: '{prioridade_desc}' = +2 pontos por urgência")
+    else:
+        justificativa_partes.append(f"PRIORIDADE: '{prioridade_desc}' = sem ajuste adicional")
+
+    if score_prioridade >= 8:
+        classificacao_risco = "VERMELHO"
+    elif score_prioridade >= 6:
+        classificacao_risco = "AMARELO"
+    else:
+        classificacao_risco = "VERDE"
+    score_prioridade = min(10, max(1, score_prioridade))
+
+    try:
+        unidade_destino, motivo_escolha = selecionar_hospital(
+            cid=cid, especialidade=especialidade, sintomas=prontuario, gravidade=classificacao_risco
+        )
+        justificativa_partes.append(f"HOSPITAL SELECIONADO PELO PIPELINE: {unidade_destino}")
+        justificativa_partes.append(f"JUSTIFICATIVA TÉCNICA: {motivo_escolha}")
+    except Exception:
+        unidade_destino = "HOSPITAL ESTADUAL DR ALBERTO RASSI HGG"
+        justificativa_partes.append(f"HOSPITAL FALLBACK: {unidade_destino} - Pipeline indisponível")
+
+    tipo_transporte = "USB"
+    acionar_ambulancia = True
+    previsao_vaga = "2-4 horas"
+    if classificacao_risco == "VERMELHO":
+        tipo_transporte = "USA"
+        previsao_vaga = "Imediato"
+        justificativa_partes.append("TRANSPORTE: USA (Suporte Avançado) devido ao alto risco")
+    elif classificacao_risco == "AMARELO":
+        tipo_transporte = "USB"
+        previsao_vaga = "1-2 horas"
+        justificativa_partes.append("TRANSPORTE: USB (Suporte Básico) adequado para o risco")
+    else:
+        previsao_vaga = "4-8 horas"
+        if score_prioridade <= 3:
+            acionar_ambulancia = False
+            justificativa_partes.append("TRANSPORTE: Próprio pode ser considerado (baixo risco)")
+        else:
+            justificativa_partes.append("TRANSPORTE: USB (Suporte Básico) para baixo risco")
+
+    justificativa_final = " | ".join(justificativa_partes) + f" | SCORE FINAL: {score_prioridade}/10 = RISCO {classificacao_risco}"
+    decisao_base = {
+        "analise_decisoria": {
+            "score_prioridade": score_prioridade,
+            "classificacao_risco": classificacao_risco,
+            "unidade_destino_sugerida": unidade_destino,
+            "justificativa_clinica": justificativa_final
+        },
+        "logistica": {
+            "acionar_ambulancia": acionar_ambulancia,
+            "tipo_transporte": tipo_transporte,
+            "previsao_vaga_h": previsao_vaga
+        },
+        "protocolo_especial": {
+            "tipo": "NORMAL",
+            "instrucoes_imediatas": "Monitorização de sinais vitais durante transporte"
+        }
+    }
+
+    matchmaker_usado = False
+    if MATCHMAKER_DISPONIVEL:
+        try:
+            resultado_matchmaker = processar_matchmaking(paciente_data, decisao_base)
+            decisao_base["matchmaking_logistico"] = resultado_matchmaker["matchmaking_logistico"]
+            decisao_base["ambulancia_sugerida"] = resultado_matchmaker["ambulancia_sugerida"]
+            decisao_base["rota_otimizada"] = resultado_matchmaker["rota_otimizada"]
+            decisao_base["protocolo_especial"] = resultado_matchmaker["protocolo_especial"]
+            matchmaker_usado = True
+        except Exception:
+            pass
+
+    decisao_base["metadata"] = {
+        "ia_engine": "IA Inteligente v4.0 - BIOBERT + MATCHMAKER + PIPELINE HOSPITAIS GOIÁS",
+        "tempo_processamento": time.time() - start_time,
+        "biobert_usado": biobert_usado,
+        "biobert_disponivel": BIOBERT_DISPONIVEL,
+        "matchmaker_usado": matchmaker_usado,
+        "matchmaker_disponivel": MATCHMAKER_DISPONIVEL,
+        "dados_analisados": {
+            "protocolo": protocolo,
+            "especialidade": especialidade,
+            "cid": cid,
+            "sintomas_detectados": len(sintomas_encontrados),
+            "hospital_justificado": True,
+            "pipeline_hospitais": True,
+            "pipeline_ativo": True,
+            "sistema": "unificado"
+        }
+    }
+    return decisao_base
+
+
+def comparavel(decisao: dict) -> dict:
+    """Decisão sem o que depende do relógio (tempos e carimbo do matchmaker)"""
+    decisao = {chave: dict(valor) if isinstance(valor, dict) else valor for chave, valor in decisao.items()}
+    decisao["metadata"].pop("tempo_processamento")
+    decisao["metadata"].pop("etapas", None)
+    if "matchmaking_logistico" in decisao:
+        decisao["matchmaking_logistico"].pop("processado_em", None)
+    return decisao
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def comparar(selecionar, extrair, matchmaking):
+    """(divergentes, decisões do pipeline) para ENTRADAS"""
+    pipeline = PipelineTriagem(selecionar_hospital=selecionar, extrair_biobert=extrair,
+                               processar_matchmaking=matchmaking)
+    try:
+        divergentes, decisoes = [], []
+        for entrada in ENTRADAS:
+            referencia = analisar_referencia(dict(entrada), selecionar, extrair, matchmaking)
+            decisao = pipeline.analisar(dict(entrada))
+            decisoes.append(decisao)
+            if comparavel(decisao) != comparavel(referencia):
+                divergentes.append(entrada["protocolo"])
+        return divergentes, decisoes
+    finally:
+        pipeline.encerrar()
+
+def teste_decisao_igual_a_referencia():
+    print_header("1. DECISÃO IGUAL À DA TRIAGEM MONOLÍTICA")
+    divergentes, decisoes = comparar(selecionar_hospital_goias, extrair_fixo, processar_matchmaking)
+    sem_deps, _ = comparar(selecionar_hospital_goias, None, None)
+    sucesso = not divergentes and not sem_deps and len(decisoes) == len(ENTRADAS)
+    print_resultado("Mesma decisão para as entradas fixas (com e sem BioBERT/matchmaker)", sucesso,
+                    f"Divergentes: {divergentes + sem_deps or 'nenhuma'} | "
+                    f"Riscos: {[d['analise_decisoria']['classificacao_risco'] for d in decisoes]}")
+    return sucesso
+
+def teste_tempos_das_etapas():
+    print_header("2. TEMPOS EM metadata['etapas']")
+    _, decisoes = comparar(selecionar_hospital_goias, extrair_fixo, processar_matchmaking)
+    coerentes = []
+    for entrada, decisao in zip(ENTRADAS, decisoes):
+        metadata = decisao["metadata"]
+        etapas = metadata["etapas"]
+        # extrair só roda com prontuário e BioBERT disponível
+        esperadas = [e for e in ETAPAS if e != "extrair" or entrada.get("prontuario_texto")]
+        tempos = {nome: etapas[nome]["tempo_ms"] for nome in esperadas if nome in etapas}
+        # extrair e pontuar se sobrepõem; as demais etapas são sequenciais
+        caminho_ms = max(tempos.get("extrair", 0), tempos.get("pontuar", 0)) + \
+            sum(tempos.get(nome, 0) for nome in ("selecionar", "logistica", "explicar"))
+        coerentes.append(
+            sorted(etapas) == sorted(esperadas) and all(t >= 0 for t in tempos.values()) and
+            all(isinstance(etapas[nome]["cache_hit"], bool) for nome in esperadas) and
+            caminho_ms <= metadata["tempo_processamento"] * 1000 + 1
+        )
+    sucesso = all(coerentes)
+    primeira = decisoes[0]["metadata"]
+    print_resultado("Uma entrada por etapa executada, dentro de tempo_processamento", sucesso,
+                    f"{ {nome: dados['tempo_ms'] for nome, dados in primeira['etapas'].items()} } | "
+                    f"total {primeira['tempo_processamento'] * 1000:.3f} ms")
+    return sucesso
+
+def teste_fallback_do_catalogo():
+    print_header("3. FALLBACK DE HOSPITAL PELO CATÁLOGO")
+    divergentes, decisoes = comparar(selecionar_indisponivel, extrair_fixo, processar_matchmaking)
+    hgg = catalogo_hospitais.obter().buscar("HGG")
+    sucesso = not divergentes and hospital_fallback() == hgg.nome and \
+        all(d["analise_decisoria"]["unidade_destino_sugerida"] == hgg.nome for d in decisoes)
+    print_resultado("HGG do catálogo, igual ao nome fixo da versão monolítica", sucesso,
+                    f"Fallback: {hospital_fallback()} | Divergentes: {divergentes or 'nenhuma'}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DA TRIAGEM EM ETAPAS")
+    print("="*60)
+
+    resultados = [
+        ("Decisão igual à referência", teste_decisao_igual_a_referencia()),
+        ("Tempos das etapas", teste_tempos_das_etapas()),
+        ("Fallback pelo catálogo", teste_fallback_do_catalogo()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
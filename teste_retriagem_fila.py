@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Teste da re-triagem em lote da fila (POST /admin/retriagem-fila e backend/triagem_lote.py)
+Roda no próprio processo sobre um SQLite temporário:
+- em dry_run as diferenças são retornadas e nada é gravado
+- fora dele score, classificação e justificativa_tecnica são regravados; linhas
+  sem mudança mantêm a justificativa original
+- a re-triagem roda no executor de banco com sessão própria (não usa a da requisição)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+DIRETORIO = tempfile.mkdtemp(prefix="teste_retriagem_fila_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'regulacao.db')}"
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+from shared.database import SessionLocal, PacienteRegulacao, create_tables
+import main_unified
+from triagem_lote import analisar_lote
+
+create_tables()
+cliente = TestClient(main_unified.app)
+
+JUSTIFICATIVA_ANTIGA = "DADOS INSERIDOS - Protocolo: {} | SCORE FINAL: {}/10 = RISCO {}"
+PACIENTES = [
+    # (protocolo, cid, prontuário, prioridade, score gravado, classificação gravada)
+    ("RETRI-1", "I21.0", "Dor torácica intensa com sudorese", "Urgente", 3, "VERDE"),
+    ("RETRI-2", "M54.5", "Dor lombar crônica", "Normal", 9, "VERMELHO"),
+    ("RETRI-3", "J18.9", "Tosse e febre", "Normal", None, None),
+]
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def token(email, tipo_usuario):
+    """Usuário no banco e token como o emitido por /login"""
+    db = SessionLocal()
+    db.add(main_unified.Usuario(email=email, nome=email, tipo_usuario=tipo_usuario, senha_hash="-"))
+    db.commit()
+    db.close()
+    return {"Authorization": f"Bearer {main_unified.create_access_token(data={'sub': email})}"}
+
+def popular_fila():
+    """Pacientes com scores de uma tabela antiga; o último já está atualizado"""
+    esperado = analisar_lote([{"cid": cid, "prontuario_texto": texto, "prioridade_descricao": prioridade}
+                              for _, cid, texto, prioridade, _, _ in PACIENTES])
+    db = SessionLocal()
+    for i, (protocolo, cid, texto, prioridade, score, classificacao) in enumerate(PACIENTES):
+        if score is None:
+            score, classificacao = int(esperado["score_prioridade"][i]), str(esperado["classificacao_risco"][i])
+        db.add(PacienteRegulacao(
+            protocolo=protocolo, status="AGUARDANDO_REGULACAO", especialidade="Clínica Médica", cid=cid,
+            prontuario_texto=texto, prioridade_descricao=prioridade, score_prioridade=score,
+            classificacao_risco=classificacao, data_solicitacao=datetime(2026, 10, 17, 8),
+            justificativa_tecnica=JUSTIFICATIVA_ANTIGA.format(protocolo, score, classificacao)
+        ))
+    db.commit()
+    db.close()
+    return esperado
+
+def linhas():
+    db = SessionLocal()
+    resultado = {p.protocolo: (p.score_prioridade, p.classificacao_risco, p.justificativa_tecnica)
+                 for p in db.query(PacienteRegulacao).order_by(PacienteRegulacao.id)}
+    db.close()
+    return resultado
+
+ESPERADO = popular_fila()
+CABECALHO = token("admin.retriagem@teste.gov.br", "ADMIN")
+
+def teste_dry_run():
+    print_header("1. DRY RUN NÃO GRAVA")
+    antes = linhas()
+    resposta = cliente.post("/admin/retriagem-fila", json={"dry_run": True}, headers=CABECALHO)
+    dados = resposta.json()
+    sucesso = resposta.status_code == 200 and dados["total_analisados"] == 3 and dados["total_alterados"] == 2 and \
+        [d["protocolo"] for d in dados["diferencas"]] == ["RETRI-1", "RETRI-2"] and linhas() == antes
+    print_resultado("Diferenças retornadas, banco intacto", sucesso,
+                    f"Status: {resposta.status_code} | Transições: {dados.get('transicoes')}")
+    return sucesso
+
+def teste_justificativa_regravada():
+    print_header("2. SCORE E JUSTIFICATIVA REGRAVADOS")
+    banco = main_unified.executor_db.metricas()["concluidas"]
+    resposta = cliente.post("/admin/retriagem-fila", json={"dry_run": False}, headers=CABECALHO)
+    depois = linhas()
+    regravados = all(
+        depois[protocolo][:2] == (int(ESPERADO["score_prioridade"][i]), str(ESPERADO["classificacao_risco"][i])) and
+        depois[protocolo][2].startswith("RE-TRIAGEM EM LOTE") and
+        depois[protocolo][2].endswith(f"SCORE FINAL: {depois[protocolo][0]}/10 = RISCO {depois[protocolo][1]}") and
+        f"Anterior: {PACIENTES[i][4]}/10 = RISCO {PACIENTES[i][5]}" in depois[protocolo][2]
+        for i, protocolo in enumerate(("RETRI-1", "RETRI-2"))
+    )
+    sem_mudanca = depois["RETRI-3"][2] == JUSTIFICATIVA_ANTIGA.format("RETRI-3", *depois["RETRI-3"][:2])
+    # Re-triagem + reconstrução do índice da fila, ambas no executor de banco
+    no_executor_db = main_unified.executor_db.metricas()["concluidas"] == banco + 2
+    sucesso = resposta.status_code == 200 and resposta.json()["total_alterados"] == 2 and \
+        regravados and sem_mudanca and no_executor_db
+    print_resultado("Linhas alteradas com a justificativa da re-triagem", sucesso,
+                    f"RETRI-1: {depois['RETRI-1'][2]}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DA RE-TRIAGEM DA FILA")
+    print("="*60)
+
+    resultados = [
+        ("Dry run", teste_dry_run()),
+        ("Justificativa regravada", teste_justificativa_regravada()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste do snapshot de ocupação consumido pelo seletor de hospitais (backend/microservices/shared/snapshot_ocupacao.py)
+Roda no próprio processo, sem o MS-Ingestao:
+- linhas do mesmo hospital (tipos de leito, sigla ou nome) viram uma entrada pelo pior caso
+- o resultado e a versão não dependem da ordem do payload
+- payload vazio não apaga o último snapshot; payload igual não republica
+- snapshot sem resposta válida há mais de OCUPACAO_IDADE_MAXIMA_S sai do score
+"""
+
+import os
+import sys
+from datetime import timedelta
+
+SHARED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend", "microservices", "shared")
+sys.path.insert(0, SHARED_DIR)
+
+from catalogo_hospitais import catalogo_hospitais
+from snapshot_ocupacao import SnapshotOcupacao, PainelOcupacao, painel_ocupacao, termo_capacidade
+
+HUGO = catalogo_hospitais.obter().buscar("HUGO")
+
+PAYLOAD = [
+    {"hospital": HUGO.nome, "sigla": "HUGO", "tipo_leito": "UTI", "taxa_ocupacao": 95.0, "leitos_disponiveis": 1,
+     "tendencia": "ALTA", "alerta_saturacao": True, "previsao_saturacao_min": 40},
+    {"hospital": HUGO.nome, "sigla": "HUGO", "tipo_leito": "ENFERMARIA", "taxa_ocupacao": 50.0, "leitos_disponiveis": 20,
+     "tendencia": "QUEDA", "alerta_saturacao": False, "previsao_saturacao_min": None},
+    {"hospital": "Pronto Socorro HUGO", "sigla": "HUGO", "tipo_leito": "EMERGENCIA", "taxa_ocupacao": 70.0,
+     "leitos_disponiveis": 4, "tendencia": "ESTAVEL", "previsao_saturacao_min": 90},
+    {"hospital": "HOSPITAL FORA DO CATALOGO", "sigla": "HFC", "taxa_ocupacao": 30.0, "leitos_disponiveis": 7,
+     "tendencia": "QUEDA"},
+]
+
+
+def print_header(titulo):
+    print(f"\n{'='*60}")
+    print(f"  {titulo}")
+    print(f"{'='*60}")
+
+def print_resultado(nome, sucesso, detalhes=""):
+    status = "✅ PASSOU" if sucesso else "❌ FALHOU"
+    print(f"{status} - {nome}")
+    if detalhes:
+        print(f"   {detalhes}")
+
+def teste_agregacao_pior_caso():
+    print_header("1. UMA ENTRADA POR HOSPITAL (PIOR CASO)")
+    snapshot = SnapshotOcupacao(PAYLOAD)
+    hugo = snapshot.buscar(HUGO.nome)
+    chaves = [HUGO.sigla, "pronto socorro hugo", *HUGO.aliases]
+    sucesso = len(snapshot) == 2 and hugo is not None and \
+        all(snapshot.buscar(chave) is hugo for chave in chaves) and \
+        (hugo.taxa_ocupacao, hugo.leitos_disponiveis, hugo.tendencia, hugo.alerta_saturacao, hugo.previsao_saturacao_min) == \
+        (95.0, 25, "ALTA", True, 40) and \
+        snapshot.buscar("HFC").tendencia == "QUEDA"
+    print_resultado("Tipos de leito agregados", sucesso,
+                    f"HUGO: {hugo.taxa_ocupacao}% | {hugo.leitos_disponiveis} leitos | {hugo.tendencia} | termo {termo_capacidade(hugo)}")
+    return sucesso
+
+def teste_ordem_do_payload():
+    print_header("2. INDEPENDENTE DA ORDEM DO PAYLOAD")
+    direto = SnapshotOcupacao(PAYLOAD)
+    invertido = SnapshotOcupacao(list(reversed(PAYLOAD)))
+    sucesso = direto.versao == invertido.versao and \
+        direto.buscar("HUGO") == invertido.buscar("HUGO") and direto.buscar("HFC") == invertido.buscar("HFC")
+    print_resultado("Mesma versão e mesmas entradas", sucesso, f"v{direto.versao}")
+    return sucesso
+
+def teste_painel():
+    print_header("3. PAINEL: FALHAS E REPUBLICAÇÃO")
+    painel = PainelOcupacao()
+    recebidos = []
+    painel.assinar(recebidos.append)
+    primeiro = painel.publicar(PAYLOAD)
+    painel.publicar(list(reversed(PAYLOAD)))
+    painel.publicar([])
+    sucesso = painel.atual() is primeiro and len(recebidos) == 1 and painel.publicacoes == 1 and \
+        painel.falhas == 1 and termo_capacidade(None) == 0
+    print_resultado("Último snapshot válido mantido", sucesso,
+                    f"Publicações: {painel.publicacoes} | Falhas: {painel.falhas}")
+    return sucesso
+
+def teste_idade_maxima():
+    print_header("4. SNAPSHOT EXPIRADO SAI DO SCORE")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    from pipeline_hospitais_goias import PipelineHospitaisGoias
+
+    pipeline = PipelineHospitaisGoias()
+    publicado = painel_ocupacao.publicar(PAYLOAD)
+    antes = (painel_ocupacao.vigente(), pipeline.ocupacao, pipeline.versao_ocupacao)
+    # Sem resposta válida além do limite (falhas não renovam a idade)
+    painel_ocupacao.ultimo_sucesso -= timedelta(seconds=painel_ocupacao.idade_maxima_s + 1)
+    painel_ocupacao.registrar_falha("MS-Ingestao indisponível ou sem dados")
+    expirado = (painel_ocupacao.vigente(), pipeline.ocupacao, pipeline.versao_ocupacao, painel_ocupacao.status()["expirado"])
+    painel_ocupacao.publicar(PAYLOAD)
+    renovado = pipeline.ocupacao
+    sucesso = antes == (publicado, publicado, publicado.versao) and \
+        expirado == (None, None, None, True) and painel_ocupacao.atual() is publicado and renovado is publicado
+    print_resultado("Termo de capacidade zerado até a próxima resposta", sucesso,
+                    f"Idade máxima: {painel_ocupacao.idade_maxima_s:g}s | Expirado: {expirado[3]} | "
+                    f"Vigente após nova resposta: {renovado is publicado}")
+    return sucesso
+
+def main():
+    print("\n" + "="*60)
+    print("  TESTE DO SNAPSHOT DE OCUPAÇÃO")
+    print("="*60)
+
+    resultados = [
+        ("Agregação pelo pior caso", teste_agregacao_pior_caso()),
+        ("Ordem do payload", teste_ordem_do_payload()),
+        ("Painel de ocupação", teste_painel()),
+        ("Idade máxima do snapshot", teste_idade_maxima()),
+    ]
+
+    print_header("RESUMO DOS TESTES")
+    passou = sum(1 for _, r in resultados if r)
+    for nome, resultado in resultados:
+        print(f"  {'✅' if resultado else '❌'} {nome}")
+    print(f"\n  RESULTADO: {passou}/{len(resultados)} testes passaram")
+    return passou == len(resultados)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)